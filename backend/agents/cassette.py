@@ -0,0 +1,237 @@
+from typing import Any, Callable, Dict, List, Optional
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+import logging
+from urllib.parse import urlparse
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Grava todas as chamadas HTTP de saída de cada orquestração (OpenAI e probes de website) por agent_task_id
+RECORD_CASSETTES = os.getenv("ORCHESTRATION_RECORD_CASSETTES", "false").lower() == "true"
+
+# Corpo máximo guardado para respostas que não são da API (HTML dos websites; o pipeline só usa o status)
+MAX_PROBE_BODY_BYTES = int(os.getenv("CASSETTE_MAX_PROBE_BODY_BYTES", "65536"))
+
+CASSETTE_VERSION = 1
+CASSETTE_ENCODING = "json+zlib"
+
+# IDs de busca baseados em timestamp (ex: prompt do discovery) não entram na chave de replay
+_VOLATILE = re.compile(r"\b1[6-9]\d{8}\b")
+
+
+class CassetteMiss(requests.exceptions.RequestException):
+    """Requisição sem gravação correspondente no replay (nenhuma chamada real é feita; não há retry)"""
+
+
+def _schema_name(body: Any) -> Optional[str]:
+    if not isinstance(body, dict):
+        return None
+    if body.get("response_format"):
+        return body["response_format"].get("json_schema", {}).get("name")
+    return ((body.get("text") or {}).get("format") or {}).get("name")
+
+
+def _target(method: str, url: str) -> str:
+    # Chamadas à API valem pelo caminho (o replay pode usar outro OPENAI_BASE_URL); probes pela URL inteira
+    return urlparse(url).path if method == "POST" else url
+
+
+def request_key(method: str, url: str, body: Any = None) -> str:
+    """Chave exata da requisição (método, destino e corpo canônico, sem timestamps voláteis)"""
+    text = json.dumps(body, sort_keys=True, ensure_ascii=False, default=str) if body is not None else ""
+    return hashlib.sha256(f"{method} {_target(method, url)} {_VOLATILE.sub('<ts>', text)}".encode("utf-8")).hexdigest()
+
+
+def loose_key(method: str, url: str, body: Any = None) -> str:
+    """Chave tolerante: mesmo endpoint e mesmo schema de resposta (usada quando o prompt mudou)"""
+    return f"{method} {_target(method, url)} {_schema_name(body) or ''}"
+
+
+class Cassette:
+    """Trocas HTTP de uma execução, gravadas (mode="record") ou reproduzidas sem rede (mode="replay")
+
+    No replay cada gravação é usada uma única vez: primeiro pela chave exata, depois (fora do
+    modo strict) pela chave tolerante, na ordem em que foram gravadas.
+    """
+
+    def __init__(self, agent_task_id: Optional[int] = None, run: Dict[str, Any] = None,
+                 interactions: List[Dict[str, Any]] = None, mode: str = "record",
+                 pace: bool = False, strict: bool = False, recorded_at: str = None,
+                 result: Dict[str, Any] = None):
+        self.agent_task_id = agent_task_id
+        self.run = run or {}
+        self.interactions = interactions or []
+        self.mode = mode
+        self.pace = pace
+        self.strict = strict
+        self.recorded_at = recorded_at or datetime.now().isoformat()
+        self.result = result
+        self.misses = 0
+        self.loose_matches = 0
+        self._lock = threading.Lock()
+        self._used = set()
+        self._exact: Dict[str, deque] = defaultdict(deque)
+        self._loose: Dict[str, deque] = defaultdict(deque)
+        for index, interaction in enumerate(self.interactions):
+            self._exact[interaction["key"]].append(index)
+            self._loose[interaction["loose_key"]].append(index)
+
+    # -------------------------------------------------------------------------
+    # Serialização
+    # -------------------------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        raw = json.dumps({
+            "version": CASSETTE_VERSION,
+            "agent_task_id": self.agent_task_id,
+            "recorded_at": self.recorded_at,
+            "run": self.run,
+            "result": self.result,
+            "interactions": self.interactions
+        }, ensure_ascii=False, default=str).encode("utf-8")
+        return zlib.compress(raw, 6)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes, mode: str = "replay", pace: bool = False, strict: bool = False) -> "Cassette":
+        data = json.loads(zlib.decompress(payload).decode("utf-8"))
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Versão de cassette não suportada: {data.get('version')}")
+        return cls(agent_task_id=data.get("agent_task_id"), run=data.get("run"), interactions=data.get("interactions"),
+                   mode=mode, pace=pace, strict=strict, recorded_at=data.get("recorded_at"), result=data.get("result"))
+
+    # -------------------------------------------------------------------------
+    # Gravação / replay
+    # -------------------------------------------------------------------------
+
+    def perform(self, method: str, url: str, send: Callable[[], requests.Response], body: Any = None) -> requests.Response:
+        if self.mode == "replay":
+            return self._replay(method, url, body)
+
+        interaction = {
+            "method": method,
+            "url": url,
+            "key": request_key(method, url, body),
+            "loose_key": loose_key(method, url, body),
+            "request": body
+        }
+        started = time.monotonic()
+        try:
+            response = send()
+        except requests.RequestException as e:
+            interaction.update(error=type(e).__name__, message=str(e), elapsed=time.monotonic() - started)
+            self._append(interaction)
+            raise
+
+        text = response.text
+        if body is None and len(text) > MAX_PROBE_BODY_BYTES:
+            text = text[:MAX_PROBE_BODY_BYTES]
+        interaction.update(status=response.status_code, headers=dict(response.headers), body=text,
+                           final_url=response.url, elapsed=time.monotonic() - started)
+        self._append(interaction)
+        return response
+
+    def _append(self, interaction: Dict[str, Any]):
+        with self._lock:
+            interaction["seq"] = len(self.interactions)
+            self.interactions.append(interaction)
+
+    def _take(self, queue: deque) -> Optional[int]:
+        while queue:
+            index = queue.popleft()
+            if index not in self._used:
+                self._used.add(index)
+                return index
+        return None
+
+    def _replay(self, method: str, url: str, body: Any) -> requests.Response:
+        with self._lock:
+            index = self._take(self._exact[request_key(method, url, body)])
+            if index is None and not self.strict:
+                index = self._take(self._loose[loose_key(method, url, body)])
+                if index is not None:
+                    self.loose_matches += 1
+                    logger.warning("Replay: %s %s sem gravação exata; usando a gravação #%d do mesmo tipo",
+                                   method, url, index)
+            if index is None:
+                self.misses += 1
+
+        if index is None:
+            raise CassetteMiss(f"Replay: nenhuma gravação para {method} {url}")
+
+        interaction = self.interactions[index]
+        if self.pace:
+            time.sleep(interaction.get("elapsed", 0))
+
+        if interaction.get("error"):
+            error_class = getattr(requests.exceptions, interaction["error"], requests.exceptions.ConnectionError)
+            raise error_class(interaction.get("message", ""))
+
+        response = requests.Response()
+        response.status_code = interaction["status"]
+        response.headers = CaseInsensitiveDict(interaction.get("headers") or {})
+        response._content = (interaction.get("body") or "").encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = interaction.get("final_url") or url
+        response.elapsed = timedelta(seconds=interaction.get("elapsed", 0))
+        return response
+
+
+_active: ContextVar[Optional[Cassette]] = ContextVar("orchestration_cassette", default=None)
+
+
+@contextmanager
+def use_cassette(cassette: Optional[Cassette]):
+    """Ativa o cassette no contexto atual durante o bloco
+
+    Só as chamadas feitas neste contexto (e nas threads iniciadas com `tracing.propagate`) passam
+    pelo cassette; jobs, probes e outras tasks rodando em paralelo não entram na gravação.
+    """
+    if cassette is None:
+        yield None
+        return
+    token = _active.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _active.reset(token)
+
+
+def post(session: requests.Session, url: str, **kwargs) -> requests.Response:
+    """session.post passando pelo cassette ativo (se houver)"""
+    cassette = _active.get()
+    if cassette is None:
+        return session.post(url, **kwargs)
+    return cassette.perform("POST", url, lambda: session.post(url, **kwargs), body=kwargs.get("json"))
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """requests.get passando pelo cassette ativo (se houver)"""
+    cassette = _active.get()
+    if cassette is None:
+        return requests.get(url, **kwargs)
+    return cassette.perform("GET", url, lambda: requests.get(url, **kwargs))
+
+
+def result_digest(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Números da execução gravada, para comparar com o replay"""
+    results = result.get("results", {})
+    return {
+        "status": result.get("status"),
+        "processing_time": result.get("processing_time", 0),
+        "node_timings": result.get("node_timings", {}),
+        "tokens_used": result.get("tokens_used", 0),
+        "discovered_count": results.get("discovered_count", 0),
+        "validated_count": results.get("validated_count", 0),
+        "invalid_count": results.get("invalid_count", 0)
+    }
@@ -0,0 +1,239 @@
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+from contextlib import contextmanager
+import json
+import os
+import logging
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from agents import tracing
+
+logger = logging.getLogger(__name__)
+
+# Checkpoints persistentes das orquestrações (desligue para voltar ao grafo sem estado)
+CHECKPOINTS_ENABLED = os.getenv("ORCHESTRATION_CHECKPOINTS", "true").lower() == "true"
+
+# Mantém checkpoints e journal após uma execução bem-sucedida (útil para depuração)
+KEEP_CHECKPOINTS = os.getenv("ORCHESTRATION_KEEP_CHECKPOINTS", "false").lower() == "true"
+
+
+def _default_session_factory():
+    from database.connection import SessionLocal
+    return SessionLocal()
+
+
+def thread_config(agent_task_id: int) -> Dict[str, Any]:
+    """Config do LangGraph para a orquestração de uma agent_task"""
+    return {"configurable": {"thread_id": str(agent_task_id), "checkpoint_ns": ""}}
+
+
+class SQLAlchemyCheckpointSaver(BaseCheckpointSaver):
+    """Checkpointer do LangGraph gravando no banco da aplicação (Postgres ou SQLite)
+
+    Guarda o estado completo após cada node (thread_id = agent_task_id), o que permite
+    retomar uma orquestração interrompida a partir do último node concluído.
+    """
+
+    def __init__(self, session_factory: Callable = None, **kwargs):
+        super().__init__(**kwargs)
+        self.session_factory = session_factory or _default_session_factory
+
+    @contextmanager
+    def _session(self):
+        db = self.session_factory()
+        try:
+            yield db
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _to_tuple(self, db, row) -> CheckpointTuple:
+        from database.models import OrchestrationCheckpointWrite
+
+        writes = db.query(OrchestrationCheckpointWrite).filter(
+            OrchestrationCheckpointWrite.thread_id == row.thread_id,
+            OrchestrationCheckpointWrite.checkpoint_ns == row.checkpoint_ns,
+            OrchestrationCheckpointWrite.checkpoint_id == row.checkpoint_id
+        ).order_by(OrchestrationCheckpointWrite.task_id, OrchestrationCheckpointWrite.idx).all()
+
+        def config_for(checkpoint_id):
+            return {"configurable": {"thread_id": row.thread_id, "checkpoint_ns": row.checkpoint_ns,
+                                     "checkpoint_id": checkpoint_id}}
+
+        return CheckpointTuple(
+            config=config_for(row.checkpoint_id),
+            checkpoint=self.serde.loads_typed((row.type, row.checkpoint)),
+            metadata=self.serde.loads_typed((row.metadata_type, row.checkpoint_metadata)),
+            parent_config=config_for(row.parent_checkpoint_id) if row.parent_checkpoint_id else None,
+            pending_writes=[(w.task_id, w.channel, self.serde.loads_typed((w.type, w.value))) for w in writes]
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        from database.models import OrchestrationCheckpoint
+
+        configurable = config["configurable"]
+        with self._session() as db:
+            query = db.query(OrchestrationCheckpoint).filter(
+                OrchestrationCheckpoint.thread_id == str(configurable["thread_id"]),
+                OrchestrationCheckpoint.checkpoint_ns == configurable.get("checkpoint_ns", "")
+            )
+            checkpoint_id = get_checkpoint_id(config)
+            if checkpoint_id:
+                query = query.filter(OrchestrationCheckpoint.checkpoint_id == checkpoint_id)
+            # IDs de checkpoint são UUIDv6 (ordenáveis por tempo)
+            row = query.order_by(OrchestrationCheckpoint.checkpoint_id.desc()).first()
+            return self._to_tuple(db, row) if row else None
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        from database.models import OrchestrationCheckpoint
+
+        with self._session() as db:
+            query = db.query(OrchestrationCheckpoint)
+            if config:
+                configurable = config["configurable"]
+                query = query.filter(OrchestrationCheckpoint.thread_id == str(configurable["thread_id"]))
+                if configurable.get("checkpoint_ns") is not None:
+                    query = query.filter(OrchestrationCheckpoint.checkpoint_ns == configurable["checkpoint_ns"])
+                if get_checkpoint_id(config):
+                    query = query.filter(OrchestrationCheckpoint.checkpoint_id == get_checkpoint_id(config))
+            if before and get_checkpoint_id(before):
+                query = query.filter(OrchestrationCheckpoint.checkpoint_id < get_checkpoint_id(before))
+
+            tuples = []
+            for row in query.order_by(OrchestrationCheckpoint.checkpoint_id.desc()):
+                checkpoint_tuple = self._to_tuple(db, row)
+                if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                tuples.append(checkpoint_tuple)
+                if limit is not None and len(tuples) >= limit:
+                    break
+        yield from tuples
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        from database.models import OrchestrationCheckpoint
+
+        configurable = config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_type, checkpoint_bytes = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_bytes = self.serde.dumps_typed(metadata)
+
+        with tracing.span("checkpoint.put", kind="db", bytes=len(checkpoint_bytes)), self._session() as db:
+            db.merge(OrchestrationCheckpoint(
+                thread_id=thread_id,
+                checkpoint_ns=checkpoint_ns,
+                checkpoint_id=checkpoint["id"],
+                parent_checkpoint_id=configurable.get("checkpoint_id"),
+                type=checkpoint_type,
+                checkpoint=checkpoint_bytes,
+                metadata_type=metadata_type,
+                checkpoint_metadata=metadata_bytes
+            ))
+
+        logger.debug("Checkpoint %s gravado (thread %s, step %s)", checkpoint["id"], thread_id, metadata.get("step"))
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                 "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple], task_id: str, task_path: str = "") -> None:
+        from database.models import OrchestrationCheckpointWrite
+
+        configurable = config["configurable"]
+        with tracing.span("checkpoint.put_writes", kind="db", writes=len(writes)), self._session() as db:
+            for idx, (channel, value) in enumerate(writes):
+                value_type, value_bytes = self.serde.dumps_typed(value)
+                db.merge(OrchestrationCheckpointWrite(
+                    thread_id=str(configurable["thread_id"]),
+                    checkpoint_ns=configurable.get("checkpoint_ns", ""),
+                    checkpoint_id=configurable["checkpoint_id"],
+                    task_id=task_id,
+                    idx=WRITES_IDX_MAP.get(channel, idx),
+                    channel=channel,
+                    type=value_type,
+                    value=value_bytes,
+                    task_path=task_path
+                ))
+
+    def delete_thread(self, thread_id: str) -> None:
+        from database.models import OrchestrationCheckpoint, OrchestrationCheckpointWrite
+
+        with self._session() as db:
+            db.query(OrchestrationCheckpointWrite).filter(
+                OrchestrationCheckpointWrite.thread_id == str(thread_id)).delete()
+            db.query(OrchestrationCheckpoint).filter(
+                OrchestrationCheckpoint.thread_id == str(thread_id)).delete()
+
+
+class StepJournal:
+    """Resultados por startup dentro de um node (ex: métricas de cada startup)
+
+    O checkpoint do LangGraph só é gravado ao fim do node; o journal cobre o meio dele,
+    para que uma retomada não repita chamadas ao LLM que já foram pagas.
+    """
+
+    def __init__(self, agent_task_id: Optional[int], session_factory: Callable = None):
+        self.agent_task_id = agent_task_id
+        self.session_factory = session_factory or _default_session_factory
+
+    @property
+    def enabled(self) -> bool:
+        return CHECKPOINTS_ENABLED and self.agent_task_id is not None
+
+    def load(self, node: str) -> Dict[str, Any]:
+        """step_key -> resultado já registrado para o node"""
+        if not self.enabled:
+            return {}
+        from database.models import OrchestrationStep
+
+        db = self.session_factory()
+        try:
+            rows = db.query(OrchestrationStep).filter(
+                OrchestrationStep.agent_task_id == self.agent_task_id,
+                OrchestrationStep.node == node
+            ).all()
+            return {row.step_key: row.result for row in rows}
+        finally:
+            db.close()
+
+    def record(self, node: str, step_key: str, result: Any):
+        """Registra o resultado de um passo; falha ao gravar não interrompe o pipeline"""
+        if not self.enabled:
+            return
+        from database.models import OrchestrationStep
+
+        span = tracing.start_span("journal.record", kind="db", node=node)
+        db = self.session_factory()
+        try:
+            db.merge(OrchestrationStep(agent_task_id=self.agent_task_id, node=node, step_key=step_key[:255],
+                                       result=json.loads(json.dumps(result, default=str))))
+            db.commit()
+            span.end()
+        except Exception as e:
+            db.rollback()
+            span.end(error=e)
+            logger.warning("Falha ao gravar passo %s/%s no journal: %s", node, step_key, e)
+        finally:
+            db.close()
+
+    def clear(self):
+        if self.agent_task_id is None:
+            return
+        from database.models import OrchestrationStep
+
+        db = self.session_factory()
+        try:
+            db.query(OrchestrationStep).filter(OrchestrationStep.agent_task_id == self.agent_task_id).delete()
+            db.commit()
+        finally:
+            db.close()
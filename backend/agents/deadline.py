@@ -0,0 +1,45 @@
+from typing import Optional
+import os
+import time
+
+# Orçamento padrão (em segundos) de uma orquestração completa
+DEFAULT_TIME_BUDGET = float(os.getenv("ORCHESTRATION_TIME_BUDGET", "900"))
+
+# Abaixo disso não vale a pena iniciar uma chamada ao LLM
+MIN_CALL_TIMEOUT = float(os.getenv("OPENAI_MIN_CALL_TIMEOUT", "5"))
+
+
+class DeadlineExceeded(TimeoutError):
+    """O orçamento de tempo da task acabou antes da chamada"""
+
+
+class Deadline:
+    """Prazo absoluto (epoch) propagado do orçamento da task até cada chamada externa
+
+    Guardado no estado como float para continuar serializável.
+    """
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_budget(cls, seconds: Optional[float] = None) -> "Deadline":
+        return cls(time.time() + (seconds if seconds else DEFAULT_TIME_BUDGET))
+
+    @classmethod
+    def at(cls, expires_at: Optional[float]) -> Optional["Deadline"]:
+        return cls(expires_at) if expires_at else None
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.time(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: float, minimum: float = MIN_CALL_TIMEOUT) -> float:
+        """Timeout da próxima chamada: o menor entre o padrão e o tempo restante"""
+        remaining = self.remaining()
+        if remaining < minimum:
+            raise DeadlineExceeded(f"Restam {remaining:.1f}s do orçamento da task (mínimo {minimum:.0f}s por chamada)")
+        return min(default, remaining)
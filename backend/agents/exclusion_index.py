@@ -0,0 +1,199 @@
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+from urllib.parse import urlparse
+from datetime import datetime
+import math
+import os
+import re
+import unicodedata
+import logging
+from agents.prompts import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Orçamento padrão (em tokens) para a lista de exclusão enviada ao LLM
+DEFAULT_EXCLUSION_TOKEN_BUDGET = int(os.getenv("DISCOVERY_EXCLUSION_TOKEN_BUDGET", "300"))
+
+# Sufixos societários ignorados na comparação de nomes
+_COMPANY_SUFFIXES = {"ltda", "sa", "inc", "llc", "ltd", "corp", "me", "eireli", "sas", "gmbh"}
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Hosts compartilhados por várias empresas: o domínio sozinho não identifica a startup
+_SHARED_HOSTS = (
+    "linkedin.com", "crunchbase.com", "instagram.com", "facebook.com", "twitter.com", "x.com",
+    "youtube.com", "medium.com", "substack.com", "github.com", "angel.co", "wellfound.com",
+    "linktr.ee", "bit.ly", "sites.google.com", "wixsite.com", "wordpress.com", "blogspot.com",
+    "notion.site", "webflow.io", "carrd.co", "vercel.app", "netlify.app", "herokuapp.com",
+)
+
+
+def normalize_name(name: str) -> str:
+    """Normaliza nome de startup para comparação exata (sem acentos, caixa ou sufixos societários)"""
+    if not name:
+        return ""
+
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    tokens = [t for t in _NON_ALNUM.split(text) if t]
+
+    while len(tokens) > 1 and tokens[-1] in _COMPANY_SUFFIXES:
+        tokens.pop()
+
+    return " ".join(tokens)
+
+
+def normalize_domain(website: str) -> str:
+    """Chave do website para detectar a mesma startup com nome diferente
+
+    Normalmente o host sem 'www.'; em hosts compartilhados (redes sociais, diretórios, construtores
+    de site) o host sozinho não identifica a empresa, então a chave é host + caminho - e vazia sem caminho.
+    """
+    if not website or not isinstance(website, str) or "." not in website:
+        return ""
+
+    url = website.strip().lower()
+    if not url.startswith(("http://", "https://")):
+        url = f"https://{url}"
+
+    try:
+        parsed = urlparse(url)
+        host = parsed.hostname or ""
+    except ValueError:
+        return ""
+
+    host = host[4:] if host.startswith("www.") else host
+    if not any(host == shared or host.endswith(f".{shared}") for shared in _SHARED_HOSTS):
+        return host
+
+    path = parsed.path.strip("/")
+    return f"{host}/{path}" if path else ""
+
+
+class ExclusionIndex:
+    """Conjunto exato de startups já conhecidas para um (país, setor)
+
+    O conjunto completo é usado para pós-filtrar os resultados do discovery localmente;
+    apenas um subconjunto ranqueado por relevância e limitado por tokens vai para o prompt.
+    """
+
+    def __init__(self, country: Optional[str], sector: Optional[str], entries: Iterable[Dict[str, Any]]):
+        self.key: Tuple[str, str] = ((country or "").lower(), (sector or "").lower())
+        self.sector = sector
+        self._names: Dict[str, Dict[str, Any]] = {}
+        self._domains: Dict[str, str] = {}
+
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            normalized = normalize_name(entry.get("name"))
+            if not normalized:
+                continue
+
+            # Em caso de duplicata, preferir o registro válido
+            current = self._names.get(normalized)
+            if current is None or (current.get("status") == "invalid" and entry.get("status") != "invalid"):
+                self._names[normalized] = entry
+
+            domain = normalize_domain(entry.get("website"))
+            if domain:
+                self._domains.setdefault(domain, normalized)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def contains(self, startup: Dict[str, Any]) -> bool:
+        """Verifica se a startup já é conhecida (por nome normalizado ou domínio do website)"""
+        if normalize_name(startup.get("name")) in self._names:
+            return True
+
+        domain = normalize_domain(startup.get("website"))
+        return bool(domain) and domain in self._domains
+
+    def filter(self, startups: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Remove startups já conhecidas e duplicatas dentro do próprio lote"""
+        kept = []
+        filtered = []
+        seen = set()
+
+        for startup in startups:
+            if not isinstance(startup, dict):
+                kept.append(startup)
+                continue
+
+            normalized = normalize_name(startup.get("name"))
+            if self.contains(startup) or (normalized and normalized in seen):
+                filtered.append(startup.get("name", "N/A"))
+                continue
+
+            seen.add(normalized)
+            kept.append(startup)
+
+        return kept, filtered
+
+    def _relevance(self, entry: Dict[str, Any]) -> float:
+        """Startups do mesmo setor, bem financiadas e recentes são as mais prováveis de reaparecer"""
+        score = 0.0
+
+        if self.sector and (entry.get("sector") or "").lower() == self.sector.lower():
+            score += 3.0
+
+        if entry.get("status") != "invalid":
+            score += 1.0
+
+        funding = entry.get("last_funding_amount") or 0
+        if isinstance(funding, (int, float)) and funding > 0:
+            score += min(math.log10(funding), 9.0) / 3.0
+
+        created_at = entry.get("created_at")
+        if isinstance(created_at, str):
+            try:
+                created_at = datetime.fromisoformat(created_at)
+            except ValueError:
+                created_at = None
+        if isinstance(created_at, datetime):
+            age_days = max((datetime.now(created_at.tzinfo) - created_at).days, 0)
+            score += 1.0 / (1.0 + age_days / 30.0)
+
+        return score
+
+    def prompt_subset(self, token_budget: int = DEFAULT_EXCLUSION_TOKEN_BUDGET) -> List[str]:
+        """Nomes mais relevantes que cabem no orçamento de tokens"""
+        ranked = sorted(self._names.values(), key=self._relevance, reverse=True)
+
+        names = []
+        used = 0
+        for entry in ranked:
+            cost = count_tokens(entry["name"]) + 1  # separador
+            if used + cost > token_budget:
+                break
+            names.append(entry["name"])
+            used += cost
+
+        return names
+
+    def format_for_prompt(self, token_budget: int = DEFAULT_EXCLUSION_TOKEN_BUDGET) -> str:
+        """Texto compacto de exclusão para o prompt de discovery"""
+        if not self._names:
+            return ""
+
+        names = self.prompt_subset(token_budget)
+        if not names:
+            return ""
+
+        omitted = len(self._names) - len(names)
+        text = f"NÃO incluir startups já cadastradas ({len(self._names)} no total). Principais: {', '.join(names)}."
+        if omitted > 0:
+            text += f" Outras {omitted} conhecidas serão descartadas automaticamente - priorize startups menos conhecidas."
+
+        return text
+
+
+def build_exclusion_index(country: Optional[str], sector: Optional[str],
+                          valid_startups: List[Dict[str, Any]],
+                          invalid_startups: List[Dict[str, Any]]) -> ExclusionIndex:
+    """Constrói o índice de exclusão a partir do contexto válido/inválido da orquestração"""
+    entries = [dict(s, status="valid") for s in valid_startups or [] if isinstance(s, dict)]
+    entries += [dict(s, status="invalid") for s in invalid_startups or [] if isinstance(s, dict)]
+
+    index = ExclusionIndex(country, sector, entries)
+    logger.info("EXCLUSION INDEX: %s startups conhecidas para %s", len(index), index.key)
+    return index
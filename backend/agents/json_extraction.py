@@ -0,0 +1,185 @@
+from typing import Any, Optional, List, Tuple
+import json
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Decoder rápido quando disponível (mesma semântica do json.loads para os nossos payloads)
+try:
+    import orjson
+
+    def _loads(text: str) -> Any:
+        return orjson.loads(text)
+
+    _DECODE_ERRORS = (orjson.JSONDecodeError, ValueError)
+except ImportError:  # pragma: no cover - depende do ambiente
+    _loads = json.loads
+    _DECODE_ERRORS = (json.JSONDecodeError, ValueError)
+
+# Motivos de falha reportados em ExtractionResult.reason
+EMPTY = "empty"
+NO_JSON = "no_json"
+UNBALANCED = "unbalanced"
+DECODE_ERROR = "decode_error"
+WRONG_TYPE = "wrong_type"
+
+# Quantas posições de início candidatas testar (texto com citações "[1]" antes do JSON)
+MAX_CANDIDATES = 20
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|$)", re.DOTALL)
+_NUMERIC_UNDERSCORE = re.compile(r"(?<=[:\[,\s])\d+(?:_\d+)+")
+_CLOSERS = {"[": "]", "{": "}"}
+
+
+class ExtractionResult:
+    """Resultado da extração: `value` quando ok, senão `reason` e `detail` explicam a falha"""
+
+    __slots__ = ("value", "reason", "detail", "repaired")
+
+    def __init__(self, value: Any = None, reason: Optional[str] = None, detail: str = "", repaired: bool = False):
+        self.value = value
+        self.reason = reason
+        self.detail = detail
+        self.repaired = repaired
+
+    @property
+    def ok(self) -> bool:
+        return self.reason is None
+
+    def __repr__(self) -> str:
+        if self.ok:
+            return f"ExtractionResult(ok, repaired={self.repaired})"
+        return f"ExtractionResult({self.reason}: {self.detail})"
+
+
+def _scan(text: str, start: int) -> Tuple[Optional[int], Optional[Tuple[int, List[str]]]]:
+    """Varre a partir de text[start] (um '[' ou '{') balanceando colchetes fora de strings
+
+    Retorna (fim, None) quando o valor fecha, ou (None, ponto_seguro) quando o texto termina antes,
+    onde ponto_seguro = (posição, pilha aberta) logo após o último elemento completo.
+    """
+    stack = [text[start]]
+    in_string = False
+    escaped = False
+    safe: Optional[Tuple[int, List[str]]] = None
+
+    for i in range(start + 1, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "[{":
+            stack.append(ch)
+        elif ch in "]}":
+            if not stack or _CLOSERS[stack[-1]] != ch:
+                return None, safe
+            stack.pop()
+            if not stack:
+                return i + 1, None
+            safe = (i + 1, list(stack))
+        elif ch == ",":
+            safe = (i, list(stack))
+
+    return None, safe
+
+
+def _repair(fragment: str, open_stack: List[str]) -> str:
+    """Fecha um JSON truncado descartando o elemento incompleto final"""
+    fragment = fragment.rstrip().rstrip(",")
+    return fragment + "".join(_CLOSERS[c] for c in reversed(open_stack))
+
+
+def _decode(candidate: str) -> Tuple[bool, Any, str]:
+    try:
+        return True, _loads(candidate), ""
+    except _DECODE_ERRORS as e:
+        # Números com underscore (ex: 1_000_000) são um erro comum do modelo
+        fixed = _NUMERIC_UNDERSCORE.sub(lambda m: m.group(0).replace("_", ""), candidate)
+        if fixed != candidate:
+            try:
+                return True, _loads(fixed), ""
+            except _DECODE_ERRORS:
+                pass
+        return False, None, str(e)
+
+
+def _type_ok(value: Any, expect: Optional[type], item_type: Optional[type]) -> bool:
+    if expect is not None and not isinstance(value, expect):
+        return False
+    if item_type is not None and isinstance(value, list):
+        return all(isinstance(item, item_type) for item in value)
+    return True
+
+
+def extract_json(text: Optional[str], expect: Optional[type] = None, repair: bool = False,
+                 item_type: Optional[type] = None) -> ExtractionResult:
+    """Extrai o valor JSON mais externo de uma resposta de LLM
+
+    - Ignora cercas de markdown e texto ao redor com uma única varredura balanceada por candidato
+    - `expect` (list/dict) restringe o tipo do valor de topo; um dict com uma única lista
+      é aceito quando se espera lista (ex: {"startups": [...]})
+    - `item_type` exige o tipo dos itens da lista (descarta citações como "[1]" antes do JSON)
+    - `repair=True` fecha JSON truncado (ex: max_tokens atingido) descartando o último elemento parcial
+    """
+    if not text or not text.strip():
+        return ExtractionResult(reason=EMPTY, detail="conteúdo vazio")
+
+    fence = _FENCE.search(text)
+    if fence and fence.group(1).strip():
+        text = fence.group(1)
+
+    # Lista esperada também aceita objeto envelopando a lista
+    openers = "{" if expect is dict else "[{"
+
+    failure = ExtractionResult(reason=NO_JSON, detail="nenhum '[' ou '{' encontrado")
+    position = 0
+    for _ in range(MAX_CANDIDATES):
+        starts = [p for p in (text.find(c, position) for c in openers) if p != -1]
+        if not starts:
+            break
+        start = min(starts)
+        position = start + 1
+
+        end, safe = _scan(text, start)
+        if end is None:
+            if repair and safe is not None:
+                ok, value, error = _decode(_repair(text[start:safe[0]], safe[1]))
+                if ok and _type_ok(_unwrap(value, expect), expect, item_type):
+                    return ExtractionResult(_unwrap(value, expect), repaired=True)
+            failure = ExtractionResult(reason=UNBALANCED, detail=f"valor iniciado na posição {start} não fecha")
+            continue
+
+        ok, value, error = _decode(text[start:end])
+        if not ok:
+            failure = ExtractionResult(reason=DECODE_ERROR, detail=error)
+            continue
+
+        value = _unwrap(value, expect)
+        if not _type_ok(value, expect, item_type):
+            expected = expect.__name__ if expect else "valor"
+            if item_type is not None:
+                expected += f" de {item_type.__name__}"
+            failure = ExtractionResult(reason=WRONG_TYPE, detail=f"esperado {expected}, recebido {type(value).__name__}")
+            continue
+
+        return ExtractionResult(value)
+
+    return failure
+
+
+def _unwrap(value: Any, expect: Optional[type]) -> Any:
+    """Aceita {"chave": [...]} quando uma lista é esperada"""
+    if expect is list and isinstance(value, dict):
+        lists = [v for v in value.values() if isinstance(v, list)]
+        if len(lists) == 1:
+            return lists[0]
+    return value
@@ -0,0 +1,373 @@
+from typing import Dict, Any, Optional, List
+from collections import deque
+from queue import Queue, Empty
+import os
+import random
+import threading
+import time
+import logging
+import requests
+from agents.rate_limiter import openai_rate_limiter, parse_reset_duration, OpenAIRateLimiter, RatePermit
+from agents.deadline import Deadline, DeadlineExceeded
+from agents import cassette, tracing
+from agents.token_ledger import token_ledger
+from instrumentation import observe_openai_call
+
+logger = logging.getLogger(__name__)
+
+# Base da API (aponte para um servidor local, ex: benchmarks/fake_openai.py, para rodar sem a OpenAI)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+BACKOFF_BASE_SECONDS = float(os.getenv("OPENAI_BACKOFF_BASE_SECONDS", "1.0"))
+BACKOFF_MAX_SECONDS = float(os.getenv("OPENAI_BACKOFF_MAX_SECONDS", "30.0"))
+
+# Hedging: requisição duplicada após o p95 de latência do tipo de chamada
+HEDGING_ENABLED = os.getenv("OPENAI_HEDGING_ENABLED", "false").lower() == "true"
+HEDGE_QUANTILE = float(os.getenv("OPENAI_HEDGE_QUANTILE", "0.95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("OPENAI_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MAX_FRACTION = float(os.getenv("OPENAI_HEDGE_MAX_FRACTION", "0.1"))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Sessões HTTP ociosas mantidas para reuso (conexões keep-alive com a OpenAI)
+HTTP_POOL_SIZE = int(os.getenv("OPENAI_HTTP_POOL_SIZE", "16"))
+
+
+class SessionPool:
+    """Sessões HTTP reaproveitadas entre chamadas e entre execuções (sem novo handshake TCP/TLS a cada chamada)
+
+    Cada requisição em andamento usa uma sessão exclusiva (para poder ser abortada no hedge);
+    ao terminar ela volta ao pool, e sessões abortadas são descartadas.
+    """
+
+    def __init__(self, max_idle: int = HTTP_POOL_SIZE):
+        self._lock = threading.Lock()
+        self._idle: deque = deque()
+        self.max_idle = max_idle
+        self.created = 0
+
+    def checkout(self) -> requests.Session:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            self.created += 1
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def checkin(self, session: requests.Session):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(session)
+                return
+        session.close()
+
+    def discard(self, session: requests.Session):
+        session.close()
+
+
+http_pool = SessionPool()
+
+
+class LatencyTracker:
+    """Janela de latências recentes (respostas 200) por tipo de chamada"""
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self.window = window
+
+    def record(self, call_type: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(call_type, deque(maxlen=self.window)).append(seconds)
+
+    def quantile(self, call_type: str, q: float, min_samples: int = HEDGE_MIN_SAMPLES) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(call_type, ()))
+        if len(samples) < min_samples:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+class HedgeBudget:
+    """Limita a fração de chamadas que recebem hedge (janela das últimas N chamadas)"""
+
+    def __init__(self, max_fraction: float = HEDGE_MAX_FRACTION, window: int = 500):
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window)
+        self.max_fraction = max_fraction
+
+    def record_call(self):
+        with self._lock:
+            self._calls.append(False)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            hedges = sum(self._calls)
+            if not self._calls or hedges + 1 > self.max_fraction * len(self._calls):
+                return False
+            # Marca a chamada mais recente como hedgeada
+            self._calls[-1] = True
+            return True
+
+
+latency_tracker = LatencyTracker()
+hedge_budget = HedgeBudget()
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Tempo sugerido pelo servidor para nova tentativa (retry-after-ms, retry-after ou reset dos limites)"""
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if headers.get("retry-after"):
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            pass
+
+    resets = [
+        parse_reset_duration(headers.get("x-ratelimit-reset-requests")),
+        parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+    ]
+    resets = [r for r in resets if r is not None]
+    return max(resets) if resets else None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Backoff exponencial com full jitter, respeitando o retry-after do servidor quando houver"""
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after + random.uniform(0, BACKOFF_BASE_SECONDS))
+    return min(delay, BACKOFF_MAX_SECONDS)
+
+
+def _usage(response: Optional[requests.Response]) -> Optional[Dict[str, Any]]:
+    """Bloco usage da resposta ({} quando não houve sucesso; None se o corpo não é JSON)"""
+    if response is None or response.status_code != 200:
+        return {}
+    try:
+        return response.json().get("usage") or {}
+    except ValueError:
+        return None
+
+
+def _used_tokens(response: Optional[requests.Response], usage: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """Tokens efetivamente consumidos (Chat Completions ou Responses API); `usage` já extraído evita reler o JSON"""
+    if response is None or response.status_code != 200:
+        return 0
+    if usage is None:
+        usage = _usage(response)
+    return usage.get("total_tokens") if usage is not None else None
+
+
+class _Flight:
+    """Uma requisição HTTP em andamento (primária ou hedge) com sessão própria para poder ser abortada"""
+
+    def __init__(self, permit: RatePermit, label: str, call_type: str):
+        self.permit = permit
+        self.label = label
+        self.call_type = call_type
+        self.model: Optional[str] = None
+        self.session = http_pool.checkout()
+        self.response: Optional[requests.Response] = None
+        self.error: Optional[Exception] = None
+        self.started_at = time.monotonic()
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+        self._finished = False
+        self._abandoned = False
+
+    def start(self, url: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: float, done: Queue,
+              inline: bool = False):
+        """Dispara a requisição em uma thread própria, ou na thread atual com inline=True (sem hedge)"""
+        self.model = payload.get("model")
+
+        def run():
+            try:
+                self.response = cassette.post(self.session, url, headers=headers, json=payload, timeout=timeout)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.elapsed = time.monotonic() - self.started_at
+                with self._lock:
+                    self._finished = True
+                    abandoned = self._abandoned
+                if abandoned:
+                    self._release_abandoned()
+                done.put(self)
+
+        if inline:
+            run()
+        else:
+            # Mesmo contexto da chamada (cassette, trace, atribuição de tokens) na thread do hedge
+            threading.Thread(target=tracing.propagate(run), daemon=True, name=f"openai-{self.label}").start()
+
+    def abandon(self):
+        """Descarta a requisição perdedora: fecha a sessão e libera a cota quando ela terminar"""
+        with self._lock:
+            self._abandoned = True
+            finished = self._finished
+        if finished:
+            self._release_abandoned()
+        else:
+            http_pool.discard(self.session)
+
+    def _release_abandoned(self):
+        # O custo do perdedor continua contando no limiter e no ledger (tokens realmente gastos)
+        usage = _usage(self.response)
+        self.permit.release(used_tokens=_used_tokens(self.response, usage))
+        token_ledger.record(self.model, self.call_type, usage)
+        http_pool.discard(self.session)
+
+    def finish(self):
+        """Devolve a sessão ao pool (requisição concluída normalmente)"""
+        http_pool.checkin(self.session)
+
+
+def _send(url: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: float,
+          estimated_tokens: int, call_type: str, limiter: OpenAIRateLimiter,
+          deadline: Optional[Deadline], hedge: bool):
+    """Uma tentativa (possivelmente com hedge); retorna (response, permit) do vencedor ainda não liberado"""
+    acquire_timeout = deadline.remaining() if deadline else None
+    done: Queue = Queue()
+    flights: List[_Flight] = [_Flight(limiter.acquire(estimated_tokens, timeout=acquire_timeout), "primary", call_type)]
+    hedge_budget.record_call()
+
+    # Sem hedge possível a requisição roda na própria thread (sem custo de criar outra)
+    hedge_delay = latency_tracker.quantile(call_type, HEDGE_QUANTILE) if hedge else None
+    flights[0].start(url, headers, payload, timeout, done, inline=hedge_delay is None or hedge_delay >= timeout)
+    first: Optional[_Flight] = None
+    if hedge_delay is not None and hedge_delay < timeout:
+        try:
+            first = done.get(timeout=hedge_delay)
+        except Empty:
+            first = None
+
+        if first is None and hedge_budget.try_spend():
+            try:
+                # Hedge só sai se houver cota imediata; nunca espera pelo limiter
+                hedge_permit = limiter.acquire(estimated_tokens, timeout=0)
+            except TimeoutError:
+                hedge_permit = None
+            if hedge_permit:
+                logger.info("%s: hedge disparado após %.1fs", call_type, hedge_delay)
+                hedge_flight = _Flight(hedge_permit, "hedge", call_type)
+                flights.append(hedge_flight)
+                hedge_flight.start(url, headers, payload, timeout, done)
+
+    pending = len(flights)
+    winner: Optional[_Flight] = None
+    while pending:
+        flight = first if first is not None else done.get()
+        first = None
+        pending -= 1
+
+        usable = flight.response is not None and flight.response.status_code not in RETRYABLE_STATUS
+        if usable or pending == 0:
+            winner = flight
+            break
+
+        # Falhou, mas a outra ainda pode responder: liberar esta e aguardar
+        flight.permit.release(used_tokens=0, throttled=flight.response is not None and flight.response.status_code == 429)
+        if flight.response is not None:
+            limiter.update_from_headers(flight.response.headers)
+        flight.finish()
+
+    for flight in flights:
+        if flight is not winner and not flight.permit.released:
+            flight.abandon()
+
+    winner.finish()
+    if winner.error is not None:
+        winner.permit.release()
+        raise winner.error
+
+    if winner.response.status_code == 200:
+        latency_tracker.record(call_type, winner.elapsed)
+    if winner.label == "hedge":
+        logger.info("%s: hedge venceu em %.1fs", call_type, winner.elapsed)
+
+    return winner.response, winner.permit
+
+
+def post_with_retry(url: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: float,
+                    estimated_tokens: int = 0, call_type: str = "openai",
+                    limiter: OpenAIRateLimiter = openai_rate_limiter,
+                    max_retries: int = MAX_RETRIES,
+                    deadline: Optional[Deadline] = None,
+                    hedge: bool = HEDGING_ENABLED) -> requests.Response:
+    """POST para a OpenAI passando pelo rate limiter global, com retry em 429/5xx e erros de conexão
+
+    Com `deadline`, cada tentativa usa no máximo o tempo restante da task (DeadlineExceeded quando acaba).
+    Retorna a última resposta recebida (mesmo que de erro) ou relança a última exceção de rede.
+    """
+    last_error: Optional[Exception] = None
+
+    for attempt in range(max_retries + 1):
+        attempt_timeout = deadline.timeout(timeout) if deadline else timeout
+        started = time.monotonic()
+        span = tracing.start_span(f"openai.{call_type}", kind="http", attempt=attempt + 1)
+        try:
+            response, permit = _send(url, headers, payload, attempt_timeout, estimated_tokens,
+                                     call_type, limiter, deadline, hedge)
+        except TimeoutError as e:
+            span.end(error=e)
+            observe_openai_call(call_type, type(e).__name__, time.monotonic() - started)
+            if isinstance(e, DeadlineExceeded) or (deadline and deadline.expired):
+                raise DeadlineExceeded(f"{call_type}: orçamento de tempo esgotado") from e
+            raise
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            span.end(error=e)
+            observe_openai_call(call_type, type(e).__name__, time.monotonic() - started)
+            last_error = e
+            if attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning("%s: erro de rede (%s), tentativa %s/%s, aguardando %.1fs", call_type, e.__class__.__name__, attempt + 1, max_retries + 1, delay)
+            _sleep_within(delay, deadline)
+            continue
+
+        limiter.update_from_headers(response.headers)
+
+        usage = _usage(response)
+        observe_openai_call(call_type, response.status_code, time.monotonic() - started, usage)
+        span.end(status_code=response.status_code, tokens=_used_tokens(response, usage))
+        token_ledger.record(payload.get("model"), call_type, usage)
+
+        if response.status_code not in RETRYABLE_STATUS:
+            permit.release(used_tokens=_used_tokens(response, usage))
+            return response
+
+        throttled = response.status_code == 429
+        retry_after = _retry_after_seconds(response)
+        permit.release(used_tokens=0, throttled=throttled)
+
+        if attempt >= max_retries:
+            logger.error("%s: status %s após %s tentativas", call_type, response.status_code, attempt + 1)
+            return response
+
+        if throttled:
+            # Pausa compartilhada: as demais threads também esperam em vez de estourar a cota
+            limiter.throttle(retry_after)
+
+        delay = backoff_delay(attempt, retry_after)
+        logger.warning("%s: status %s, tentativa %s/%s, aguardando %.1fs", call_type, response.status_code, attempt + 1, max_retries + 1, delay)
+        _sleep_within(delay, deadline)
+
+    if last_error:
+        raise last_error
+    raise RuntimeError(f"{call_type}: nenhuma tentativa realizada")
+
+
+def _sleep_within(delay: float, deadline: Optional[Deadline]):
+    """Dorme o backoff sem ultrapassar o deadline"""
+    if deadline and deadline.remaining() < delay:
+        raise DeadlineExceeded("Backoff ultrapassaria o orçamento de tempo da task")
+    time.sleep(delay)
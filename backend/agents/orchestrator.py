@@ -1,14 +1,53 @@
-from typing import Dict, Any, List, TypedDict
+from typing import Dict, Any, List, Optional, TypedDict, Type
+from pydantic import BaseModel
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolExecutor
-import requests
-import json
 import os
+import textwrap
+import uuid
+import math
+import time
+import threading
+from collections import deque
 from datetime import datetime
 import logging
+from logging_config import log_payload
+from instrumentation import NODE_DURATION, WEBSITE_PROBE_DURATION
+from concurrent.futures import ThreadPoolExecutor
+from agents.exclusion_index import build_exclusion_index, normalize_name, normalize_domain
+from agents.structured_output import chat_response_format, responses_text_format, parse_output
+from schemas.llm_outputs import DiscoveryOutput, DiscoveryPlanOutput, StartupMetricsOutput, ValidationInsightOutput
+from agents.openai_client import post_with_retry, OPENAI_BASE_URL
+from agents.deadline import Deadline
+from agents.checkpointer import SQLAlchemyCheckpointSaver, StepJournal, CHECKPOINTS_ENABLED, KEEP_CHECKPOINTS, thread_config
+from agents import cassette, scoring_engine, source_reputation, tracing
+from agents.token_ledger import token_ledger
+from agents.prompts import (
+    DISCOVERY_PROMPT, DISCOVERY_PLAN_PROMPT, METRICS_PROMPT, VALIDATION_INSIGHT_PROMPT,
+    WEBSEARCH_SYSTEM_PROMPT, count_tokens, count_static_tokens, usage_from_response
+)
 
 logger = logging.getLogger(__name__)
 
+# Startups pontuadas em paralelo no node de métricas
+METRICS_WORKERS = int(os.getenv("METRICS_WORKERS", "4"))
+
+# Pré-filtro local: só as K melhores pelo scoring engine vão ao LLM (0 = todas)
+METRICS_LLM_TOP_K = int(os.getenv("METRICS_LLM_TOP_K", "0"))
+
+# Discovery em shards para as estratégias de demanda de mercado: um plano de setores/países
+# e uma busca menor por shard em paralelo, ao invés de uma única chamada grande
+SHARDED_STRATEGIES = ("market_demand", "global_market_demand")
+DISCOVERY_SHARDING_ENABLED = os.getenv("DISCOVERY_SHARDING_ENABLED", "true").lower() == "true"
+DISCOVERY_MAX_SHARDS = int(os.getenv("DISCOVERY_MAX_SHARDS", "4"))
+DISCOVERY_SHARD_WORKERS = int(os.getenv("DISCOVERY_SHARD_WORKERS", "4"))
+# Folga sobre a cota de cada shard (compensa o filtro de VC/setor e duplicatas entre shards)
+DISCOVERY_SHARD_OVERFETCH = float(os.getenv("DISCOVERY_SHARD_OVERFETCH", "1.5"))
+
+# Usados quando o plano do LLM falha
+DEFAULT_SHARD_SECTORS = ["Saúde", "Fintech", "Agro", "Educação", "Logística", "Energia", "Varejo"]
+DEFAULT_SHARD_COUNTRIES = ["Brazil", "Mexico", "Argentina", "Colombia", "Chile", "Peru"]
+
 class OrchestrationState(TypedDict):
     """Estado compartilhado entre todos os agentes"""
     # Dados de entrada
@@ -19,6 +58,9 @@ class OrchestrationState(TypedDict):
 
     # Contexto de startups já processadas
     valid_startups: List[Dict[str, Any]]
+    known_invalid_startups: List[Dict[str, Any]]
+
+    # Startups invalidadas nesta execução
     invalid_startups: List[Dict[str, Any]]
 
     # Resultados de cada agente
@@ -28,7 +70,12 @@ class OrchestrationState(TypedDict):
 
     # Metadados
     total_tokens: int
+    token_usage: Dict[str, Dict[str, int]]
+    excluded_count: int
     processing_time: float
+    node_timings: Dict[str, float]  # segundos gastos em cada node
+    deadline_at: float
+    task_id: Optional[int]  # agent_task_id: thread do checkpointer e chave do journal
     current_step: str
     errors: List[str]
 
@@ -42,14 +89,17 @@ class StartupOrchestrator:
             raise ValueError("OPENAI_API_KEY não encontrada")
 
         # Usar Responses API para web search com gpt-4o-mini padrão
-        self.chat_url = "https://api.openai.com/v1/chat/completions"
-        self.responses_url = "https://api.openai.com/v1/responses"
+        self.chat_url = f"{OPENAI_BASE_URL}/chat/completions"
+        self.responses_url = f"{OPENAI_BASE_URL}/responses"
         self.model = "gpt-4o-mini"  # Modelo padrão, mais estável que search-preview
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
 
+        # Checkpoints persistentes: uma orquestração interrompida retoma do último node concluído
+        self.checkpointer = SQLAlchemyCheckpointSaver() if CHECKPOINTS_ENABLED else None
+
         # Construir grafo
         self.graph = self._build_graph()
 
@@ -58,11 +108,11 @@ class StartupOrchestrator:
         workflow = StateGraph(OrchestrationState)
 
         # Adicionar nodes
-        workflow.add_node("discovery", self._discovery_agent)
-        workflow.add_node("source_validation", self._source_validation_agent)
-        workflow.add_node("validation", self._validation_agent)
-        workflow.add_node("metrics", self._metrics_agent)
-        workflow.add_node("finalize", self._finalize_results)
+        workflow.add_node("discovery", self._timed_node("discovery", self._discovery_agent))
+        workflow.add_node("source_validation", self._timed_node("source_validation", self._source_validation_agent))
+        workflow.add_node("validation", self._timed_node("validation", self._validation_agent))
+        workflow.add_node("metrics", self._timed_node("metrics", self._metrics_agent))
+        workflow.add_node("finalize", self._timed_node("finalize", self._finalize_results))
 
         # Definir fluxo
         workflow.set_entry_point("discovery")
@@ -72,24 +122,41 @@ class StartupOrchestrator:
         workflow.add_edge("metrics", "finalize")
         workflow.add_edge("finalize", END)
 
-        return workflow.compile()
+        return workflow.compile(checkpointer=self.checkpointer)
+
+    def _timed_node(self, name: str, node):
+        """Registra em state["node_timings"] a duração do node (vai para o resultado da orquestração) e abre o span do node"""
+        def run(state: OrchestrationState) -> OrchestrationState:
+            started = time.monotonic()
+            with tracing.span(name, kind="node"), token_ledger.attribute(node=name):
+                result = node(state)
+            elapsed = time.monotonic() - started
+            NODE_DURATION.labels(name).observe(elapsed)
+            result.setdefault("node_timings", {})[name] = round(elapsed, 3)
+            logger.debug("Node %s concluído em %.3fs", name, result["node_timings"][name])
+            return result
+        return run
 
     def _discovery_agent(self, state: OrchestrationState) -> OrchestrationState:
         """Agente de descoberta usando WebSearch nativo"""
-        logger.info(f"*** DISCOVERY AGENT CHAMADO *** - Limite: {state['limit']}")
-        logger.info(f"Estado atual: country={state.get('country')}, sector={state.get('sector')}, strategy={state.get('search_strategy')}")
+        logger.info("Discovery: country=%s, sector=%s, strategy=%s, limite=%s",
+                    state.get('country'), state.get('sector'), state.get('search_strategy'), state['limit'])
         state["current_step"] = "discovery"
 
-        # Criar contexto de exclusão
-        exclusion_context = ""
-        if state.get("valid_startups"):
-            valid_names = [s["name"] for s in state["valid_startups"]]
-            exclusion_context += f"\nNÃO incluir estas startups já encontradas: {valid_names}"
+        if DISCOVERY_SHARDING_ENABLED and state.get("search_strategy") in SHARDED_STRATEGIES and state["limit"] > 1:
+            return self._sharded_discovery(state)
 
-        if state.get("invalid_startups"):
-            invalid_names = [s["name"] for s in state["invalid_startups"]]
-            exclusion_context += f"\nNÃO incluir estas startups inválidas: {invalid_names}"
+        # Índice exato de startups conhecidas: subconjunto ranqueado vai ao prompt, o resto é filtrado localmente
+        exclusion_index = build_exclusion_index(
+            state.get("country"),
+            state.get("sector"),
+            state.get("valid_startups", []),
+            state.get("known_invalid_startups", [])
+        )
+        return self._discover(state, exclusion_index)
 
+    def _discover(self, state: OrchestrationState, exclusion_index) -> OrchestrationState:
+        """Uma consulta de discovery via WebSearch para o país/setor/estratégia do state"""
         # Definir query e restrições baseadas na estratégia de busca
         search_strategy = state.get('search_strategy', 'specific')
 
@@ -180,213 +247,48 @@ class StartupOrchestrator:
         else:
             geographic_context = "na América Latina"
 
-        # Sistema de exclusão inteligente - apenas impedir redescoberta de startups idênticas
-        existing_startups = self._get_context_exclusions(state)
-        exclusion_text = self._format_exclusion_list(existing_startups, state.get('sector'))
+        # Lista de exclusão compacta e limitada por orçamento de tokens
+        exclusion_text = exclusion_index.format_for_prompt()
 
         # Adicionar timestamp para forçar diferentes consultas
-        import time
         current_time = int(time.time())
 
         # Prompt otimizado para DESCOBRIR APENAS STARTUPS COM VC CONFIRMADO
-        prompt = f"""
-        Use a ferramenta WebSearch para descobrir EXATAMENTE {state['limit']} startups de IA reais {geographic_context} que COMPROVADAMENTE receberam funding de VC.
-
-        IMPORTANTE: Esta é uma busca de {current_time} - procure por startups DIFERENTES das buscas anteriores.
-
-        METODOLOGIA OBRIGATÓRIA PARA CADA STARTUP:
-        1º) Encontre startups de IA do setor/região
-        2º) Para CADA startup, busque especificamente: "[nome] venture capital funding investors"
-        3º) Confirme em fontes confiáveis: Crunchbase, TechCrunch, sites de VC
-        4º) SE NÃO ACHAR VC CONFIRMADO = DESCARTE e busque outra
-        5º) APENAS inclua na lista se VC estiver 100% confirmado
-
-        REGRA FUNDAMENTAL - VENTURE CAPITAL OBRIGATÓRIO:
-        TODAS as startups descobertas DEVEM ter recebido funding de Venture Capital confirmado.
-        NÃO incluir startups que só receberam:
-        - Funding governamental, subsídios ou editais públicos
-        - Bootstrapping ou autofinanciamento
-        - Crowdfunding ou financiamento coletivo
-        - Apenas angel investment sem VC follow-up
-        - Aceleradoras sem VC confirmado
-
-        APENAS incluir startups com:
-        - Rounds de VC confirmados (Seed, Series A, B, C...)
-        - Fundos de Venture Capital conhecidos como investidores
-        - Investment comprovado em bases como Crunchbase/Distrito
-        - Nomes específicos de fundos VC (não genéricos)
-
-        QUERIES ESPECÍFICAS POR SETOR (OBRIGATORIAMENTE usar o setor {state.get('sector', '')}):
-        1. "{search_query} {state.get('sector', '')} venture capital funding 2024 2023"
-        2. "startups {state.get('sector', '')} Brasil VC novos emergentes"
-        3. "AI {state.get('sector', '')} Brasil artificial intelligence recentes"
-        4. "nuevas {state.get('sector', '')} startups Brasil diferentes inovadoras"
-        5. "empresas {state.get('sector', '')} tecnologia VC série A seed brasil"
-
-        ESTRATÉGIA DE BUSCA DIVERSIFICADA:
-        - Use termos como "novos", "emergentes", "recentes", "diferentes"
-        - Busque em fontes diferentes a cada consulta
-        - Varie os termos de busca para evitar resultados repetidos
-        - Inclua anos recentes (2023, 2024) para startups mais novas
-
-        {exclusion_text}
-
-        ⚠️ EXCLUSÃO CRÍTICA - NÃO INCLUIR ESTAS STARTUPS JÁ CONHECIDAS:
-        - netLex (já descoberta anteriormente)
-        - Voa Health (já descoberta anteriormente)
-        - SciCrop (já descoberta anteriormente)
-        - DataStone (já descoberta anteriormente)
-        - Magie (já descoberta anteriormente)
-
-        BUSQUE STARTUPS COMPLETAMENTE DIFERENTES dessas listadas acima.
-        Se uma dessas aparecer na busca, IGNORE e procure outras novas.
-
-        FONTES CONFIÁVEIS PARA CONFIRMAR VC (use para validar CADA startup):
-        1. BASES OFICIAIS: crunchbase.com, pitchbook.com, dealroom.co
-        2. VC BRASILEIROS: distrito.me, neofeed.com.br, brasiljorney.com.br
-        3. MÍDIA TECH: techcrunch.com, venturebeat.com, valor.globo.com
-        4. SITES DE VC: sites oficiais dos fundos VC brasileiros
-
-        FUNDOS VC BRASILEIROS CONHECIDOS (para referência):
-        Monashees, Kaszek, Canary, Redpoint e.ventures, Valor Capital, SP Ventures
-
-        {sector_constraint}
-        {exclusion_context}
-
-        REGRA DE QUALIDADE - PREFERÊNCIA POR MENOS COM VC:
-        - Melhor descobrir 1-2 startups COM VC confirmado
-        - Do que descobrir 5 startups SEM VC confirmado
-        - SE não encontrar {state['limit']} com VC, retorne menos
-        - JAMAIS "inventar" ou "assumir" que uma startup tem VC
-
-        OBRIGATÓRIO - WEBSITE OFICIAL REAL VIA WEBSEARCH:
-        - Use WebSearch para encontrar o website OFICIAL de cada startup
-        - Busque especificamente: "[nome da startup] site oficial website"
-        - JAMAIS INVENTAR URLs ou adicionar .com.br/.com automaticamente
-        - Se não encontrar website via busca, deixar campo "website" como null
-        - APENAS usar websites que você encontrou através de busca web
-        - USAR WebSearch para buscar: "[nome_startup] site oficial website url"
-        - VERIFICAR em múltiplas fontes: matérias, perfis LinkedIn, diretórios
-        - CONFIRMAR URL exato encontrado nas buscas
-        - Exemplos REAIS encontrados via busca:
-          * "Creditec" → site REAL é "https://soucreditec.com.br" (não creditec.com.br)
-          * "Crop Sense AI" → site REAL é "https://crop-sense-ai.vercel.app/" (não cropsenseai.com.br)
-        - Se WebSearch não encontrar URL oficial → usar "Não encontrado"
-        - ZERO TOLERÂNCIA para URLs inventadas ou chutadas
-
-        Após a busca web, extraia APENAS startups reais com:
-        1. Nome confirmado em fonte confiável
-        2. Website OFICIAL encontrado na busca (não inventado)
-        3. Funding verificado em fontes CONFIÁVEIS (Neofeed, BrasilJourney, etc.)
-        4. Tecnologias AI específicas e detalhadas
-
-        REGRAS ANTI-ALUCINAÇÃO CRÍTICAS - SEGUIR RIGOROSAMENTE:
-
-        1. COERÊNCIA ABSOLUTA NOME-DESCRIÇÃO:
-           - CONFIRMAR que o nome no campo "name" é EXATAMENTE a mesma empresa da "description"
-           - Se o nome é "Magie", toda a descrição deve falar APENAS da "Magie"
-           - JAMAIS misturar: nome "TechStartup" com descrição da "OutraEmpresa"
-           - VERIFICAR múltiplas vezes essa correspondência antes de incluir
-
-        2. VALIDAÇÃO RIGOROSA DE SETOR/CORE BUSINESS:
-           - Identificar o CORE BUSINESS real da startup pela descrição
-           - Se busca "{state.get('sector', '')}", incluir APENAS startups cujo negócio principal é 100% desse setor
-           - Analise o core business real da startup
-           - Não confunda empresas que apenas "atendem" um setor com empresas "do" setor
-           - Empresa que vende para agro ≠ empresa de agro (a menos que seja seu core business)
-           - ANALISAR o negócio principal, não apenas o mercado alvo
-
-        3. VERIFICAÇÃO OBRIGATÓRIA DE WEBSITES:
-           - TODO startup DEVE ter um website funcional e verificado
-           - Use busca web para confirmar que o site existe e funciona
-           - Teste múltiplas variações: https://startup.com, https://www.startup.com, etc.
-           - Se o site não funcionar ou não existir, DESCARTAR a startup completamente
-           - NUNCA inventar URLs ou incluir startups sem sites funcionais verificados
-           - Priorizar startups com sites ativos e responsivos
-
-        OBRIGATÓRIO - TECNOLOGIAS EM INGLÊS:
-        - ai_technologies SEMPRE em inglês: ["Computer Vision", "Natural Language Processing", "Machine Learning"]
-        - NÃO usar português: "Visão Computacional", "Processamento de Linguagem Natural"
-        - Tecnologias específicas, não mercados: "Computer Vision" não "análise de dados financeiros"
-
-        FORMATO DE RESPOSTA OBRIGATÓRIO - APENAS JSON VÁLIDO:
-
-        RESPONDA APENAS COM JSON ARRAY VÁLIDO (sem explicações, sem markdown, sem texto adicional):
-
-        [
-          {{
-            "name": "Nome Exato da Startup",
-            "website": "https://site-oficial-verificado.com.br",
-            "sector": "{state.get('sector', 'AI/Technology')}",
-            "ai_technologies": ["Computer Vision", "Natural Language Processing"],
-            "founded_year": 2021,
-            "last_funding_amount": 5000000,
-            "investor_names": ["Nome do Investidor"],
-            "country": "{state.get('country', 'Global')}",
-            "city": "Cidade",
-            "description": "Descrição verificada da startup",
-            "has_venture_capital": true,
-            "funding_round": "Series A",
-            "funding_date": "2023",
-            "sources": {{
-              "funding": ["URL fonte de funding"],
-              "validation": ["URL de validação"]
-            }}
-          }}
-        ]
-
-        IMPORTANTE:
-        - NÃO adicione texto antes ou depois do JSON
-        - NÃO use markdown (```json)
-        - NÃO explique nada
-        - APENAS o array JSON válido
-
-        PROCESSO DE VALIDAÇÃO FINAL OBRIGATÓRIO:
-        ETAPA 1 - Revisão Individual por Startup:
-        Para CADA startup encontrada, perguntar-se:
-        ✓ O nome no campo "name" é exatamente a mesma empresa da "description"?
-        ✓ O core business principal é 100% do setor "{state.get('sector', 'AI/Technology')}"?
-        ✓ O website foi verificado e funciona (acessível via busca web)?
-        ✓ As tecnologias AI são específicas e em inglês?
-        ✓ Os dados de funding são consistentes e verificados?
-
-        VERIFICAÇÃO CRÍTICA DE WEBSITE:
-        - TESTAR o website na busca web antes de incluir
-        - Se o site retornar erro 404, não funcionar ou não existir → EXCLUIR startup
-        - Apenas incluir startups cujo website está comprovadamente ativo
-        - Website válido é OBRIGATÓRIO para inclusão
-
-        ETAPA 2 - Filtro Rigoroso:
-        - REMOVER startups que falhem em qualquer critério acima
-        - REMOVER startups cujo negócio principal não seja 100% do setor solicitado
-        - REMOVER startups com incoerência nome-descrição
-        - Se todas as startups foram removidas, retornar array vazio []
-
-        ETAPA 3 - Formatação Final:
-        - Campo 'sector': usar EXATAMENTE "{state.get('sector', 'AI/Technology')}"
-        - Campo 'description': SEMPRE em português brasileiro (pt-BR), descrever APENAS a startup mencionada no campo 'name'
-        - Campo 'ai_technologies': APENAS em inglês, tecnologias específicas
-        """
+        rendered_prompt = DISCOVERY_PROMPT.build(
+            limit=state['limit'],
+            geographic_context=geographic_context,
+            search_id=current_time,
+            sector=state.get('sector') or '',
+            search_query=search_query,
+            exclusion_text=exclusion_text,
+            sector_constraint=textwrap.dedent(sector_constraint),
+            sector_label=state.get('sector') or 'AI/Technology',
+            country_label=state.get('country') or 'Global'
+        )
+        prompt = rendered_prompt.text
+        estimated_prompt_tokens = rendered_prompt.tokens + count_static_tokens(WEBSEARCH_SYSTEM_PROMPT)
+        logger.info("Prompt de discovery: ~%d tokens (orçamento %d, removidas: %s)",
+                    estimated_prompt_tokens, rendered_prompt.budget, rendered_prompt.dropped)
 
         try:
-            logger.info(f"=== INICIANDO DISCOVERY AGENT === - Limite: {state['limit']}")
-            logger.info(f"Prompt enviado (primeiros 300 chars): {prompt[:300]}...")
-            result = self._make_openai_request_with_websearch(prompt)
-            logger.info(f"=== RESULTADO RECEBIDO: {result} ===")
+            logger.info("Discovery agent iniciado - limite: %d", state['limit'])
+            log_payload(logger, "Prompt de discovery", prompt)
+            result = self._make_openai_request_with_websearch(prompt, prompt_tokens=estimated_prompt_tokens,
+                                                              deadline=Deadline.at(state.get("deadline_at")),
+                                                              output_model=DiscoveryOutput)
+            log_payload(logger, "Resultado do discovery", result)
+            self._record_token_usage(state, "discovery", usage_from_response(result, estimated_prompt_tokens))
 
             if "error" in result:
-                logger.error(f"Erro encontrado no resultado: {result['error']}")
+                logger.error("Erro no discovery: %s", result['error'])
                 state["errors"].append(f"Discovery error: {result['error']}")
                 state["discovered_startups"] = []
                 return state
 
             # Parse JSON response
-            logger.info(f"=== INICIANDO PARSE JSON ===")
             content = result.get("content", "")
-            logger.info(f"=== CONTENT ORIGINAL: '{content}' ===")
             content = content.strip() if content else ""
-            logger.info(f"Conteúdo bruto recebido: {content[:200]}...")
-            logger.info(f"Tamanho do conteúdo: {len(content)}")
+            logger.debug("Conteúdo do discovery: %d chars", len(content))
 
             if not content:
                 logger.error("Conteúdo vazio recebido da API!")
@@ -394,55 +296,23 @@ class StartupOrchestrator:
                 state["discovered_startups"] = []
                 return state
 
-            # Extrair JSON do conteúdo mais agressivamente
-            original_content = content
-
-            # Remover markdown se existir
-            if "```json" in content:
-                json_start = content.find("```json") + len("```json")
-                json_end = content.find("```", json_start)
-                if json_end != -1:
-                    content = content[json_start:json_end].strip()
-                else:
-                    content = content[json_start:].strip()
-            elif "```" in content:
-                json_start = content.find("```") + 3
-                json_end = content.find("```", json_start)
-                if json_end != -1:
-                    content = content[json_start:json_end].strip()
-                else:
-                    content = content[json_start:].strip()
-
-            # Se ainda não é JSON, tentar encontrar array no texto
-            if not content.strip().startswith('['):
-                # Procurar por array JSON no meio do texto
-                import re
-                json_match = re.search(r'\[.*?\]', content, re.DOTALL)
-                if json_match:
-                    content = json_match.group(0)
-                else:
-                    logger.error(f"Nenhum JSON array encontrado no conteúdo")
-                    logger.error(f"Conteúdo original completo: {original_content}")
-                    # Se não encontrar JSON, retornar array vazio
-                    state["discovered_startups"] = []
-                    state["errors"].append("Modelo retornou formato inválido - não JSON")
-                    return state
-
-            logger.info(f"JSON extraído: {content[:200]}...")
-
-            if not content:
-                logger.error("Conteúdo vazio após limpeza de markdown!")
-                state["errors"].append("Conteúdo vazio após limpeza")
+            # Structured output: validação direta no schema (extrator tolerante só como fallback)
+            parsed, parse_error = parse_output(content, DiscoveryOutput, repair=True)
+            if parsed is None:
+                logger.error("Discovery com resposta inválida: %s", parse_error)
+                log_payload(logger, "Conteúdo inválido", content)
                 state["discovered_startups"] = []
+                state["errors"].append(f"Modelo retornou formato inválido ({parse_error})")
                 return state
 
-            # Corrigir underscores em números para evitar erro de JSON
-            import re
-            content = re.sub(r'"last_funding_amount":\s*(\d+)_(\d+)', r'"last_funding_amount": \1\2', content)
-            content = re.sub(r':(\s*)(\d+)_(\d+)', r':\1\2\3', content)
-            logger.info(f"JSON corrigido (primeiros 200 chars): {content[:200]}...")
+            startups = [startup.model_dump() for startup in parsed.startups]
 
-            startups = json.loads(content)
+            # Pós-filtro exato: descartar startups já conhecidas (inclusive as fora do subconjunto do prompt)
+            startups, excluded_names = exclusion_index.filter(startups)
+            state["excluded_count"] = state.get("excluded_count", 0) + len(excluded_names)
+            if excluded_names:
+                logger.info("Exclusão local: %d startups já conhecidas descartadas", len(excluded_names))
+                logger.debug("Descartadas: %s", excluded_names)
 
             # FILTRO DUPLO: Remover startups SEM VC e SETOR ERRADO
             original_count = len(startups)
@@ -468,9 +338,7 @@ class StartupOrchestrator:
 
                     if not sector_match:
                         sector_ok = False
-                        logger.warning(f"SETOR ERRADO: {startup_name} ({startup_sector}) descartada - esperado {expected_sector}")
-                    else:
-                        logger.info(f"SETOR OK: {startup_name} ({startup_sector}) aprovado para {expected_sector}")
+                        logger.debug("Setor errado: %s (%s) - esperado %s", startup_name, startup_sector, expected_sector)
 
                 # FILTRO 2: Verificar apenas VC (setor fica para o validation_agent)
                 vc_ok = (
@@ -483,14 +351,14 @@ class StartupOrchestrator:
                 # APENAS incluir se passou nos dois filtros (setor + VC)
                 if sector_ok and vc_ok:
                     filtered_startups.append(startup)
-                    logger.info(f"APROVADA: {startup_name} - Setor: {startup_sector} - VC: {investor_names} - ${funding_amount:,}")
+                    logger.debug("Aprovada: %s - setor: %s - VC: %s - $%s", startup_name, startup_sector, investor_names, funding_amount)
                 elif not sector_ok:
-                    logger.warning(f"REJEITADA POR SETOR: {startup_name}")
+                    logger.info("Rejeitada por setor: %s", startup_name)
                 else:
-                    logger.warning(f"REJEITADA SEM VC: {startup_name}")
+                    logger.info("Rejeitada sem VC: %s", startup_name)
 
             startups = filtered_startups
-            logger.info(f"=== FILTRO DUPLO: {original_count} -> {len(startups)} startups (setor + VC, validation_agent fará segunda validação) ===")
+            logger.info("Filtro setor + VC: %d -> %d startups", original_count, len(startups))
 
             # Garantir limite
             if len(startups) > state['limit']:
@@ -499,53 +367,169 @@ class StartupOrchestrator:
             state["discovered_startups"] = startups
             state["total_tokens"] += result.get("tokens_used", 0)
 
-            logger.info(f"Discovery agent encontrou {len(startups)} startups via WebSearch")
+            logger.info("Discovery agent encontrou %d startups via WebSearch", len(startups))
 
-        except json.JSONDecodeError as e:
-            error_msg = f"JSON parse error in discovery: {str(e)}"
-            logger.error(f"=== JSON DECODE ERROR ===")
-            logger.error(f"Erro: {str(e)}")
-            logger.error(f"Content que causou erro: '{content if 'content' in locals() else 'CONTENT_NAO_DEFINIDO'}'")
-            logger.error(f"Result completo: {result if 'result' in locals() else 'RESULT_NAO_DEFINIDO'}")
-            state["errors"].append(error_msg)
-            state["discovered_startups"] = []
         except Exception as e:
             error_msg = f"Discovery agent error: {str(e)}"
-            logger.error(f"=== EXCEPTION GERAL ===")
-            logger.error(f"Erro: {str(e)}")
-            logger.error(f"Tipo do erro: {type(e)}")
+            logger.exception("Erro no discovery agent: %s", e)
             state["errors"].append(error_msg)
             state["discovered_startups"] = []
 
         return state
 
-    def _make_openai_request_with_websearch(self, prompt: str, max_tokens: int = 2500) -> Dict[str, Any]:
-        """Fazer requisição OpenAI usando Chat Completions API com gpt-4o-mini padrão"""
+    def _sharded_discovery(self, state: OrchestrationState) -> OrchestrationState:
+        """Discovery em shards: planeja setores/países, busca cada shard em paralelo e mescla sem duplicatas"""
+        journal = StepJournal(state.get("task_id"))
+        completed_steps = journal.load("discovery")
+        deadline = Deadline.at(state.get("deadline_at"))
+
+        shards = completed_steps.get("plan")
+        if shards is None:
+            shards = self._plan_discovery_shards(state, min(DISCOVERY_MAX_SHARDS, state["limit"]), deadline)
+            journal.record("discovery", "plan", shards)
+
+        # Cota por shard com folga para o filtro de VC/setor e a deduplicação entre shards
+        quota = math.ceil(state["limit"] / len(shards))
+        shard_limit = max(1, math.ceil(quota * DISCOVERY_SHARD_OVERFETCH))
+        logger.info("Discovery em %d shards (%d startups cada): %s", len(shards), shard_limit,
+                    [f"{shard['country'] or 'Global'}/{shard['sector'] or 'todos'}" for shard in shards])
+
+        def discover_shard(shard: Dict[str, Any]) -> Dict[str, Any]:
+            step_key = f"shard:{shard['country'] or ''}:{shard['sector'] or ''}"
+            if step_key in completed_steps:
+                return completed_steps[step_key]
+
+            # State próprio por shard (threads não compartilham listas mutáveis)
+            shard_state = {
+                **state,
+                "country": shard["country"],
+                "sector": shard["sector"],
+                "search_strategy": "specific",
+                "limit": shard_limit,
+                "discovered_startups": [],
+                "total_tokens": 0,
+                "token_usage": {},
+                "excluded_count": 0,
+                "errors": []
+            }
+            exclusion_index = build_exclusion_index(
+                shard["country"], shard["sector"],
+                state.get("valid_startups", []), state.get("known_invalid_startups", [])
+            )
+            with tracing.span("discovery.shard", kind="shard", country=shard["country"], sector=shard["sector"]) as span:
+                self._discover(shard_state, exclusion_index)
+                span.set(discovered=len(shard_state["discovered_startups"]), errors=len(shard_state["errors"]))
+            result = {key: shard_state[key] for key in
+                      ("discovered_startups", "total_tokens", "token_usage", "excluded_count", "errors")}
+            # Shard que falhou não vai ao journal: é repetido numa retomada
+            if not result["errors"]:
+                journal.record("discovery", step_key, result)
+            return result
+
+        with ThreadPoolExecutor(max_workers=max(1, min(DISCOVERY_SHARD_WORKERS, len(shards)))) as executor:
+            results = list(executor.map(tracing.propagate(discover_shard), shards))
+
+        for shard, result in zip(shards, results):
+            label = f"{shard['country'] or 'Global'}/{shard['sector'] or 'todos'}"
+            state["total_tokens"] += result["total_tokens"]
+            state["excluded_count"] = state.get("excluded_count", 0) + result["excluded_count"]
+            state["errors"].extend(f"[{label}] {error}" for error in result["errors"])
+            for node, usage in result["token_usage"].items():
+                node_usage = state.setdefault("token_usage", {}).setdefault(node, {
+                    "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "estimated_prompt_tokens": 0
+                })
+                for key, value in usage.items():
+                    node_usage[key] = node_usage.get(key, 0) + value
+
+        startups, duplicates = self._merge_shard_results([r["discovered_startups"] for r in results], state["limit"])
+        if duplicates:
+            logger.info("Discovery em shards: %d duplicatas entre shards descartadas", len(duplicates))
+        state["discovered_startups"] = startups
+        logger.info("Discovery em shards encontrou %d startups", len(startups))
+        return state
+
+    def _plan_discovery_shards(self, state: OrchestrationState, max_shards: int,
+                               deadline: Deadline = None) -> List[Dict[str, Any]]:
+        """Escolhe os shards (país, setor) do discovery; sem resposta válida do LLM usa a lista padrão"""
+        fixed_country = state.get("country") if state.get("search_strategy") == "market_demand" else None
+        if fixed_country:
+            scope = f"em {fixed_country}"
+            country_rule = f'country = "{fixed_country}" em todos os recortes; varie apenas o setor'
+        else:
+            scope = "globalmente, priorizando América Latina"
+            country_rule = "Varie país e setor; priorize países da América Latina"
+
+        rendered_prompt = DISCOVERY_PLAN_PROMPT.build(
+            max_shards=max_shards,
+            scope=scope,
+            country_rule=country_rule,
+            known_sectors=", ".join(DEFAULT_SHARD_SECTORS)
+        )
+        result = self._make_openai_request(rendered_prompt.text, max_tokens=400, prompt_tokens=rendered_prompt.tokens,
+                                           deadline=deadline, call_type="discovery_plan",
+                                           output_model=DiscoveryPlanOutput)
+
+        shards = []
+        if "error" in result:
+            logger.warning("Erro ao planejar shards do discovery: %s", result["error"])
+        else:
+            self._record_token_usage(state, "discovery_plan", usage_from_response(result, rendered_prompt.tokens))
+            state["total_tokens"] += result.get("tokens_used", 0)
+            parsed, parse_error = parse_output(result.get("content", ""), DiscoveryPlanOutput, repair=True)
+            if parsed is None:
+                logger.warning("Plano de shards inválido: %s", parse_error)
+            else:
+                seen = set()
+                for shard in parsed.shards:
+                    country = fixed_country or shard.country.strip()
+                    sector = shard.sector.strip()
+                    key = (country.lower(), sector.lower())
+                    if country and sector and key not in seen:
+                        seen.add(key)
+                        shards.append({"country": country, "sector": sector})
+                shards = shards[:max_shards]
+
+        if len(shards) < 2:
+            # Fallback: setores conhecidos no país pedido, ou países da região sem setor fixo
+            if fixed_country:
+                shards = [{"country": fixed_country, "sector": sector} for sector in DEFAULT_SHARD_SECTORS[:max_shards]]
+            else:
+                shards = [{"country": country, "sector": None} for country in DEFAULT_SHARD_COUNTRIES[:max_shards]]
+            logger.info("Usando shards padrão do discovery")
+        return shards
+
+    def _merge_shard_results(self, shard_startups: List[List[Dict[str, Any]]], limit: int):
+        """Intercala os shards (round-robin, para diversificar) descartando a mesma startup vinda de shards diferentes"""
+        queues = [deque(startups) for startups in shard_startups]
+        seen_names, seen_domains = set(), set()
+        merged, duplicates = [], []
+
+        while len(merged) < limit and any(queues):
+            for queue in queues:
+                if not queue or len(merged) >= limit:
+                    continue
+                startup = queue.popleft()
+                name = normalize_name(startup.get("name"))
+                domain = normalize_domain(startup.get("website"))
+                if (name and name in seen_names) or (domain and domain in seen_domains):
+                    duplicates.append(startup.get("name", "N/A"))
+                    continue
+                seen_names.add(name)
+                if domain:
+                    seen_domains.add(domain)
+                merged.append(startup)
+
+        return merged, duplicates
+
+    def _make_openai_request_with_websearch(self, prompt: str, max_tokens: int = 2500, prompt_tokens: int = None,
+                                            deadline: Deadline = None, output_model: Type[BaseModel] = None) -> Dict[str, Any]:
+        """Fazer requisição OpenAI usando Responses API + WebSearch (structured output quando output_model é informado)"""
 
         # Usar Responses API corretamente com gpt-4o-mini + web_search_preview
         payload = {
             "model": self.model,  # gpt-4o-mini padrão
             "input": [
-                {"role": "system", "content": """ESPECIALISTA EM IDENTIFICAÇÃO RIGOROSA DE STARTUPS POR SETOR E PAÍS
-
-REGRA CRÍTICA - ZERO TOLERÂNCIA:
-- Se busca setor "Agro" → APENAS empresas cujo CORE BUSINESS é agricultura, pecuária, biotecnologia agrícola
-- Se encontrar Magie (fintech) → REJEITAR (é fintech, não agro)
-- Se encontrar Capim (fintech odontológico) → REJEITAR (é fintech health, não agro)
-- Se encontrar qualquer fintech/healthtech → REJEITAR COMPLETAMENTE
-
-DEFINIÇÕES ESPECÍFICAS:
-- AGRO = agricultura, pecuária, agrotecnologia, biotecnologia agrícola, equipamentos agrícolas
-- FINTECH = pagamentos, crédito, empréstimos, cartões, PIX (NUNCA é agro)
-- HEALTHTECH = saúde, medicina, odontologia (NUNCA é agro)
-
-OBRIGATÓRIO:
-1. Use web search para identificar CORE BUSINESS real
-2. Se a empresa faz pagamentos/crédito → É FINTECH (rejeitar se busca agro)
-3. Se a empresa faz saúde/odonto → É HEALTHTECH (rejeitar se busca agro)
-4. APENAS incluir se for 100% do setor solicitado
-
-RESPOSTA: JSON array apenas."""},
+                {"role": "system", "content": WEBSEARCH_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             "tools": [
@@ -556,48 +540,31 @@ RESPOSTA: JSON array apenas."""},
             "temperature": 0.7,  # Alta temperatura para mais diversidade e menos repetição
             "max_output_tokens": max_tokens
         }
+        if output_model is not None:
+            payload["text"] = responses_text_format(output_model)
 
         try:
-            logger.info(f"Fazendo requisição WebSearch com modelo: {self.model}")
-            logger.info(f"Payload enviado: {json.dumps(payload, indent=2)}")
+            logger.info("Requisição WebSearch com modelo %s", self.model)
+            log_payload(logger, "Payload WebSearch", payload)
 
-            response = requests.post(
+            response = post_with_retry(
                 self.responses_url,  # Usar Responses API corretamente
                 headers=self.headers,
-                json=payload,
-                timeout=120  # Timeout maior para WebSearch
+                payload=payload,
+                timeout=120,  # Timeout maior para WebSearch (limitado pelo deadline da task)
+                estimated_tokens=(prompt_tokens or count_tokens(prompt)) + max_tokens,
+                call_type="websearch",
+                deadline=deadline
             )
 
-            logger.info(f"Status da resposta: {response.status_code}")
-            logger.info(f"Headers da resposta: {dict(response.headers)}")
-
-            # Log da resposta bruta para debug
-            response_text = response.text
-            logger.info(f"Resposta bruta (primeiros 500 chars): {response_text[:500]}")
+            logger.info("WebSearch status %d", response.status_code)
 
             if response.status_code == 200:
                 result = response.json()
-                logger.info(f"WebSearch concluído com sucesso usando {self.model}")
-
-                # Log detalhado da estrutura da resposta
-                logger.info(f"=== ESTRUTURA COMPLETA DA RESPOSTA ===")
-                logger.info(f"Keys disponíveis: {list(result.keys())}")
-                logger.info(f"Resposta completa (primeiros 500 chars): {str(result)[:500]}")
-
-                if "choices" in result and result["choices"]:
-                    logger.info(f"Choices disponíveis: {len(result['choices'])}")
-                    message_content = result["choices"][0]["message"]["content"]
-                    logger.info(f"Conteúdo da mensagem (primeiros 200 chars): {message_content[:200] if message_content else 'VAZIO'}")
-                elif "output" in result:
-                    logger.info(f"Output encontrado - tipo: {type(result['output'])}")
-                    logger.info(f"Output (primeiros 200 chars): {str(result['output'])[:200]}")
-                else:
-                    logger.error("Nem choices nem output encontrados na resposta!")
-                    logger.error(f"Estrutura recebida: {result}")
+                log_payload(logger, "Resposta WebSearch", result)
 
-                # DEBUG: Estrutura básica para confirmar recebimento
-                logger.info(f"Status da resposta: {result.get('status')}")
-                logger.info(f"Outputs recebidos: {len(result.get('output', []))}")
+                if not result.get("output"):
+                    logger.error("Resposta WebSearch sem 'output' (keys: %s)", list(result.keys()))
 
                 # Responses API - estrutura real baseada nos logs
                 content = ""
@@ -611,24 +578,26 @@ RESPOSTA: JSON array apenas."""},
                             content = message_output["content"][0].get("text", "")
                             annotations = message_output["content"][0].get("annotations", [])
                 except Exception as e:
-                    logger.error(f"Erro ao extrair da estrutura real: {e}")
+                    logger.error("Erro ao extrair conteúdo da resposta WebSearch: %s", e)
                     content = ""
 
-                logger.info(f"Content extraído via output_text: {content[:200] if content else 'VAZIO'}...")
-                logger.info(f"Annotations encontradas: {len(annotations)}")
+                logger.debug("WebSearch: %d chars de conteúdo, %d annotations", len(content), len(annotations))
 
+                usage = result.get("usage", {})
                 return {
                     "content": content,
                     "annotations": annotations,
-                    "tokens_used": result.get("usage", {}).get("total_tokens", 0)
+                    "tokens_used": usage.get("total_tokens", 0),
+                    "prompt_tokens": usage.get("input_tokens", 0),
+                    "completion_tokens": usage.get("output_tokens", 0)
                 }
             else:
                 error_text = response.text[:500]
-                logger.error(f"Erro WebSearch {response.status_code}: {error_text}")
+                logger.error("Erro WebSearch %d: %s", response.status_code, error_text)
                 return {"error": f"WebSearch API Error: {response.status_code} - {error_text}"}
 
         except Exception as e:
-            logger.error(f"Exceção na requisição WebSearch: {str(e)}")
+            logger.error("Exceção na requisição WebSearch: %s", str(e))
             return {"error": f"WebSearch Request error: {str(e)}"}
 
     def _get_sector_keywords(self, sector: str) -> str:
@@ -645,255 +614,108 @@ RESPOSTA: JSON array apenas."""},
         }
         return sector_map.get(sector, "technology AI artificial intelligence")
 
-    def _get_context_exclusions(self, state: OrchestrationState) -> list:
-        """ISOLAMENTO DE CONTEXTO: Usa APENAS startups do contexto passado, nunca do banco"""
-        exclusions = []
-
-        # Adicionar startups válidas do contexto (já filtradas por setor no agent_service)
-        for startup in state.get('valid_startups', []):
-            if isinstance(startup, dict) and startup.get('name'):
-                exclusions.append((startup['name'], state.get('sector', 'Unknown')))
-
-        # Adicionar startups inválidas do contexto
-        for startup in state.get('invalid_startups', []):
-            if isinstance(startup, dict) and startup.get('name'):
-                exclusions.append((startup['name'], state.get('sector', 'Unknown')))
-
-        logger.info(f"EXCLUSION CONTEXT: {len(exclusions)} startups para excluir do setor {state.get('sector')}")
-        return exclusions
-
     def _get_existing_startups(self, state: OrchestrationState) -> list:
         """MÉTODO DEPRECIADO - NÃO USAR PARA EVITAR CONTAMINAÇÃO DE CONTEXTO"""
-        logger.warning(f"Método _get_existing_startups foi chamado para setor {state.get('sector')} - ISSO PODE CAUSAR CONTAMINAÇÃO!")
+        logger.warning("Método _get_existing_startups foi chamado para setor %s - ISSO PODE CAUSAR CONTAMINAÇÃO!", state.get('sector'))
         return []
 
-    def _format_exclusion_list(self, existing_startups: list, sector: str = None) -> str:
-        """Formata lista de exclusão para o prompt - APENAS para evitar redescoberta"""
-        if not existing_startups:
-            return ""
-
-        if sector:
-            # Filtrar apenas startups do mesmo setor por NOME EXATO
-            sector_startups = [name for name, startup_sector in existing_startups
-                             if startup_sector and startup_sector.lower() == sector.lower()]
-
-            if sector_startups:
-                startup_list = "\n".join([f"- {name}" for name in sector_startups[:10]])  # Limitar a 10
-                return f"""
-        EVITAR REDESCOBERTA - STARTUPS JÁ CADASTRADAS NO SETOR {sector.upper()}:
-        As seguintes startups JÁ ESTÃO no banco de dados:
-        {startup_list}
-
-        IMPORTANTE: NÃO descobrir novamente essas startups que já existem.
-        Busque APENAS startups DIFERENTES e NOVAS que não estão nesta lista.
-        Foque em encontrar outras startups do setor que ainda não foram descobertas.
-        """
-        else:
-            # Para busca sem setor específico, mostrar todas por setor
-            by_sector = {}
-            for name, startup_sector in existing_startups:
-                sector_key = startup_sector or "Outros"
-                if sector_key not in by_sector:
-                    by_sector[sector_key] = []
-                by_sector[sector_key].append(name)
-
-            exclusion_text = "EXCLUSÃO OBRIGATÓRIA - STARTUPS JÁ CADASTRADAS:\n"
-            for sector_name, names in by_sector.items():
-                limited_names = names[:10]  # Limitar a 10 por setor
-                startup_list = "\n".join([f"  - {name}" for name in limited_names])
-                exclusion_text += f"\n{sector_name}:\n{startup_list}\n"
-
-            exclusion_text += "\nIMPORTANTE: NÃO BUSCAR nenhuma dessas startups. Busque APENAS startups NOVAS."
-            return exclusion_text
-
-        return ""
-
 
     def _source_validation_agent(self, state: OrchestrationState) -> OrchestrationState:
         """Agente para validar fontes confiáveis de funding e investidores"""
         state["current_step"] = "source_validation"
         all_startups = []
 
-        for startup in state.get("discovered_startups", []):
-            source_validation = self._validate_startup_sources(startup)
+        discovered = state.get("discovered_startups", [])
+        # Lote inteiro em uma passada pelo índice de reputação
+        validations = source_reputation.get_index().score_startups(discovered)
+
+        for startup, source_validation in zip(discovered, validations):
             startup["source_validation"] = source_validation
 
             # SEMPRE manter a startup, independente da confiabilidade das fontes
             all_startups.append(startup)
 
             if source_validation["is_reliable"]:
-                logger.info(f"Fontes validadas para {startup['name']}: {source_validation['reliability_score']:.1f}%")
+                logger.info("Fontes validadas para %s: %.1f%%", startup['name'], source_validation['reliability_score'])
             else:
-                logger.info(f"Fontes não confiáveis para {startup['name']}: {source_validation['issues']} - mantendo startup")
+                logger.info("Fontes não confiáveis para %s: %s - mantendo startup", startup['name'], source_validation['issues'])
 
         state["discovered_startups"] = all_startups
         reliable_count = len([s for s in all_startups if s.get("source_validation", {}).get("is_reliable", False)])
-        logger.info(f"Source validation: {len(all_startups)} startups processadas ({reliable_count} com fontes confiáveis)")
+        logger.info("Source validation: %s startups processadas (%s com fontes confiáveis)", len(all_startups), reliable_count)
 
         return state
 
     def _validate_startup_sources(self, startup: Dict[str, Any]) -> Dict[str, Any]:
         """Validar se as fontes fornecidas são confiáveis"""
-
-        # Verificação de tipo para evitar erro quando startup vem como string
-        if isinstance(startup, str):
-            logger.error(f"Startup veio como string ao invés de dict: {startup}")
-            return {
-                "is_reliable": False,
-                "reliability_score": 0,
-                "issues": ["Formato de dados inválido"]
-            }
-
-        sources = startup.get("sources", {})
-
-        # PROTEÇÃO: Verificar se sources é dict (pode vir como lista por erro)
-        if isinstance(sources, list):
-            logger.warning(f"Sources veio como lista para {startup.get('name')}: {sources}")
-            sources = {}  # Converter para dict vazio se vier como lista
-        elif not isinstance(sources, dict):
-            logger.warning(f"Sources tem tipo incorreto para {startup.get('name')}: {type(sources)}")
-            sources = {}
-
-        reliability_score = 0
-        issues = []
-        validated_sources = {}
-
-        # Fontes confiáveis conhecidas com weights (hierarquia de confiabilidade)
-        trusted_sources = {
-            # Bases de dados profissionais (peso máximo)
-            "crunchbase": 30, "pitchbook": 30, "angellist": 25,
-
-            # Mídia especializada internacional (peso alto)
-            "techcrunch": 20, "venturebeat": 18, "bloomberg": 18, "forbes": 18,
-
-            # Mídia brasileira confiável (peso alto)
-            "neofeed": 25, "brasiljorney": 22, "startup.com.br": 20,
-            "valor econômico": 18, "exame": 15, "folha": 15, "estadão": 15,
-
-            # Organizações e hubs de startups brasileiros (peso médio-alto)
-            "abstartups": 15, "distrito": 15, "startupi": 12, "baguete": 12,
-            "startse": 12, "ecommercebrasil": 10, "tecmundo": 10,
-
-            # Fontes setoriais especializadas (peso médio)
-            "setortech": 12, "industrytech": 10, "sectorbusiness": 10,
-
-            # Sites oficiais e comunicados (peso médio)
-            "site oficial": 12, "press release": 10, "linkedin company": 10,
-            "comunicado oficial": 12, "portal da transparência": 15
-        }
-
-        # Validar funding sources
-        funding_sources = sources.get("funding", [])
-        funding_score = 0
-
-        for source in funding_sources:
-            source_lower = source.lower()
-            for trusted, weight in trusted_sources.items():
-                if trusted in source_lower:
-                    funding_score += weight
-                    break
-            else:
-                issues.append(f"Fonte de funding não reconhecida: {source}")
-
-        validated_sources["funding"] = funding_sources
-        funding_score = min(funding_score, 50)  # Máximo 50 pontos para funding
-
-        # Validar investor sources
-        investor_sources = sources.get("investors", [])
-        investor_score = 0
-
-        for source in investor_sources:
-            source_lower = source.lower()
-            for trusted, weight in trusted_sources.items():
-                if trusted in source_lower:
-                    investor_score += weight
-                    break
-            else:
-                issues.append(f"Fonte de investidores não reconhecida: {source}")
-
-        validated_sources["investors"] = investor_sources
-        investor_score = min(investor_score, 30)  # Máximo 30 pontos para investors
-
-        # Validar validation sources
-        validation_sources = sources.get("validation", [])
-        validation_score = 0
-
-        for source in validation_sources:
-            source_lower = source.lower()
-            for trusted, weight in trusted_sources.items():
-                if trusted in source_lower:
-                    validation_score += weight
-                    break
-
-        validated_sources["validation"] = validation_sources
-        validation_score = min(validation_score, 20)  # Máximo 20 pontos para validation
-
-        # Score final
-        reliability_score = funding_score + investor_score + validation_score
-
-        # Critérios para ser considerado confiável
-        is_reliable = (
-            reliability_score >= 40 and  # Score mínimo de 40%
-            len(funding_sources) >= 1 and  # Pelo menos 1 fonte de funding
-            funding_score >= 15  # Pelo menos 15 pontos em funding sources
-        )
-
-        return {
-            "is_reliable": is_reliable,
-            "reliability_score": reliability_score,
-            "funding_score": funding_score,
-            "investor_score": investor_score,
-            "validation_score": validation_score,
-            "validated_sources": validated_sources,
-            "issues": issues,
-            "recommendation": "ACCEPT" if is_reliable else "INVESTIGATE_SOURCES"
-        }
+        return source_reputation.get_index().score_startups([startup])[0]
 
     def _validation_agent(self, state: OrchestrationState) -> OrchestrationState:
         """Agente de validação com insights detalhados"""
         state["current_step"] = "validation"
         validated_startups = []
+        journal = StepJournal(state.get("task_id"))
+        completed_steps = journal.load("validation")
+
+        for i, startup in enumerate(state.get("discovered_startups", [])):
+            with tracing.span("startup.validate", kind="startup", startup=startup.get("name")) as span:
+                step_key = f"{i}:{startup.get('name')}"
+                step = completed_steps.get(step_key)
+                if step is not None:
+                    logger.info("Validação de %s recuperada do journal", startup.get("name"))
+                    validation_result = step["validation_result"]
+                else:
+                    validation_result = self._validate_startup_thoroughly(startup, state)
 
-        for startup in state.get("discovered_startups", []):
-            validation_result = self._validate_startup_thoroughly(startup, state)
-
-            # Se website não é válido, marcar como "Não encontrado"
-            if not validation_result.get("website_valid", True):
-                startup["website"] = "Não encontrado"
-
-            # SEMPRE salvar startup, mas marcar se é válida ou inválida
-            startup["validation"] = validation_result
-            startup["is_valid"] = validation_result["is_valid"]
-
-            if validation_result["is_valid"]:
-                validated_startups.append(startup)
-            else:
-                # Gerar insight detalhado do porque é inválida
-                validation_insight = self._generate_validation_insight(startup, validation_result)
-
-                invalid_startup = {
-                    "name": startup["name"],
-                    "website": startup.get("website"),
-                    "sector": startup.get("sector"),
-                    "reason": validation_result.get("reason", "Validation failed"),
-                    "issues": validation_result.get("issues", []),
-                    "validation_insight": validation_insight["insight"],
-                    "confidence_level": validation_insight["confidence"],
-                    "recommendation": validation_insight["recommendation"],
-                    "full_validation_data": validation_result
-                }
+                # Se website não é válido, marcar como "Não encontrado"
+                if not validation_result.get("website_valid", True):
+                    startup["website"] = "Não encontrado"
 
-                if "invalid_startups" not in state:
-                    state["invalid_startups"] = []
-                state["invalid_startups"].append(invalid_startup)
+                # SEMPRE salvar startup, mas marcar se é válida ou inválida
+                startup["validation"] = validation_result
+                startup["is_valid"] = validation_result["is_valid"]
 
-                # Adicionar tokens usados na geração do insight
-                state["total_tokens"] += validation_insight.get("tokens_used", 0)
+                if validation_result["is_valid"]:
+                    validated_startups.append(startup)
+                else:
+                    # Gerar insight detalhado do porque é inválida
+                    if step is not None and step.get("validation_insight"):
+                        validation_insight = step["validation_insight"]
+                    else:
+                        validation_insight = self._generate_validation_insight(startup, validation_result,
+                                                                               deadline=Deadline.at(state.get("deadline_at")))
+
+                    invalid_startup = {
+                        "name": startup["name"],
+                        "website": startup.get("website"),
+                        "sector": startup.get("sector"),
+                        "reason": validation_result.get("reason", "Validation failed"),
+                        "issues": validation_result.get("issues", []),
+                        "validation_insight": validation_insight["insight"],
+                        "confidence_level": validation_insight["confidence"],
+                        "recommendation": validation_insight["recommendation"],
+                        "full_validation_data": validation_result
+                    }
+
+                    if "invalid_startups" not in state:
+                        state["invalid_startups"] = []
+                    state["invalid_startups"].append(invalid_startup)
+
+                    # Adicionar tokens usados na geração do insight
+                    state["total_tokens"] += validation_insight.get("tokens_used", 0)
+                    if validation_insight.get("usage"):
+                        self._record_token_usage(state, "validation", validation_insight["usage"])
+
+                if step is None:
+                    journal.record("validation", step_key, {
+                        "validation_result": validation_result,
+                        "validation_insight": None if validation_result["is_valid"] else validation_insight
+                    })
+                span.set(valid=bool(validation_result["is_valid"]), from_journal=step is not None)
 
         state["validated_startups"] = validated_startups
-        state["total_tokens"] += sum([s.get("validation", {}).get("tokens_used", 0) for s in validated_startups])
 
-        logger.info(f"Validation agent: {len(validated_startups)} válidas, {len(state.get('invalid_startups', []))} inválidas")
+        logger.info("Validation agent: %s válidas, %s inválidas", len(validated_startups), len(state.get('invalid_startups', [])))
 
         return state
 
@@ -901,25 +723,81 @@ RESPOSTA: JSON array apenas."""},
         """Agente de métricas e scoring"""
         state["current_step"] = "metrics"
         startup_metrics = []
+        validated = state.get("validated_startups", [])
+
+        # Scoring local vetorizado decide quem vale uma chamada ao LLM; o resto fica com o score local
+        llm_indices, local_indices = scoring_engine.top_k(validated, METRICS_LLM_TOP_K)
+        all_metrics: List[Dict[str, Any]] = [None] * len(validated)
+        if local_indices:
+            local_metrics = scoring_engine.score_startups(
+                [validated[i] for i in local_indices],
+                note=f"Fora do top {METRICS_LLM_TOP_K} do scoring local - LLM não consultado"
+            )
+            for i, metrics in zip(local_indices, local_metrics):
+                all_metrics[i] = metrics
+            logger.info("Metrics: %d startups pontuadas localmente, %d enviadas ao LLM", len(local_indices), len(llm_indices))
+
+        # Métricas já calculadas antes de uma interrupção não voltam ao LLM
+        journal = StepJournal(state.get("task_id"))
+        completed_steps = journal.load("metrics")
+        step_keys = {i: f"{i}:{validated[i].get('name')}" for i in llm_indices}
+        pending = []
+        for i in llm_indices:
+            if step_keys[i] in completed_steps:
+                all_metrics[i] = completed_steps[step_keys[i]]
+            else:
+                pending.append(i)
+        if len(pending) < len(llm_indices):
+            logger.info("Metrics: %d startups recuperadas do journal", len(llm_indices) - len(pending))
+
+        deadline = Deadline.at(state.get("deadline_at"))
+
+        def score(i: int) -> Dict[str, Any]:
+            with tracing.span("startup.metrics", kind="startup", startup=validated[i].get("name")) as span:
+                metrics = self._calculate_startup_metrics(validated[i], deadline)
+                span.set(total_score=metrics.get("total_score"))
+                # Fallback por falha do LLM não vai para o journal: uma retomada tenta de novo
+                if "error" not in metrics:
+                    journal.record("metrics", step_keys[i], metrics)
+            return metrics
+
+        # Chamadas em paralelo; o rate limiter global controla a vazão real
+        with ThreadPoolExecutor(max_workers=max(1, min(METRICS_WORKERS, len(pending) or 1))) as executor:
+            for i, metrics in zip(pending, executor.map(tracing.propagate(score), pending)):
+                all_metrics[i] = metrics
 
-        for startup in state.get("validated_startups", []):
-            metrics = self._calculate_startup_metrics(startup)
+        for startup, metrics in zip(validated, all_metrics):
             startup["metrics"] = metrics
             startup_metrics.append({
                 "startup": startup,
                 "metrics": metrics
             })
             state["total_tokens"] += metrics.get("tokens_used", 0)
+            if metrics.get("usage"):
+                self._record_token_usage(state, "metrics", metrics["usage"])
 
         # Ordenar por score total
         startup_metrics.sort(key=lambda x: x["metrics"]["total_score"], reverse=True)
 
         state["startup_metrics"] = startup_metrics
 
-        logger.info(f"Metrics agent processou {len(startup_metrics)} startups")
+        logger.info("Metrics agent processou %s startups", len(startup_metrics))
 
         return state
 
+    def _record_token_usage(self, state: OrchestrationState, node: str, usage: Dict[str, int]):
+        """Acumula tokens de prompt/completion (reais e estimados) por node"""
+        node_usage = state.setdefault("token_usage", {}).setdefault(node, {
+            "calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "estimated_prompt_tokens": 0
+        })
+        node_usage["calls"] += 1
+        node_usage["prompt_tokens"] += usage.get("prompt_tokens", 0)
+        node_usage["completion_tokens"] += usage.get("completion_tokens", 0)
+        node_usage["estimated_prompt_tokens"] += usage.get("estimated_prompt_tokens", 0)
+
     def _finalize_results(self, state: OrchestrationState) -> OrchestrationState:
         """Finalizar e estruturar resultados"""
         state["current_step"] = "completed"
@@ -928,7 +806,7 @@ RESPOSTA: JSON array apenas."""},
         if "processing_time" not in state:
             state["processing_time"] = 0.0
 
-        logger.info(f"Orquestração finalizada: {len(state.get('startup_metrics', []))} startups processadas")
+        logger.info("Orquestração finalizada: %s startups processadas", len(state.get('startup_metrics', [])))
 
         return state
 
@@ -939,7 +817,7 @@ RESPOSTA: JSON array apenas."""},
 
         # FIX: Handle case where startup might be a list instead of dict
         if isinstance(startup, list):
-            logger.warning(f"Startup data is unexpectedly a list: {startup}")
+            logger.warning("Startup data is unexpectedly a list: %s", startup)
             return {
                 "is_valid": False,
                 "confidence_score": 0,
@@ -969,14 +847,14 @@ RESPOSTA: JSON array apenas."""},
             if not sector_match:
                 issues.append(f"REJEITADA: Setor incorreto - esperado {expected_sector}, encontrado {startup_sector}")
                 validation_scores['sector_match_score'] = 0
-                logger.warning(f"SETOR INCORRETO: {startup_name} é {startup_sector}, mas busca era para {expected_sector}")
+                logger.warning("SETOR INCORRETO: %s é %s, mas busca era para %s", startup_name, startup_sector, expected_sector)
             elif keyword_matches < 2:  # Mínimo 2 keywords do setor na descrição
                 issues.append(f"REJEITADA: Descrição não condiz com setor {expected_sector}")
                 validation_scores['sector_match_score'] = 0
-                logger.warning(f"DESCRIÇÃO INCOMPATÍVEL: {startup_name} - apenas {keyword_matches} keywords de {expected_sector}")
+                logger.warning("DESCRIÇÃO INCOMPATÍVEL: %s - apenas %s keywords de %s", startup_name, keyword_matches, expected_sector)
             else:
                 validation_scores['sector_match_score'] = 100
-                logger.info(f"SETOR OK: {startup_name} - {expected_sector}")
+                logger.info("SETOR OK: %s - %s", startup_name, expected_sector)
 
         # Deixar o agente de IA fazer a validação de setor
 
@@ -1045,78 +923,52 @@ RESPOSTA: JSON array apenas."""},
             "tokens_used": 0
         }
 
-    def _generate_validation_insight(self, startup: Dict[str, Any], validation_result: Dict[str, Any]) -> Dict[str, Any]:
+    def _generate_validation_insight(self, startup: Dict[str, Any], validation_result: Dict[str, Any],
+                                     deadline: Deadline = None) -> Dict[str, Any]:
         """Gera insight detalhado sobre porque a startup foi invalidada"""
 
         # Otimização: Para casos simples de website inválido, usar insight padrão sem API
         issues = validation_result.get("issues", [])
         if len(issues) == 1 and any("Website" in issue or "website" in issue for issue in issues):
-            logger.info(f"Usando insight padrão para {startup.get('name')} - problema simples de website")
+            logger.info("Usando insight padrão para %s - problema simples de website", startup.get('name'))
             return self._default_validation_insight(validation_result)
 
         # Para casos mais complexos, usar IA
-        prompt = f"""
-        Analise porque esta startup foi marcada como INVÁLIDA e forneça insights acionáveis:
-
-        STARTUP: {startup.get('name')}
-        Website: {startup.get('website')}
-        Setor: {startup.get('sector')}
-        Tecnologias: {startup.get('ai_technologies')}
-        Funding: ${startup.get('last_funding_amount', 0):,}
-        Investidores: {startup.get('investor_names')}
-
-        RESULTADOS DA VALIDAÇÃO:
-        - Website funcionando: {'SIM' if validation_result.get('website_valid') else 'NÃO'}
-        - Score total: {validation_result.get('total_validation_score', 0):.1f}%
-        - Issues encontrados: {validation_result.get('issues', [])}
-
-        Forneça uma análise DETALHADA em JSON:
-        {{
-            "insight": "Explicação clara e detalhada dos problemas encontrados",
-            "confidence": 0.XX,
-            "main_issues": ["issue1", "issue2"],
-            "potential_fixes": ["como corrigir issue1", "como corrigir issue2"],
-            "recommendation": "REJECT/INVESTIGATE/MANUAL_REVIEW",
-            "analysis": {{
-                "website_analysis": "análise específica do website",
-                "funding_analysis": "análise das fontes de funding",
-                "existence_analysis": "análise da existência da empresa",
-                "data_quality": "qualidade geral dos dados fornecidos"
-            }}
-        }}
-        """
+        rendered_prompt = VALIDATION_INSIGHT_PROMPT.build(
+            name=startup.get('name'),
+            website=startup.get('website'),
+            sector=startup.get('sector'),
+            ai_technologies=startup.get('ai_technologies'),
+            funding_amount=startup.get('last_funding_amount') or 0,
+            investor_names=startup.get('investor_names'),
+            website_working='SIM' if validation_result.get('website_valid') else 'NÃO',
+            total_validation_score=validation_result.get('total_validation_score', 0),
+            issues=validation_result.get('issues', [])
+        )
+        prompt = rendered_prompt.text
 
         try:
-            result = self._make_openai_request(prompt, max_tokens=800)
+            result = self._make_openai_request(prompt, max_tokens=800, prompt_tokens=rendered_prompt.tokens,
+                                               deadline=deadline, call_type="validation_insight",
+                                               output_model=ValidationInsightOutput)
             if "error" in result:
-                logger.warning(f"API error no insight de validação: {result['error']}")
-                return self._default_validation_insight(validation_result)
-
-            content = result.get("content", "").strip()
-            if not content:
-                logger.warning("Conteúdo vazio recebido para insight de validação")
+                logger.warning("API error no insight de validação: %s", result['error'])
                 return self._default_validation_insight(validation_result)
 
-            # Limpar markdown se presente
-            if content.startswith("```json"):
-                content = content.replace("```json", "").replace("```", "").strip()
-            elif content.startswith("```"):
-                content = content.replace("```", "", 1).replace("```", "").strip()
-
-            if not content:
-                logger.warning("Conteúdo vazio após limpeza de markdown")
+            content = result.get("content", "")
+            parsed, parse_error = parse_output(content, ValidationInsightOutput, repair=True)
+            if parsed is None:
+                logger.warning("Resposta inválida no insight de validação: %s", parse_error)
+                log_payload(logger, "Content do insight de validação", content)
                 return self._default_validation_insight(validation_result)
 
-            insight_data = json.loads(content)
+            insight_data = parsed.model_dump()
             insight_data["tokens_used"] = result.get("tokens_used", 0)
+            insight_data["usage"] = usage_from_response(result, rendered_prompt.tokens)
             return insight_data
 
-        except json.JSONDecodeError as e:
-            logger.warning(f"JSON parsing falhou no insight de validação: {e}")
-            logger.warning(f"Content recebido: '{content if 'content' in locals() else 'CONTENT_NAO_DEFINIDO'}'")
-            return self._default_validation_insight(validation_result)
         except Exception as e:
-            logger.warning(f"Não foi possível gerar insight de validação: {e}")
+            logger.warning("Não foi possível gerar insight de validação: %s", e)
             return self._default_validation_insight(validation_result)
 
     def _default_validation_insight(self, validation_result: Dict[str, Any]) -> Dict[str, Any]:
@@ -1155,6 +1007,13 @@ RESPOSTA: JSON array apenas."""},
         if not url:
             return False
 
+        started = time.monotonic()
+        valid = self._probe_website(url)
+        WEBSITE_PROBE_DURATION.labels("ok" if valid else "unreachable").observe(time.monotonic() - started)
+        return valid
+
+    def _probe_website(self, url: str) -> bool:
+        """Tenta a URL original e as variações (normalizada, com https/http) até uma responder"""
         urls_to_try = [
             url,  # URL original
             self._normalize_url(url),  # URL normalizada
@@ -1170,18 +1029,21 @@ RESPOSTA: JSON array apenas."""},
             ])
 
         for test_url in urls_to_try:
+            span = tracing.start_span("website.probe", kind="http", url=test_url)
             try:
-                response = requests.get(test_url, timeout=8, allow_redirects=True)
+                response = cassette.get(test_url, timeout=8, allow_redirects=True)
+                span.end(status_code=response.status_code)
                 if response.status_code in [200, 301, 302]:
                     return True
-            except:
+            except Exception as e:
+                span.end(error=e)
                 continue
 
         return False
 
 
 
-    def _calculate_startup_metrics(self, startup: Dict[str, Any]) -> Dict[str, Any]:
+    def _calculate_startup_metrics(self, startup: Dict[str, Any], deadline: Deadline = None) -> Dict[str, Any]:
         """Calcular métricas de score para a startup"""
         # Garantir que valores não sejam None para evitar erro de formatação
         name = startup.get('name') or 'N/A'
@@ -1191,162 +1053,58 @@ RESPOSTA: JSON array apenas."""},
         investor_names = startup.get('investor_names') or 'N/A'
         country = startup.get('country') or 'N/A'
 
-        prompt = f"""
-        Analise esta startup validada e calcule scores de 0-100 para as métricas. Seja criterioso e realista.
-
-        STARTUP: {name}
-        Setor: {sector}
-        Tecnologias IA: {ai_technologies}
-        Funding: ${funding_amount:,}
-        Investidores: {investor_names}
-        País: {country}
-        Cidade: {startup.get('city') or 'N/A'}
-
-        CRITÉRIOS DE ANÁLISE (baseado nas tecnologias ESPECÍFICAS da startup):
-        1. MARKET_DEMAND (0-100): Demanda do mercado
-           - Baseado nas tecnologias IA ESPECÍFICAS: Computer Vision (85-95), NLP (80-90), Machine Learning (70-85)
-           - Tecnologias relevantes para NVIDIA GPU (Deep Learning, Computer Vision: +20 pontos)
-           - Aplicação prática no setor específico (B2B enterprise: +15 pontos)
-           - NÃO criar análises genéricas como "análise de dados financeiros"
-
-        2. TECHNICAL_LEVEL (0-100): Nível técnico
-           - Baseado nas tecnologias IA LISTADAS: Deep Learning (80-100), Machine Learning (60-80), Computer Vision (70-90)
-           - Complexidade técnica real: Multi-modal AI (90-100), Single technology (60-80)
-           - Avaliar apenas as tecnologias mencionadas na lista ai_technologies
-
-        3. PARTNERSHIP_POTENTIAL (0-100): Potencial de parceria
-           - Funding recente e significativo (>$10M: 80-100, $1-10M: 60-80, <$1M: 30-60)
-           - Investidores conhecidos (+20 pontos)
-           - Setor alinhado com NVIDIA (AI/GPU intensive: +15 pontos)
-
-        RETORNE APENAS JSON válido (sem markdown):
-        {{
-            "market_demand_score": XX,
-            "technical_level_score": XX,
-            "partnership_potential_score": XX,
-            "total_score": XX,
-            "reasoning": {{
-                "market": "justificativa detalhada",
-                "technical": "justificativa detalhada",
-                "partnership": "justificativa detalhada"
-            }}
-        }}
-        """
+        rendered_prompt = METRICS_PROMPT.build(
+            name=name,
+            sector=sector,
+            ai_technologies=ai_technologies,
+            funding_amount=funding_amount,
+            investor_names=investor_names,
+            country=country,
+            city=startup.get('city') or 'N/A'
+        )
+        prompt = rendered_prompt.text
 
         try:
-            result = self._make_openai_request(prompt, max_tokens=700)
+            result = self._make_openai_request(prompt, max_tokens=700, prompt_tokens=rendered_prompt.tokens,
+                                               deadline=deadline, call_type="metrics",
+                                               output_model=StartupMetricsOutput)
             if "error" in result:
-                logger.error(f"OpenAI API error para metrics: {result['error']}")
+                logger.error("OpenAI API error para metrics: %s", result['error'])
                 return self._default_metrics(startup, f"API Error: {result['error']}")
 
-            content = result["content"].strip()
-
-            # Remover markdown se presente
-            if content.startswith("```json"):
-                content = content.replace("```json", "").replace("```", "").strip()
-            elif content.startswith("```"):
-                content = content.replace("```", "", 1).replace("```", "").strip()
-
-            metrics = json.loads(content)
-
-            # Validar que todos os scores estão presentes
-            required_scores = ["market_demand_score", "technical_level_score", "partnership_potential_score"]
-            for score_key in required_scores:
-                if score_key not in metrics or not isinstance(metrics[score_key], (int, float)):
-                    logger.error(f"Score inválido ou ausente: {score_key}")
-                    return self._default_metrics(startup, f"Score inválido: {score_key}")
-
-            # Calcular total_score se não foi fornecido ou está inválido
-            if "total_score" not in metrics or not isinstance(metrics["total_score"], (int, float)):
-                metrics["total_score"] = round(
-                    metrics.get("market_demand_score", 0) * 0.4 +
-                    metrics.get("technical_level_score", 0) * 0.3 +
-                    metrics.get("partnership_potential_score", 0) * 0.3,
-                    2
-                )
-
-            # Validar reasoning
-            if "reasoning" not in metrics:
-                metrics["reasoning"] = {
-                    "market": "Análise padrão de mercado",
-                    "technical": "Análise padrão técnica",
-                    "partnership": "Análise padrão de parceria"
-                }
+            parsed, parse_error = parse_output(result.get("content"), StartupMetricsOutput)
+            if parsed is None:
+                logger.error("Resposta inválida nas métricas de %s: %s", startup.get('name'), parse_error)
+                return self._default_metrics(startup, f"Parse error ({parse_error})")
 
+            metrics = parsed.model_dump()
+            metrics["scoring_engine"] = scoring_engine.METRICS_ANALYSIS_VERSION
             metrics["tokens_used"] = result.get("tokens_used", 0)
+            metrics["usage"] = usage_from_response(result, rendered_prompt.tokens)
 
-            logger.info(f"Métricas calculadas para {startup.get('name')}: Total Score = {metrics['total_score']}")
+            logger.info("Métricas calculadas para %s: Total Score = %s", startup.get('name'), metrics['total_score'])
             return metrics
 
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parse error para startup {startup.get('name')}: {e}")
-            return self._default_metrics(startup, f"JSON parse error: {str(e)}")
         except Exception as e:
-            logger.error(f"Erro inesperado ao calcular métricas para {startup.get('name')}: {e}")
+            logger.error("Erro inesperado ao calcular métricas para %s: %s", startup.get('name'), e)
             return self._default_metrics(startup, f"Erro inesperado: {str(e)}")
 
-    def _default_metrics(self, startup: Dict[str, Any] = None, error_msg: str = "Failed to calculate metrics") -> Dict[str, Any]:
-        """Métricas padrão em caso de erro com análise básica"""
-
-        # Fazer uma análise básica sem IA em caso de erro
-        market_score = 40
-        technical_score = 40
-        partnership_score = 40
-
-        if startup:
-            # Análise simples baseada em dados disponíveis
-
-            # Market demand baseado em tecnologias
-            ai_techs = startup.get('ai_technologies', [])
-            if any(tech.lower() in ['computer vision', 'cv', 'vision'] for tech in ai_techs):
-                market_score += 15
-            if any(tech.lower() in ['nlp', 'natural language', 'language model'] for tech in ai_techs):
-                market_score += 10
-            if any(tech.lower() in ['deep learning', 'neural network'] for tech in ai_techs):
-                market_score += 10
-
-            # Technical level baseado em tecnologias
-            if len(ai_techs) >= 2:
-                technical_score += 10
-            if any(tech.lower() in ['deep learning', 'machine learning'] for tech in ai_techs):
-                technical_score += 15
-
-            # Partnership potential baseado em funding
-            funding = startup.get('last_funding_amount', 0)
-            if funding >= 10000000:  # $10M+
-                partnership_score += 25
-            elif funding >= 1000000:  # $1M+
-                partnership_score += 15
-            elif funding > 0:
-                partnership_score += 5
-
-            # Investidores
-            investors = startup.get('investor_names', [])
-            if len(investors) >= 2:
-                partnership_score += 10
-
-        # Garantir que scores não excedam 100
-        market_score = min(market_score, 100)
-        technical_score = min(technical_score, 100)
-        partnership_score = min(partnership_score, 100)
-
-        total_score = round(market_score * 0.4 + technical_score * 0.3 + partnership_score * 0.3, 2)
+    def calculate_metrics(self, startup: Dict[str, Any], deadline: Deadline = None) -> Dict[str, Any]:
+        """Métricas de uma startup fora do pipeline (usado pelo re-scoring em lote)
 
-        return {
-            "market_demand_score": market_score,
-            "technical_level_score": technical_score,
-            "partnership_potential_score": partnership_score,
-            "total_score": total_score,
-            "reasoning": {
-                "error": error_msg,
-                "market": f"Análise básica sem IA: Score {market_score} baseado em tecnologias",
-                "technical": f"Análise básica sem IA: Score {technical_score} baseado em CTO e tecnologias",
-                "partnership": f"Análise básica sem IA: Score {partnership_score} baseado em funding e investidores"
-            },
-            "tokens_used": 0
-        }
+        Se o LLM falhar o retorno traz "error" (com o fallback local): quem grava decide se descarta.
+        """
+        return self._calculate_startup_metrics(startup, deadline)
 
-    def _make_openai_request(self, prompt: str, max_tokens: int = 3000) -> Dict[str, Any]:
+    def _default_metrics(self, startup: Dict[str, Any] = None, error_msg: str = "Failed to calculate metrics") -> Dict[str, Any]:
+        """Métricas padrão em caso de erro: scoring local determinístico (sem IA), com a mensagem em "error" """
+        metrics = scoring_engine.score_startup(startup, note=error_msg)
+        metrics["error"] = error_msg
+        return metrics
+
+    def _make_openai_request(self, prompt: str, max_tokens: int = 3000, prompt_tokens: int = None,
+                             deadline: Deadline = None, call_type: str = "chat",
+                             output_model: Type[BaseModel] = None) -> Dict[str, Any]:
         """Fazer requisição para OpenAI sem WebSearch (para métricas, validação, etc.)"""
         # Para operações que não precisam de WebSearch, usar gpt-4o-mini padrão
         model_without_search = "gpt-4o-mini"
@@ -1357,20 +1115,28 @@ RESPOSTA: JSON array apenas."""},
             "max_tokens": max_tokens,
             "temperature": 0.7
         }
+        if output_model is not None:
+            payload["response_format"] = chat_response_format(output_model)
 
         try:
-            response = requests.post(
+            response = post_with_retry(
                 self.chat_url,  # Usar chat_url em vez de base_url
                 headers=self.headers,
-                json=payload,
-                timeout=60
+                payload=payload,
+                timeout=60,
+                estimated_tokens=(prompt_tokens or count_tokens(prompt)) + max_tokens,
+                call_type=call_type,
+                deadline=deadline
             )
 
             if response.status_code == 200:
                 result = response.json()
+                usage = result.get("usage", {})
                 return {
                     "content": result["choices"][0]["message"]["content"],
-                    "tokens_used": result["usage"]["total_tokens"]
+                    "tokens_used": usage.get("total_tokens", 0),
+                    "prompt_tokens": usage.get("prompt_tokens", 0),
+                    "completion_tokens": usage.get("completion_tokens", 0)
                 }
             else:
                 return {"error": f"API Error: {response.status_code}"}
@@ -1380,11 +1146,18 @@ RESPOSTA: JSON array apenas."""},
 
     def run_orchestration(self, country: str, sector: str = None, limit: int = 5,
                          existing_valid: List = None, existing_invalid: List = None,
-                         search_strategy: str = "specific") -> Dict[str, Any]:
-        """Executar orquestração completa com ISOLAMENTO TOTAL DE CONTEXTO"""
+                         search_strategy: str = "specific", time_budget: float = None,
+                         task_id: int = None, resume: bool = False) -> Dict[str, Any]:
+        """Executar orquestração completa com ISOLAMENTO TOTAL DE CONTEXTO
+
+        time_budget: segundos disponíveis para a execução inteira (padrão ORCHESTRATION_TIME_BUDGET);
+        cada chamada ao LLM usa como timeout o menor entre o seu padrão e o tempo restante.
+        task_id: agent_task_id usado como thread do checkpointer; com resume=True a execução
+        continua do último node concluído dessa task (sem repetir o discovery).
+        """
 
         # Inicialização da orquestração
-        logger.info(f"Iniciando orquestração: {country} - {sector} - Limite: {limit}")
+        logger.info("Iniciando orquestração: %s - %s - Limite: %s", country, sector, limit)
 
         initial_state = OrchestrationState(
             country=country,
@@ -1392,35 +1165,70 @@ RESPOSTA: JSON array apenas."""},
             limit=limit,
             search_strategy=search_strategy,
             valid_startups=existing_valid or [],
-            invalid_startups=existing_invalid or [],
+            known_invalid_startups=existing_invalid or [],
+            invalid_startups=[],
             discovered_startups=[],
             validated_startups=[],
             startup_metrics=[],
             total_tokens=0,
+            token_usage={},
+            excluded_count=0,
             processing_time=0.0,
+            node_timings={},
+            deadline_at=Deadline.from_budget(time_budget).expires_at,
+            task_id=task_id,
             current_step="starting",
             errors=[]
         )
 
         start_time = datetime.now()
+        config = None
 
         try:
             # Executar grafo
             # Executando LangGraph
-            logger.info(f"Executando pipeline - limite: {limit}, setor: {initial_state.get('sector')}")
+            logger.info("Executando pipeline - limite: %s, setor: %s", limit, initial_state.get('sector'))
+
+            # Sem task_id a execução ainda precisa de uma thread para o checkpointer (descartada no fim)
+            config = thread_config(task_id if task_id is not None else f"adhoc-{uuid.uuid4()}")
+            resumed_from = None
 
             try:
-                final_state = self.graph.invoke(initial_state)
-                logger.info(f"Pipeline concluído com sucesso")
+                graph_input = initial_state
+                if resume and self.checkpointer is not None:
+                    snapshot = self.graph.get_state(config)
+                    if snapshot.next:
+                        resumed_from = snapshot.next[0]
+                        # Novo prazo para o restante; o resto do estado vem do checkpoint
+                        self.graph.update_state(config, {"deadline_at": initial_state["deadline_at"]})
+                        graph_input = None
+                        logger.info("Retomando task %s a partir do node '%s'", task_id, resumed_from)
+                    elif snapshot.values:
+                        logger.info("Task %s já tinha concluído o pipeline; usando o estado salvo", task_id)
+                        resumed_from = END
+                    else:
+                        logger.info("Task %s sem checkpoint; executando do início", task_id)
+
+                if resumed_from == END:
+                    final_state = dict(snapshot.values)
+                elif self.checkpointer is not None:
+                    final_state = self.graph.invoke(graph_input, config)
+                else:
+                    final_state = self.graph.invoke(graph_input)
+                logger.info("Pipeline concluído com sucesso")
             except Exception as graph_error:
-                logger.error(f"Erro no pipeline: {str(graph_error)}")
+                logger.error("Erro no pipeline: %s", str(graph_error))
                 import traceback
-                logger.error(f"Traceback: {traceback.format_exc()}")
+                logger.error("Traceback: %s", traceback.format_exc())
                 raise graph_error
 
             end_time = datetime.now()
             final_state["processing_time"] = (end_time - start_time).total_seconds()
 
+            if self.checkpointer is not None and not KEEP_CHECKPOINTS:
+                self.checkpointer.delete_thread(config["configurable"]["thread_id"])
+                StepJournal(task_id).clear()
+
             return {
                 "status": "success",
                 "country": country,
@@ -1430,18 +1238,43 @@ RESPOSTA: JSON array apenas."""},
                     "discovered_count": len(final_state.get("discovered_startups", [])),
                     "validated_count": len(final_state.get("validated_startups", [])),
                     "invalid_count": len(final_state.get("invalid_startups", [])),
+                    "excluded_count": final_state.get("excluded_count", 0),
                     "startup_metrics": final_state.get("startup_metrics", []),
                     "invalid_startups": final_state.get("invalid_startups", [])
                 },
                 "tokens_used": final_state.get("total_tokens", 0),
+                "token_usage": final_state.get("token_usage", {}),
                 "processing_time": final_state.get("processing_time", 0),
-                "errors": final_state.get("errors", [])
+                "node_timings": final_state.get("node_timings", {}),
+                "errors": final_state.get("errors", []),
+                "resumed_from": resumed_from
             }
 
         except Exception as e:
+            # Checkpoints de execuções sem task não podem ser retomados: descarta
+            if self.checkpointer is not None and task_id is None and config is not None:
+                self.checkpointer.delete_thread(config["configurable"]["thread_id"])
             return {
                 "status": "error",
                 "error": str(e),
                 "tokens_used": initial_state.get("total_tokens", 0),
                 "processing_time": (datetime.now() - start_time).total_seconds()
-            }
\ No newline at end of file
+            }
+
+
+_orchestrator: Optional[StartupOrchestrator] = None
+_orchestrator_lock = threading.Lock()
+
+
+def get_orchestrator() -> StartupOrchestrator:
+    """Orquestrador compartilhado pelo processo: o grafo é compilado uma única vez
+
+    Seguro entre tasks concorrentes porque todo estado de execução vive em OrchestrationState
+    (a instância só guarda configuração, o grafo compilado e o checkpointer).
+    """
+    global _orchestrator
+    if _orchestrator is None:
+        with _orchestrator_lock:
+            if _orchestrator is None:
+                _orchestrator = StartupOrchestrator()
+    return _orchestrator
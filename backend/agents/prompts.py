@@ -0,0 +1,491 @@
+from typing import Dict, Any, List, Optional
+from string import Formatter
+from functools import lru_cache
+import os
+import textwrap
+import logging
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken vem com langchain-openai
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# gpt-4o-mini usa o encoding o200k_base
+TOKENIZER_ENCODING = "o200k_base"
+
+# Orçamento máximo de tokens do prompt por tipo de chamada
+PROMPT_TOKEN_BUDGETS = {
+    "discovery": int(os.getenv("DISCOVERY_PROMPT_TOKEN_BUDGET", "2600")),
+    "discovery_plan": int(os.getenv("DISCOVERY_PLAN_PROMPT_TOKEN_BUDGET", "400")),
+    "metrics": int(os.getenv("METRICS_PROMPT_TOKEN_BUDGET", "700")),
+    "validation_insight": int(os.getenv("VALIDATION_INSIGHT_PROMPT_TOKEN_BUDGET", "600")),
+    "startup_validation": int(os.getenv("STARTUP_VALIDATION_PROMPT_TOKEN_BUDGET", "1400")),
+}
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        except Exception as e:
+            logger.warning(f"Tokenizer {TOKENIZER_ENCODING} indisponível, usando estimativa por caracteres: {e}")
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """Conta tokens localmente com tiktoken (ou ~4 caracteres por token se indisponível)"""
+    if not text:
+        return 0
+
+    encoding = _get_encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=64)
+def count_static_tokens(text: str) -> int:
+    """Contagem memoizada para textos fixos (system prompts, seções estáticas)"""
+    return count_tokens(text)
+
+
+class PromptSection:
+    """Trecho de prompt com prioridade; seções estáticas são renderizadas e medidas uma única vez"""
+
+    def __init__(self, name: str, template: str, priority: int = 50, required: bool = False):
+        self.name = name
+        self.priority = priority
+        self.required = required
+        self.template = textwrap.dedent(template).strip()
+        self.fields = {field for _, field, _, _ in Formatter().parse(self.template) if field}
+        self.is_static = not self.fields
+
+        self._static_text = self.template.format() if self.is_static else None
+
+    def render(self, values: Dict[str, Any]) -> str:
+        if self.is_static:
+            return self._static_text
+        return self.template.format(**values).strip()
+
+    def tokens(self, text: str) -> int:
+        if self.is_static:
+            return count_static_tokens(self._static_text)
+        return count_tokens(text)
+
+
+class RenderedPrompt:
+    """Prompt final com tamanho medido e seções removidas pelo orçamento"""
+
+    def __init__(self, name: str, text: str, tokens: int, budget: int, sections: List[str], dropped: List[str]):
+        self.name = name
+        self.text = text
+        self.tokens = tokens
+        self.budget = budget
+        self.sections = sections
+        self.dropped = dropped
+
+
+class PromptTemplate:
+    """Template composto de seções; corta as de menor prioridade até caber no orçamento"""
+
+    def __init__(self, name: str, sections: List[PromptSection], budget: Optional[int] = None):
+        self.name = name
+        self.sections = sections
+        self.budget = budget if budget is not None else PROMPT_TOKEN_BUDGETS.get(name, 4000)
+
+    def build(self, budget: Optional[int] = None, **values) -> RenderedPrompt:
+        budget = budget if budget is not None else self.budget
+
+        rendered = []
+        for index, section in enumerate(self.sections):
+            text = section.render(values)
+            if text:
+                rendered.append((index, section, text, section.tokens(text)))
+
+        total = sum(tokens for _, _, _, tokens in rendered)
+        dropped = []
+
+        # Remover primeiro as seções opcionais de menor prioridade (e, no empate, as mais ao final)
+        removable = sorted(
+            [item for item in rendered if not item[1].required],
+            key=lambda item: (item[1].priority, -item[0])
+        )
+        for item in removable:
+            if total <= budget:
+                break
+            rendered.remove(item)
+            dropped.append(item[1].name)
+            total -= item[3]
+
+        text = "\n\n".join(item[2] for item in rendered)
+        tokens = count_tokens(text)
+
+        if tokens > budget:
+            logger.warning(f"Prompt '{self.name}' com {tokens} tokens excede orçamento de {budget} mesmo após cortes")
+        if dropped:
+            logger.info(f"Prompt '{self.name}': seções removidas pelo orçamento: {dropped}")
+
+        return RenderedPrompt(
+            name=self.name,
+            text=text,
+            tokens=tokens,
+            budget=budget,
+            sections=[item[1].name for item in rendered],
+            dropped=dropped
+        )
+
+
+# =============================================================================
+# Discovery
+# =============================================================================
+
+WEBSEARCH_SYSTEM_PROMPT = """ESPECIALISTA EM IDENTIFICAÇÃO RIGOROSA DE STARTUPS POR SETOR E PAÍS
+
+REGRA CRÍTICA - ZERO TOLERÂNCIA:
+- Se busca setor "Agro" → APENAS empresas cujo CORE BUSINESS é agricultura, pecuária, biotecnologia agrícola
+- Se encontrar Magie (fintech) → REJEITAR (é fintech, não agro)
+- Se encontrar Capim (fintech odontológico) → REJEITAR (é fintech health, não agro)
+- Se encontrar qualquer fintech/healthtech → REJEITAR COMPLETAMENTE
+
+DEFINIÇÕES ESPECÍFICAS:
+- AGRO = agricultura, pecuária, agrotecnologia, biotecnologia agrícola, equipamentos agrícolas
+- FINTECH = pagamentos, crédito, empréstimos, cartões, PIX (NUNCA é agro)
+- HEALTHTECH = saúde, medicina, odontologia (NUNCA é agro)
+
+OBRIGATÓRIO:
+1. Use web search para identificar CORE BUSINESS real
+2. Se a empresa faz pagamentos/crédito → É FINTECH (rejeitar se busca agro)
+3. Se a empresa faz saúde/odonto → É HEALTHTECH (rejeitar se busca agro)
+4. APENAS incluir se for 100% do setor solicitado
+
+RESPOSTA: objeto JSON conforme o schema."""
+
+DISCOVERY_PROMPT = PromptTemplate("discovery", [
+    PromptSection("task", """
+        Use a ferramenta WebSearch para descobrir EXATAMENTE {limit} startups de IA reais {geographic_context} que COMPROVADAMENTE receberam funding de VC.
+
+        IMPORTANTE: Esta é uma busca de {search_id} - procure por startups DIFERENTES das buscas anteriores.
+        """, priority=100, required=True),
+    PromptSection("methodology", """
+        METODOLOGIA OBRIGATÓRIA PARA CADA STARTUP:
+        1º) Encontre startups de IA do setor/região
+        2º) Para CADA startup, busque especificamente: "[nome] venture capital funding investors"
+        3º) Confirme em fontes confiáveis: Crunchbase, TechCrunch, sites de VC
+        4º) SE NÃO ACHAR VC CONFIRMADO = DESCARTE e busque outra
+        5º) APENAS inclua na lista se VC estiver 100% confirmado
+        """, priority=80),
+    PromptSection("vc_rule", """
+        REGRA FUNDAMENTAL - VENTURE CAPITAL OBRIGATÓRIO:
+        TODAS as startups descobertas DEVEM ter recebido funding de Venture Capital confirmado.
+        NÃO incluir startups que só receberam:
+        - Funding governamental, subsídios ou editais públicos
+        - Bootstrapping ou autofinanciamento
+        - Crowdfunding ou financiamento coletivo
+        - Apenas angel investment sem VC follow-up
+        - Aceleradoras sem VC confirmado
+
+        APENAS incluir startups com:
+        - Rounds de VC confirmados (Seed, Series A, B, C...)
+        - Fundos de Venture Capital conhecidos como investidores
+        - Investment comprovado em bases como Crunchbase/Distrito
+        - Nomes específicos de fundos VC (não genéricos)
+        """, priority=95, required=True),
+    PromptSection("queries", """
+        QUERIES ESPECÍFICAS POR SETOR (OBRIGATORIAMENTE usar o setor {sector}):
+        1. "{search_query} {sector} venture capital funding 2024 2023"
+        2. "startups {sector} Brasil VC novos emergentes"
+        3. "AI {sector} Brasil artificial intelligence recentes"
+        4. "nuevas {sector} startups Brasil diferentes inovadoras"
+        5. "empresas {sector} tecnologia VC série A seed brasil"
+        """, priority=60),
+    PromptSection("search_diversity", """
+        ESTRATÉGIA DE BUSCA DIVERSIFICADA:
+        - Use termos como "novos", "emergentes", "recentes", "diferentes"
+        - Busque em fontes diferentes a cada consulta
+        - Varie os termos de busca para evitar resultados repetidos
+        - Inclua anos recentes (2023, 2024) para startups mais novas
+        """, priority=20),
+    PromptSection("exclusions", "{exclusion_text}", priority=85),
+    PromptSection("trusted_sources", """
+        FONTES CONFIÁVEIS PARA CONFIRMAR VC (use para validar CADA startup):
+        1. BASES OFICIAIS: crunchbase.com, pitchbook.com, dealroom.co
+        2. VC BRASILEIROS: distrito.me, neofeed.com.br, brasiljorney.com.br
+        3. MÍDIA TECH: techcrunch.com, venturebeat.com, valor.globo.com
+        4. SITES DE VC: sites oficiais dos fundos VC brasileiros
+
+        FUNDOS VC BRASILEIROS CONHECIDOS (para referência):
+        Monashees, Kaszek, Canary, Redpoint e.ventures, Valor Capital, SP Ventures
+        """, priority=40),
+    PromptSection("constraint", "{sector_constraint}", priority=90, required=True),
+    PromptSection("quality", """
+        REGRA DE QUALIDADE - PREFERÊNCIA POR MENOS COM VC:
+        - Melhor descobrir 1-2 startups COM VC confirmado
+        - Do que descobrir 5 startups SEM VC confirmado
+        - SE não encontrar {limit} com VC, retorne menos
+        - JAMAIS "inventar" ou "assumir" que uma startup tem VC
+        """, priority=50),
+    PromptSection("website", """
+        OBRIGATÓRIO - WEBSITE OFICIAL REAL VIA WEBSEARCH:
+        - Use WebSearch para encontrar o website OFICIAL de cada startup
+        - Busque especificamente: "[nome da startup] site oficial website"
+        - JAMAIS INVENTAR URLs ou adicionar .com.br/.com automaticamente
+        - Se não encontrar website via busca, deixar campo "website" como null
+        - APENAS usar websites que você encontrou através de busca web
+        - USAR WebSearch para buscar: "[nome_startup] site oficial website url"
+        - VERIFICAR em múltiplas fontes: matérias, perfis LinkedIn, diretórios
+        - CONFIRMAR URL exato encontrado nas buscas
+        - Exemplos REAIS encontrados via busca:
+          * "Creditec" → site REAL é "https://soucreditec.com.br" (não creditec.com.br)
+          * "Crop Sense AI" → site REAL é "https://crop-sense-ai.vercel.app/" (não cropsenseai.com.br)
+        - Se WebSearch não encontrar URL oficial → usar "Não encontrado"
+        - ZERO TOLERÂNCIA para URLs inventadas ou chutadas
+
+        Após a busca web, extraia APENAS startups reais com:
+        1. Nome confirmado em fonte confiável
+        2. Website OFICIAL encontrado na busca (não inventado)
+        3. Funding verificado em fontes CONFIÁVEIS (Neofeed, BrasilJourney, etc.)
+        4. Tecnologias AI específicas e detalhadas
+        """, priority=45),
+    PromptSection("anti_hallucination", """
+        REGRAS ANTI-ALUCINAÇÃO CRÍTICAS - SEGUIR RIGOROSAMENTE:
+
+        1. COERÊNCIA ABSOLUTA NOME-DESCRIÇÃO:
+           - CONFIRMAR que o nome no campo "name" é EXATAMENTE a mesma empresa da "description"
+           - Se o nome é "Magie", toda a descrição deve falar APENAS da "Magie"
+           - JAMAIS misturar: nome "TechStartup" com descrição da "OutraEmpresa"
+           - VERIFICAR múltiplas vezes essa correspondência antes de incluir
+
+        2. VALIDAÇÃO RIGOROSA DE SETOR/CORE BUSINESS:
+           - Identificar o CORE BUSINESS real da startup pela descrição
+           - Se busca "{sector}", incluir APENAS startups cujo negócio principal é 100% desse setor
+           - Analise o core business real da startup
+           - Não confunda empresas que apenas "atendem" um setor com empresas "do" setor
+           - Empresa que vende para agro ≠ empresa de agro (a menos que seja seu core business)
+           - ANALISAR o negócio principal, não apenas o mercado alvo
+
+        3. VERIFICAÇÃO OBRIGATÓRIA DE WEBSITES:
+           - TODO startup DEVE ter um website funcional e verificado
+           - Use busca web para confirmar que o site existe e funciona
+           - Teste múltiplas variações: https://startup.com, https://www.startup.com, etc.
+           - Se o site não funcionar ou não existir, DESCARTAR a startup completamente
+           - NUNCA inventar URLs ou incluir startups sem sites funcionais verificados
+           - Priorizar startups com sites ativos e responsivos
+        """, priority=55),
+    PromptSection("technologies", """
+        OBRIGATÓRIO - TECNOLOGIAS EM INGLÊS:
+        - ai_technologies SEMPRE em inglês: ["Computer Vision", "Natural Language Processing", "Machine Learning"]
+        - NÃO usar português: "Visão Computacional", "Processamento de Linguagem Natural"
+        - Tecnologias específicas, não mercados: "Computer Vision" não "análise de dados financeiros"
+        """, priority=65),
+    PromptSection("format", """
+        FORMATO: objeto {{"startups": [...]}} conforme o schema de resposta.
+        - sector = "{sector_label}", country = "{country_label}"
+        - investor_names: lista de investidores; last_funding_amount em USD (número)
+        - sources.funding / sources.validation: URLs que comprovam funding e existência
+        - Nenhuma startup aprovada → "startups": []
+        """, priority=100, required=True),
+    PromptSection("final_check", """
+        PROCESSO DE VALIDAÇÃO FINAL OBRIGATÓRIO:
+        ETAPA 1 - Revisão Individual por Startup:
+        Para CADA startup encontrada, perguntar-se:
+        ✓ O nome no campo "name" é exatamente a mesma empresa da "description"?
+        ✓ O core business principal é 100% do setor "{sector_label}"?
+        ✓ O website foi verificado e funciona (acessível via busca web)?
+        ✓ As tecnologias AI são específicas e em inglês?
+        ✓ Os dados de funding são consistentes e verificados?
+
+        VERIFICAÇÃO CRÍTICA DE WEBSITE:
+        - TESTAR o website na busca web antes de incluir
+        - Se o site retornar erro 404, não funcionar ou não existir → EXCLUIR startup
+        - Apenas incluir startups cujo website está comprovadamente ativo
+        - Website válido é OBRIGATÓRIO para inclusão
+
+        ETAPA 2 - Filtro Rigoroso:
+        - REMOVER startups que falhem em qualquer critério acima
+        - REMOVER startups cujo negócio principal não seja 100% do setor solicitado
+        - REMOVER startups com incoerência nome-descrição
+        - Se todas as startups foram removidas, retornar array vazio []
+
+        ETAPA 3 - Formatação Final:
+        - Campo 'sector': usar EXATAMENTE "{sector_label}"
+        - Campo 'description': SEMPRE em português brasileiro (pt-BR), descrever APENAS a startup mencionada no campo 'name'
+        - Campo 'ai_technologies': APENAS em inglês, tecnologias específicas
+        """, priority=10),
+])
+
+# Planejamento do discovery em shards (estratégias de demanda de mercado)
+DISCOVERY_PLAN_PROMPT = PromptTemplate("discovery_plan", [
+    PromptSection("task", """
+        Liste os {max_shards} recortes (país, setor) mais promissores para buscar startups de IA
+        com funding de VC {scope}. Cada recorte será pesquisado separadamente.
+        """, priority=100, required=True),
+    PromptSection("criteria", """
+        CRITÉRIOS:
+        - Setores de IA com MAIOR demanda e investimento de VC recente
+        - Diversifique: nenhum par país/setor repetido
+        - {country_rule}
+        - Prefira estes nomes de setor quando aplicável: {known_sectors}
+        """, priority=60),
+    PromptSection("format", """
+        Responda no schema fornecido: "shards" com country, sector e uma justificativa curta (rationale).
+        """, priority=100, required=True),
+])
+
+# =============================================================================
+# Métricas
+# =============================================================================
+
+METRICS_PROMPT = PromptTemplate("metrics", [
+    PromptSection("startup", """
+        Analise esta startup validada e calcule scores de 0-100 para as métricas. Seja criterioso e realista.
+
+        STARTUP: {name}
+        Setor: {sector}
+        Tecnologias IA: {ai_technologies}
+        Funding: ${funding_amount:,}
+        Investidores: {investor_names}
+        País: {country}
+        Cidade: {city}
+        """, priority=100, required=True),
+    PromptSection("criteria", """
+        CRITÉRIOS DE ANÁLISE (baseado nas tecnologias ESPECÍFICAS da startup):
+        1. MARKET_DEMAND (0-100): Demanda do mercado
+           - Baseado nas tecnologias IA ESPECÍFICAS: Computer Vision (85-95), NLP (80-90), Machine Learning (70-85)
+           - Tecnologias relevantes para NVIDIA GPU (Deep Learning, Computer Vision: +20 pontos)
+           - Aplicação prática no setor específico (B2B enterprise: +15 pontos)
+           - NÃO criar análises genéricas como "análise de dados financeiros"
+
+        2. TECHNICAL_LEVEL (0-100): Nível técnico
+           - Baseado nas tecnologias IA LISTADAS: Deep Learning (80-100), Machine Learning (60-80), Computer Vision (70-90)
+           - Complexidade técnica real: Multi-modal AI (90-100), Single technology (60-80)
+           - Avaliar apenas as tecnologias mencionadas na lista ai_technologies
+
+        3. PARTNERSHIP_POTENTIAL (0-100): Potencial de parceria
+           - Funding recente e significativo (>$10M: 80-100, $1-10M: 60-80, <$1M: 30-60)
+           - Investidores conhecidos (+20 pontos)
+           - Setor alinhado com NVIDIA (AI/GPU intensive: +15 pontos)
+        """, priority=50),
+    PromptSection("format", """
+        Responda no schema fornecido: scores de 0-100, total_score ponderado
+        (40% mercado, 30% técnico, 30% parceria) e uma justificativa por critério.
+        """, priority=100, required=True),
+])
+
+# =============================================================================
+# Insight de validação (startups inválidas)
+# =============================================================================
+
+VALIDATION_INSIGHT_PROMPT = PromptTemplate("validation_insight", [
+    PromptSection("startup", """
+        Analise porque esta startup foi marcada como INVÁLIDA e forneça insights acionáveis:
+
+        STARTUP: {name}
+        Website: {website}
+        Setor: {sector}
+        Tecnologias: {ai_technologies}
+        Funding: ${funding_amount:,}
+        Investidores: {investor_names}
+        """, priority=100, required=True),
+    PromptSection("validation", """
+        RESULTADOS DA VALIDAÇÃO:
+        - Website funcionando: {website_working}
+        - Score total: {total_validation_score:.1f}%
+        - Issues encontrados: {issues}
+        """, priority=90, required=True),
+    PromptSection("format", """
+        Responda no schema fornecido com uma análise DETALHADA: insight explicando os problemas,
+        confidence de 0 a 1, issues principais, como corrigi-los, recommendation
+        (REJECT, INVESTIGATE ou MANUAL_REVIEW) e a análise de website, funding, existência e qualidade dos dados.
+        """, priority=100, required=True),
+])
+
+# =============================================================================
+# Validação de startup (StartupValidationAgent)
+# =============================================================================
+
+STARTUP_VALIDATION_SYSTEM_PROMPT = "Analise resultados de busca web e valide startups."
+
+STARTUP_VALIDATION_PROMPT = PromptTemplate("startup_validation", [
+    PromptSection("startup", """
+        Valide esta startup combinando verificações técnicas e busca web:
+
+        DADOS DA STARTUP:
+        Nome: {name}
+        Website: {website} (acessível: {website_accessible})
+        Setor Declarado: {sector}
+        Descrição: {description}
+        Tecnologias IA: {ai_technologies} (DEVE ser em inglês)
+        Funding: ${funding_amount:,}
+        Investidores: {investor_names}
+        Fontes: {sources}
+        """, priority=100, required=True),
+    PromptSection("web_data", "{web_validation_text}", priority=60),
+    PromptSection("sector_examples", "{sector_examples}", priority=40),
+    PromptSection("criteria", """
+        CRITÉRIOS DE VALIDAÇÃO - APLICAR RIGOROSAMENTE:
+
+        1. COERÊNCIA NOME-DESCRIÇÃO: ✓
+           - Nome e descrição devem se referir à MESMA empresa
+           - Zero tolerância para mistura de empresas diferentes
+
+        2. VALIDAÇÃO TÉCNICA DE WEBSITE: {website_check}
+           - Website deve ser tecnicamente acessível
+
+        3. TECNOLOGIAS IA - CRITÉRIO RIGOROSO:
+           - APENAS em inglês: "Computer Vision", "Natural Language Processing", "Machine Learning"
+           - ESPECÍFICAS, não genéricas: "Deep Learning" ✓, "análise de dados" ✗
+           - TECNOLOGIAS, não aplicações: "NLP" ✓, "análise de crédito" ✗
+
+        4. VALIDAÇÃO RIGOROSA DE SETOR POR CORE BUSINESS - CRITÉRIO ELIMINATÓRIO:
+           - ANALISAR o negócio PRINCIPAL da startup através de descrição E website
+           - SETOR DEVE SER O CORE BUSINESS, não apenas cliente ou aplicação secundária
+           - EXEMPLOS DE INVALIDAÇÃO POR SETOR:
+             * Se busca "Saúde" mas startup é de pagamentos/fintech → INVALID
+             * Se busca "Agro" mas startup é de marketing digital → INVALID
+             * Se busca "Fintech" mas startup é de análise médica → INVALID
+           - ZERO TOLERÂNCIA: core business diferente = INVALIDAÇÃO AUTOMÁTICA
+           - Não aceitar empresas que apenas "atendem" o setor como clientes
+
+        5. VALIDAÇÃO CRÍTICA DE VENTURE CAPITAL - OBRIGATÓRIO:
+           - DEVE ter recebido funding de Venture Capital confirmado
+           - Investidores devem ser FUNDOS VC conhecidos (não genéricos)
+           - Funding amount mínimo de $100k
+           - Fontes confiáveis que comprovem o VC funding
+           - REJEITAR se só tem: gov funding, bootstrapping, crowdfunding, angel apenas
+
+        6. CONSISTÊNCIA DE DADOS:
+           - Funding realista e verificado
+           - Investidores conhecidos no ecossistema
+           - Datas e valores coerentes
+        """, priority=50),
+    PromptSection("invalidation", """
+        INVALIDAÇÃO AUTOMÁTICA SE:
+        - SEM VENTURE CAPITAL confirmado (REGRA FUNDAMENTAL)
+        - Tecnologias em português ou genéricas demais
+        - Incoerência nome-descrição
+        - Core business diferente do setor solicitado
+        - Dados claramente inventados ou inconsistentes
+        - Apenas funding governamental/crowdfunding/bootstrapping
+        """, priority=70),
+    PromptSection("format", """
+        Responda no schema fornecido: validation_status (valid/suspicious/invalid), confidence_score de 0 a 1,
+        problemas específicos em issues_found e ações sugeridas em recommendations.
+        verified_website: {verified_website}; web_search_used: {web_search_used}.
+        """, priority=100, required=True),
+])
+
+
+def usage_from_response(result: Dict[str, Any], estimated_prompt_tokens: int = 0) -> Dict[str, int]:
+    """Normaliza contagem de tokens de um resultado de requisição OpenAI"""
+    return {
+        "prompt_tokens": result.get("prompt_tokens", 0),
+        "completion_tokens": result.get("completion_tokens", 0),
+        "estimated_prompt_tokens": estimated_prompt_tokens
+    }
@@ -0,0 +1,214 @@
+from typing import Dict, Any, Optional, Mapping
+import os
+import re
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Limites iniciais; são ajustados automaticamente pelos headers x-ratelimit-* da OpenAI
+DEFAULT_RPM = int(os.getenv("OPENAI_RPM_LIMIT", "500"))
+DEFAULT_TPM = int(os.getenv("OPENAI_TPM_LIMIT", "200000"))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+MIN_CONCURRENCY = 1
+
+# Abaixo desta fração do limite restante a concorrência para de crescer
+LOW_REMAINING_FRACTION = 0.1
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Converte durações da OpenAI ('1s', '6m0s', '20ms') em segundos"""
+    if not value:
+        return None
+
+    seconds = 0.0
+    matched = False
+    for amount, unit in _DURATION_PART.findall(value):
+        matched = True
+        amount = float(amount)
+        if unit == "ms":
+            seconds += amount / 1000
+        elif unit == "s":
+            seconds += amount
+        elif unit == "m":
+            seconds += amount * 60
+        elif unit == "h":
+            seconds += amount * 3600
+
+    if not matched:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return seconds
+
+
+class TokenBucket:
+    """Token bucket com reposição contínua por minuto (não é thread-safe; protegido pelo limiter)"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(max(per_minute, 1))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.capacity / 60.0)
+            self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Segundos até haver `amount` disponível (0 se já houver)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * 60.0 / self.capacity
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def sync(self, limit: Optional[int], remaining: Optional[int], now: float):
+        """Alinha o bucket local com a visão do servidor"""
+        self._refill(now)
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            self.tokens = min(self.tokens, float(remaining))
+
+
+class RatePermit:
+    """Reserva de uma requisição em andamento; liberar com release()"""
+
+    def __init__(self, limiter: "OpenAIRateLimiter", reserved_tokens: int):
+        self.limiter = limiter
+        self.reserved_tokens = reserved_tokens
+        self.released = False
+
+    def release(self, used_tokens: Optional[int] = None, throttled: bool = False):
+        if not self.released:
+            self.released = True
+            self.limiter._release(self, used_tokens, throttled)
+
+
+class OpenAIRateLimiter:
+    """Limiter global do processo para requisições/min, tokens/min e concorrência adaptativa (AIMD)"""
+
+    def __init__(self, rpm: int = DEFAULT_RPM, tpm: int = DEFAULT_TPM, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self._condition = threading.Condition()
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max(max_concurrency, MIN_CONCURRENCY)
+        self.concurrency_limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.throttled_until = 0.0
+
+    def acquire(self, estimated_tokens: int = 0, timeout: Optional[float] = None) -> RatePermit:
+        """Bloqueia até haver cota de requisição, tokens e concorrência; TimeoutError se estourar o timeout"""
+        give_up_at = time.monotonic() + timeout if timeout is not None else None
+
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                wait = max(
+                    self.throttled_until - now,
+                    self.requests.wait_time(1, now),
+                    self.tokens.wait_time(estimated_tokens, now),
+                    0.0
+                )
+                if wait == 0.0 and self.in_flight < int(self.concurrency_limit):
+                    self.requests.take(1)
+                    self.tokens.take(estimated_tokens)
+                    self.in_flight += 1
+                    return RatePermit(self, estimated_tokens)
+
+                if give_up_at is not None:
+                    remaining = give_up_at - now
+                    if remaining <= 0:
+                        raise TimeoutError("Sem cota de rate limit disponível antes do deadline")
+                    wait = min(wait, remaining) if wait > 0 else remaining
+
+                # Sem cota: aguarda reposição; sem slot: aguarda liberação (ou no máximo 1s)
+                self._condition.wait(timeout=min(wait, 1.0) if wait > 0 else 1.0)
+
+    def _release(self, permit: RatePermit, used_tokens: Optional[int], throttled: bool):
+        with self._condition:
+            self.in_flight = max(self.in_flight - 1, 0)
+
+            # Devolver a parte da reserva que não foi consumida (max_tokens raramente é usado por inteiro)
+            if used_tokens is not None and used_tokens < permit.reserved_tokens:
+                self.tokens.give_back(permit.reserved_tokens - used_tokens)
+
+            if throttled:
+                # Decréscimo multiplicativo
+                self.concurrency_limit = max(MIN_CONCURRENCY, self.concurrency_limit / 2)
+            elif self.concurrency_limit < self.max_concurrency:
+                # Acréscimo aditivo
+                self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1.0 / self.concurrency_limit)
+
+            self._condition.notify_all()
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Ajusta buckets e concorrência a partir dos headers x-ratelimit-* da resposta"""
+        if not headers:
+            return
+
+        def _int(name):
+            try:
+                return int(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        limit_requests = _int("x-ratelimit-limit-requests")
+        limit_tokens = _int("x-ratelimit-limit-tokens")
+        remaining_requests = _int("x-ratelimit-remaining-requests")
+        remaining_tokens = _int("x-ratelimit-remaining-tokens")
+
+        if limit_requests is None and limit_tokens is None and remaining_requests is None and remaining_tokens is None:
+            return
+
+        with self._condition:
+            now = time.monotonic()
+            self.requests.sync(limit_requests, remaining_requests, now)
+            self.tokens.sync(limit_tokens, remaining_tokens, now)
+
+            low_requests = limit_requests and remaining_requests is not None and remaining_requests < limit_requests * LOW_REMAINING_FRACTION
+            low_tokens = limit_tokens and remaining_tokens is not None and remaining_tokens < limit_tokens * LOW_REMAINING_FRACTION
+            if low_requests or low_tokens:
+                # Perto do limite: não deixar a concorrência passar do que já está em uso
+                self.concurrency_limit = max(MIN_CONCURRENCY, min(self.concurrency_limit, float(self.in_flight)))
+
+            self._condition.notify_all()
+
+    def throttle(self, retry_after: Optional[float]):
+        """Pausa novas requisições de todo o processo após um 429"""
+        if not retry_after or retry_after <= 0:
+            return
+        with self._condition:
+            self.throttled_until = max(self.throttled_until, time.monotonic() + retry_after)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado atual do limiter (para logs e monitoramento)"""
+        with self._condition:
+            now = time.monotonic()
+            self.requests._refill(now)
+            self.tokens._refill(now)
+            return {
+                "in_flight": self.in_flight,
+                "concurrency_limit": round(self.concurrency_limit, 2),
+                "requests_available": int(self.requests.tokens),
+                "requests_per_minute": int(self.requests.capacity),
+                "tokens_available": int(self.tokens.tokens),
+                "tokens_per_minute": int(self.tokens.capacity),
+                "throttled_for": max(round(self.throttled_until - now, 2), 0)
+            }
+
+
+# Instância global compartilhada por StartupOrchestrator e StartupValidationAgent
+openai_rate_limiter = OpenAIRateLimiter()
@@ -0,0 +1,225 @@
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import os
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SCORING_ENGINE_VERSION = "local-1.0"
+
+# Versão gravada em startup_metrics.analysis_version para scores do LLM; mudar força o re-scoring
+METRICS_ANALYSIS_VERSION = os.getenv("METRICS_ANALYSIS_VERSION", "1.0")
+
+# Flags de tecnologia (one-hot) e os nomes que ativam cada uma (comparação exata, minúsculas)
+TECH_FLAGS = ("computer_vision", "nlp", "deep_learning", "neural_network", "machine_learning")
+TECH_ALIASES = {
+    "computer vision": "computer_vision",
+    "cv": "computer_vision",
+    "vision": "computer_vision",
+    "nlp": "nlp",
+    "natural language": "nlp",
+    "language model": "nlp",
+    "deep learning": "deep_learning",
+    "neural network": "neural_network",
+    "machine learning": "machine_learning",
+}
+_FLAG_INDEX = {flag: i for i, flag in enumerate(TECH_FLAGS)}
+
+# Pesos padrão (mesmas regras do antigo _default_metrics); sobrescrevíveis via SCORING_WEIGHTS (JSON)
+DEFAULT_WEIGHTS: Dict[str, Any] = {
+    "base": {"market": 40, "technical": 40, "partnership": 40},
+    "market": {"computer_vision": 15, "nlp": 10, "deep_learning_or_neural_network": 10},
+    "technical": {"multi_technology": 10, "min_technologies": 2, "deep_learning_or_machine_learning": 15},
+    "funding_tiers": [[10_000_000, 25], [1_000_000, 15], [0, 5]],  # [mínimo exclusivo p/ 0, bônus]
+    "investors": {"min_investors": 2, "bonus": 10},
+    "total": {"market": 0.4, "technical": 0.3, "partnership": 0.3},
+}
+
+
+def load_weights() -> Dict[str, Any]:
+    """Pesos padrão mesclados com o JSON opcional em SCORING_WEIGHTS"""
+    weights = json.loads(json.dumps(DEFAULT_WEIGHTS))
+    override = os.getenv("SCORING_WEIGHTS")
+    if override:
+        try:
+            for key, value in json.loads(override).items():
+                if isinstance(value, dict) and isinstance(weights.get(key), dict):
+                    weights[key].update(value)
+                else:
+                    weights[key] = value
+        except (ValueError, AttributeError) as e:
+            logger.warning("SCORING_WEIGHTS inválido, usando pesos padrão: %s", e)
+    return weights
+
+
+def _field(record: Any, name: str, default=None):
+    """Lê um campo de dict ou de objeto ORM"""
+    if isinstance(record, dict):
+        value = record.get(name, default)
+    else:
+        value = getattr(record, name, default)
+    return default if value is None else value
+
+
+class StartupBatch:
+    """Lote de startups em colunas (numpy) para pontuação vetorizada"""
+
+    def __init__(self, funding: np.ndarray, investor_counts: np.ndarray,
+                 tech_counts: np.ndarray, tech_flags: np.ndarray):
+        self.funding = funding
+        self.investor_counts = investor_counts
+        self.tech_counts = tech_counts
+        self.tech_flags = tech_flags
+
+    def __len__(self) -> int:
+        return len(self.funding)
+
+    @classmethod
+    def from_records(cls, records: Sequence[Any]) -> "StartupBatch":
+        """Monta as colunas a partir de dicts do pipeline ou de modelos Startup"""
+        n = len(records)
+        funding = np.zeros(n, dtype=np.float64)
+        investor_counts = np.zeros(n, dtype=np.int32)
+        tech_counts = np.zeros(n, dtype=np.int32)
+        tech_flags = np.zeros((n, len(TECH_FLAGS)), dtype=bool)
+
+        for i, record in enumerate(records):
+            try:
+                funding[i] = float(_field(record, "last_funding_amount", 0) or 0)
+            except (TypeError, ValueError):
+                funding[i] = 0.0
+
+            investors = _field(record, "investor_names", [])
+            investor_counts[i] = len(investors) if isinstance(investors, (list, tuple)) else 0
+
+            technologies = _field(record, "ai_technologies", [])
+            if not isinstance(technologies, (list, tuple)):
+                continue
+            tech_counts[i] = len(technologies)
+            for tech in technologies:
+                flag = TECH_ALIASES.get(str(tech).strip().lower())
+                if flag:
+                    tech_flags[i, _FLAG_INDEX[flag]] = True
+
+        return cls(funding, investor_counts, tech_counts, tech_flags)
+
+    def flag(self, name: str) -> np.ndarray:
+        return self.tech_flags[:, _FLAG_INDEX[name]]
+
+
+def inputs_fingerprint(record: Any) -> str:
+    """Hash dos dados que alimentam o score (setor, tecnologias, funding, investidores)
+
+    Normalizado para que reordenar listas ou mudar maiúsculas não force um novo score.
+    """
+    def _names(value) -> List[str]:
+        if not isinstance(value, (list, tuple)):
+            return []
+        return sorted({str(v).strip().lower() for v in value if str(v).strip()})
+
+    def _amount(value) -> Optional[float]:
+        try:
+            return round(float(value), 2) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    canonical = {
+        "sector": str(_field(record, "sector", "")).strip().lower(),
+        "technologies": _names(_field(record, "ai_technologies", [])),
+        "funding": _amount(_field(record, "last_funding_amount")),
+        "investors": _names(_field(record, "investor_names", [])),
+    }
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def score_batch(batch: StartupBatch, weights: Optional[Dict[str, Any]] = None) -> Dict[str, np.ndarray]:
+    """Calcula os quatro scores para o lote inteiro de uma vez"""
+    w = weights or load_weights()
+    n = len(batch)
+
+    cv = batch.flag("computer_vision")
+    nlp = batch.flag("nlp")
+    dl = batch.flag("deep_learning")
+    nn = batch.flag("neural_network")
+    ml = batch.flag("machine_learning")
+
+    market = np.full(n, float(w["base"]["market"]))
+    market += cv * w["market"]["computer_vision"]
+    market += nlp * w["market"]["nlp"]
+    market += (dl | nn) * w["market"]["deep_learning_or_neural_network"]
+
+    technical = np.full(n, float(w["base"]["technical"]))
+    technical += (batch.tech_counts >= w["technical"]["min_technologies"]) * w["technical"]["multi_technology"]
+    technical += (dl | ml) * w["technical"]["deep_learning_or_machine_learning"]
+
+    # Faixas de funding ordenadas da maior para a menor; a primeira que casar vence
+    partnership = np.full(n, float(w["base"]["partnership"]))
+    tiers = sorted(w["funding_tiers"], key=lambda t: t[0], reverse=True)
+    conditions = [batch.funding >= threshold if threshold > 0 else batch.funding > 0 for threshold, _ in tiers]
+    partnership += np.select(conditions, [float(bonus) for _, bonus in tiers], default=0.0)
+    partnership += (batch.investor_counts >= w["investors"]["min_investors"]) * w["investors"]["bonus"]
+
+    market = np.minimum(market, 100.0)
+    technical = np.minimum(technical, 100.0)
+    partnership = np.minimum(partnership, 100.0)
+
+    total = np.round(
+        market * w["total"]["market"] + technical * w["total"]["technical"] + partnership * w["total"]["partnership"],
+        2
+    )
+
+    return {"market": market, "technical": technical, "partnership": partnership, "total": total}
+
+
+def _metrics_dict(scores: Dict[str, np.ndarray], i: int, note: Optional[str]) -> Dict[str, Any]:
+    market = float(scores["market"][i])
+    technical = float(scores["technical"][i])
+    partnership = float(scores["partnership"][i])
+
+    reasoning = {
+        "market": f"Análise básica sem IA: Score {market:g} baseado em tecnologias",
+        "technical": f"Análise básica sem IA: Score {technical:g} baseado em tecnologias",
+        "partnership": f"Análise básica sem IA: Score {partnership:g} baseado em funding e investidores"
+    }
+    if note:
+        reasoning["error"] = note
+
+    return {
+        "market_demand_score": market,
+        "technical_level_score": technical,
+        "partnership_potential_score": partnership,
+        "total_score": float(scores["total"][i]),
+        "reasoning": reasoning,
+        "scoring_engine": SCORING_ENGINE_VERSION,
+        "tokens_used": 0
+    }
+
+
+def score_startups(startups: Sequence[Any], note: Optional[str] = None,
+                   weights: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Métricas locais (mesmo formato das métricas do LLM) para cada startup"""
+    if not startups:
+        return []
+    scores = score_batch(StartupBatch.from_records(startups), weights)
+    return [_metrics_dict(scores, i, note) for i in range(len(startups))]
+
+
+def score_startup(startup: Optional[Dict[str, Any]], note: Optional[str] = None) -> Dict[str, Any]:
+    """Atalho para uma startup só (fallback quando o LLM falha)"""
+    return score_startups([startup or {}], note)[0]
+
+
+def top_k(startups: Sequence[Any], k: int, weights: Optional[Dict[str, Any]] = None) -> Tuple[List[int], List[int]]:
+    """Índices das K startups com maior score local e dos demais (ordem original preservada)"""
+    n = len(startups)
+    if k <= 0 or k >= n:
+        return list(range(n)), []
+
+    total = score_batch(StartupBatch.from_records(startups), weights)["total"]
+    # Ordenação estável por score decrescente: empates mantêm a ordem do discovery
+    ranked = np.argsort(-total, kind="stable")
+    selected = set(ranked[:k].tolist())
+    return sorted(selected), [i for i in range(n) if i not in selected]
@@ -0,0 +1,204 @@
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from collections import deque
+from functools import lru_cache
+from urllib.parse import urlparse
+import json
+import os
+import re
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRUSTED_SOURCES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "trusted_sources.json")
+
+# Sufixos públicos de segundo nível mais comuns nas nossas fontes (sem depender da Public Suffix List)
+_MULTI_LABEL_SUFFIXES = {
+    "com.br", "net.br", "org.br", "gov.br", "edu.br", "co.uk", "org.uk", "ac.uk",
+    "com.mx", "com.ar", "com.co", "com.au", "co.jp", "co.in", "com.pt", "co.il"
+}
+_URL = re.compile(r"(?:https?://)?(?:[a-z0-9-]+\.)+[a-z]{2,}(?::\d+)?(?:/\S*)?", re.IGNORECASE)
+_BARE_DOMAIN = re.compile(r"^(?:[a-z0-9-]+\.)+[a-z]{2,}$")
+
+CATEGORIES = ("funding", "investors", "validation")
+
+
+def _fold(text: str) -> str:
+    """Minúsculas sem acentos (comparação de nomes em texto livre)"""
+    text = unicodedata.normalize("NFKD", str(text))
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def parse_host(source: str) -> Optional[str]:
+    """Host de uma fonte que é URL ou domínio (também dentro de texto livre); None se não houver"""
+    value = source.strip().lower()
+    match = _URL.search(value) if " " in value else _URL.fullmatch(value)
+    if not match:
+        return None
+
+    url = match.group(0)
+    if "://" not in url:
+        url = f"https://{url}"
+    try:
+        host = urlparse(url).hostname or ""
+    except ValueError:
+        return None
+
+    if not _BARE_DOMAIN.match(host):
+        return None
+    return host[4:] if host.startswith("www.") else host
+
+
+def registrable_domain(host: str) -> str:
+    """Domínio registrável (ex: blog.folha.uol.com.br -> uol.com.br)"""
+    labels = host.split(".")
+    size = 3 if len(labels) >= 3 and ".".join(labels[-2:]) in _MULTI_LABEL_SUFFIXES else 2
+    return ".".join(labels[-size:])
+
+
+class AhoCorasick:
+    """Autômato para buscar todos os nomes de uma vez em texto livre (uma passada por texto)"""
+
+    def __init__(self, patterns: Dict[str, int]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int]]] = [[]]  # (tamanho do padrão, peso)
+
+        for pattern, weight in patterns.items():
+            node = 0
+            for ch in pattern:
+                if ch not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[node][ch] = len(self._goto) - 1
+                node = self._goto[node][ch]
+            self._out[node].append((len(pattern), weight))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def best_match(self, text: str) -> int:
+        """Maior peso entre os padrões que aparecem como palavra inteira no texto (0 se nenhum)"""
+        best = 0
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, weight in self._out[node]:
+                start, end = i - length + 1, i + 1
+                # Fronteira de palavra: "folha" não casa com "folhagem"
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    best = max(best, weight)
+        return best
+
+
+class SourceReputationIndex:
+    """Índice pré-compilado de fontes confiáveis: sufixo de domínio exato para URLs, Aho-Corasick para nomes"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.domains = {d.lower().lstrip("."): int(w) for d, w in config.get("domains", {}).items()}
+        self.names = {_fold(n): int(w) for n, w in config.get("names", {}).items()}
+        self.limits = {"funding": 50, "investors": 30, "validation": 20, **config.get("limits", {})}
+        self.reliability = {"min_score": 40, "min_funding_sources": 1, "min_funding_score": 15,
+                            **config.get("reliability", {})}
+        self._matcher = AhoCorasick(self.names)
+        self.source_weight = lru_cache(maxsize=8192)(self._source_weight)
+
+    @classmethod
+    def from_file(cls, path: str = None) -> "SourceReputationIndex":
+        path = path or os.getenv("TRUSTED_SOURCES_PATH") or DEFAULT_TRUSTED_SOURCES_PATH
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def domain_weight(self, host: str) -> int:
+        """Peso do domínio configurado mais específico que seja sufixo do host (por rótulo, não substring)"""
+        floor = registrable_domain(host)
+        candidate = host
+        while True:
+            if candidate in self.domains:
+                return self.domains[candidate]
+            if candidate == floor or "." not in candidate:
+                return 0
+            candidate = candidate.split(".", 1)[1]
+
+    def _source_weight(self, source: str) -> int:
+        host = parse_host(source)
+        if host is not None:
+            weight = self.domain_weight(host)
+            # URL pura decide pelo domínio; texto livre com URL ainda pode citar um nome confiável
+            if weight or " " not in source.strip():
+                return weight
+        return self._matcher.best_match(_fold(source))
+
+    def score_sources(self, sources: Any) -> Dict[str, Any]:
+        """Scores por categoria (funding/investors/validation) e confiabilidade de uma startup"""
+        if not isinstance(sources, dict):
+            sources = {}
+
+        issues = []
+        scores = {}
+        validated_sources = {}
+        for category in CATEGORIES:
+            items = [s for s in sources.get(category) or [] if isinstance(s, str) and s.strip()]
+            validated_sources[category] = items
+            total = 0
+            for source in items:
+                weight = self.source_weight(source)
+                total += weight
+                if not weight and category != "validation":
+                    label = "funding" if category == "funding" else "investidores"
+                    issues.append(f"Fonte de {label} não reconhecida: {source}")
+            scores[category] = min(total, self.limits[category])
+
+        reliability_score = scores["funding"] + scores["investors"] + scores["validation"]
+        is_reliable = (
+            reliability_score >= self.reliability["min_score"] and
+            len(validated_sources["funding"]) >= self.reliability["min_funding_sources"] and
+            scores["funding"] >= self.reliability["min_funding_score"]
+        )
+
+        return {
+            "is_reliable": is_reliable,
+            "reliability_score": reliability_score,
+            "funding_score": scores["funding"],
+            "investor_score": scores["investors"],
+            "validation_score": scores["validation"],
+            "validated_sources": validated_sources,
+            "issues": issues,
+            "recommendation": "ACCEPT" if is_reliable else "INVESTIGATE_SOURCES"
+        }
+
+    def score_startups(self, startups: Sequence[Any]) -> List[Dict[str, Any]]:
+        """Pontua um lote inteiro; fontes repetidas entre startups são avaliadas uma vez só"""
+        results = []
+        for startup in startups:
+            if not isinstance(startup, dict):
+                logger.error("Startup veio como %s ao invés de dict: %s", type(startup).__name__, startup)
+                results.append({"is_reliable": False, "reliability_score": 0, "issues": ["Formato de dados inválido"]})
+                continue
+            sources = startup.get("sources", {})
+            if not isinstance(sources, dict):
+                logger.warning("Sources com tipo incorreto para %s: %s", startup.get("name"), type(sources).__name__)
+            results.append(self.score_sources(sources))
+        return results
+
+
+_index: Optional[SourceReputationIndex] = None
+
+
+def get_index() -> SourceReputationIndex:
+    """Índice compartilhado, carregado na primeira chamada"""
+    global _index
+    if _index is None:
+        _index = SourceReputationIndex.from_file()
+    return _index
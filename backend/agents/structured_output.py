@@ -0,0 +1,110 @@
+from typing import Any, Dict, Optional, Tuple, Type
+from functools import lru_cache
+import copy
+import logging
+from pydantic import BaseModel, ValidationError
+from agents.json_extraction import extract_json
+
+logger = logging.getLogger(__name__)
+
+# Palavras-chave que o modo strict da OpenAI não aceita (a validação delas fica no Pydantic)
+_UNSUPPORTED_KEYWORDS = {
+    "default", "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum",
+    "minLength", "maxLength", "pattern", "format", "minItems", "maxItems"
+}
+
+
+# Onde há sub-schemas: um schema, uma lista de schemas ou um mapa nome -> schema
+_SCHEMA_CHILDREN = ("items", "not")
+_SCHEMA_LIST_CHILDREN = ("anyOf", "oneOf", "allOf", "prefixItems")
+_SCHEMA_MAP_CHILDREN = ("properties", "$defs", "definitions")
+
+
+def _make_strict(node: Any):
+    """Ajusta o JSON schema do Pydantic às regras do modo strict (todos os campos obrigatórios, sem extras)
+
+    Só percorre nós de schema: as chaves de `properties`/`$defs` são nomes (um campo chamado
+    `format` ou `default` continua no schema).
+    """
+    if not isinstance(node, dict):
+        return
+    for key in _UNSUPPORTED_KEYWORDS & node.keys():
+        del node[key]
+    if node.get("type") == "object" and "properties" in node:
+        node["additionalProperties"] = False
+        node["required"] = list(node["properties"].keys())
+
+    for key in _SCHEMA_CHILDREN:
+        children = node.get(key)
+        for child in children if isinstance(children, list) else [children]:
+            _make_strict(child)
+    for key in _SCHEMA_LIST_CHILDREN:
+        for child in node.get(key) or []:
+            _make_strict(child)
+    for key in _SCHEMA_MAP_CHILDREN:
+        for child in (node.get(key) or {}).values():
+            _make_strict(child)
+
+
+@lru_cache(maxsize=None)
+def _strict_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    schema = copy.deepcopy(model.model_json_schema())
+    _make_strict(schema)
+    return schema
+
+
+def strict_json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """JSON schema estrito derivado do modelo (calculado uma vez por modelo)"""
+    return copy.deepcopy(_strict_schema(model))
+
+
+def chat_response_format(model: Type[BaseModel]) -> Dict[str, Any]:
+    """`response_format` para a Chat Completions API"""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": model.__name__, "strict": True, "schema": _strict_schema(model)}
+    }
+
+
+def responses_text_format(model: Type[BaseModel]) -> Dict[str, Any]:
+    """`text` para a Responses API"""
+    return {
+        "format": {"type": "json_schema", "name": model.__name__, "strict": True, "schema": _strict_schema(model)}
+    }
+
+
+def parse_output(content: Optional[str], model: Type[BaseModel],
+                 repair: bool = False) -> Tuple[Optional[BaseModel], Optional[str]]:
+    """Valida a resposta direto no modelo; se falhar, cai para o extrator tolerante
+
+    Retorna (objeto, None) em caso de sucesso ou (None, motivo) em caso de falha.
+    """
+    if not content:
+        return None, "empty: conteúdo vazio"
+
+    try:
+        return model.model_validate_json(content), None
+    except ValidationError as e:
+        first_error = e.errors()[0] if e.errors() else {}
+
+    # Fallback: texto ao redor, cercas markdown ou JSON truncado
+    extraction = extract_json(content, repair=repair)
+    if not extraction.ok:
+        return None, f"{extraction.reason}: {extraction.detail}"
+
+    try:
+        parsed = model.model_validate(_wrap_list(model, extraction.value))
+    except ValidationError as e:
+        error = e.errors()[0] if e.errors() else first_error
+        location = ".".join(str(p) for p in error.get("loc", ()))
+        return None, f"schema: {location} {error.get('msg', '')}".strip()
+
+    logger.debug("Resposta %s recuperada pelo extrator tolerante", model.__name__)
+    return parsed, None
+
+
+def _wrap_list(model: Type[BaseModel], value: Any) -> Any:
+    """Aceita um array puro quando o modelo é um envelope com um único campo (ex: {"startups": [...]})"""
+    if isinstance(value, list) and len(model.model_fields) == 1:
+        return {next(iter(model.model_fields)): value}
+    return value
@@ -0,0 +1,150 @@
+from typing import Any, Callable, Dict, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+import json
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Preço em USD por 1M tokens (entrada, saída); sobrescreva/complete com JSON, ex: {"gpt-4o-mini": [0.15, 0.6]}
+DEFAULT_PRICING = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00)
+}
+TOKEN_PRICING = {
+    **DEFAULT_PRICING,
+    **{model: tuple(prices) for model, prices in json.loads(os.getenv("TOKEN_PRICING_JSON", "{}") or "{}").items()}
+}
+
+# Lançamentos acumulados em memória antes de irem ao banco em lote
+LEDGER_FLUSH_SIZE = int(os.getenv("TOKEN_LEDGER_FLUSH_SIZE", "50"))
+
+_attribution: ContextVar[Dict[str, Any]] = ContextVar("token_attribution", default={})
+
+
+def _default_session_factory():
+    from database.connection import SessionLocal
+    return SessionLocal()
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    """Custo estimado em USD; modelos com sufixo de versão (gpt-4o-mini-2024-07-18) usam o preço do nome base"""
+    prices = TOKEN_PRICING.get(model or "")
+    if prices is None:
+        base = next((name for name in sorted(TOKEN_PRICING, key=len, reverse=True) if (model or "").startswith(name)), None)
+        prices = TOKEN_PRICING[base] if base else (0.0, 0.0)
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def day_start(moment: datetime = None) -> datetime:
+    """Início do dia (UTC) usado pelos orçamentos diários"""
+    moment = moment or datetime.now(timezone.utc)
+    return moment.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class TokenLedger:
+    """Um lançamento por chamada ao LLM: tokens de prompt/completion e custo por task, job, node, modelo e tipo
+
+    Os lançamentos ficam em memória e vão ao banco em lote (a cada LEDGER_FLUSH_SIZE e no fim de
+    cada task); as consultas de gasto somam o banco e o que ainda não foi gravado.
+    """
+
+    def __init__(self, session_factory: Callable = None, flush_size: int = LEDGER_FLUSH_SIZE):
+        self.session_factory = session_factory or _default_session_factory
+        self.flush_size = max(1, flush_size)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def attribute(self, **fields):
+        """Atribui as chamadas ao LLM feitas dentro do bloco (agent_task_id, scheduled_job_id, node)"""
+        token = _attribution.set({**_attribution.get(), **{key: value for key, value in fields.items() if value is not None}})
+        try:
+            yield
+        finally:
+            _attribution.reset(token)
+
+    def record(self, model: Optional[str], call_type: str, usage: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Lança o uso de uma resposta (Chat Completions ou Responses API); sem usage não há lançamento"""
+        if not usage:
+            return None
+        prompt = usage.get("prompt_tokens", usage.get("input_tokens")) or 0
+        completion = usage.get("completion_tokens", usage.get("output_tokens")) or 0
+        attribution = _attribution.get()
+        entry = {
+            "agent_task_id": attribution.get("agent_task_id"),
+            "scheduled_job_id": attribution.get("scheduled_job_id"),
+            "node": attribution.get("node"),
+            "model": model,
+            "call_type": call_type,
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": usage.get("total_tokens") or prompt + completion,
+            "cost_usd": round(estimate_cost(model, prompt, completion), 6),
+            "created_at": datetime.now(timezone.utc)
+        }
+        with self._lock:
+            self._pending.append(entry)
+            full = len(self._pending) >= self.flush_size
+        if full:
+            self.flush()
+        return entry
+
+    def flush(self) -> int:
+        """Grava os lançamentos pendentes; em caso de erro eles continuam pendentes para a próxima vez"""
+        from database.models import TokenLedgerEntry
+
+        with self._flush_lock:
+            with self._lock:
+                entries = list(self._pending)
+            if not entries:
+                return 0
+
+            db = self.session_factory()
+            try:
+                db.bulk_insert_mappings(TokenLedgerEntry, entries)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.warning("Falha ao gravar %d lançamentos de tokens (nova tentativa no próximo flush): %s",
+                               len(entries), e)
+                return 0
+            finally:
+                db.close()
+
+            # Só este flush remove do início da lista; novos lançamentos entram no fim
+            with self._lock:
+                del self._pending[:len(entries)]
+        return len(entries)
+
+    def spent(self, since: datetime = None, scheduled_job_id: int = None) -> Dict[str, Any]:
+        """Tokens e custo desde `since` (início do dia UTC por padrão), de um job ou de todos"""
+        from sqlalchemy import func
+        from database.models import TokenLedgerEntry
+
+        since = since or day_start()
+        db = self.session_factory()
+        try:
+            query = db.query(
+                func.coalesce(func.sum(TokenLedgerEntry.total_tokens), 0),
+                func.coalesce(func.sum(TokenLedgerEntry.cost_usd), 0.0)
+            ).filter(TokenLedgerEntry.created_at >= since)
+            if scheduled_job_id is not None:
+                query = query.filter(TokenLedgerEntry.scheduled_job_id == scheduled_job_id)
+            tokens, cost = query.one()
+        finally:
+            db.close()
+
+        with self._lock:
+            for entry in self._pending:
+                if entry["created_at"] >= since and (scheduled_job_id is None or entry["scheduled_job_id"] == scheduled_job_id):
+                    tokens += entry["total_tokens"]
+                    cost += entry["cost_usd"]
+        return {"tokens": int(tokens), "cost_usd": round(float(cost), 4)}
+
+
+token_ledger = TokenLedger()
@@ -0,0 +1,289 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from datetime import datetime, timezone
+import json
+import os
+import threading
+import time
+import uuid
+import logging
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Spans de cada orquestração (nodes, startups, chamadas HTTP, gravações no banco) gravados em task_spans
+TRACING_ENABLED = os.getenv("ORCHESTRATION_TRACING", "true").lower() == "true"
+
+# Teto de spans mantidos em memória por execução; os excedentes são apenas contados
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "5000"))
+
+# Envio opcional dos spans para um coletor OpenTelemetry (OTLP/HTTP JSON, ex: http://otel-collector:4318/v1/traces)
+OTLP_TRACES_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT", "")
+OTLP_HEADERS = os.getenv("OTEL_EXPORTER_OTLP_HEADERS", "")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "nvidia-inception-backend")
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("orchestration_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("orchestration_span", default=None)
+
+
+class Span:
+    """Um trecho cronometrado da execução; filho do span ativo quando foi aberto"""
+
+    __slots__ = ("trace", "span_id", "parent_span_id", "name", "kind", "start_time", "status",
+                 "attributes", "duration", "_started")
+
+    def __init__(self, trace: "Trace", name: str, kind: str, parent_span_id: Optional[str],
+                 attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.start_time = time.time()
+        self.status = "ok"
+        self.attributes = attributes
+        self.duration: Optional[float] = None
+        self._started = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, error: Any = None, **attributes):
+        """Fecha o span; `error` (exceção ou texto) ou status HTTP >= 400 marcam o span como erro"""
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._started
+        self.attributes.update(attributes)
+        if error is None and (self.attributes.get("status_code") or 0) >= 400:
+            error = f"HTTP {self.attributes['status_code']}"
+        if error is not None:
+            self.status = "error"
+            self.attributes["error"] = (f"{type(error).__name__}: {error}" if isinstance(error, BaseException)
+                                        else str(error))[:500]
+
+    def to_dict(self) -> Dict[str, Any]:
+        duration = self.duration if self.duration is not None else time.perf_counter() - self._started
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "status": self.status if self.duration is not None else "unfinished",
+            "start_time": datetime.fromtimestamp(self.start_time, tz=timezone.utc),
+            "offset_ms": round((self.start_time - self.trace.started_at) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+            "attributes": json.loads(json.dumps(self.attributes, default=str))
+        }
+
+
+class _NoopSpan:
+    """Devolvido quando não há trace ativo (ou o teto foi atingido): as chamadas não fazem nada"""
+
+    span_id = None
+
+    def set(self, **attributes):
+        pass
+
+    def end(self, error: Any = None, **attributes):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Trace:
+    """Spans de uma execução, acumulados em memória e gravados de uma vez só no fim (TraceStore)"""
+
+    def __init__(self, agent_task_id: Optional[int] = None, max_spans: int = TRACE_MAX_SPANS):
+        self.agent_task_id = agent_task_id
+        self.trace_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def _open(self, name: str, kind: str, attributes: Dict[str, Any]):
+        parent = _current_span.get()
+        with self._lock:
+            if len(self.spans) >= self.max_spans:
+                self.dropped += 1
+                return _NOOP
+            span = Span(self, name, kind, parent.span_id if parent is not None else None, attributes)
+            self.spans.append(span)
+        return span
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Spans prontos para gravar/exportar (o primeiro leva a contagem de descartados)"""
+        with self._lock:
+            rows = [span.to_dict() for span in self.spans]
+        if rows and self.dropped:
+            rows[0]["attributes"]["dropped_spans"] = self.dropped
+        return rows
+
+
+@contextmanager
+def use_trace(trace: Optional[Trace]) -> Iterator[Optional[Trace]]:
+    """Ativa o trace no contexto atual; spans abertos dentro do bloco (e em `propagate`) entram nele"""
+    if trace is None:
+        yield None
+        return
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes) -> Iterator[Any]:
+    """Span com filhos: o que for aberto dentro do bloco fica pendurado nele"""
+    trace = _current_trace.get()
+    current = trace._open(name, kind, attributes) if trace is not None else _NOOP
+    if current is _NOOP:
+        yield current
+        return
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(error=e)
+        raise
+    finally:
+        current.end()
+        _current_span.reset(token)
+
+
+def start_span(name: str, kind: str = "internal", trace: Optional[Trace] = None, **attributes):
+    """Span folha (ex: uma chamada HTTP) fechado explicitamente com `.end()`
+
+    Com `trace` o span é aberto nele mesmo fora de `use_trace` (na raiz, se não houver span ativo).
+    """
+    trace = trace or _current_trace.get()
+    return trace._open(name, kind, attributes) if trace is not None else _NOOP
+
+
+def propagate(function: Callable) -> Callable:
+    """`function` com o contexto atual (trace, span, cassette e atribuição do ledger de tokens) para rodar em outra thread"""
+    context = copy_context()
+
+    def run(*args, **kwargs):
+        # Uma cópia por chamada: o mesmo Context não pode estar ativo em duas threads
+        return context.copy().run(function, *args, **kwargs)
+    return run
+
+
+# =============================================================================
+# Visualização e exportação
+# =============================================================================
+
+def waterfall(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Spans em ordem de execução (pré-ordem da árvore), com profundidade, e o total por nome"""
+    known = {s["span_id"] for s in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = defaultdict(list)
+    for s in sorted(spans, key=lambda s: s["offset_ms"]):
+        children[s["parent_span_id"] if s["parent_span_id"] in known else None].append(s)
+
+    rows = []
+    stack = [(s, 0) for s in reversed(children[None])]
+    while stack:
+        s, depth = stack.pop()
+        rows.append({
+            "span_id": s["span_id"],
+            "parent_span_id": s["parent_span_id"],
+            "depth": depth,
+            "name": s["name"],
+            "kind": s["kind"],
+            "status": s["status"],
+            "offset_ms": s["offset_ms"],
+            "duration_ms": s["duration_ms"],
+            "attributes": s["attributes"]
+        })
+        stack.extend((child, depth + 1) for child in reversed(children[s["span_id"]]))
+
+    summary: Dict[str, Dict[str, Any]] = {}
+    for s in spans:
+        entry = summary.setdefault(s["name"], {"name": s["name"], "kind": s["kind"], "count": 0,
+                                               "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+        entry["count"] += 1
+        entry["errors"] += s["status"] == "error"
+        entry["total_ms"] = round(entry["total_ms"] + s["duration_ms"], 3)
+        entry["max_ms"] = max(entry["max_ms"], s["duration_ms"])
+
+    return {
+        "trace_id": spans[0]["trace_id"] if spans else None,
+        "started_at": min((s["start_time"] for s in spans), default=None),
+        "duration_ms": max((s["offset_ms"] + s["duration_ms"] for s in spans), default=0.0),
+        "span_count": len(spans),
+        "spans": rows,
+        "summary": sorted(summary.values(), key=lambda entry: entry["total_ms"], reverse=True)
+    }
+
+
+# SpanKind do OTLP: chamadas de saída são CLIENT (3), o resto INTERNAL (1)
+_OTLP_KIND = {"http": 3, "db": 3}
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, str):
+        return {"stringValue": value}
+    return {"stringValue": json.dumps(value, ensure_ascii=False, default=str)}
+
+
+def _unix_nano(moment: datetime) -> int:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1_000_000) * 1000
+
+
+def to_otlp(spans: List[Dict[str, Any]], agent_task_id: Optional[int] = None) -> Dict[str, Any]:
+    """Spans no formato OTLP/JSON (ExportTraceServiceRequest), importável em Jaeger/Tempo/coletor OTel"""
+    otlp_spans = []
+    for s in spans:
+        start = _unix_nano(s["start_time"])
+        attributes = {"span.kind": s["kind"], **(s["attributes"] or {})}
+        if agent_task_id is not None:
+            attributes["agent_task.id"] = agent_task_id
+        otlp_spans.append({
+            "traceId": s["trace_id"],
+            "spanId": s["span_id"],
+            "parentSpanId": s["parent_span_id"] or "",
+            "name": s["name"],
+            "kind": _OTLP_KIND.get(s["kind"], 1),
+            "startTimeUnixNano": str(start),
+            "endTimeUnixNano": str(start + int(s["duration_ms"] * 1_000_000)),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()],
+            "status": {"code": 2, "message": str(s["attributes"].get("error", ""))} if s["status"] == "error" else {"code": 1}
+        })
+
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": OTEL_SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": otlp_spans}]
+    }]}
+
+
+def export_otlp(trace: Trace) -> bool:
+    """Envia o trace ao coletor configurado em OTEL_EXPORTER_OTLP_TRACES_ENDPOINT (falha só é logada)"""
+    if not OTLP_TRACES_ENDPOINT:
+        return False
+    headers = dict(item.split("=", 1) for item in OTLP_HEADERS.split(",") if "=" in item)
+    try:
+        response = requests.post(OTLP_TRACES_ENDPOINT, json=to_otlp(trace.rows(), trace.agent_task_id),
+                                 headers={key.strip(): value.strip() for key, value in headers.items()}, timeout=5)
+        response.raise_for_status()
+        return True
+    except requests.RequestException as e:
+        logger.warning("Falha ao exportar trace %s para %s: %s", trace.trace_id, OTLP_TRACES_ENDPOINT, e)
+        return False
@@ -3,26 +3,34 @@ import json
 import os
 from typing import Dict, Any, List, Optional
 from urllib.parse import urlparse
-import time
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from datetime import datetime
+from agents.openai_client import post_with_retry, OPENAI_BASE_URL
+from agents import tracing
+from agents.structured_output import chat_response_format, parse_output
+from schemas.llm_outputs import StartupValidationOutput
+from agents.prompts import STARTUP_VALIDATION_PROMPT, STARTUP_VALIDATION_SYSTEM_PROMPT, count_static_tokens, usage_from_response
 
 logger = logging.getLogger(__name__)
 
+# Validações simultâneas em batch_validate_startups; a vazão real é controlada pelo rate limiter global
+VALIDATION_BATCH_WORKERS = int(os.getenv("VALIDATION_BATCH_WORKERS", "4"))
+
 class StartupValidationAgent:
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
 
-        self.chat_url = "https://api.openai.com/v1/chat/completions"
+        self.chat_url = f"{OPENAI_BASE_URL}/chat/completions"
         # Usar gpt-4o-mini padrão
         self.model = "gpt-4o-mini"
 
     def _perform_targeted_web_validation(self, startup_name: str, country: str, website_works: bool) -> Dict[str, Any]:
         """Validação técnica simples baseada no website fornecido pelo discovery"""
 
-        logger.info(f"Executando validação técnica para {startup_name}")
+        logger.info("Executando validação técnica para %s", startup_name)
 
         validation_data = {
             "website_found": None,
@@ -38,9 +46,9 @@ class StartupValidationAgent:
         if website_works:
             validation_data["company_status"] = "active"
             validation_data["website_found"] = "confirmed_working"
-            logger.info(f"Website de {startup_name} está funcionando")
+            logger.info("Website de %s está funcionando", startup_name)
         else:
-            logger.warning(f"Website fornecido para {startup_name} não está funcionando")
+            logger.warning("Website fornecido para %s não está funcionando", startup_name)
             validation_data["company_status"] = "inactive_website"
 
         return validation_data
@@ -76,121 +84,66 @@ class StartupValidationAgent:
         sector_examples = self._get_sector_validation_examples(expected_sector)
 
         # Análise final combinando validações técnicas + web (se necessário)
-        validation_prompt = f"""
-        Valide esta startup combinando verificações técnicas e busca web:
-
-        DADOS DA STARTUP:
-        Nome: {startup_data.get('name')}
-        Website: {startup_data.get('website')} (acessível: {'Sim' if website_valid else 'Não'})
-        Setor Declarado: {startup_data.get('sector')}
-        Descrição: {startup_data.get('description', '')}
-        Tecnologias IA: {startup_data.get('ai_technologies', [])} (DEVE ser em inglês)
-        Funding: ${startup_data.get('last_funding_amount', 0):,}
-        Investidores: {startup_data.get('investor_names')}
-        Fontes: {startup_data.get('sources', {})}
-
-        {'DADOS DA BUSCA WEB:' + json.dumps(web_validation_data, indent=2) if web_validation_data else 'Busca web não foi necessária.'}
-
-        {sector_examples}
-
-        CRITÉRIOS DE VALIDAÇÃO - APLICAR RIGOROSAMENTE:
-
-        1. COERÊNCIA NOME-DESCRIÇÃO: {'✓' if True else '✗'}
-           - Nome e descrição devem se referir à MESMA empresa
-           - Zero tolerância para mistura de empresas diferentes
-
-        2. VALIDAÇÃO TÉCNICA DE WEBSITE: {'✓' if website_valid else '✗'}
-           - Website deve ser tecnicamente acessível
-
-        3. TECNOLOGIAS IA - CRITÉRIO RIGOROSO:
-           - APENAS em inglês: "Computer Vision", "Natural Language Processing", "Machine Learning"
-           - ESPECÍFICAS, não genéricas: "Deep Learning" ✓, "análise de dados" ✗
-           - TECNOLOGIAS, não aplicações: "NLP" ✓, "análise de crédito" ✗
-
-        4. VALIDAÇÃO RIGOROSA DE SETOR POR CORE BUSINESS - CRITÉRIO ELIMINATÓRIO:
-           - ANALISAR o negócio PRINCIPAL da startup através de descrição E website
-           - SETOR DEVE SER O CORE BUSINESS, não apenas cliente ou aplicação secundária
-           - EXEMPLOS DE INVALIDAÇÃO POR SETOR:
-             * Se busca "Saúde" mas startup é de pagamentos/fintech → INVALID
-             * Se busca "Agro" mas startup é de marketing digital → INVALID
-             * Se busca "Fintech" mas startup é de análise médica → INVALID
-           - ZERO TOLERÂNCIA: core business diferente = INVALIDAÇÃO AUTOMÁTICA
-           - Não aceitar empresas que apenas "atendem" o setor como clientes
-
-        5. VALIDAÇÃO CRÍTICA DE VENTURE CAPITAL - OBRIGATÓRIO:
-           - DEVE ter recebido funding de Venture Capital confirmado
-           - Investidores devem ser FUNDOS VC conhecidos (não genéricos)
-           - Funding amount mínimo de $100k
-           - Fontes confiáveis que comprovem o VC funding
-           - REJEITAR se só tem: gov funding, bootstrapping, crowdfunding, angel apenas
-
-        6. CONSISTÊNCIA DE DADOS:
-           - Funding realista e verificado
-           - Investidores conhecidos no ecossistema
-           - Datas e valores coerentes
-
-        INVALIDAÇÃO AUTOMÁTICA SE:
-        - SEM VENTURE CAPITAL confirmado (REGRA FUNDAMENTAL)
-        - Tecnologias em português ou genéricas demais
-        - Incoerência nome-descrição
-        - Core business diferente do setor solicitado
-        - Dados claramente inventados ou inconsistentes
-        - Apenas funding governamental/crowdfunding/bootstrapping
-
-        RETORNE JSON:
-        {{
-            "validation_status": "valid/suspicious/invalid",
-            "confidence_score": 0.XX,
-            "issues_found": ["problemas específicos"],
-            "verified_website": "{startup_data.get('website') if website_valid else 'null'}",
-            "funding_verified": true/false,
-            "company_active": true/false,
-            "web_search_used": {str(bool(web_validation_data)).lower()},
-            "technology_validation": "valid/invalid",
-            "sector_validation": "valid/invalid",
-            "recommendations": ["ações sugeridas"]
-        }}
-        """
+        rendered_prompt = STARTUP_VALIDATION_PROMPT.build(
+            name=startup_data.get('name'),
+            website=startup_data.get('website'),
+            website_accessible='Sim' if website_valid else 'Não',
+            sector=startup_data.get('sector'),
+            description=startup_data.get('description', ''),
+            ai_technologies=startup_data.get('ai_technologies', []),
+            funding_amount=startup_data.get('last_funding_amount') or 0,
+            investor_names=startup_data.get('investor_names'),
+            sources=startup_data.get('sources', {}),
+            web_validation_text='DADOS DA BUSCA WEB:' + json.dumps(web_validation_data, indent=2) if web_validation_data else 'Busca web não foi necessária.',
+            sector_examples=sector_examples.strip(),
+            website_check='✓' if website_valid else '✗',
+            verified_website=startup_data.get('website') if website_valid else 'null',
+            web_search_used=str(bool(web_validation_data)).lower()
+        )
+        validation_prompt = rendered_prompt.text
+        estimated_prompt_tokens = rendered_prompt.tokens + count_static_tokens(STARTUP_VALIDATION_SYSTEM_PROMPT)
 
         try:
-            response = requests.post(
+            response = post_with_retry(
                 self.chat_url,
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
                     "Content-Type": "application/json"
                 },
-                json={
+                payload={
                     "model": self.model,
                     "messages": [
-                        {"role": "system", "content": "Analise resultados de busca web e valide startups. Retorne JSON válido."},
+                        {"role": "system", "content": STARTUP_VALIDATION_SYSTEM_PROMPT},
                         {"role": "user", "content": validation_prompt}
                     ],
                     "temperature": 0.1,
-                    "max_tokens": 800
+                    "max_tokens": 800,
+                    "response_format": chat_response_format(StartupValidationOutput)
                 },
-                timeout=30
+                timeout=30,
+                estimated_tokens=estimated_prompt_tokens + 800,
+                call_type="startup_validation"
             )
 
             if response.status_code == 200:
                 result = response.json()
-                content = result["choices"][0]["message"]["content"].strip()
-
-                # Parse JSON response
-                if content.startswith("```json"):
-                    content = content.replace("```json", "").replace("```", "").strip()
-                elif content.startswith("```"):
-                    content = content.replace("```", "", 1).replace("```", "").strip()
-
-                validation_result = json.loads(content)
-                validation_result["tokens_used"] = result["usage"]["total_tokens"]
+                parsed, parse_error = parse_output(result["choices"][0]["message"]["content"], StartupValidationOutput)
+                if parsed is None:
+                    return self._default_validation_result(f"Parse error ({parse_error})")
+
+                validation_result = parsed.model_dump()
+                usage = result.get("usage", {})
+                validation_result["tokens_used"] = usage.get("total_tokens", 0)
+                validation_result["usage"] = usage_from_response({
+                    "prompt_tokens": usage.get("prompt_tokens", 0),
+                    "completion_tokens": usage.get("completion_tokens", 0)
+                }, estimated_prompt_tokens)
 
                 return validation_result
 
             else:
                 return self._default_validation_result(f"API Error: {response.status_code}")
 
-        except json.JSONDecodeError as e:
-            return self._default_validation_result(f"JSON parse error: {e}")
         except Exception as e:
             return self._default_validation_result(f"Validation error: {e}")
 
@@ -213,8 +166,11 @@ class StartupValidationAgent:
         results = []
         total_tokens = 0
 
-        for startup in startups_list:
-            validation = self.validate_startup_info(startup)
+        # Sem delay fixo entre itens: o rate limiter global segura as requisições quando necessário
+        with ThreadPoolExecutor(max_workers=max(1, min(VALIDATION_BATCH_WORKERS, len(startups_list) or 1))) as executor:
+            validations = list(executor.map(tracing.propagate(self.validate_startup_info), startups_list))
+
+        for startup, validation in zip(startups_list, validations):
             total_tokens += validation.get("tokens_used", 0)
 
             results.append({
@@ -222,9 +178,6 @@ class StartupValidationAgent:
                 "validation": validation
             })
 
-            # Pequeno delay para evitar rate limiting
-            time.sleep(1)
-
         return {
             "validations": results,
             "total_tokens_used": total_tokens,
@@ -279,14 +232,14 @@ class StartupValidationAgent:
 
                 # Considerar válido se retornar 200-399 ou 403 (bloqueio mas existe)
                 if response.status_code in range(200, 400) or response.status_code == 403:
-                    logger.info(f"Website válido encontrado: {test_url} (status: {response.status_code})")
+                    logger.info("Website válido encontrado: %s (status: %s)", test_url, response.status_code)
                     return True
 
             except requests.exceptions.Timeout:
-                logger.warning(f"Timeout ao acessar {test_url}")
+                logger.warning("Timeout ao acessar %s", test_url)
                 continue
             except Exception as e:
-                logger.debug(f"Erro ao verificar {test_url}: {e}")
+                logger.debug("Erro ao verificar %s: %s", test_url, e)
                 continue
 
         return False
@@ -1,12 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from database.connection import get_db
 from database import models
 from schemas.agent import AgentTaskRequest, AgentTaskResponse
 from services.agent_service import AgentService
-from services.task_manager import task_manager, process_orchestration_task
+from services.result_store import ResultStore
+from services.trace_store import TraceStore
+from services.task_heartbeat import claim_task
+from agents import tracing
+from agents.token_ledger import token_ledger, day_start
+from services.token_budget import budget_status, usage_breakdown
+from datetime import timedelta
+from services.task_manager import task_manager, process_orchestration_task, resume_orchestration_task, ORCHESTRATION_TASK_TYPES
 
 router = APIRouter()
 
@@ -45,7 +52,8 @@ async def run_startup_pipeline(
         getattr(request, 'limit', 5),
         request.from_worker,
         request.job_id,
-        getattr(request, 'search_strategy', 'specific')
+        getattr(request, 'search_strategy', 'specific'),
+        request.time_budget_seconds
     )
 
     return AgentTaskResponse(
@@ -66,15 +74,25 @@ async def get_task_status(task_id: int, db: Session = Depends(get_db)):
     # Filtrar output_data para remover informações sensíveis
     filtered_output = None
     if task.output_data:
+        if "results" in task.output_data:
+            # Tasks antigas guardavam o resultado completo em output_data
+            discovery_count = len(task.output_data.get("results", {}).get("startup_metrics", []))
+            invalid_count = len(task.output_data.get("results", {}).get("invalid_startups", []))
+        else:
+            discovery_count = task.output_data.get("startup_count", 0)
+            invalid_count = task.output_data.get("invalid_count", 0)
+
         filtered_output = {
             "status": task.output_data.get("status"),
             "total_tokens": task.output_data.get("total_tokens", 0),
             "execution_time": task.output_data.get("execution_time", 0),
             "pipeline_summary": {
-                "discovery_count": len(task.output_data.get("results", {}).get("startup_metrics", [])),
-                "invalid_count": len(task.output_data.get("results", {}).get("invalid_startups", [])),
+                "discovery_count": discovery_count,
+                "invalid_count": invalid_count,
+                "excluded_count": task.output_data.get("excluded_count", 0),
                 "success": task.output_data.get("status") == "success"
-            }
+            },
+            "has_full_result": bool(task.result_digest)
         }
 
         # Adicionar erros se houver
@@ -95,11 +113,117 @@ async def get_task_status(task_id: int, db: Session = Depends(get_db)):
         "created_at": task.created_at
     }
 
+@router.post("/tasks/{task_id}/resume", response_model=AgentTaskResponse)
+async def resume_task(task_id: int, db: Session = Depends(get_db)):
+    """Retoma uma orquestração interrompida ou com erro a partir do último node concluído"""
+    service = AgentService(db)
+    task = service.get_task(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if task.task_type not in ORCHESTRATION_TASK_TYPES:
+        raise HTTPException(status_code=400, detail="Only orchestration tasks can be resumed")
+    if task.status == "completed" and (task.output_data or {}).get("status") == "success":
+        raise HTTPException(status_code=409, detail="Task already completed successfully")
+    # Pending/running só é retomada se estiver órfã (sem batimento de nenhuma réplica)
+    if task.status in ("pending", "running") and not claim_task(db, task.id, ("pending", "running")):
+        raise HTTPException(status_code=409, detail="Task is still queued or running")
+
+    task_manager.enqueue_task(task.id, resume_orchestration_task, task.id)
+
+    return AgentTaskResponse(
+        task_id=task.id,
+        status="pending",
+        message=f"Orchestration resume queued (queue size: {task_manager.get_queue_size()})"
+    )
+
+@router.get("/tasks/{task_id}/result")
+async def get_task_result(task_id: int, db: Session = Depends(get_db)):
+    """Retorna o resultado completo da orquestração (carregado sob demanda do result store)"""
+    service = AgentService(db)
+    task = service.get_task(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if task.result_digest:
+        result = ResultStore(db).get(task.result_digest)
+        if result is not None:
+            return {"task_id": task.id, "result_digest": task.result_digest, "result": result}
+
+    # Compatibilidade com tasks antigas que guardavam tudo em output_data
+    if task.output_data and "results" in task.output_data:
+        return {"task_id": task.id, "result_digest": None, "result": task.output_data}
+
+    raise HTTPException(status_code=404, detail="Result not available")
+
+@router.get("/tasks/{task_id}/trace")
+async def get_task_trace(task_id: int, trace_id: Optional[str] = None, format: str = "waterfall",
+                         db: Session = Depends(get_db)):
+    """Waterfall dos spans de uma execução da task (a mais recente por padrão); format=otlp devolve OTLP/JSON"""
+    if format not in ("waterfall", "otlp"):
+        raise HTTPException(status_code=400, detail="format must be 'waterfall' or 'otlp'")
+
+    service = AgentService(db)
+    if not service.get_task(task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    store = TraceStore(db)
+    traces = store.traces(task_id)
+    if trace_id is None and traces:
+        trace_id = traces[-1]["trace_id"]
+    if trace_id not in [trace["trace_id"] for trace in traces]:
+        raise HTTPException(status_code=404, detail="Trace not available")
+
+    spans = store.spans(task_id, trace_id)
+    if format == "otlp":
+        return tracing.to_otlp(spans, task_id)
+    return {"task_id": task_id, "traces": traces, **tracing.waterfall(spans)}
+
+@router.get("/tasks/{task_id}/tokens")
+async def get_task_tokens(task_id: int, db: Session = Depends(get_db)):
+    """Tokens e custo estimado da task por node, modelo e tipo de chamada"""
+    service = AgentService(db)
+    if not service.get_task(task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    token_ledger.flush()
+    breakdown = usage_breakdown(db, ["node", "model", "call_type"], agent_task_id=task_id)
+    return {
+        "task_id": task_id,
+        "total_tokens": sum(row["total_tokens"] for row in breakdown),
+        "cost_usd": round(sum(row["cost_usd"] for row in breakdown), 4),
+        "breakdown": breakdown
+    }
+
+@router.get("/tokens/usage")
+async def get_token_usage(days: int = 7, db: Session = Depends(get_db)):
+    """Consumo de tokens: orçamento de hoje, totais diários (UTC) e hoje por job e por node/modelo/tipo"""
+    if days < 1:
+        raise HTTPException(status_code=400, detail="days must be >= 1")
+
+    token_ledger.flush()
+    today = day_start()
+    daily = db.query(
+        func.date(models.TokenLedgerEntry.created_at),
+        func.sum(models.TokenLedgerEntry.total_tokens),
+        func.sum(models.TokenLedgerEntry.cost_usd)
+    ).filter(
+        models.TokenLedgerEntry.created_at >= today - timedelta(days=days - 1)
+    ).group_by(func.date(models.TokenLedgerEntry.created_at)).order_by(func.date(models.TokenLedgerEntry.created_at)).all()
+
+    return {
+        "budget": budget_status(),
+        "daily": [{"date": str(date), "total_tokens": int(tokens or 0), "cost_usd": round(float(cost or 0), 4)}
+                  for date, tokens, cost in daily],
+        "today_by_job": usage_breakdown(db, ["scheduled_job_id"], since=today),
+        "today_by_call": usage_breakdown(db, ["node", "model", "call_type"], since=today)
+    }
+
 @router.get("/queue/status")
 async def get_queue_status():
     """Retorna o status da fila de processamento"""
     return {
         "queue_size": task_manager.get_queue_size(),
+        "deferred": task_manager.get_deferred_count(),
         "worker_running": task_manager.is_worker_running(),
         "message": "Task queue operational" if task_manager.is_worker_running() else "Task queue stopped"
     }
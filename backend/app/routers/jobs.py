@@ -5,6 +5,7 @@ from database.connection import get_db
 from database.models import ScheduledJob
 from schemas.agent import ScheduledJobCreate, ScheduledJobUpdate, ScheduledJobResponse
 from services.scheduler_service import scheduler_service
+from services.token_budget import budget_status
 import logging
 
 logger = logging.getLogger(__name__)
@@ -79,6 +80,17 @@ async def get_scheduled_job(
         raise HTTPException(status_code=404, detail="Job não encontrado")
     return job
 
+@router.get("/{job_id}/budget")
+async def get_job_budget(
+    job_id: int,
+    db: Session = Depends(get_db)
+):
+    """Gasto de tokens de hoje contra os orçamentos do job e global, e a ação da próxima execução"""
+    job = db.query(ScheduledJob).filter(ScheduledJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return {"job_id": job.id, **budget_status(job)}
+
 @router.put("/{job_id}", response_model=ScheduledJobResponse)
 async def update_scheduled_job(
     job_id: int,
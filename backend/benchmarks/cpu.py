@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks das etapas puramente de CPU do pipeline, sobre dados sintéticos
+
+Cada caso roda para cada tamanho (10 a 100k registros por padrão) com repetição estatística
+(mediana, mínimo e desvio padrão de várias amostras) e é comparado com o baseline salvo.
+
+    python benchmarks/cpu.py                            # roda tudo e compara com o baseline
+    python benchmarks/cpu.py --save-baseline            # grava benchmarks/baselines/cpu.json
+    python benchmarks/cpu.py --cases validation report_workbook --sizes 10 1000
+
+Nenhuma chamada de rede é feita: o caso "validation" usa startups sem website (o probe HTTP
+é I/O e aparece no benchmark ponta a ponta, benchmarks/pipeline.py).
+"""
+
+import sys
+import os
+import argparse
+import json
+import logging
+import platform
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Nenhuma chamada real é feita; só precisamos que os módulos importem
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from agents import scoring_engine, source_reputation
+from agents.exclusion_index import build_exclusion_index
+from agents.json_extraction import extract_json
+from agents.orchestrator import get_orchestrator
+from agents.structured_output import parse_output
+from schemas.llm_outputs import DiscoveryOutput
+from services.report_service import ReportService
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "cpu.json")
+
+SECTORS = ["Fintech", "Saúde", "Agro", "Educação", "Logística", "Energia", "Varejo"]
+CITIES = ["São Paulo", "Rio de Janeiro", "Belo Horizonte", "Curitiba", "Florianópolis", "Recife"]
+TECHNOLOGIES = ["Machine Learning", "Computer Vision", "NLP", "LLM", "Deep Learning", "Reinforcement Learning"]
+INVESTORS = ["Kaszek", "Monashees", "Valor Capital", "Canary", "Astella", "SoftBank", "a16z", "Anjo Local"]
+ROUNDS = ["Pre-Seed", "Seed", "Series A", "Series B", "Series C"]
+# Mistura de fontes reconhecidas (domínio e nome) e desconhecidas, como vêm do discovery
+FUNDING_SOURCES = ["https://www.crunchbase.com/organization/{slug}", "https://techcrunch.com/2024/05/{slug}-raises",
+                   "https://neofeed.com.br/startups/{slug}", "Press release {name}", "https://blog.{slug}.io/news",
+                   "Bloomberg Línea", "https://medium.com/@{slug}/funding"]
+VALIDATION_SOURCES = ["https://www.linkedin.com/company/{slug}", "Site oficial", "https://{slug}.com.br/sobre",
+                      "https://startupi.com.br/{slug}"]
+
+
+def make_startups(size: int, seed: int = 42, websites: bool = True) -> List[Dict[str, Any]]:
+    """Startups no formato do DiscoveryOutput, com nomes únicos e ~20% sem VC confirmado"""
+    rng = random.Random(seed)
+    startups = []
+    for i in range(size):
+        name = f"{rng.choice(['Neo', 'Agro', 'Med', 'Pay', 'Edu', 'Log', 'Sol'])}{rng.choice(['tech', 'IA', 'Lab', 'Hub'])} {i}"
+        slug = name.lower().replace(" ", "-")
+        sector = rng.choice(SECTORS)
+        has_vc = rng.random() > 0.2
+        startups.append({
+            "name": name,
+            "website": f"https://{slug}.com.br" if websites else None,
+            "sector": sector,
+            "ai_technologies": rng.sample(TECHNOLOGIES, rng.randint(1, 3)),
+            "founded_year": rng.randint(2012, 2024),
+            "last_funding_amount": round(rng.lognormvariate(14, 1.5), 2) if has_vc else None,
+            "investor_names": rng.sample(INVESTORS, rng.randint(1, 3)) if has_vc else [],
+            "country": "Brazil",
+            "city": rng.choice(CITIES),
+            "description": (f"Startup de {sector} que usa inteligência artificial para financial banking payments "
+                            f"e {rng.choice(['credit', 'healthcare', 'logistics', 'retail'])} em escala."),
+            "has_venture_capital": has_vc,
+            "funding_round": rng.choice(ROUNDS) if has_vc else None,
+            "funding_date": f"{rng.randint(2019, 2025)}-{rng.randint(1, 12):02d}" if has_vc else None,
+            "sources": {
+                "funding": [s.format(slug=slug, name=name) for s in rng.sample(FUNDING_SOURCES, rng.randint(0, 3))],
+                "validation": [s.format(slug=slug) for s in rng.sample(VALIDATION_SOURCES, rng.randint(1, 2))]
+            }
+        })
+    return startups
+
+
+# =============================================================================
+# Casos: cada um recebe o tamanho e devolve a função medida (a preparação não entra na medição)
+# =============================================================================
+
+def case_source_validation(size: int) -> Callable[[], Any]:
+    """_source_validation_agent: reputação das fontes do lote inteiro"""
+    startups = make_startups(size)
+    index = source_reputation.get_index()
+    return lambda: index.score_startups(startups)
+
+
+def case_validation(size: int) -> Callable[[], Any]:
+    """_validate_startup_thoroughly por startup (setor, VC e fontes; sem probe de website)"""
+    startups = make_startups(size, websites=False)
+    orchestrator = get_orchestrator()
+    state = {"sector": "Fintech", "country": "Brazil"}
+    return lambda: [orchestrator._validate_startup_thoroughly(startup, state) for startup in startups]
+
+
+def case_discovery_parse(size: int) -> Callable[[], Any]:
+    """Resposta do discovery em JSON puro (caminho direto do model_validate_json)"""
+    content = json.dumps({"startups": make_startups(size)}, ensure_ascii=False)
+    return lambda: parse_output(content, DiscoveryOutput, repair=True)
+
+
+def case_discovery_extract(size: int) -> Callable[[], Any]:
+    """Resposta do websearch com texto ao redor, cerca markdown e JSON truncado (extrator tolerante + reparo)"""
+    body = json.dumps({"startups": make_startups(size)}, ensure_ascii=False, indent=2)
+    content = f"Encontrei as seguintes startups [1]:\n\n```json\n{body[:-len(body) // (size * 2) - 1]}"
+    return lambda: extract_json(content, expect=list, repair=True, item_type=dict)
+
+
+def case_exclusion_list(size: int) -> Callable[[], Any]:
+    """Índice de exclusão + texto do prompt (_format_exclusion_list) sobre o contexto válido/inválido"""
+    startups = make_startups(size)
+    now = datetime.now()
+    for i, startup in enumerate(startups):
+        startup["created_at"] = (now - timedelta(days=i % 720)).isoformat()
+    valid, invalid = startups[: size * 4 // 5], startups[size * 4 // 5:]
+    return lambda: build_exclusion_index("Brazil", "Fintech", valid, invalid).format_for_prompt()
+
+
+def case_default_metrics(size: int) -> Callable[[], Any]:
+    """_default_metrics chamado startup a startup (fallback quando o LLM falha)"""
+    startups = make_startups(size)
+    orchestrator = get_orchestrator()
+    return lambda: [orchestrator._default_metrics(startup, "benchmark") for startup in startups]
+
+
+def case_batch_metrics(size: int) -> Callable[[], Any]:
+    """scoring_engine.score_startups do lote inteiro (caminho do re-scoring em massa)"""
+    startups = make_startups(size)
+    return lambda: scoring_engine.score_startups(startups, "benchmark")
+
+
+def case_report_workbook(size: int) -> Callable[[], Any]:
+    """ReportService.build_workbook: XLSX com uma linha por startup"""
+    rows = []
+    for i, startup in enumerate(make_startups(size)):
+        row = SimpleNamespace(**{k: v for k, v in startup.items() if k != "sources"})
+        row.metrics = [SimpleNamespace(total_score=float(i % 100))] if i % 10 else []
+        rows.append(row)
+    service = ReportService(db=None)
+    return lambda: service.build_workbook(rows)
+
+
+CASES: Dict[str, Callable[[int], Callable[[], Any]]] = {
+    "source_validation": case_source_validation,
+    "validation": case_validation,
+    "discovery_parse": case_discovery_parse,
+    "discovery_extract": case_discovery_extract,
+    "exclusion_list": case_exclusion_list,
+    "default_metrics": case_default_metrics,
+    "batch_metrics": case_batch_metrics,
+    "report_workbook": case_report_workbook,
+}
+
+
+# =============================================================================
+# Medição
+# =============================================================================
+
+def measure(func: Callable[[], Any], repeat: int, min_time: float) -> Dict[str, Any]:
+    """Amostras de `number` chamadas cada, com number calibrado para a amostra durar ~min_time"""
+    started = time.perf_counter()
+    func()  # aquecimento e calibração
+    single = time.perf_counter() - started
+    number = max(1, int(min_time / single)) if single > 0 else 1000
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number)
+
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "repeat": repeat,
+        "number": number
+    }
+
+
+def run(cases: List[str], sizes: List[int], repeat: int, min_time: float) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in cases:
+        print(f"\n⏱️  {name}: {CASES[name].__doc__}")
+        results[name] = {}
+        for size in sizes:
+            func = CASES[name](size)
+            timing = measure(func, repeat, min_time)
+            results[name][str(size)] = timing
+            print(f"   • {size:>7} registros   mediana {_fmt(timing['median'])}   mín {_fmt(timing['min'])}   "
+                  f"± {_fmt(timing['stdev'])}   {timing['median'] / size * 1e6:9.2f} µs/registro")
+    return results
+
+
+def _fmt(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:8.3f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.3f} ms"
+    return f"{seconds * 1e6:8.1f} µs"
+
+
+# =============================================================================
+# Baseline
+# =============================================================================
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]]):
+    """Mescla os resultados no baseline existente (casos/tamanhos não medidos são mantidos)"""
+    baseline = load_baseline(path)
+    merged = baseline.get("results", {})
+    for name, by_size in results.items():
+        merged.setdefault(name, {}).update(by_size)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+            "results": merged
+        }, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Baseline gravado em {path}")
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> int:
+    """Imprime a variação da mediana contra o baseline; retorna o número de regressões"""
+    recorded = baseline.get("results", {})
+    print(f"\n📊 Comparação com o baseline de {baseline.get('created_at', '?')} ({baseline.get('machine', '?')}):")
+
+    regressions = 0
+    for name, by_size in results.items():
+        for size, timing in by_size.items():
+            previous = recorded.get(name, {}).get(size)
+            if not previous:
+                continue
+            change = timing["median"] / previous["median"] - 1
+            # Só é regressão se até a melhor amostra ficou acima do limite (descarta ruído)
+            regressed = change > threshold and timing["min"] > previous["median"] * (1 + threshold)
+            improved = change < -threshold
+            regressions += regressed
+            marker = "❌" if regressed else "✅" if improved else "  "
+            print(f"   {marker} {name:<18} {size:>7}   {_fmt(previous['median'])} -> {_fmt(timing['median'])}   "
+                  f"{change * 100:+7.1f}%")
+    return regressions
+
+
+def print_ranking(results: Dict[str, Dict[str, Any]]):
+    """Quais etapas dominam no maior tamanho medido (custo por registro)"""
+    largest = {name: max(by_size, key=int) for name, by_size in results.items() if by_size}
+    ranking = sorted(largest, key=lambda n: results[n][largest[n]]["median"] / int(largest[n]), reverse=True)
+    print(f"\n🏁 Custo por registro no maior tamanho:")
+    for name in ranking:
+        size = largest[name]
+        print(f"   • {name:<18} {results[name][size]['median'] / int(size) * 1e6:9.2f} µs/registro ({size})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks das etapas de CPU do pipeline")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="Casos a rodar")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Registros por entrada")
+    parser.add_argument("--repeat", type=int, default=5, help="Amostras por caso/tamanho")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Duração mínima (s) de cada amostra")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Arquivo de baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados como novo baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Variação tolerada antes de acusar regressão")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Sai com código 1 se houver regressão")
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    # Os logs por startup (info/warning) não fazem parte do custo medido
+    logging.disable(logging.CRITICAL)
+
+    print(f"🧪 {len(args.cases)} casos x tamanhos {args.sizes} ({args.repeat} amostras, Python {platform.python_version()})")
+    results = run(args.cases, args.sizes, args.repeat, args.min_time)
+    print_ranking(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Resultados gravados em {args.json}")
+
+    regressions = 0
+    baseline = load_baseline(args.baseline)
+    if baseline and not args.save_baseline:
+        regressions = compare(results, baseline, args.threshold)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+    elif not baseline:
+        print(f"\n⚠️  Sem baseline em {args.baseline}; rode com --save-baseline para criar")
+
+    if regressions:
+        print(f"\n❌ {regressions} regressões acima de {args.threshold * 100:.0f}%")
+        if args.fail_on_regression:
+            sys.exit(1)
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Servidor local que imita a OpenAI (Responses API + Chat Completions) para rodar o pipeline sem rede
+
+Responde no formato que o código de produção parseia (incluindo output[1].content[0].text do
+web_search), escolhendo o conteúdo pelo schema de structured output da requisição. Permite
+injetar latência, erros 5xx e 429, e substituir respostas por payloads fixos ou templates.
+
+    python benchmarks/fake_openai.py --port 8089 --latency lognormal:0.8:0.4 --error-rate 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 HTTP_PROXY=http://127.0.0.1:8089 NO_PROXY=127.0.0.1 uvicorn main:app
+
+Payloads fixos (--payloads arquivo.json): {"<NomeDoSchema>": <objeto JSON ou string template>}.
+Strings são templates string.Template com $base_url, $sector, $country, $limit e $n (contador).
+Os websites das startups geradas são http://<slug>.startup.test/ (um domínio por startup); com
+HTTP_PROXY apontando para este servidor (e NO_PROXY=127.0.0.1) o probe de website também é local.
+"""
+
+import sys
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from string import Template
+from typing import Any, Callable, Dict, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Distribuição de latência em segundos: fixed:S, uniform:MIN:MAX, lognormal:MEDIANA:SIGMA ou exp:MEDIA"""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(":")] if args else []
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        # Mediana em segundos é mais fácil de configurar que mu
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1 / values[0])
+    raise ValueError(f"Distribuição de latência desconhecida: {spec}")
+
+
+class FakeOpenAIConfig:
+    """Comportamento do servidor; pode ser alterado com o servidor rodando (ex: entre cenários)"""
+
+    def __init__(self, latency: str = "fixed:0", websearch_latency: str = None, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, invalid_rate: float = 0.0, payloads: Dict[str, Any] = None,
+                 seed: int = None, rpm_limit: int = 100000, tpm_limit: int = 100000000):
+        self.latency = parse_latency(latency)
+        self.websearch_latency = parse_latency(websearch_latency) if websearch_latency else self.latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.invalid_rate = invalid_rate  # fração de startups geradas sem dados básicos (viram inválidas)
+        self.payloads = payloads or {}
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.rng = random.Random(seed)
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: FakeOpenAIConfig):
+        super().__init__(address, _Handler)
+        self.config = config
+        self.lock = threading.Lock()
+        self.counter = 0
+        self.stats: Dict[str, int] = {"requests": 0, "errors": 0, "rate_limited": 0, "site_probes": 0}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def next_id(self) -> int:
+        with self.lock:
+            self.counter += 1
+            return self.counter
+
+    def count(self, key: str):
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def handle_error(self, request, client_address):
+        # Cliente que encerra a conexão no meio (ex: API derrubada no fim do teste de carga) não é erro do fake
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def start_fake_openai(config: FakeOpenAIConfig = None, host: str = "127.0.0.1", port: int = 0) -> FakeOpenAIServer:
+    """Sobe o servidor numa thread daemon; use server.base_url + "/v1" como OPENAI_BASE_URL"""
+    server = FakeOpenAIServer((host, port), config or FakeOpenAIConfig())
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-openai").start()
+    return server
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def _schema_name(payload: Dict[str, Any]) -> Optional[str]:
+    if "response_format" in payload:
+        return payload["response_format"].get("json_schema", {}).get("name")
+    return (payload.get("text") or {}).get("format", {}).get("name")
+
+
+def _prompt_text(payload: Dict[str, Any]) -> str:
+    messages = payload.get("messages") or payload.get("input") or []
+    return "\n".join(m.get("content", "") for m in messages if isinstance(m, dict) and m.get("role") == "user")
+
+
+def _from_schema(schema: Dict[str, Any], defs: Dict[str, Any], rng: random.Random) -> Any:
+    """Valor qualquer que satisfaça o schema (para schemas sem gerador dedicado)"""
+    if "$ref" in schema:
+        return _from_schema(defs[schema["$ref"].split("/")[-1]], defs, rng)
+    if "anyOf" in schema:
+        return _from_schema(schema["anyOf"][0], defs, rng)
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object":
+        return {key: _from_schema(value, defs, rng) for key, value in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_from_schema(schema.get("items", {}), defs, rng)]
+    if kind == "number":
+        return round(rng.uniform(0, 100), 1)
+    if kind == "integer":
+        return rng.randint(0, 100)
+    if kind == "boolean":
+        return True
+    return "fake"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: FakeOpenAIServer
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        # Websites das startups geradas (probe do node de validação, via HTTP_PROXY ou direto em /site/)
+        if self.path.startswith(("http://", "/site/")):
+            self.server.count("site_probes")
+            data = b"<html><body>fake startup</body></html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        if self.path == "/stats":
+            self._send_json(200, dict(self.server.stats))
+            return
+        self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        config = self.server.config
+        self.server.count("requests")
+
+        is_responses = self.path.endswith("/responses")
+        latency = config.websearch_latency if is_responses else config.latency
+        time.sleep(max(0.0, latency(config.rng)))
+
+        limits = {
+            "x-ratelimit-limit-requests": str(config.rpm_limit),
+            "x-ratelimit-limit-tokens": str(config.tpm_limit),
+            "x-ratelimit-remaining-requests": str(config.rpm_limit),
+            "x-ratelimit-remaining-tokens": str(config.tpm_limit),
+        }
+        roll = config.rng.random()
+        if roll < config.rate_limit_rate:
+            self.server.count("rate_limited")
+            self._send_json(429, {"error": {"message": "Rate limit reached (fake)", "type": "requests"}},
+                            {"retry-after-ms": "200", **limits})
+            return
+        if roll < config.rate_limit_rate + config.error_rate:
+            self.server.count("errors")
+            self._send_json(500, {"error": {"message": "Internal error (fake)", "type": "server_error"}}, limits)
+            return
+
+        if is_responses:
+            self._send_json(200, self._responses_body(payload), limits)
+        elif self.path.endswith("/chat/completions"):
+            self._send_json(200, self._chat_body(payload), limits)
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    # -------------------------------------------------------------------------
+    # Conteúdo
+    # -------------------------------------------------------------------------
+
+    def _content(self, payload: Dict[str, Any]) -> str:
+        name = _schema_name(payload)
+        prompt = _prompt_text(payload)
+        values = self._prompt_values(prompt)
+
+        canned = self.server.config.payloads.get(name)
+        if canned is not None:
+            if isinstance(canned, str):
+                return Template(canned).safe_substitute(values, n=self.server.next_id())
+            return json.dumps(canned)
+
+        generator = getattr(self, f"_gen_{name}", None)
+        if generator is not None:
+            return json.dumps(generator(values))
+
+        schema = (payload.get("response_format", {}).get("json_schema", {}).get("schema")
+                  or (payload.get("text") or {}).get("format", {}).get("schema"))
+        if schema:
+            return json.dumps(_from_schema(schema, schema.get("$defs", {}), self.server.config.rng))
+        return "ok"
+
+    def _prompt_values(self, prompt: str) -> Dict[str, Any]:
+        def find(pattern: str, default: str = "") -> str:
+            match = re.search(pattern, prompt)
+            return match.group(1) if match else default
+
+        return {
+            "base_url": self.server.base_url,
+            "limit": int(find(r"EXATAMENTE (\d+)", "") or find(r"Liste os (\d+)", "") or 3),
+            "sector": find(r'sector = "([^"]*)"', "AI/Technology"),
+            "country": find(r'country = "([^"]*)"', "Brazil"),
+            "known_sectors": find(r"nomes de setor quando aplicável: ([^\n]*)", "")
+        }
+
+    def _gen_DiscoveryOutput(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        rng = self.server.config.rng
+        startups = []
+        for _ in range(values["limit"]):
+            n = self.server.next_id()
+            name = f"Fake {values['sector']} AI {n}"
+            slug = _slug(name)
+            invalid = rng.random() < self.server.config.invalid_rate
+            startups.append({
+                "name": name,
+                "website": f"http://{slug}.startup.test/",
+                "sector": values["sector"],
+                "ai_technologies": [] if invalid else rng.sample(
+                    ["Computer Vision", "Natural Language Processing", "Machine Learning", "Deep Learning"], 2),
+                "founded_year": rng.randint(2015, 2023),
+                "last_funding_amount": float(rng.randint(5, 200) * 100000),
+                "investor_names": rng.sample(["Kaszek", "Monashees", "Valor Capital", "Canary", "SoftBank"], 2),
+                "country": values["country"],
+                "city": "São Paulo",
+                "description": f"{name} aplica inteligência artificial ao setor {values['sector']}.",
+                "has_venture_capital": True,
+                "funding_round": "Series A",
+                "funding_date": "2024-03",
+                "sources": {
+                    "funding": [f"https://www.crunchbase.com/organization/{slug}", f"https://techcrunch.com/{slug}"],
+                    "validation": [f"https://www.linkedin.com/company/{slug}"]
+                }
+            })
+        return {"startups": startups}
+
+    def _gen_DiscoveryPlanOutput(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        sectors = [s.strip() for s in values["known_sectors"].split(",") if s.strip()] or ["Fintech", "Saúde", "Agro"]
+        countries = ["Brazil", "Mexico", "Argentina", "Colombia", "Chile"]
+        return {"shards": [
+            {"country": countries[i % len(countries)], "sector": sectors[i % len(sectors)], "rationale": "fake"}
+            for i in range(values["limit"])
+        ]}
+
+    def _gen_StartupMetricsOutput(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        rng = self.server.config.rng
+        market, technical, partnership = (round(rng.uniform(40, 95), 1) for _ in range(3))
+        return {
+            "market_demand_score": market,
+            "technical_level_score": technical,
+            "partnership_potential_score": partnership,
+            "total_score": round(0.4 * market + 0.3 * technical + 0.3 * partnership, 1),
+            "reasoning": {"market": "fake", "technical": "fake", "partnership": "fake"}
+        }
+
+    def _gen_ValidationInsightOutput(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "insight": "Dados básicos incompletos (fake)",
+            "confidence": 0.8,
+            "main_issues": ["Sem tecnologias de IA"],
+            "potential_fixes": ["Buscar novamente"],
+            "recommendation": "INVESTIGATE",
+            "analysis": {"website_analysis": "ok", "funding_analysis": "ok",
+                         "existence_analysis": "ok", "data_quality": "baixa"}
+        }
+
+    def _gen_StartupValidationOutput(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "validation_status": "valid", "confidence_score": 0.9, "issues_found": [],
+            "verified_website": None, "funding_verified": True, "company_active": True,
+            "web_search_used": False, "technology_validation": "valid", "sector_validation": "valid",
+            "recommendations": []
+        }
+
+    @staticmethod
+    def _usage(payload: Dict[str, Any], text: str) -> Dict[str, int]:
+        # Estimativa grosseira (~4 caracteres por token) só para os relatórios de tokens
+        prompt_tokens = len(json.dumps(payload.get("messages") or payload.get("input") or [])) // 4
+        completion_tokens = max(1, len(text) // 4)
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    def _responses_body(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        text = self._content(payload)
+        usage = self._usage(payload, text)
+        return {
+            "id": f"resp_fake_{self.server.next_id()}",
+            "object": "response",
+            "model": payload.get("model"),
+            "output": [
+                {"type": "web_search_call", "id": "ws_fake", "status": "completed"},
+                {"type": "message", "role": "assistant",
+                 "content": [{"type": "output_text", "text": text, "annotations": []}]}
+            ],
+            "usage": {"input_tokens": usage["prompt_tokens"], "output_tokens": usage["completion_tokens"],
+                      "total_tokens": usage["total_tokens"]}
+        }
+
+    def _chat_body(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        text = self._content(payload)
+        return {
+            "id": f"chatcmpl-fake-{self.server.next_id()}",
+            "object": "chat.completion",
+            "model": payload.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+            "usage": self._usage(payload, text)
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor fake da OpenAI (Responses + Chat Completions)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0.05", help="Chat Completions: fixed:S, uniform:A:B, lognormal:MED:SIGMA, exp:MEDIA")
+    parser.add_argument("--websearch-latency", help="Responses API (padrão: igual a --latency)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fração de respostas 429")
+    parser.add_argument("--invalid-rate", type=float, default=0.0, help="Fração de startups geradas inválidas")
+    parser.add_argument("--payloads", help="JSON com payloads fixos/templates por nome de schema")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    payloads = None
+    if args.payloads:
+        with open(args.payloads, encoding="utf-8") as f:
+            payloads = json.load(f)
+
+    server = start_fake_openai(FakeOpenAIConfig(
+        latency=args.latency, websearch_latency=args.websearch_latency, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, invalid_rate=args.invalid_rate, payloads=payloads, seed=args.seed
+    ), host=args.host, port=args.port)
+    print(f"🧪 Fake OpenAI em {server.base_url}/v1 (Ctrl+C para parar)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
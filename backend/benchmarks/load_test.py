@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Teste de carga da API HTTP com perfis de tráfego reais
+
+Perfis:
+    dashboard  atualização do dashboard (ranking, estatísticas de logs, contagem de não lidas)
+    browse     navegação de startups com filtros, paginação e detalhe
+    reports    download do relatório XLSX
+    submit     envio de /api/agents/task/run (OpenAI fake) + consulta de status
+    mixed      mistura ponderada dos anteriores
+
+Por padrão sobe o uvicorn num subprocesso apontado para o servidor fake da OpenAI
+(benchmarks/fake_openai.py), com o monitor de event loop ligado, e roda os perfis em sequência.
+Para cada perfil reporta vazão, latência (p50/p90/p99) e erros por rota, o atraso do event loop
+medido dentro do servidor (GET /health/loop, com a linha de código que segurou o loop) e a
+latência de um /health sondado em paralelo (canário: sobe quando o loop está bloqueado).
+
+    python benchmarks/load_test.py --seed 5000 --users 20 --duration 30
+    python benchmarks/load_test.py --profiles dashboard browse --users 50
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --profiles dashboard   # servidor já rodando
+"""
+
+import sys
+import os
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_DATABASE_URL = "sqlite:////tmp/nvidia_inception_loadtest.db"
+
+# benchmarks.seed_dataset importa a configuração da aplicação
+os.environ.setdefault("DATABASE_URL", DEFAULT_DATABASE_URL)
+os.environ.setdefault("OPENAI_API_KEY", "loadtest")
+
+import requests
+from benchmarks.fake_openai import FakeOpenAIConfig, start_fake_openai
+from benchmarks.seed_dataset import SECTORS, COUNTRIES
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MIXED_WEIGHTS = {"dashboard": 55, "browse": 35, "reports": 7, "submit": 3}
+
+
+class Stats:
+    """Latências e status por rota (nome lógico, não a URL com parâmetros)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = Counter()
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, name: str, latency: float, status: Any, ok: bool):
+        with self._lock:
+            self.latencies[name].append(latency)
+            self.statuses[name][status] += 1
+            if not ok:
+                self.errors[name] += 1
+
+
+class LoadUser:
+    """Usuário virtual em loop fechado: uma sessão HTTP própria, como uma aba do navegador"""
+
+    def __init__(self, base_url: str, stats: Stats, rng: random.Random):
+        self.base_url = base_url
+        self.stats = stats
+        self.rng = rng
+        self.session = requests.Session()
+        self.startup_ids: List[int] = []
+
+    def request(self, method: str, path: str, name: str, timeout: float = 60, **kwargs) -> Optional[requests.Response]:
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=timeout, **kwargs)
+            # Corpo inteiro lido dentro da medição (relatórios XLSX)
+            _ = response.content
+        except requests.RequestException as e:
+            self.stats.record(name, time.perf_counter() - started, type(e).__name__, False)
+            return None
+        self.stats.record(name, time.perf_counter() - started, response.status_code, response.status_code < 400)
+        return response
+
+
+# =============================================================================
+# Perfis
+# =============================================================================
+
+def dashboard(user: LoadUser):
+    """Uma atualização do dashboard dispara as três chamadas"""
+    user.request("GET", "/api/agents/metrics/ranking", "GET /api/agents/metrics/ranking")
+    user.request("GET", "/api/logs/stats", "GET /api/logs/stats")
+    user.request("GET", "/api/notifications/unread-count", "GET /api/notifications/unread-count")
+
+
+def browse(user: LoadUser):
+    rng = user.rng
+    params: Dict[str, Any] = {"skip": rng.choice([0, 0, 0, 100, 500, 2000]), "limit": rng.choice([20, 50, 100])}
+    if rng.random() < 0.6:
+        params["sector"] = rng.choices(list(SECTORS), weights=list(SECTORS.values()))[0]
+    if rng.random() < 0.5:
+        params["country"] = rng.choices(list(COUNTRIES), weights=list(COUNTRIES.values()))[0]
+    if rng.random() < 0.3:
+        params["has_vc"] = "true"
+
+    response = user.request("GET", "/api/startups/", "GET /api/startups/", params=params)
+    if response is not None and response.ok:
+        user.startup_ids = [s["id"] for s in response.json()][:50] or user.startup_ids
+    if user.startup_ids and rng.random() < 0.5:
+        user.request("GET", f"/api/startups/{rng.choice(user.startup_ids)}", "GET /api/startups/{id}")
+
+
+def reports(user: LoadUser):
+    rng = user.rng
+    now = datetime.now()
+    filters = {
+        "sectors": rng.sample(list(SECTORS), rng.randint(0, 3)),
+        "countries": rng.sample(list(COUNTRIES), rng.randint(0, 2)),
+        "max_startups": rng.choice([50, 100, 500]),
+        "sort_by": rng.choice(["score", "created_at", "name"]),
+        "sort_order": "desc"
+    }
+    if rng.random() < 0.3:
+        filters["start_date"] = (now - timedelta(days=rng.choice([30, 90, 365]))).isoformat()
+    user.request("POST", "/api/startups/report", "POST /api/startups/report", json=filters, timeout=120)
+
+
+def submit(user: LoadUser):
+    rng = user.rng
+    payload = {
+        "country": rng.choices(list(COUNTRIES), weights=list(COUNTRIES.values()))[0],
+        "sector": rng.choice(list(SECTORS)),
+        "limit": rng.choice([3, 5]),
+        "search_strategy": "specific"
+    }
+    response = user.request("POST", "/api/agents/task/run", "POST /api/agents/task/run", json=payload)
+    user.request("GET", "/api/agents/queue/status", "GET /api/agents/queue/status")
+    if response is not None and response.ok:
+        user.request("GET", f"/api/agents/tasks/{response.json()['task_id']}", "GET /api/agents/tasks/{id}")
+
+
+def mixed(user: LoadUser):
+    profile = user.rng.choices(list(MIXED_WEIGHTS), weights=list(MIXED_WEIGHTS.values()))[0]
+    PROFILES[profile](user)
+
+
+PROFILES: Dict[str, Callable[[LoadUser], None]] = {
+    "dashboard": dashboard,
+    "browse": browse,
+    "reports": reports,
+    "submit": submit,
+    "mixed": mixed,
+}
+
+
+# =============================================================================
+# Execução
+# =============================================================================
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def run_profile(name: str, base_url: str, users: int, duration: float, think_time: float,
+                seed: int) -> Dict[str, Any]:
+    stats = Stats()
+    canary = Stats()
+    deadline = time.monotonic() + duration
+    stop = threading.Event()
+
+    # Zera a janela do monitor de event loop do servidor para este perfil
+    try:
+        requests.get(f"{base_url}/health/loop", params={"reset": "true"}, timeout=10)
+    except requests.RequestException:
+        pass
+
+    def virtual_user(index: int):
+        user = LoadUser(base_url, stats, random.Random(seed + index))
+        while time.monotonic() < deadline:
+            PROFILES[name](user)
+            if think_time:
+                time.sleep(user.rng.expovariate(1 / think_time))
+        user.session.close()
+
+    def probe():
+        # Rota async trivial: toda latência acima do normal é espera pelo event loop
+        user = LoadUser(base_url, canary, random.Random(seed))
+        while not stop.wait(0.1):
+            user.request("GET", "/health", "GET /health")
+
+    canary_thread = threading.Thread(target=probe, daemon=True)
+    canary_thread.start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=virtual_user, args=(i,), daemon=True) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - started
+    stop.set()
+    canary_thread.join()
+
+    try:
+        loop = requests.get(f"{base_url}/health/loop", timeout=10).json()
+    except (requests.RequestException, ValueError):
+        loop = {}
+
+    total = sum(len(values) for values in stats.latencies.values())
+    errors = sum(stats.errors.values())
+    return {
+        "profile": name,
+        "users": users,
+        "wall_time": wall_time,
+        "requests": total,
+        "throughput": total / wall_time if wall_time else 0.0,
+        "error_rate": errors / total if total else 0.0,
+        "routes": {
+            route: {
+                "count": len(values),
+                "rps": len(values) / wall_time if wall_time else 0.0,
+                "p50": statistics.median(values),
+                "p90": _percentile(values, 0.90),
+                "p99": _percentile(values, 0.99),
+                "max": max(values),
+                "errors": stats.errors.get(route, 0),
+                "statuses": {str(k): v for k, v in stats.statuses[route].items()}
+            }
+            for route, values in sorted(stats.latencies.items())
+        },
+        "canary": {
+            "p50": statistics.median(canary.latencies["GET /health"]) if canary.latencies["GET /health"] else 0.0,
+            "p99": _percentile(canary.latencies["GET /health"], 0.99),
+            "max": max(canary.latencies["GET /health"], default=0.0)
+        },
+        "event_loop": loop
+    }
+
+
+def print_profile(result: Dict[str, Any]):
+    print(f"\n🚦 Perfil {result['profile']}: {result['users']} usuários, {result['wall_time']:.1f}s, "
+          f"{result['requests']} requisições ({result['throughput']:.1f} req/s, "
+          f"{result['error_rate'] * 100:.2f}% erros)")
+    print(f"   {'rota':<40}{'req/s':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'erros':>7}")
+    for route, data in result["routes"].items():
+        print(f"   {route:<40}{data['rps']:>8.1f}{data['p50'] * 1000:>8.1f}ms{data['p90'] * 1000:>8.1f}ms"
+              f"{data['p99'] * 1000:>8.1f}ms{data['max'] * 1000:>8.1f}ms{data['errors']:>7}")
+
+    canary = result["canary"]
+    print(f"   • Canário GET /health: p50 {canary['p50'] * 1000:.1f} ms   p99 {canary['p99'] * 1000:.1f} ms   "
+          f"max {canary['max'] * 1000:.1f} ms")
+
+    loop = result["event_loop"]
+    if not loop.get("enabled"):
+        print("   ⚠️  Monitor de event loop desligado no servidor (LOOP_LAG_MONITOR=true)")
+        return
+    lag = loop["lag_ms"]
+    print(f"   • Event loop: lag p50 {lag['p50']:.1f} ms   p99 {lag['p99']:.1f} ms   max {lag['max']:.1f} ms   "
+          f"{loop['stalls']} bloqueios >= {loop['stall_threshold_ms']:.0f} ms "
+          f"({loop['blocked_fraction'] * 100:.1f}% do tempo bloqueado)")
+    for culprit in loop.get("culprits", [])[:5]:
+        print(f"      ↳ {culprit['count']:>5}x {culprit['location']}")
+
+
+def start_server(port: int, env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    log_file = open(log_path, "w", encoding="utf-8")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT
+    )
+    log_file.close()
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(120):
+        if process.poll() is not None:
+            raise SystemExit(f"❌ Servidor saiu com código {process.returncode} (log em {log_path})")
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise SystemExit("❌ Servidor não respondeu em 60s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga da API com perfis de tráfego")
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--users", type=int, default=10, help="Usuários virtuais simultâneos")
+    parser.add_argument("--duration", type=float, default=20, help="Segundos por perfil")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pausa média (s) entre iterações de cada usuário")
+    parser.add_argument("--url", help="Usa um servidor já rodando (não sobe uvicorn nem a OpenAI fake)")
+    parser.add_argument("--port", type=int, default=8765, help="Porta do uvicorn iniciado pelo teste")
+    parser.add_argument("--server-log", default=os.path.join(tempfile.gettempdir(), "nvidia_inception_loadtest_server.log"),
+                        help="Saída do uvicorn iniciado pelo teste")
+    parser.add_argument("--database-url", default=os.environ["DATABASE_URL"])
+    parser.add_argument("--seed", type=int, default=0, help="Semeia N startups (e volumes proporcionais) antes do teste")
+    parser.add_argument("--latency", default="lognormal:0.3:0.3", help="Latência da OpenAI fake (Chat Completions)")
+    parser.add_argument("--websearch-latency", default="lognormal:2:0.3", help="Latência da OpenAI fake (Responses)")
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    server_process = None
+    fake_server = None
+    base_url = args.url.rstrip("/") if args.url else f"http://127.0.0.1:{args.port}"
+
+    if args.seed:
+        from sqlalchemy import create_engine
+        from database.connection import Base
+        from benchmarks.seed_dataset import seed
+        engine = create_engine(args.database_url)
+        Base.metadata.create_all(engine)
+        seed(engine, startups=args.seed, invalid=args.seed * 2 // 5, tasks=max(args.seed // 5, 1),
+             task_logs=args.seed * 20, notifications=args.seed * 10, newsletter=max(args.seed // 10, 1),
+             days=730, seed_value=args.random_seed, chunk_size=20000)
+
+    if not args.url:
+        fake_server = start_fake_openai(FakeOpenAIConfig(
+            latency=args.latency, websearch_latency=args.websearch_latency, seed=args.random_seed
+        ))
+        env = dict(os.environ)
+        env.update({
+            "DATABASE_URL": args.database_url,
+            "OPENAI_BASE_URL": f"{fake_server.base_url}/v1",
+            # Probe dos websites fake respondido pelo próprio servidor fake
+            "HTTP_PROXY": fake_server.base_url,
+            "NO_PROXY": "127.0.0.1,localhost",
+            "LOOP_LAG_MONITOR": "true"
+        })
+        print(f"🧪 Subindo API em {base_url} (banco {args.database_url}, OpenAI fake em {fake_server.base_url}/v1)")
+        print(f"   • Log do servidor: {args.server_log}")
+        server_process = start_server(args.port, env, args.server_log)
+
+    results = []
+    try:
+        for profile in args.profiles:
+            result = run_profile(profile, base_url, args.users, args.duration, args.think_time, args.random_seed)
+            print_profile(result)
+            results.append(result)
+    finally:
+        if server_process:
+            server_process.terminate()
+            server_process.wait(timeout=30)
+        if fake_server:
+            fake_server.shutdown()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"\n📄 Resultados gravados em {args.json}")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark do custo de preparação por task de orquestração
+
+Compara o modelo antigo (novo StartupOrchestrator + nova sessão HTTP a cada task/chamada)
+com o atual (orquestrador compartilhado com grafo compilado uma vez + pool de sessões).
+A parte HTTP usa um servidor local em loopback, então mede só conexão/handshake, sem rede externa.
+
+    python benchmarks/orchestrator_setup.py --tasks 50 --calls 200
+"""
+
+import sys
+import os
+import argparse
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Nenhuma chamada real é feita; só precisamos que os módulos importem
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import requests
+from agents.orchestrator import StartupOrchestrator, get_orchestrator
+from agents.openai_client import SessionPool
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Sem isso o keep-alive do servidor de teste cai no atraso Nagle/delayed-ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _timed(func, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _report(label: str, samples: list):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"   • {label:<38} média {statistics.mean(samples):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def bench_orchestrator(tasks: int):
+    print(f"\n🧩 Preparação do orquestrador ({tasks} tasks):")
+    before = _timed(StartupOrchestrator, tasks)
+    get_orchestrator()  # compilação única, como no startup da aplicação
+    after = _timed(get_orchestrator, tasks)
+    _report("antes: StartupOrchestrator() por task", before)
+    _report("depois: get_orchestrator()", after)
+    return statistics.mean(before), statistics.mean(after)
+
+
+def bench_http(calls: int):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    payload = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "ping"}]}
+
+    def fresh_session():
+        session = requests.Session()
+        session.post(url, json=payload, timeout=5).raise_for_status()
+        session.close()
+
+    pool = SessionPool()
+
+    def pooled_session():
+        session = pool.checkout()
+        session.post(url, json=payload, timeout=5).raise_for_status()
+        pool.checkin(session)
+
+    print(f"\n🌐 Chamadas HTTP em loopback ({calls} chamadas):")
+    try:
+        before = _timed(fresh_session, calls)
+        after = _timed(pooled_session, calls)
+    finally:
+        server.shutdown()
+    _report("antes: requests.Session() por chamada", before)
+    _report("depois: pool de sessões", after)
+    print(f"   • sessões criadas pelo pool: {pool.created}")
+    return statistics.mean(before), statistics.mean(after)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Custo de preparação por task: antes x depois do orquestrador compartilhado")
+    parser.add_argument("--tasks", type=int, default=50, help="Tasks simuladas (instanciações do orquestrador)")
+    parser.add_argument("--calls", type=int, default=200, help="Chamadas HTTP em loopback")
+    args = parser.parse_args()
+
+    graph_before, graph_after = bench_orchestrator(args.tasks)
+    http_before, http_after = bench_http(args.calls)
+
+    print(f"\n📊 RESUMO:")
+    print(f"   • Orquestrador: {graph_before:.3f} ms -> {graph_after:.3f} ms por task")
+    print(f"   • HTTP: {http_before:.3f} ms -> {http_after:.3f} ms por chamada")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark ponta a ponta do pipeline de orquestração contra o servidor fake da OpenAI
+
+Para cada combinação de N startups por execução e concorrência (execuções simultâneas),
+roda run_orchestration e reporta latência por node, tempo ponta a ponta, tokens e vazão.
+Nada sai da máquina: OPENAI_BASE_URL aponta para benchmarks/fake_openai.py.
+
+    python benchmarks/pipeline.py --startups 5 20 --concurrency 1 4 \\
+        --latency lognormal:0.4:0.3 --websearch-latency lognormal:3:0.3 --error-rate 0.02
+"""
+
+import sys
+import os
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_openai import FakeOpenAIConfig, start_fake_openai
+
+NODES = ("discovery", "source_validation", "validation", "metrics", "finalize")
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def run_scenario(orchestrator, startups: int, concurrency: int, repeat: int, strategy: str,
+                 server) -> Dict[str, Any]:
+    """Executa concurrency x repeat orquestrações (concurrency por vez) e agrega os resultados"""
+    stats_before = dict(server.stats)
+    runs: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+
+    def one_run(_):
+        started = time.perf_counter()
+        result = orchestrator.run_orchestration(country="Brazil", sector=None, limit=startups,
+                                                existing_valid=[], existing_invalid=[],
+                                                search_strategy=strategy)
+        result["wall_time"] = time.perf_counter() - started
+        with lock:
+            runs.append(result)
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one_run, range(concurrency * repeat)))
+    wall_time = time.perf_counter() - wall_started
+
+    ok = [r for r in runs if r.get("status") == "success"]
+    e2e = [r["wall_time"] for r in ok]
+    processed = sum(len(r["results"]["startup_metrics"]) + r["results"]["invalid_count"] for r in ok)
+    return {
+        "startups": startups,
+        "concurrency": concurrency,
+        "runs": len(runs),
+        "failed_runs": len(runs) - len(ok),
+        "e2e_p50": statistics.median(e2e) if e2e else 0.0,
+        "e2e_p95": _percentile(e2e, 0.95),
+        "nodes": {
+            node: {
+                "p50": statistics.median(values) if values else 0.0,
+                "p95": _percentile(values, 0.95)
+            }
+            for node in NODES
+            for values in [[r["node_timings"][node] for r in ok if node in r.get("node_timings", {})]]
+        },
+        "tokens_per_run": statistics.mean([r["tokens_used"] for r in ok]) if ok else 0,
+        "startups_per_second": processed / wall_time if wall_time else 0.0,
+        "wall_time": wall_time,
+        "server": {key: server.stats.get(key, 0) - stats_before.get(key, 0) for key in server.stats}
+    }
+
+
+def print_scenario(result: Dict[str, Any]):
+    print(f"\n🚀 {result['startups']} startups x concorrência {result['concurrency']} "
+          f"({result['runs']} execuções, {result['failed_runs']} com erro, {result['wall_time']:.2f}s)")
+    print(f"   • Ponta a ponta: p50 {result['e2e_p50']:.3f}s   p95 {result['e2e_p95']:.3f}s")
+    for node, timing in result["nodes"].items():
+        print(f"   • {node:<18} p50 {timing['p50']:.3f}s   p95 {timing['p95']:.3f}s")
+    print(f"   • Tokens por execução: {result['tokens_per_run']:.0f}")
+    print(f"   • Vazão: {result['startups_per_second']:.2f} startups/s")
+    server = result["server"]
+    print(f"   • Servidor: {server['requests']} requisições, {server['errors']} erros 5xx, "
+          f"{server['rate_limited']} 429")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de orquestração (sem rede, OpenAI fake)")
+    parser.add_argument("--startups", type=int, nargs="+", default=[5, 10], help="Limite de startups por execução")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4], help="Execuções simultâneas")
+    parser.add_argument("--repeat", type=int, default=2, help="Rodadas por cenário")
+    parser.add_argument("--strategy", default="specific", help="search_strategy das execuções")
+    parser.add_argument("--latency", default="lognormal:0.3:0.3", help="Latência da Chat Completions")
+    parser.add_argument("--websearch-latency", default="lognormal:2:0.3", help="Latência da Responses API")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--invalid-rate", type=float, default=0.2, help="Fração de startups inválidas (gera insights)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--checkpoints", action="store_true", help="Inclui o custo dos checkpoints (requer DATABASE_URL real)")
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    server = start_fake_openai(FakeOpenAIConfig(
+        latency=args.latency, websearch_latency=args.websearch_latency, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, invalid_rate=args.invalid_rate, seed=args.seed
+    ))
+
+    # Configuração lida na importação dos módulos: precisa vir antes deles
+    os.environ["OPENAI_BASE_URL"] = f"{server.base_url}/v1"
+    # Probe dos websites fake (http://<slug>.startup.test) respondido pelo próprio servidor
+    os.environ["HTTP_PROXY"] = server.base_url
+    os.environ["NO_PROXY"] = "127.0.0.1,localhost"
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    os.environ["ORCHESTRATION_CHECKPOINTS"] = "true" if args.checkpoints else "false"
+
+    from agents.orchestrator import get_orchestrator
+    orchestrator = get_orchestrator()
+
+    print(f"🧪 OpenAI fake em {server.base_url}/v1 (chat {args.latency}, websearch {args.websearch_latency})")
+    results = []
+    for startups in args.startups:
+        for concurrency in args.concurrency:
+            result = run_scenario(orchestrator, startups, concurrency, args.repeat, args.strategy, server)
+            print_scenario(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Resultados gravados em {args.json}")
+    server.shutdown()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Replay de uma orquestração gravada (ORCHESTRATION_RECORD_CASSETTES=true), sem acesso à rede
+
+Roda o grafo inteiro com os mesmos parâmetros da execução original, respondendo cada chamada
+HTTP a partir do cassette, e compara tempos por node e tokens com a gravação.
+
+    python benchmarks/replay.py 123                  # cassette da agent_task 123 (banco)
+    python benchmarks/replay.py 123 --export 123.cassette
+    python benchmarks/replay.py --file 123.cassette --pace --repeat 3
+
+--pace reproduz a latência gravada de cada chamada (tempo real de ponta a ponta); sem ele o
+replay mede só o custo local do pipeline.
+"""
+
+import sys
+import os
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Replay nunca grava checkpoints nem dispara hedges (não há requisições reais para duplicar)
+os.environ["ORCHESTRATION_CHECKPOINTS"] = "false"
+os.environ["OPENAI_HEDGING_ENABLED"] = "false"
+os.environ.setdefault("OPENAI_API_KEY", "replay")
+
+
+def load_cassette_bytes(agent_task_id: int = None, path: str = None) -> bytes:
+    if path:
+        with open(path, "rb") as f:
+            return f.read()
+
+    from database.connection import SessionLocal
+    from services.cassette_store import CassetteStore
+    db = SessionLocal()
+    try:
+        payload = CassetteStore(db).get_bytes(agent_task_id)
+    finally:
+        db.close()
+    if payload is None:
+        raise SystemExit(f"❌ Nenhum cassette gravado para a task {agent_task_id}")
+    return payload
+
+
+def replay_once(payload: bytes, pace: bool, strict: bool):
+    from agents.cassette import Cassette, use_cassette
+    from agents.orchestrator import get_orchestrator
+
+    cassette = Cassette.from_bytes(payload, pace=pace, strict=strict)
+    with use_cassette(cassette):
+        result = get_orchestrator().run_orchestration(**cassette.run)
+    return cassette, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay determinístico de uma orquestração gravada")
+    parser.add_argument("agent_task_id", type=int, nargs="?", help="Task cujo cassette será lido do banco")
+    parser.add_argument("--file", help="Lê o cassette de um arquivo (exportado com --export)")
+    parser.add_argument("--export", help="Grava o cassette neste arquivo e sai")
+    parser.add_argument("--pace", action="store_true", help="Reproduz a latência gravada de cada chamada")
+    parser.add_argument("--strict", action="store_true", help="Só aceita requisições idênticas às gravadas")
+    parser.add_argument("--repeat", type=int, default=1, help="Número de replays")
+    args = parser.parse_args()
+
+    if args.agent_task_id is None and not args.file:
+        parser.error("informe agent_task_id ou --file")
+
+    payload = load_cassette_bytes(args.agent_task_id, args.file)
+    if args.export:
+        with open(args.export, "wb") as f:
+            f.write(payload)
+        print(f"✅ Cassette exportado para {args.export} ({len(payload)} bytes)")
+        sys.exit(0)
+
+    runs = [replay_once(payload, args.pace, args.strict) for _ in range(args.repeat)]
+    cassette = runs[0][0]
+    recorded = cassette.result or {}
+
+    print(f"\n🎞️  Cassette da task {cassette.agent_task_id} gravado em {cassette.recorded_at} "
+          f"({len(cassette.interactions)} chamadas)")
+    print(f"   • Parâmetros: {cassette.run.get('country')} / {cassette.run.get('sector') or 'todos setores'} / "
+          f"limite {cassette.run.get('limit')} / {cassette.run.get('search_strategy')}")
+
+    def median(values):
+        return statistics.median(values) if values else 0.0
+
+    times = [result.get("processing_time", 0) for _, result in runs]
+    print(f"\n📊 {'':<20}{'gravado':>12}{'replay (mediana)':>20}")
+    print(f"   {'ponta a ponta':<20}{recorded.get('processing_time', 0):>11.3f}s{median(times):>19.3f}s")
+    nodes = list((recorded.get("node_timings") or {}).keys()) or list(runs[0][1].get("node_timings", {}).keys())
+    for node in nodes:
+        replayed = [result.get("node_timings", {}).get(node, 0) for _, result in runs]
+        print(f"   {node:<20}{(recorded.get('node_timings') or {}).get(node, 0):>11.3f}s{median(replayed):>19.3f}s")
+    print(f"   {'tokens':<20}{recorded.get('tokens_used', 0):>12}{runs[0][1].get('tokens_used', 0):>20}")
+
+    for replayed_cassette, result in runs:
+        counts = result.get("results", {})
+        print(f"\n   • status {result.get('status')}: {counts.get('discovered_count', 0)} descobertas, "
+              f"{counts.get('validated_count', 0)} válidas, {counts.get('invalid_count', 0)} inválidas "
+              f"(gravado: {recorded.get('discovered_count', 0)}/{recorded.get('validated_count', 0)}/"
+              f"{recorded.get('invalid_count', 0)})")
+        if replayed_cassette.misses or replayed_cassette.loose_matches:
+            print(f"   ⚠️  {replayed_cassette.misses} chamadas sem gravação, "
+                  f"{replayed_cassette.loose_matches} casadas só pelo tipo (prompt mudou)")
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Popula o banco com um dataset sintético em escala de produção (para testes de carga)
+
+Gera startups, métricas, startups inválidas, agent_tasks, task_logs, notificações e e-mails
+da newsletter com distribuições realistas de setores, países, tecnologias, funding e tamanho
+das fontes. No PostgreSQL as linhas entram via COPY (psycopg2 copy_expert), em lotes.
+
+    python benchmarks/seed_dataset.py --startups 100000 --task-logs 2000000 --notifications 1000000
+    python benchmarks/seed_dataset.py --scale 10          # multiplica todos os volumes padrão
+    python benchmarks/seed_dataset.py --clear             # remove apenas os dados semeados
+
+Use um banco de teste: os IDs são atribuídos a partir do maior ID existente, então inserções
+da aplicação durante a carga podem colidir. Os registros semeados são marcados (domínio
+.seed.test, prefixo "[seed]", agent_name "seed") para que --clear não toque no resto.
+"""
+
+import sys
+import os
+import argparse
+import csv
+import io
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text, Table
+from config import settings
+from database.models import (
+    Startup, StartupMetrics, InvalidStartup, AgentTask, TaskLog, Notification, NewsletterEmail
+)
+
+SEED_DOMAIN = "seed.test"
+SEED_PREFIX = "[seed]"
+SEED_AGENT = "seed"
+
+# Distribuições (peso relativo)
+SECTORS = {"Fintech": 24, "Saúde": 18, "Varejo": 14, "Agro": 11, "Educação": 10, "Logística": 9, "Energia": 6,
+           "HR Tech": 4, "Legal Tech": 2, "PropTech": 2}
+COUNTRIES = {"Brazil": 45, "Mexico": 12, "United States": 10, "Argentina": 8, "Colombia": 7, "Chile": 6,
+             "Peru": 3, "Portugal": 3, "Spain": 3, "Uruguay": 3}
+CITIES = {
+    "Brazil": ["São Paulo", "Rio de Janeiro", "Belo Horizonte", "Curitiba", "Florianópolis", "Recife", "Porto Alegre"],
+    "Mexico": ["Cidade do México", "Guadalajara", "Monterrey"],
+    "United States": ["San Francisco", "New York", "Austin", "Miami"],
+    "Argentina": ["Buenos Aires", "Córdoba"],
+    "Colombia": ["Bogotá", "Medellín"],
+    "Chile": ["Santiago"],
+    "Peru": ["Lima"],
+    "Portugal": ["Lisboa", "Porto"],
+    "Spain": ["Madrid", "Barcelona"],
+    "Uruguay": ["Montevidéu"],
+}
+TECHNOLOGIES = {"Machine Learning": 30, "NLP": 18, "LLM": 16, "Computer Vision": 14, "Deep Learning": 10,
+                "Generative AI": 10, "Predictive Analytics": 8, "Reinforcement Learning": 3, "Robotics": 3,
+                "Speech Recognition": 3}
+INVESTORS = ["Kaszek", "Monashees", "Valor Capital", "Canary", "Astella", "SoftBank Latin America", "Redpoint eventures",
+             "Bossanova", "Igah Ventures", "QED Investors", "Tiger Global", "a16z", "Y Combinator", "Y Combinator",
+             "Bradesco Ventures", "Itaú Ventures", "Anjos do Brasil", "ALLVP", "Mountain Nazca", "Magma Partners"]
+FUNDING_ROUNDS = {"Pre-Seed": 20, "Seed": 35, "Series A": 25, "Series B": 12, "Series C": 5, "Series D+": 3}
+# Mediana do funding (USD) por rodada; dispersão lognormal em torno dela
+ROUND_MEDIAN = {"Pre-Seed": 3e5, "Seed": 1.5e6, "Series A": 8e6, "Series B": 25e6, "Series C": 60e6, "Series D+": 150e6}
+SOURCE_SITES = ["https://www.crunchbase.com/organization/{slug}", "https://techcrunch.com/{year}/{slug}-raises",
+                "https://neofeed.com.br/startups/{slug}", "https://www.startupi.com.br/{slug}-capta",
+                "https://pitchbook.com/profiles/company/{slug}", "https://www.linkedin.com/company/{slug}",
+                "https://exame.com/negocios/{slug}", "https://medium.com/@{slug}/funding-{year}",
+                "https://{slug}.{domain}/imprensa", "Press release {name}"]
+INVALID_REASONS = {
+    "REJEITADA: Startup sem Venture Capital confirmado": 35,
+    "REJEITADA: Sem fontes que comprovem o VC funding": 20,
+    "Website inacessível ou inválido": 20,
+    "REJEITADA: Funding amount muito baixo ou inexistente": 15,
+    "REJEITADA: Descrição não condiz com setor": 10,
+}
+TASK_TYPES = {"startup_discovery": 70, "startup_rescoring": 10, "startup_revalidation": 10, "newsletter": 10}
+TASK_STATUS = {"completed": 85, "failed": 10, "interrupted": 3, "running": 2}
+NOTIFICATION_TYPES = {"success": 55, "info": 25, "error": 12, "warning": 8}
+SYLLABLES = ["neo", "agro", "med", "pay", "edu", "log", "sol", "vita", "cred", "fin", "data", "mind", "nova",
+             "flux", "byte", "zen", "quant", "omni", "tera", "lumi", "hub", "lab", "ia", "tech", "ly", "io"]
+
+# Linhas por comando COPY / executemany
+DEFAULT_CHUNK_SIZE = 20000
+
+
+def _pick(rng: random.Random, weights: Dict[str, int]) -> str:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _sample(rng: random.Random, weights: Dict[str, int], k: int) -> List[str]:
+    chosen = []
+    while len(chosen) < min(k, len(weights)):
+        item = _pick(rng, weights)
+        if item not in chosen:
+            chosen.append(item)
+    return chosen
+
+
+def _timestamp(rng: random.Random, now: datetime, days: int) -> datetime:
+    # Crescimento da base: registros recentes são mais frequentes
+    return now - timedelta(days=days * rng.random() ** 2, seconds=rng.randint(0, 86399))
+
+
+def _sources_count(rng: random.Random) -> int:
+    # Cauda longa: a maioria tem 1-3 fontes, algumas chegam a dezenas
+    return min(int(rng.lognormvariate(0.6, 0.9)), 40)
+
+
+def _name(rng: random.Random, row_id: int) -> str:
+    base = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+    return f"{base} {row_id}"
+
+
+# =============================================================================
+# Geradores de linhas (dicts por coluna; IDs atribuídos aqui para ligar as FKs)
+# =============================================================================
+
+def startup_rows(rng: random.Random, first_id: int, count: int, now: datetime, days: int) -> Iterator[Dict[str, Any]]:
+    for row_id in range(first_id, first_id + count):
+        name = _name(rng, row_id)
+        slug = name.lower().replace(" ", "-")
+        country = _pick(rng, COUNTRIES)
+        sector = _pick(rng, SECTORS)
+        has_vc = rng.random() < 0.8
+        funding_round = _pick(rng, FUNDING_ROUNDS) if has_vc else None
+        amount = round(ROUND_MEDIAN[funding_round] * rng.lognormvariate(0, 0.6), 2) if has_vc else None
+        created_at = _timestamp(rng, now, days)
+        year = rng.randint(2019, now.year)
+        sources = {
+            category: [rng.choice(SOURCE_SITES).format(slug=slug, name=name, year=year, domain=SEED_DOMAIN)
+                       for _ in range(_sources_count(rng))]
+            for category in ("funding", "investors", "validation")
+        }
+        technologies = _sample(rng, TECHNOLOGIES, rng.randint(1, 4))
+        yield {
+            "id": row_id,
+            "name": name,
+            "website": f"https://{slug}.{SEED_DOMAIN}",
+            "sector": sector,
+            "founded_year": rng.randint(2008, now.year),
+            "country": country,
+            "city": rng.choice(CITIES[country]),
+            "description": (f"{name} é uma startup de {sector} que aplica {', '.join(technologies)} para "
+                            f"{rng.choice(['automatizar', 'reduzir custos de', 'personalizar', 'escalar'])} "
+                            f"{rng.choice(['crédito', 'diagnósticos', 'logística', 'vendas', 'atendimento', 'operações'])}. "
+                            + "Atende empresas em toda a região. " * rng.randint(0, 6)).strip(),
+            "ai_technologies": technologies,
+            "last_funding_amount": amount,
+            "last_funding_date": created_at - timedelta(days=rng.randint(0, 540)) if has_vc else None,
+            "total_funding": round(amount * rng.uniform(1.0, 3.0), 2) if amount else None,
+            "investor_names": rng.sample(INVESTORS, rng.randint(1, 4)) if has_vc else [],
+            "has_venture_capital": has_vc,
+            "sources": sources,
+            "created_at": created_at,
+            "updated_at": None
+        }
+
+
+def metrics_rows(rng: random.Random, first_id: int, startup_ids: range, now: datetime,
+                 days: int) -> Iterator[Dict[str, Any]]:
+    row_id = first_id
+    for startup_id in startup_ids:
+        # ~10% das startups já foram re-pontuadas (mais de uma linha de métricas)
+        for version in range(1 if rng.random() < 0.9 else rng.randint(2, 3)):
+            market, technical, partnership = (round(100 * rng.betavariate(5, 3), 1) for _ in range(3))
+            yield {
+                "id": row_id,
+                "startup_id": startup_id,
+                "market_demand_score": market,
+                "technical_level_score": technical,
+                "partnership_potential_score": partnership,
+                "total_score": round(market * 0.4 + technical * 0.35 + partnership * 0.25, 1),
+                "analysis_date": _timestamp(rng, now, days),
+                "analysis_version": "1.0" if version == 0 else "2.0",
+                "inputs_fingerprint": f"{rng.getrandbits(256):064x}"
+            }
+            row_id += 1
+
+
+def invalid_startup_rows(rng: random.Random, first_id: int, count: int, now: datetime,
+                         days: int) -> Iterator[Dict[str, Any]]:
+    for row_id in range(first_id, first_id + count):
+        name = _name(rng, row_id)
+        issues = _sample(rng, INVALID_REASONS, rng.randint(1, 3))
+        confidence = round(rng.uniform(0.4, 0.95), 2)
+        yield {
+            "id": row_id,
+            "name": name,
+            "website": f"{rng.choice(['https://', 'http://', ''])}{name.lower().replace(' ', '-')}.{SEED_DOMAIN}",
+            "sector": _pick(rng, SECTORS),
+            "reason": "; ".join(issues),
+            "validation_issues": issues,
+            "validation_insight": f"Não encontrado - Startup invalidada devido a: {issues[0]}",
+            "confidence_level": confidence,
+            "recommendation": rng.choice(["REJECT", "INVESTIGATE", "MANUAL_REVIEW"]),
+            "full_validation_data": {
+                "validation_scores": {"website_score": rng.choice([0, 100]), "vc_funding_score": rng.choice([0, 100]),
+                                      "funding_sources_score": rng.choice([0, 100])},
+                "issues": issues,
+                "confidence": confidence
+            },
+            "created_at": _timestamp(rng, now, days)
+        }
+
+
+def agent_task_rows(rng: random.Random, first_id: int, count: int, now: datetime,
+                    days: int) -> Iterator[Dict[str, Any]]:
+    for row_id in range(first_id, first_id + count):
+        task_type = _pick(rng, TASK_TYPES)
+        status = _pick(rng, TASK_STATUS)
+        started_at = _timestamp(rng, now, days)
+        limit = rng.choice([5, 10, 20])
+        yield {
+            "id": row_id,
+            "task_type": task_type,
+            "status": status,
+            "agent_name": SEED_AGENT,
+            "input_data": {"country": _pick(rng, COUNTRIES), "sector": _pick(rng, SECTORS), "limit": limit,
+                           "search_strategy": rng.choice(["specific", "market_demand"]),
+                           "from_scheduler": rng.random() < 0.7},
+            "output_data": {"startups_found": rng.randint(0, limit), "tokens_used": rng.randint(2000, 40000)}
+            if status == "completed" else None,
+            "result_digest": None,
+            "error_message": "Timeout na chamada à OpenAI" if status == "failed" else None,
+            "started_at": started_at,
+            "completed_at": started_at + timedelta(seconds=rng.lognormvariate(4.5, 0.6)) if status != "running" else None,
+            "created_at": started_at
+        }
+
+
+def task_log_rows(rng: random.Random, first_id: int, count: int, task_ids: range, now: datetime,
+                  days: int) -> Iterator[Dict[str, Any]]:
+    for row_id in range(first_id, first_id + count):
+        status = rng.choices(["started", "completed", "failed"], weights=[45, 47, 8])[0]
+        country = _pick(rng, COUNTRIES)
+        sector = _pick(rng, SECTORS)
+        started_at = _timestamp(rng, now, days)
+        execution_time = round(rng.lognormvariate(4.5, 0.6), 2) if status != "started" else None
+        yield {
+            "id": row_id,
+            "task_name": f"{SEED_PREFIX} Descoberta {sector} - {country}",
+            "task_type": f"scheduled_discovery_{sector.lower()}" if rng.random() < 0.7 else "manual_discovery",
+            "status": status,
+            "message": (f"Iniciando descoberta de startups para {country} - Setor: {sector}" if status == "started"
+                        else f"Descoberta concluída: {rng.randint(0, 20)} startups" if status == "completed"
+                        else "Erro na descoberta: timeout"),
+            "execution_time": execution_time,
+            "scheduled_job_id": None,
+            "agent_task_id": rng.choice(task_ids) if task_ids and rng.random() < 0.9 else None,
+            "started_at": started_at,
+            "completed_at": started_at + timedelta(seconds=execution_time) if execution_time else None,
+            "created_at": started_at
+        }
+
+
+def notification_rows(rng: random.Random, first_id: int, count: int, task_ids: range, now: datetime,
+                      days: int) -> Iterator[Dict[str, Any]]:
+    for row_id in range(first_id, first_id + count):
+        kind = _pick(rng, NOTIFICATION_TYPES)
+        created_at = _timestamp(rng, now, days)
+        yield {
+            "id": row_id,
+            "title": f"{SEED_PREFIX} " + {"success": "Descoberta concluída", "info": "Task iniciada",
+                                          "error": "Falha na descoberta", "warning": "Limite de tokens próximo"}[kind],
+            "message": f"{rng.randint(0, 20)} novas startups em {_pick(rng, SECTORS)} ({_pick(rng, COUNTRIES)})",
+            "type": kind,
+            # Notificações antigas quase sempre já foram lidas
+            "is_read": rng.random() < (0.95 if (now - created_at).days > 7 else 0.3),
+            "task_id": rng.choice(task_ids) if task_ids and rng.random() < 0.8 else None,
+            "job_id": None,
+            "created_at": created_at
+        }
+
+
+def newsletter_rows(rng: random.Random, first_id: int, count: int, now: datetime,
+                    days: int) -> Iterator[Dict[str, Any]]:
+    for row_id in range(first_id, first_id + count):
+        first_name = rng.choice(["ana", "bruno", "carla", "diego", "elisa", "felipe", "gabi", "hugo", "iris", "joão"])
+        yield {
+            "id": row_id,
+            "email": f"{first_name}.{row_id}@{SEED_DOMAIN}",
+            "name": first_name.capitalize(),
+            "is_active": rng.random() < 0.9,
+            "created_at": _timestamp(rng, now, days),
+            "updated_at": None
+        }
+
+
+# =============================================================================
+# Carga
+# =============================================================================
+
+class Seeder:
+    """Insere linhas em lotes: COPY no PostgreSQL, executemany nos demais bancos"""
+
+    def __init__(self, engine, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.is_postgres = engine.dialect.name == "postgresql"
+        self.loaded: List[str] = []
+
+    def next_id(self, table: Table) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {table.name}")).scalar() + 1
+
+    def load(self, table: Table, rows: Iterable[Dict[str, Any]]) -> int:
+        started = time.perf_counter()
+        total = 0
+        chunk: List[Dict[str, Any]] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                total += self._flush(table, chunk)
+                chunk = []
+        if chunk:
+            total += self._flush(table, chunk)
+
+        elapsed = time.perf_counter() - started
+        print(f"   ✅ {table.name:<18} {total:>10} linhas em {elapsed:7.1f}s ({total / elapsed if elapsed else 0:,.0f} linhas/s)")
+        self.loaded.append(table.name)
+        return total
+
+    def _flush(self, table: Table, chunk: List[Dict[str, Any]]) -> int:
+        if self.is_postgres:
+            self._copy(table, chunk)
+        else:
+            with self.engine.begin() as conn:
+                conn.execute(table.insert(), chunk)
+        return len(chunk)
+
+    def _copy(self, table: Table, chunk: List[Dict[str, Any]]):
+        columns = list(chunk[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in chunk:
+            writer.writerow([_copy_value(row[column]) for column in columns])
+        buffer.seek(0)
+
+        raw = self.engine.raw_connection()
+        try:
+            with raw.cursor() as cursor:
+                cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+            raw.commit()
+        finally:
+            raw.close()
+
+    def finish(self):
+        """Acerta as sequências dos IDs atribuídos manualmente e atualiza as estatísticas do planner"""
+        if not self.is_postgres:
+            return
+        with self.engine.begin() as conn:
+            for name in self.loaded:
+                conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), "
+                                  f"(SELECT COALESCE(MAX(id), 1) FROM {name}))"))
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for name in self.loaded:
+                conn.execute(text(f"ANALYZE {name}"))
+        print(f"   📈 Sequências ajustadas e ANALYZE em {len(self.loaded)} tabelas")
+
+
+def _copy_value(value: Any) -> Any:
+    # None vira campo vazio sem aspas (NULL no COPY csv); o gerador nunca produz string vazia
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return value
+
+
+def clear_seeded(engine):
+    """Remove só os registros semeados, respeitando as FKs"""
+    seeded_startups = f"SELECT id FROM startups WHERE website LIKE '%.{SEED_DOMAIN}'"
+    seeded_tasks = f"SELECT id FROM agent_tasks WHERE agent_name = '{SEED_AGENT}'"
+    statements = [
+        f"DELETE FROM notifications WHERE title LIKE '{SEED_PREFIX}%' OR task_id IN ({seeded_tasks})",
+        f"DELETE FROM task_logs WHERE task_name LIKE '{SEED_PREFIX}%' OR agent_task_id IN ({seeded_tasks})",
+        f"DELETE FROM startup_metrics WHERE startup_id IN ({seeded_startups})",
+        f"DELETE FROM startup_revalidations WHERE startup_id IN ({seeded_startups})",
+        f"DELETE FROM analysis WHERE startup_id IN ({seeded_startups})",
+        f"DELETE FROM leadership WHERE startup_id IN ({seeded_startups})",
+        f"DELETE FROM startups WHERE website LIKE '%.{SEED_DOMAIN}'",
+        f"DELETE FROM invalid_startups WHERE website LIKE '%.{SEED_DOMAIN}'",
+        f"DELETE FROM newsletter_emails WHERE email LIKE '%@{SEED_DOMAIN}'",
+        f"DELETE FROM agent_tasks WHERE agent_name = '{SEED_AGENT}'",
+    ]
+    with engine.begin() as conn:
+        for statement in statements:
+            deleted = conn.execute(text(statement)).rowcount
+            print(f"   🗑️  {statement.split()[2]:<22} {deleted} linhas removidas")
+
+
+def seed(engine, startups: int, invalid: int, tasks: int, task_logs: int, notifications: int,
+         newsletter: int, days: int, seed_value: int, chunk_size: int):
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc)
+    seeder = Seeder(engine, chunk_size)
+
+    first_startup = seeder.next_id(Startup.__table__)
+    first_task = seeder.next_id(AgentTask.__table__)
+    startup_ids = range(first_startup, first_startup + startups)
+    task_ids = range(first_task, first_task + tasks)
+
+    mode = "COPY" if seeder.is_postgres else f"executemany ({engine.dialect.name})"
+    print(f"🌱 Semeando dataset sintético via {mode}, lotes de {chunk_size} linhas, {days} dias de histórico")
+    started = time.perf_counter()
+
+    seeder.load(Startup.__table__, startup_rows(rng, first_startup, startups, now, days))
+    seeder.load(StartupMetrics.__table__, metrics_rows(
+        rng, seeder.next_id(StartupMetrics.__table__), startup_ids, now, days))
+    seeder.load(InvalidStartup.__table__, invalid_startup_rows(
+        rng, seeder.next_id(InvalidStartup.__table__), invalid, now, days))
+    seeder.load(AgentTask.__table__, agent_task_rows(rng, first_task, tasks, now, days))
+    seeder.load(TaskLog.__table__, task_log_rows(
+        rng, seeder.next_id(TaskLog.__table__), task_logs, task_ids, now, days))
+    seeder.load(Notification.__table__, notification_rows(
+        rng, seeder.next_id(Notification.__table__), notifications, task_ids, now, days))
+    seeder.load(NewsletterEmail.__table__, newsletter_rows(
+        rng, seeder.next_id(NewsletterEmail.__table__), newsletter, now, days))
+
+    seeder.finish()
+    print(f"\n🎉 Dataset semeado em {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera um dataset sintético em escala de produção")
+    parser.add_argument("--startups", type=int, default=10000)
+    parser.add_argument("--invalid", type=int, default=None, help="Startups inválidas (padrão: 40%% de --startups)")
+    parser.add_argument("--tasks", type=int, default=2000, help="agent_tasks")
+    parser.add_argument("--task-logs", type=int, default=200000)
+    parser.add_argument("--notifications", type=int, default=100000)
+    parser.add_argument("--newsletter", type=int, default=1000, help="E-mails da newsletter")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplica todos os volumes")
+    parser.add_argument("--days", type=int, default=730, help="Janela de datas de criação")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador (dataset reprodutível)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Linhas por COPY")
+    parser.add_argument("--database-url", default=None, help="Banco alvo (padrão: DATABASE_URL)")
+    parser.add_argument("--clear", action="store_true", help="Remove os dados semeados e sai")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url or settings.database_url)
+
+    if args.clear:
+        print("🧹 Removendo dados semeados...")
+        clear_seeded(engine)
+        sys.exit(0)
+
+    def scaled(value: int) -> int:
+        return int(math.ceil(value * args.scale))
+
+    seed(engine,
+         startups=scaled(args.startups),
+         invalid=scaled(args.invalid if args.invalid is not None else int(args.startups * 0.4)),
+         tasks=scaled(args.tasks),
+         task_logs=scaled(args.task_logs),
+         notifications=scaled(args.notifications),
+         newsletter=scaled(args.newsletter),
+         days=args.days,
+         seed_value=args.seed,
+         chunk_size=args.chunk_size)
@@ -1,17 +1,23 @@
 #!/usr/bin/env python3
 """
 Script para limpar banco de dados removendo startups inválidas
+
+Usa o mesmo motor do job "startup_revalidation": lotes paralelos, progresso salvo
+por lote (uma execução interrompida continua de onde parou) e startups validadas
+dentro do TTL são puladas.
 """
 
 import sys
-sys.path.append('/app')
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-import requests
-from agents.validation_agent import StartupValidationAgent
+from services.revalidation_service import RevalidationService
 from services.startup_service import StartupService
 from database.connection import get_db
 
-def cleanup_database():
+def cleanup_database(ttl_hours: float = None, batch_size: int = None, workers: int = None,
+                     resume: bool = True, assume_yes: bool = False):
     """Limpa o banco removendo startups inválidas"""
 
     print("🧹 Iniciando limpeza do banco de dados...")
@@ -19,82 +25,61 @@ def cleanup_database():
     # Get database session
     db = next(get_db())
     startup_service = StartupService(db)
-    validator = StartupValidationAgent()
-
-    # Get all startups
-    startups = startup_service.get_startups(limit=1000)
-    print(f"📊 {len(startups)} startups encontradas no banco")
-
-    invalid_startups = []
-    total_tokens = 0
-
-    for startup in startups:
-        print(f"\n🔍 Validando: {startup.name}")
-
-        # Convert to dict for validation
-        startup_data = {
-            "name": startup.name,
-            "website": str(startup.website) if startup.website else None,
-            "sector": startup.sector,
-            "founded_year": startup.founded_year,
-            "country": startup.country,
-            "city": startup.city,
-            "description": startup.description,
-            "ai_technologies": startup.ai_technologies,
-            "last_funding_amount": startup.last_funding_amount,
-            "investor_names": startup.investor_names,
-            "ceo_name": startup.ceo_name,
-            "ceo_linkedin": startup.ceo_linkedin,
-            "cto_name": startup.cto_name,
-            "cto_linkedin": startup.cto_linkedin,
-            "has_venture_capital": startup.has_venture_capital
-        }
-
-        # Validate
-        validation = validator.validate_startup_info(startup_data)
-        total_tokens += validation.get("tokens_used", 0)
-
-        print(f"   Status: {validation['validation_status']}")
-        print(f"   Confiança: {validation['confidence_score']:.2f}")
-
-        # Mark for removal if invalid or company doesn't exist
-        if (validation['validation_status'] == 'invalid' or
-            validation.get('company_exists') == False or
-            validation['confidence_score'] < 0.3):
-
-            invalid_startups.append({
-                "id": startup.id,
-                "name": startup.name,
-                "reason": validation.get('issues_found', ['Low confidence'])
-            })
-            print(f"   ❌ Marcada para remoção")
-        else:
-            print(f"   ✅ Mantida")
+
+    def report(progress):
+        print(f"   ⏳ {progress['processed']}/{progress['total']} startups "
+              f"({progress['skipped']} dentro do TTL, {progress['flagged']} marcadas)")
+
+    service = RevalidationService(db, ttl_hours=ttl_hours, batch_size=batch_size,
+                                  workers=workers, on_progress=report)
+    task, resumed = service.open_run(input_data={"source": "cleanup_db"}, resume=resume)
+    if resumed:
+        print(f"🔁 Retomando execução #{task.id} a partir da startup {task.output_data.get('last_startup_id', 0)}")
+
+    try:
+        progress = service.run(task)
+    except KeyboardInterrupt:
+        task.status = "interrupted"
+        db.commit()
+        print(f"\n⏸️  Interrompido. Rode novamente para continuar a execução #{task.id}.")
+        db.close()
+        return
+
+    task.status = "completed"
+    db.commit()
+
+    flagged = service.flagged_startups()
 
     # Show summary
     print(f"\n📊 RESUMO DA LIMPEZA:")
-    print(f"   • Total startups analisadas: {len(startups)}")
-    print(f"   • Startups inválidas encontradas: {len(invalid_startups)}")
-    print(f"   • Tokens utilizados: {total_tokens}")
+    print(f"   • Total startups analisadas: {progress['processed']}")
+    print(f"   • Puladas (validadas dentro do TTL): {progress['skipped']}")
+    print(f"   • Startups inválidas encontradas: {len(flagged)}")
+    print(f"   • Tokens utilizados: {progress['tokens_used']}")
 
-    if invalid_startups:
+    if flagged:
         print(f"\n❌ Startups marcadas para remoção:")
-        for startup in invalid_startups:
-            print(f"   • {startup['name']} (ID: {startup['id']})")
-            print(f"     Motivo: {startup['reason'][:100]}...")
+        for record in flagged:
+            reason = "; ".join(
+                issue.get("issue", str(issue)) if isinstance(issue, dict) else str(issue)
+                for issue in (record.issues or [])
+            ) or "Low confidence"
+            print(f"   • {record.startup.name} (ID: {record.startup_id})")
+            print(f"     Motivo: {reason[:100]}...")
 
         # Ask for confirmation
-        confirm = input(f"\n⚠️  Deseja remover {len(invalid_startups)} startups inválidas? (y/N): ")
+        confirm = "y" if assume_yes else input(f"\n⚠️  Deseja remover {len(flagged)} startups inválidas? (y/N): ")
 
         if confirm.lower() == 'y':
             removed_count = 0
-            for startup in invalid_startups:
-                success = startup_service.delete_startup(startup['id'])
+            for record in flagged:
+                name = record.startup.name
+                success = startup_service.delete_startup(record.startup_id)
                 if success:
                     removed_count += 1
-                    print(f"   ✅ {startup['name']} removida")
+                    print(f"   ✅ {name} removida")
                 else:
-                    print(f"   ❌ Erro ao remover {startup['name']}")
+                    print(f"   ❌ Erro ao remover {name}")
 
             print(f"\n✅ Limpeza concluída! {removed_count} startups removidas.")
         else:
@@ -105,4 +90,18 @@ def cleanup_database():
     db.close()
 
 if __name__ == "__main__":
-    cleanup_database()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Re-valida as startups salvas e remove as inválidas")
+    parser.add_argument("--ttl-hours", type=float, help="Pula startups validadas há menos que isso")
+    parser.add_argument("--batch-size", type=int, help="Startups por lote")
+    parser.add_argument("--workers", type=int, help="Validações simultâneas")
+    parser.add_argument("--no-resume", action="store_true", help="Ignora execução interrompida e começa do zero")
+    parser.add_argument("--yes", action="store_true", help="Remove sem pedir confirmação")
+    args = parser.parse_args()
+
+    cleanup_database(
+        ttl_hours=args.ttl_hours,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        resume=not args.no_resume,
+        assume_yes=args.yes
+    )
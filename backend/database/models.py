@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey, Boolean, LargeBinary, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database.connection import Base
@@ -27,6 +27,7 @@ class Startup(Base):
     leadership = relationship("Leadership", back_populates="startup", cascade="all, delete-orphan")
     analysis = relationship("Analysis", back_populates="startup", cascade="all, delete-orphan")
     metrics = relationship("StartupMetrics", back_populates="startup", cascade="all, delete-orphan")
+    revalidation = relationship("StartupRevalidation", back_populates="startup", cascade="all, delete-orphan", uselist=False)
 
 class Leadership(Base):
     __tablename__ = "leadership"
@@ -88,9 +89,28 @@ class StartupMetrics(Base):
     # Metadados
     analysis_date = Column(DateTime(timezone=True), server_default=func.now())
     analysis_version = Column(String(50), default="1.0")
+    inputs_fingerprint = Column(String(64), index=True)  # Hash dos dados usados no score (re-scoring incremental)
 
     startup = relationship("Startup", back_populates="metrics")
 
+class StartupRevalidation(Base):
+    __tablename__ = "startup_revalidations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    startup_id = Column(Integer, ForeignKey("startups.id", ondelete="CASCADE"), unique=True, nullable=False)
+    run_id = Column(Integer, ForeignKey("agent_tasks.id"), nullable=True, index=True)  # agent_task da execução
+
+    # Resultado da última re-validação
+    status = Column(String(50))  # "valid", "suspicious", "invalid", "error"
+    confidence_score = Column(Float)
+    company_active = Column(Boolean)
+    flagged = Column(Boolean, default=False)  # Candidata a remoção
+    issues = Column(JSON)
+    tokens_used = Column(Integer, default=0)
+    validated_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    startup = relationship("Startup", back_populates="revalidation")
+
 class AgentTask(Base):
     __tablename__ = "agent_tasks"
 
@@ -99,19 +119,116 @@ class AgentTask(Base):
     status = Column(String(50))  # "pending", "running", "completed", "failed"
     agent_name = Column(String(100))
     input_data = Column(JSON)
-    output_data = Column(JSON)
+    output_data = Column(JSON)  # Apenas resumo pequeno; resultado completo fica em task_results
+    result_digest = Column(String(64), ForeignKey("task_results.digest"), nullable=True)
     error_message = Column(Text)
     started_at = Column(DateTime(timezone=True))
     completed_at = Column(DateTime(timezone=True))
+    heartbeat_at = Column(DateTime(timezone=True))  # batimento do processo dono enquanto na fila/rodando
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class OrchestrationCheckpoint(Base):
+    __tablename__ = "orchestration_checkpoints"
+
+    # thread_id = agent_task_id da orquestração
+    thread_id = Column(String(100), primary_key=True)
+    checkpoint_ns = Column(String(255), primary_key=True, default="")
+    checkpoint_id = Column(String(100), primary_key=True)
+    parent_checkpoint_id = Column(String(100))
+    type = Column(String(50))  # formato de serialização (serde do LangGraph)
+    checkpoint = Column(LargeBinary, nullable=False)  # estado completo após o node
+    metadata_type = Column(String(50))
+    checkpoint_metadata = Column("metadata", LargeBinary)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class OrchestrationCheckpointWrite(Base):
+    __tablename__ = "orchestration_checkpoint_writes"
+
+    thread_id = Column(String(100), primary_key=True)
+    checkpoint_ns = Column(String(255), primary_key=True, default="")
+    checkpoint_id = Column(String(100), primary_key=True)
+    task_id = Column(String(100), primary_key=True)
+    idx = Column(Integer, primary_key=True)
+    channel = Column(String(255), nullable=False)
+    type = Column(String(50))
+    value = Column(LargeBinary)
+    task_path = Column(String(255), default="")
+
+class OrchestrationStep(Base):
+    __tablename__ = "orchestration_steps"
+
+    # Journal por startup dentro de um node (validação, métricas): evita repetir chamadas já pagas
+    id = Column(Integer, primary_key=True, index=True)
+    agent_task_id = Column(Integer, nullable=False, index=True)
+    node = Column(String(50), nullable=False)
+    step_key = Column(String(255), nullable=False)
+    result = Column(JSON)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (UniqueConstraint("agent_task_id", "node", "step_key", name="uq_orchestration_step"),)
+
+class TaskResult(Base):
+    __tablename__ = "task_results"
+
+    digest = Column(String(64), primary_key=True)  # sha256 do JSON canônico do resultado
+    encoding = Column(String(20), nullable=False, default="json+zlib")
+    payload = Column(LargeBinary, nullable=False)  # JSON comprimido
+    raw_size = Column(Integer)  # bytes antes da compressão
+    compressed_size = Column(Integer)  # bytes após a compressão
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class RunCassette(Base):
+    """Gravação das chamadas HTTP de uma orquestração (replay sem rede em benchmarks/replay.py)"""
+    __tablename__ = "run_cassettes"
+
+    agent_task_id = Column(Integer, ForeignKey("agent_tasks.id", ondelete="CASCADE"), primary_key=True)
+    encoding = Column(String(20), nullable=False, default="json+zlib")
+    payload = Column(LargeBinary, nullable=False)  # cassette comprimido
+    interaction_count = Column(Integer)
+    compressed_size = Column(Integer)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class TaskSpan(Base):
+    """Span de uma execução de orquestração (waterfall em GET /api/agents/tasks/{id}/trace)"""
+    __tablename__ = "task_spans"
+
+    id = Column(Integer, primary_key=True, index=True)
+    agent_task_id = Column(Integer, ForeignKey("agent_tasks.id", ondelete="CASCADE"), nullable=False, index=True)
+    trace_id = Column(String(32), nullable=False, index=True)  # uma por execução (retomadas geram outra)
+    span_id = Column(String(16), nullable=False)
+    parent_span_id = Column(String(16))
+    name = Column(String(255), nullable=False)
+    kind = Column(String(20))  # "task", "node", "shard", "startup", "http", "db"
+    status = Column(String(20))  # "ok", "error", "unfinished"
+    start_time = Column(DateTime(timezone=True), nullable=False)
+    offset_ms = Column(Float)  # desde o início da execução
+    duration_ms = Column(Float)
+    attributes = Column(JSON)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class TokenLedgerEntry(Base):
+    """Uso de tokens de uma chamada ao LLM (base dos orçamentos diários por job e global)"""
+    __tablename__ = "token_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    agent_task_id = Column(Integer, ForeignKey("agent_tasks.id", ondelete="SET NULL"), nullable=True, index=True)
+    scheduled_job_id = Column(Integer, ForeignKey("scheduled_jobs.id", ondelete="SET NULL"), nullable=True, index=True)
+    node = Column(String(50))  # node do grafo ("discovery", "metrics"...) ou "rescoring"/"revalidation"
+    model = Column(String(100))
+    call_type = Column(String(50))  # "websearch", "metrics", "validation_insight", "startup_validation"...
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    total_tokens = Column(Integer, default=0)
+    cost_usd = Column(Float, default=0.0)  # estimado pela tabela de preços (agents/token_ledger.py)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)  # horário da chamada (UTC)
+
 class ScheduledJob(Base):
     __tablename__ = "scheduled_jobs"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     description = Column(Text)
-    task_type = Column(String(100), nullable=False)  # "startup_discovery", "newsletter"
+    task_type = Column(String(100), nullable=False)  # "startup_discovery", "newsletter", "startup_rescoring", "startup_revalidation"
     interval_value = Column(Integer, nullable=False)  # número
     interval_unit = Column(String(20), nullable=False)  # "minutes", "hours", "days", "weeks", "months"
 
@@ -0,0 +1,92 @@
+"""
+Métricas operacionais no formato Prometheus (GET /metrics)
+
+Os objetos ficam todos aqui para que os nomes e buckets estejam num lugar só; cada módulo
+apenas observa/incrementa. Gauges de estado (fila, pool do banco, WebSockets) são lidos
+por callback na hora da coleta, sem custo no caminho quente.
+"""
+from typing import Any, Dict, Optional
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+
+# =============================================================================
+# Fila de tasks e orquestração
+# =============================================================================
+
+TASK_QUEUE_WAIT = Histogram(
+    "inception_task_queue_wait_seconds", "Tempo entre o enfileiramento e o início da task",
+    ["task_type"], buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+)
+TASK_DURATION = Histogram(
+    "inception_task_duration_seconds", "Duração da execução da task no worker",
+    ["task_type", "outcome"], buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+)
+TASK_QUEUE_SIZE = Gauge("inception_task_queue_size", "Tasks aguardando o worker")
+
+NODE_DURATION = Histogram(
+    "inception_orchestration_node_seconds", "Duração de cada node do grafo de orquestração",
+    ["node"], buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+
+# =============================================================================
+# Chamadas externas
+# =============================================================================
+
+OPENAI_REQUEST_DURATION = Histogram(
+    "inception_openai_request_seconds", "Duração de cada tentativa de chamada à OpenAI (inclui espera no rate limiter)",
+    ["call_type"], buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+)
+OPENAI_RESPONSES = Counter(
+    "inception_openai_responses", "Respostas da OpenAI por status HTTP (ou classe do erro de rede)",
+    ["call_type", "status"]
+)
+OPENAI_TOKENS = Counter(
+    "inception_openai_tokens", "Tokens consumidos por tipo de chamada", ["call_type", "kind"]
+)
+
+WEBSITE_PROBE_DURATION = Histogram(
+    "inception_website_probe_seconds", "Duração da verificação do website de uma startup (todas as variações de URL)",
+    ["outcome"], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 48)
+)
+
+# =============================================================================
+# Infraestrutura
+# =============================================================================
+
+DB_POOL_CONNECTIONS = Gauge("inception_db_pool_connections", "Conexões do pool do SQLAlchemy por estado", ["state"])
+
+WEBSOCKET_CONNECTIONS = Gauge("inception_websocket_connections", "Conexões WebSocket de notificações abertas")
+WEBSOCKET_OPENED = Counter("inception_websocket_connections_opened", "Conexões WebSocket aceitas")
+
+SCHEDULER_LAG = Histogram(
+    "inception_scheduler_lag_seconds", "Atraso entre o horário planejado de um job agendado e o disparo real",
+    ["task_type"], buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60, 300, 900)
+)
+
+
+def observe_openai_call(call_type: str, status: Any, seconds: float, usage: Optional[Dict[str, Any]] = None):
+    """Uma tentativa de chamada à OpenAI (status HTTP ou nome da exceção)"""
+    OPENAI_REQUEST_DURATION.labels(call_type).observe(seconds)
+    OPENAI_RESPONSES.labels(call_type, str(status)).inc()
+    if usage:
+        # Chat Completions (prompt/completion) ou Responses API (input/output)
+        prompt = usage.get("prompt_tokens", usage.get("input_tokens")) or 0
+        completion = usage.get("completion_tokens", usage.get("output_tokens")) or 0
+        if prompt:
+            OPENAI_TOKENS.labels(call_type, "prompt").inc(prompt)
+        if completion:
+            OPENAI_TOKENS.labels(call_type, "completion").inc(completion)
+
+
+def track_db_pool(engine):
+    """Gauges do pool lidos na coleta (pools sem contadores, como o do SQLite em memória, são ignorados)"""
+    pool = engine.pool
+    for state, reader in (("size", "size"), ("checked_out", "checkedout"),
+                          ("checked_in", "checkedin"), ("overflow", "overflow")):
+        if callable(getattr(pool, reader, None)):
+            DB_POOL_CONNECTIONS.labels(state).set_function(getattr(pool, reader))
+
+
+def render() -> bytes:
+    """Todas as métricas (incluindo processo/GC do prometheus_client) no formato texto"""
+    return generate_latest(REGISTRY)
+
@@ -0,0 +1,127 @@
+"""
+Configuração central de logging
+
+- LOG_LEVEL: nível padrão (INFO)
+- LOG_LEVELS: níveis por subsistema, ex. "agents=INFO,agents.orchestrator=WARNING,services=DEBUG"
+- LOG_FORMAT: "text" (padrão) ou "json"
+- LOG_PAYLOADS: "true" habilita o log de payloads/respostas (apenas em DEBUG, redigidos e amostrados)
+- LOG_PAYLOAD_SAMPLE_RATE: fração das chamadas cujo payload é logado (padrão 0.05)
+"""
+from typing import Any, Dict
+import json
+import logging
+import os
+import random
+import re
+
+PAYLOAD_LOGGING = os.getenv("LOG_PAYLOADS", "false").lower() == "true"
+PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.05"))
+PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+
+# Subsistemas ruidosos que ficam em WARNING a menos que LOG_LEVELS diga o contrário
+DEFAULT_SUBSYSTEM_LEVELS = {
+    "urllib3": "WARNING",
+    "apscheduler": "WARNING",
+    "httpx": "WARNING",
+}
+
+_SENSITIVE_KEYS = re.compile(r"authorization|api[_-]?key|password|secret|token$|cookie|smtp_pass", re.IGNORECASE)
+_BEARER = re.compile(r"(Bearer\s+)[A-Za-z0-9._\-]+")
+_OPENAI_KEY = re.compile(r"sk-[A-Za-z0-9_\-]{8,}")
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+
+# Atributos padrão de LogRecord (o resto veio de extra={...})
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_configured = False
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formato texto com campos extras em key=value, ou uma linha JSON por registro"""
+
+    def __init__(self, as_json: bool = False):
+        super().__init__("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+        self.as_json = as_json
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {k: v for k, v in record.__dict__.items() if k not in _RESERVED_ATTRS and not k.startswith("_")}
+
+        if self.as_json:
+            entry = {
+                "ts": self.formatTime(record),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+                **fields
+            }
+            if record.exc_info:
+                entry["exc_info"] = self.formatException(record.exc_info)
+            return json.dumps(entry, ensure_ascii=False, default=str)
+
+        text = super().format(record)
+        if fields:
+            text += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return text
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    levels = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """Configura handlers e níveis uma única vez por processo"""
+    global _configured
+    if _configured:
+        return
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(StructuredFormatter(as_json=os.getenv("LOG_FORMAT", "text").lower() == "json"))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    levels = {**DEFAULT_SUBSYSTEM_LEVELS, **_parse_levels(os.getenv("LOG_LEVELS", ""))}
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    _configured = True
+
+
+def redact(value: Any) -> Any:
+    """Remove credenciais e e-mails de estruturas arbitrárias antes de logar"""
+    if isinstance(value, dict):
+        return {k: "***" if isinstance(k, str) and _SENSITIVE_KEYS.search(k) else redact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    if isinstance(value, str):
+        value = _BEARER.sub(r"\1***", value)
+        value = _OPENAI_KEY.sub("sk-***", value)
+        return _EMAIL.sub("***@***", value)
+    return value
+
+
+def log_payload(logger: logging.Logger, label: str, payload: Any, max_chars: int = PAYLOAD_MAX_CHARS):
+    """Loga payload/resposta completa somente com LOG_PAYLOADS=true, logger em DEBUG e dentro da amostragem
+
+    A serialização só acontece depois dessas checagens, então o custo no caminho normal é zero.
+    """
+    if not PAYLOAD_LOGGING or not logger.isEnabledFor(logging.DEBUG):
+        return
+    if PAYLOAD_SAMPLE_RATE < 1.0 and random.random() >= PAYLOAD_SAMPLE_RATE:
+        return
+
+    text = payload if isinstance(payload, str) else json.dumps(redact(payload), ensure_ascii=False, default=str)
+    if isinstance(payload, str):
+        text = redact(text)
+    if len(text) > max_chars:
+        text = f"{text[:max_chars]}... (+{len(text) - max_chars} chars)"
+
+    logger.debug("%s: %s", label, text)
@@ -1,9 +1,21 @@
 from fastapi import FastAPI
+from logging_config import configure_logging
+
+configure_logging()
+
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from app.routers import startups, agents, jobs, notifications, logs, newsletter
 from database.connection import engine
 from database import models
 from services.scheduler_service import scheduler_service
+from services.task_manager import task_manager
+from services.loop_monitor import loop_monitor, LOOP_LAG_MONITOR
+from agents.orchestrator import get_orchestrator
+import instrumentation
+import logging
+
+logger = logging.getLogger(__name__)
 
 models.Base.metadata.create_all(bind=engine)
 
@@ -46,14 +58,33 @@ async def root():
 
 @app.on_event("startup")
 async def startup_event():
-    """Inicia o scheduler quando a aplicação sobe"""
+    """Inicia o scheduler quando a aplicação sobe (o líder retoma as orquestrações interrompidas)"""
+    # Compila o grafo na subida para que a primeira task não pague esse custo
+    try:
+        get_orchestrator()
+    except Exception as e:
+        logger.error("Erro ao inicializar orchestrator: %s", e)
     scheduler_service.start()
+    if LOOP_LAG_MONITOR:
+        loop_monitor.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Para o scheduler quando a aplicação para"""
+    """Para o scheduler quando a aplicação para (e registra as tasks adiadas que se perdem)"""
     scheduler_service.stop()
+    task_manager.drop_deferred()
+    loop_monitor.stop()
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/health/loop")
+async def loop_health(reset: bool = False):
+    """Atraso do event loop desde o último reset (LOOP_LAG_MONITOR=true)"""
+    return loop_monitor.snapshot(reset=reset)
+
+@app.get("/metrics")
+async def metrics():
+    """Métricas operacionais no formato texto do Prometheus"""
+    return Response(content=instrumentation.render(), media_type=instrumentation.CONTENT_TYPE_LATEST)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Migration script to add heartbeat_at field to agent_tasks table
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from config import settings
+
+def add_agent_task_heartbeat_field():
+    """Add heartbeat_at field (batimento do processo dono da task) to agent_tasks table"""
+    engine = create_engine(settings.database_url)
+
+    with engine.connect() as conn:
+        # Check if heartbeat_at column already exists
+        result = conn.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'agent_tasks' AND column_name = 'heartbeat_at'
+        """))
+
+        if result.fetchone():
+            print("✅ Campo 'heartbeat_at' já existe na tabela agent_tasks")
+            return
+
+        conn.execute(text("""
+            ALTER TABLE agent_tasks
+            ADD COLUMN heartbeat_at TIMESTAMP WITH TIME ZONE
+        """))
+
+        conn.commit()
+        print("✅ Campo 'heartbeat_at' adicionado à tabela agent_tasks")
+
+if __name__ == "__main__":
+    try:
+        add_agent_task_heartbeat_field()
+        print("🎉 Migração concluída com sucesso!")
+    except Exception as e:
+        print(f"❌ Erro na migração: {e}")
+        sys.exit(1)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Migration script to add inputs_fingerprint field to startup_metrics table
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from config import settings
+from agents.scoring_engine import inputs_fingerprint
+
+def add_metrics_fingerprint_field():
+    """Add inputs_fingerprint field to startup_metrics table and backfill existing rows"""
+    engine = create_engine(settings.database_url)
+
+    with engine.connect() as conn:
+        # Check if inputs_fingerprint column already exists
+        result = conn.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'startup_metrics' AND column_name = 'inputs_fingerprint'
+        """))
+
+        if result.fetchone():
+            print("✅ Campo 'inputs_fingerprint' já existe na tabela startup_metrics")
+            return
+
+        conn.execute(text("""
+            ALTER TABLE startup_metrics
+            ADD COLUMN inputs_fingerprint VARCHAR(64)
+        """))
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_startup_metrics_inputs_fingerprint
+            ON startup_metrics (inputs_fingerprint)
+        """))
+
+        conn.commit()
+        print("✅ Campo 'inputs_fingerprint' adicionado à tabela startup_metrics")
+
+        # As métricas atuais foram calculadas com os dados atuais: grava o fingerprint
+        # para que o primeiro re-scoring não reprocesse a tabela inteira
+        rows = conn.execute(text("""
+            SELECT m.id, s.sector, s.ai_technologies, s.last_funding_amount, s.investor_names
+            FROM startup_metrics m
+            JOIN startups s ON s.id = m.startup_id
+        """)).mappings().all()
+
+        for row in rows:
+            conn.execute(
+                text("UPDATE startup_metrics SET inputs_fingerprint = :fingerprint WHERE id = :id"),
+                {"fingerprint": inputs_fingerprint(dict(row)), "id": row["id"]}
+            )
+
+        conn.commit()
+        print(f"✅ Fingerprint calculado para {len(rows)} métricas existentes")
+
+if __name__ == "__main__":
+    try:
+        add_metrics_fingerprint_field()
+        print("🎉 Migração concluída com sucesso!")
+    except Exception as e:
+        print(f"❌ Erro na migração: {e}")
+        sys.exit(1)
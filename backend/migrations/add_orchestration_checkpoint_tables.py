@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Migration script to add orchestration checkpoint tables (LangGraph checkpointer + step journal)
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from config import settings
+
+TABLES = {
+    "orchestration_checkpoints": """
+        CREATE TABLE orchestration_checkpoints (
+            thread_id VARCHAR(100) NOT NULL,
+            checkpoint_ns VARCHAR(255) NOT NULL DEFAULT '',
+            checkpoint_id VARCHAR(100) NOT NULL,
+            parent_checkpoint_id VARCHAR(100),
+            type VARCHAR(50),
+            checkpoint BYTEA NOT NULL,
+            metadata_type VARCHAR(50),
+            metadata BYTEA,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+        )
+    """,
+    "orchestration_checkpoint_writes": """
+        CREATE TABLE orchestration_checkpoint_writes (
+            thread_id VARCHAR(100) NOT NULL,
+            checkpoint_ns VARCHAR(255) NOT NULL DEFAULT '',
+            checkpoint_id VARCHAR(100) NOT NULL,
+            task_id VARCHAR(100) NOT NULL,
+            idx INTEGER NOT NULL,
+            channel VARCHAR(255) NOT NULL,
+            type VARCHAR(50),
+            value BYTEA,
+            task_path VARCHAR(255) DEFAULT '',
+            PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+        )
+    """,
+    "orchestration_steps": """
+        CREATE TABLE orchestration_steps (
+            id SERIAL PRIMARY KEY,
+            agent_task_id INTEGER NOT NULL,
+            node VARCHAR(50) NOT NULL,
+            step_key VARCHAR(255) NOT NULL,
+            result JSON,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            CONSTRAINT uq_orchestration_step UNIQUE (agent_task_id, node, step_key)
+        )
+    """
+}
+
+def add_orchestration_checkpoint_tables():
+    """Add orchestration_checkpoints, orchestration_checkpoint_writes and orchestration_steps tables"""
+    engine = create_engine(settings.database_url)
+
+    with engine.connect() as conn:
+        for table_name, ddl in TABLES.items():
+            # Check if table already exists
+            result = conn.execute(text("""
+                SELECT table_name
+                FROM information_schema.tables
+                WHERE table_schema = 'public' AND table_name = :table_name
+            """), {"table_name": table_name})
+
+            if result.fetchone():
+                print(f"✅ Tabela '{table_name}' já existe")
+                continue
+
+            conn.execute(text(ddl))
+            print(f"✅ Tabela '{table_name}' criada")
+
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_orchestration_steps_agent_task_id
+            ON orchestration_steps (agent_task_id)
+        """))
+
+        conn.commit()
+        print("✅ Transação commitada")
+
+if __name__ == "__main__":
+    try:
+        add_orchestration_checkpoint_tables()
+        print("🎉 Migração concluída com sucesso!")
+    except Exception as e:
+        print(f"❌ Erro na migração: {e}")
+        sys.exit(1)
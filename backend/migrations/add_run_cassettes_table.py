@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Migration script to add run_cassettes table (recorded HTTP exchanges of orchestration runs)
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from config import settings
+
+def add_run_cassettes_table():
+    """Add run_cassettes table"""
+    engine = create_engine(settings.database_url)
+
+    with engine.connect() as conn:
+        # Check if table already exists
+        result = conn.execute(text("""
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_schema = 'public' AND table_name = 'run_cassettes'
+        """))
+
+        if result.fetchone():
+            print("✅ Tabela 'run_cassettes' já existe")
+            return
+
+        conn.execute(text("""
+            CREATE TABLE run_cassettes (
+                agent_task_id INTEGER PRIMARY KEY REFERENCES agent_tasks(id) ON DELETE CASCADE,
+                encoding VARCHAR(20) NOT NULL DEFAULT 'json+zlib',
+                payload BYTEA NOT NULL,
+                interaction_count INTEGER,
+                compressed_size INTEGER,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+            )
+        """))
+
+        conn.commit()
+        print("✅ Tabela 'run_cassettes' criada")
+
+if __name__ == "__main__":
+    try:
+        add_run_cassettes_table()
+        print("🎉 Migração concluída com sucesso!")
+    except Exception as e:
+        print(f"❌ Erro na migração: {e}")
+        sys.exit(1)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Migration script to add startup_revalidations table (re-validation progress per startup)
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from config import settings
+
+def add_startup_revalidations_table():
+    """Add startup_revalidations table"""
+    engine = create_engine(settings.database_url)
+
+    with engine.connect() as conn:
+        # Check if table already exists
+        result = conn.execute(text("""
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_schema = 'public' AND table_name = 'startup_revalidations'
+        """))
+
+        if result.fetchone():
+            print("✅ Tabela 'startup_revalidations' já existe")
+            return
+
+        conn.execute(text("""
+            CREATE TABLE startup_revalidations (
+                id SERIAL PRIMARY KEY,
+                startup_id INTEGER NOT NULL UNIQUE REFERENCES startups(id) ON DELETE CASCADE,
+                run_id INTEGER REFERENCES agent_tasks(id),
+                status VARCHAR(50),
+                confidence_score FLOAT,
+                company_active BOOLEAN,
+                flagged BOOLEAN DEFAULT FALSE,
+                issues JSON,
+                tokens_used INTEGER DEFAULT 0,
+                validated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+            )
+        """))
+        conn.execute(text("CREATE INDEX ix_startup_revalidations_run_id ON startup_revalidations (run_id)"))
+        conn.execute(text("CREATE INDEX ix_startup_revalidations_validated_at ON startup_revalidations (validated_at)"))
+
+        conn.commit()
+        print("✅ Tabela 'startup_revalidations' criada")
+
+if __name__ == "__main__":
+    try:
+        add_startup_revalidations_table()
+        print("🎉 Migração concluída com sucesso!")
+    except Exception as e:
+        print(f"❌ Erro na migração: {e}")
+        sys.exit(1)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Migration script to add task_results table and result_digest field to agent_tasks
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from config import settings
+
+def add_task_results_table():
+    """Add task_results table (compressed result store) and agent_tasks.result_digest"""
+    engine = create_engine(settings.database_url)
+
+    with engine.connect() as conn:
+        # Check if table already exists
+        result = conn.execute(text("""
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_schema = 'public' AND table_name = 'task_results'
+        """))
+
+        if not result.fetchone():
+            conn.execute(text("""
+                CREATE TABLE task_results (
+                    digest VARCHAR(64) PRIMARY KEY,
+                    encoding VARCHAR(20) NOT NULL DEFAULT 'json+zlib',
+                    payload BYTEA NOT NULL,
+                    raw_size INTEGER,
+                    compressed_size INTEGER,
+                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+                )
+            """))
+            print("✅ Tabela 'task_results' criada")
+        else:
+            print("✅ Tabela 'task_results' já existe")
+
+        # Check if result_digest column already exists
+        result = conn.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'agent_tasks' AND column_name = 'result_digest'
+        """))
+
+        if not result.fetchone():
+            conn.execute(text("""
+                ALTER TABLE agent_tasks
+                ADD COLUMN result_digest VARCHAR(64) REFERENCES task_results(digest)
+            """))
+            print("✅ Campo 'result_digest' adicionado à tabela agent_tasks")
+        else:
+            print("✅ Campo 'result_digest' já existe na tabela agent_tasks")
+
+        conn.commit()
+        print("✅ Transação commitada")
+
+if __name__ == "__main__":
+    try:
+        add_task_results_table()
+        print("🎉 Migração concluída com sucesso!")
+    except Exception as e:
+        print(f"❌ Erro na migração: {e}")
+        sys.exit(1)
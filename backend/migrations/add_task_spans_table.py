@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Migration script to add task_spans table (per-run tracing spans of orchestrations)
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from config import settings
+
+def add_task_spans_table():
+    """Add task_spans table"""
+    engine = create_engine(settings.database_url)
+
+    with engine.connect() as conn:
+        # Check if table already exists
+        result = conn.execute(text("""
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_schema = 'public' AND table_name = 'task_spans'
+        """))
+
+        if result.fetchone():
+            print("✅ Tabela 'task_spans' já existe")
+            return
+
+        conn.execute(text("""
+            CREATE TABLE task_spans (
+                id SERIAL PRIMARY KEY,
+                agent_task_id INTEGER NOT NULL REFERENCES agent_tasks(id) ON DELETE CASCADE,
+                trace_id VARCHAR(32) NOT NULL,
+                span_id VARCHAR(16) NOT NULL,
+                parent_span_id VARCHAR(16),
+                name VARCHAR(255) NOT NULL,
+                kind VARCHAR(20),
+                status VARCHAR(20),
+                start_time TIMESTAMP WITH TIME ZONE NOT NULL,
+                offset_ms DOUBLE PRECISION,
+                duration_ms DOUBLE PRECISION,
+                attributes JSON,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+            )
+        """))
+        conn.execute(text("CREATE INDEX ix_task_spans_agent_task_id ON task_spans (agent_task_id)"))
+        conn.execute(text("CREATE INDEX ix_task_spans_trace_id ON task_spans (trace_id)"))
+
+        conn.commit()
+        print("✅ Tabela 'task_spans' criada")
+
+if __name__ == "__main__":
+    try:
+        add_task_spans_table()
+        print("🎉 Migração concluída com sucesso!")
+    except Exception as e:
+        print(f"❌ Erro na migração: {e}")
+        sys.exit(1)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Migration script to add token_ledger table (per-call LLM token usage for daily budgets)
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from config import settings
+
+def add_token_ledger_table():
+    """Add token_ledger table"""
+    engine = create_engine(settings.database_url)
+
+    with engine.connect() as conn:
+        # Check if table already exists
+        result = conn.execute(text("""
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_schema = 'public' AND table_name = 'token_ledger'
+        """))
+
+        if result.fetchone():
+            print("✅ Tabela 'token_ledger' já existe")
+            return
+
+        conn.execute(text("""
+            CREATE TABLE token_ledger (
+                id SERIAL PRIMARY KEY,
+                agent_task_id INTEGER REFERENCES agent_tasks(id) ON DELETE SET NULL,
+                scheduled_job_id INTEGER REFERENCES scheduled_jobs(id) ON DELETE SET NULL,
+                node VARCHAR(50),
+                model VARCHAR(100),
+                call_type VARCHAR(50),
+                prompt_tokens INTEGER DEFAULT 0,
+                completion_tokens INTEGER DEFAULT 0,
+                total_tokens INTEGER DEFAULT 0,
+                cost_usd DOUBLE PRECISION DEFAULT 0,
+                created_at TIMESTAMP WITH TIME ZONE NOT NULL
+            )
+        """))
+        conn.execute(text("CREATE INDEX ix_token_ledger_agent_task_id ON token_ledger (agent_task_id)"))
+        conn.execute(text("CREATE INDEX ix_token_ledger_scheduled_job_id ON token_ledger (scheduled_job_id)"))
+        conn.execute(text("CREATE INDEX ix_token_ledger_created_at ON token_ledger (created_at)"))
+
+        conn.commit()
+        print("✅ Tabela 'token_ledger' criada")
+
+if __name__ == "__main__":
+    try:
+        add_token_ledger_table()
+        print("🎉 Migração concluída com sucesso!")
+    except Exception as e:
+        print(f"❌ Erro na migração: {e}")
+        sys.exit(1)
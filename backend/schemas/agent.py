@@ -9,6 +9,7 @@ class AgentTaskRequest(BaseModel):
     from_worker: bool = False
     job_id: Optional[int] = None
     search_strategy: str = "specific"
+    time_budget_seconds: Optional[int] = None  # Padrão: ORCHESTRATION_TIME_BUDGET
 
 class AgentTaskResponse(BaseModel):
     task_id: int
@@ -35,6 +36,9 @@ class TaskConfig(BaseModel):
     country: Optional[str] = None  # "Brazil", "America Latina", None para busca global
     sector: Optional[str] = None   # Setor específico ou None para busca por demanda
     limit: int = 10               # Limite de startups
+    daily_token_budget: Optional[int] = None        # Orçamento diário (UTC) do job em tokens
+    daily_cost_budget_usd: Optional[float] = None   # Orçamento diário (UTC) do job em USD
+    max_instances: Optional[int] = None             # Execuções simultâneas (fila + rodando); padrão SCHEDULER_MAX_INSTANCES
 
 class ScheduledJobCreate(BaseModel):
     name: str
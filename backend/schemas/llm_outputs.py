@@ -0,0 +1,111 @@
+from pydantic import BaseModel, ConfigDict, field_validator
+from typing import List, Optional, Literal
+
+
+class LLMOutput(BaseModel):
+    """Base dos formatos de resposta do LLM
+
+    O schema enviado à API é estrito; no parse, campos extras são apenas ignorados.
+    """
+    model_config = ConfigDict(extra="ignore")
+
+
+# =============================================================================
+# Discovery
+# =============================================================================
+
+class StartupSources(LLMOutput):
+    funding: List[str]
+    validation: List[str]
+
+
+class DiscoveredStartup(LLMOutput):
+    name: str
+    website: Optional[str]
+    sector: str
+    ai_technologies: List[str]
+    founded_year: Optional[int]
+    last_funding_amount: Optional[float]
+    investor_names: List[str]
+    country: str
+    city: Optional[str]
+    description: str
+    has_venture_capital: bool
+    funding_round: Optional[str]
+    funding_date: Optional[str]
+    sources: StartupSources
+
+
+class DiscoveryOutput(LLMOutput):
+    startups: List[DiscoveredStartup]
+
+
+class DiscoveryShard(LLMOutput):
+    country: str
+    sector: str
+    rationale: str
+
+
+class DiscoveryPlanOutput(LLMOutput):
+    shards: List[DiscoveryShard]
+
+
+# =============================================================================
+# Métricas
+# =============================================================================
+
+class MetricsReasoning(LLMOutput):
+    market: str
+    technical: str
+    partnership: str
+
+
+class StartupMetricsOutput(LLMOutput):
+    market_demand_score: float
+    technical_level_score: float
+    partnership_potential_score: float
+    total_score: float
+    reasoning: MetricsReasoning
+
+    @field_validator("market_demand_score", "technical_level_score", "partnership_potential_score", "total_score")
+    @classmethod
+    def clamp_score(cls, v):
+        """Scores fora de 0-100 são ajustados em vez de descartar a resposta inteira"""
+        return max(0.0, min(100.0, v))
+
+
+# =============================================================================
+# Insight de validação
+# =============================================================================
+
+class InsightAnalysis(LLMOutput):
+    website_analysis: str
+    funding_analysis: str
+    existence_analysis: str
+    data_quality: str
+
+
+class ValidationInsightOutput(LLMOutput):
+    insight: str
+    confidence: float
+    main_issues: List[str]
+    potential_fixes: List[str]
+    recommendation: Literal["REJECT", "INVESTIGATE", "MANUAL_REVIEW"]
+    analysis: InsightAnalysis
+
+
+# =============================================================================
+# Validação de startup (StartupValidationAgent)
+# =============================================================================
+
+class StartupValidationOutput(LLMOutput):
+    validation_status: Literal["valid", "suspicious", "invalid"]
+    confidence_score: float
+    issues_found: List[str]
+    verified_website: Optional[str]
+    funding_verified: bool
+    company_active: bool
+    web_search_used: bool
+    technology_validation: Literal["valid", "invalid"]
+    sector_validation: Literal["valid", "invalid"]
+    recommendations: List[str]
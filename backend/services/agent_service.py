@@ -1,7 +1,14 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
 from database import models
+from agents.scoring_engine import METRICS_ANALYSIS_VERSION, inputs_fingerprint
 from typing import Dict, Any, Optional, List
-from datetime import datetime
+from datetime import datetime, timedelta
+import os
+
+# Startups inválidas usadas no contexto de exclusão: só as recentes (invalid_startups não guarda país)
+DISCOVERY_INVALID_CONTEXT_DAYS = int(os.getenv("DISCOVERY_INVALID_CONTEXT_DAYS", "180"))
+DISCOVERY_INVALID_CONTEXT_LIMIT = int(os.getenv("DISCOVERY_INVALID_CONTEXT_LIMIT", "2000"))
 
 class AgentService:
     def __init__(self, db: Session):
@@ -25,13 +32,16 @@ class AgentService:
         task_id: int,
         status: str,
         output_data: Optional[Dict] = None,
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        result_digest: Optional[str] = None
     ):
         task = self.db.query(models.AgentTask).filter(models.AgentTask.id == task_id).first()
         if task:
             task.status = status
             if output_data:
                 task.output_data = output_data
+            if result_digest:
+                task.result_digest = result_digest
             if error_message:
                 task.error_message = error_message
             if status in ["completed", "failed"]:
@@ -139,39 +149,84 @@ class AgentService:
         return analysis
 
     def get_valid_startups_for_context(self, country: str, sector: str = None) -> List[Dict]:
-        """Busca startups válidas para contexto de exclusão"""
-        query = self.db.query(models.Startup).filter(models.Startup.country == country)
+        """Busca startups válidas para contexto de exclusão (apenas colunas usadas no ranking)"""
+        query = self.db.query(
+            models.Startup.name,
+            models.Startup.website,
+            models.Startup.sector,
+            models.Startup.last_funding_amount,
+            models.Startup.created_at
+        ).filter(models.Startup.country == country)
 
         if sector:
             query = query.filter(models.Startup.sector == sector)
 
-        startups = query.all()
-        return [{"name": s.name, "website": s.website} for s in startups]
+        return [
+            {
+                "name": s.name,
+                "website": s.website,
+                "sector": s.sector,
+                "last_funding_amount": s.last_funding_amount,
+                "created_at": s.created_at.isoformat() if s.created_at else None
+            }
+            for s in query.all()
+        ]
 
     def get_invalid_startups_for_context(self, country: str, sector: str = None) -> List[Dict]:
-        """Busca startups inválidas para contexto de exclusão"""
-        # Por enquanto retorna lista vazia, será implementado quando a tabela estiver criada
-        return []
+        """Busca startups inválidas para contexto de exclusão
+
+        invalid_startups não guarda país: a busca é limitada às mais recentes
+        (DISCOVERY_INVALID_CONTEXT_DAYS / DISCOVERY_INVALID_CONTEXT_LIMIT) para não crescer com a tabela.
+        """
+        cutoff = datetime.now() - timedelta(days=DISCOVERY_INVALID_CONTEXT_DAYS)
+        query = self.db.query(
+            models.InvalidStartup.name,
+            models.InvalidStartup.website,
+            models.InvalidStartup.sector,
+            models.InvalidStartup.created_at
+        ).filter(models.InvalidStartup.created_at >= cutoff)
+
+        if sector:
+            query = query.filter(models.InvalidStartup.sector == sector)
+
+        query = query.order_by(models.InvalidStartup.created_at.desc()).limit(DISCOVERY_INVALID_CONTEXT_LIMIT)
+
+        return [
+            {
+                "name": s.name,
+                "website": s.website,
+                "sector": s.sector,
+                "created_at": s.created_at.isoformat() if s.created_at else None
+            }
+            for s in query.all()
+        ]
 
-    def save_startup_metrics(self, startup_id: int, metrics_data: Dict) -> models.StartupMetrics:
-        """Salva métricas de uma startup"""
+    def save_startup_metrics(self, startup_id: int, metrics_data: Dict, startup: models.Startup = None,
+                             commit: bool = True) -> models.StartupMetrics:
+        """Salva métricas de uma startup (atualiza a linha existente em vez de apagar e inserir)"""
+        if startup is None:
+            startup = self.db.query(models.Startup).filter(models.Startup.id == startup_id).first()
 
-        # Remove métricas antigas se existirem
-        self.db.query(models.StartupMetrics).filter(
+        metrics = self.db.query(models.StartupMetrics).filter(
             models.StartupMetrics.startup_id == startup_id
-        ).delete()
+        ).order_by(models.StartupMetrics.id).first()
 
-        metrics = models.StartupMetrics(
-            startup_id=startup_id,
-            market_demand_score=metrics_data.get("market_demand_score", 0),
-            technical_level_score=metrics_data.get("technical_level_score", 0),
-            partnership_potential_score=metrics_data.get("partnership_potential_score", 0),
-            total_score=metrics_data.get("total_score", 0)
-        )
+        if metrics is None:
+            metrics = models.StartupMetrics(startup_id=startup_id)
+            self.db.add(metrics)
+        else:
+            metrics.analysis_date = func.now()
 
-        self.db.add(metrics)
-        self.db.commit()
-        self.db.refresh(metrics)
+        metrics.market_demand_score = metrics_data.get("market_demand_score", 0)
+        metrics.technical_level_score = metrics_data.get("technical_level_score", 0)
+        metrics.partnership_potential_score = metrics_data.get("partnership_potential_score", 0)
+        metrics.total_score = metrics_data.get("total_score", 0)
+        metrics.analysis_version = metrics_data.get("scoring_engine") or METRICS_ANALYSIS_VERSION
+        metrics.inputs_fingerprint = inputs_fingerprint(startup) if startup is not None else None
+
+        if commit:
+            self.db.commit()
+            self.db.refresh(metrics)
         return metrics
 
     def save_invalid_startup(self, invalid_data: Dict) -> models.InvalidStartup:
@@ -0,0 +1,36 @@
+from sqlalchemy.orm import Session
+from database.models import RunCassette
+from agents.cassette import Cassette, CASSETTE_ENCODING
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CassetteStore:
+    """Cassettes de orquestração comprimidos no banco, um por agent_task_id"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def put(self, cassette: Cassette):
+        payload = cassette.to_bytes()
+        self.db.merge(RunCassette(
+            agent_task_id=cassette.agent_task_id,
+            encoding=CASSETTE_ENCODING,
+            payload=payload,
+            interaction_count=len(cassette.interactions),
+            compressed_size=len(payload)
+        ))
+        self.db.commit()
+        logger.info("Cassette da task %s gravado: %d chamadas, %d bytes",
+                    cassette.agent_task_id, len(cassette.interactions), len(payload))
+
+    def get_bytes(self, agent_task_id: int) -> Optional[bytes]:
+        row = self.db.query(RunCassette).filter(RunCassette.agent_task_id == agent_task_id).first()
+        return row.payload if row else None
+
+    def get(self, agent_task_id: int, pace: bool = False, strict: bool = False) -> Optional[Cassette]:
+        """Cassette pronto para replay"""
+        payload = self.get_bytes(agent_task_id)
+        return Cassette.from_bytes(payload, pace=pace, strict=strict) if payload is not None else None
@@ -0,0 +1,138 @@
+from typing import Any, Dict, Optional
+from collections import Counter, deque
+import asyncio
+import os
+import sys
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Mede o atraso do event loop (rotas async def que fazem I/O síncrono bloqueiam todas as outras)
+LOOP_LAG_MONITOR = os.getenv("LOOP_LAG_MONITOR", "false").lower() == "true"
+
+# Intervalo do tick e atraso a partir do qual o bloqueio é registrado com o trecho de código culpado
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "50"))
+LOOP_LAG_STALL_MS = float(os.getenv("LOOP_LAG_STALL_MS", "100"))
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopLagMonitor:
+    """Tick periódico no event loop + watchdog em thread separada
+
+    O tick mede quanto cada sleep atrasou (lag). O watchdog percebe quando o tick não volta
+    a tempo e registra qual linha do código da aplicação está segurando o loop naquele momento.
+    """
+
+    def __init__(self, interval_ms: float = LOOP_LAG_INTERVAL_MS, stall_ms: float = LOOP_LAG_STALL_MS):
+        self.interval = interval_ms / 1000
+        self.stall = stall_ms / 1000
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_tick = time.monotonic()
+        self._reported_tick = 0.0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._samples: deque = deque(maxlen=20000)
+            self._ticks = 0
+            self._stalls = 0
+            self._blocked = 0.0
+            self._max = 0.0
+            self._culprits: Counter = Counter()
+            self._since = time.time()
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._last_tick = time.monotonic()
+        self._task = loop.create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info("Monitor de event loop ativo (tick %.0f ms, bloqueio a partir de %.0f ms)",
+                    self.interval * 1000, self.stall * 1000)
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _tick(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_tick = now
+            lag = max(now - started - self.interval, 0.0)
+            with self._lock:
+                self._ticks += 1
+                self._samples.append(lag)
+                self._max = max(self._max, lag)
+                if lag >= self.stall:
+                    self._stalls += 1
+                    self._blocked += lag
+            if lag >= self.stall:
+                logger.warning("Event loop bloqueado por %.0f ms", lag * 1000)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            last_tick = self._last_tick
+            if time.monotonic() - last_tick < self.stall + self.interval or self._reported_tick == last_tick:
+                continue
+            # Um registro por bloqueio: a pilha capturada enquanto o loop ainda está preso
+            self._reported_tick = last_tick
+            culprit = self._culprit()
+            if culprit:
+                with self._lock:
+                    self._culprits[culprit] += 1
+
+    def _culprit(self) -> Optional[str]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        # Primeiro frame (de dentro para fora) que pertence ao código da aplicação
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename.startswith(_BACKEND_DIR) and "site-packages" not in filename and filename != __file__:
+                return f"{os.path.relpath(filename, _BACKEND_DIR)}:{frame.f_lineno} {frame.f_code.co_name}"
+            frame = frame.f_back
+        return None
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Any]:
+        """Estatísticas do lag desde o último reset (ms)"""
+        with self._lock:
+            samples = sorted(self._samples)
+            elapsed = time.time() - self._since
+
+            def percentile(fraction: float) -> float:
+                return samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1000 if samples else 0.0
+
+            data = {
+                "enabled": self._task is not None,
+                "window_seconds": round(elapsed, 1),
+                "ticks": self._ticks,
+                "lag_ms": {
+                    "mean": round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0,
+                    "p50": round(percentile(0.5), 2),
+                    "p99": round(percentile(0.99), 2),
+                    "max": round(self._max * 1000, 2)
+                },
+                "stalls": self._stalls,
+                "stall_threshold_ms": self.stall * 1000,
+                "blocked_ms": round(self._blocked * 1000, 1),
+                "blocked_fraction": round(self._blocked / elapsed, 4) if elapsed else 0.0,
+                "culprits": [{"location": location, "count": count}
+                             for location, count in self._culprits.most_common(10)]
+            }
+        if reset:
+            self.reset()
+        return data
+
+
+loop_monitor = LoopLagMonitor()
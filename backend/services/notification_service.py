@@ -5,6 +5,7 @@ from database.models import Notification
 from datetime import datetime
 import json
 import logging
+from instrumentation import WEBSOCKET_CONNECTIONS, WEBSOCKET_OPENED
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +16,7 @@ class NotificationService:
     def add_websocket_connection(self, websocket):
         """Adiciona uma conexão WebSocket"""
         self.websocket_connections.append(websocket)
+        WEBSOCKET_OPENED.inc()
         logger.info(f"Nova conexão WebSocket adicionada. Total: {len(self.websocket_connections)}")
 
     def remove_websocket_connection(self, websocket):
@@ -175,4 +177,5 @@ class NotificationService:
             db.close()
 
 # Instância global do serviço de notificações
-notification_service = NotificationService()
\ No newline at end of file
+notification_service = NotificationService()
+WEBSOCKET_CONNECTIONS.set_function(lambda: len(notification_service.websocket_connections))
\ No newline at end of file
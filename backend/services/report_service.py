@@ -25,7 +25,12 @@ class ReportService:
         """
         # Buscar startups com base nos filtros
         startups = self._get_filtered_startups(sectors, technologies, countries, max_startups, sort_by, sort_order, start_date, end_date)
+        return self.build_workbook(startups)
 
+    def build_workbook(self, startups: List[Startup]) -> bytes:
+        """
+        Monta o XLSX a partir das startups já carregadas (sem acesso ao banco)
+        """
         # Criar workbook
         wb = Workbook()
         ws = wb.active
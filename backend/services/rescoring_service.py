@@ -0,0 +1,145 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
+import logging
+import os
+from sqlalchemy.orm import Session, selectinload
+from database import models
+from services.agent_service import AgentService
+from agents import scoring_engine, tracing
+from agents.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+# Linhas lidas por vez da tabela startups (keyset por id)
+RESCORING_BATCH_SIZE = int(os.getenv("RESCORING_BATCH_SIZE", "200"))
+
+# Chamadas simultâneas ao LLM no modo "llm"
+RESCORING_CONCURRENCY = int(os.getenv("RESCORING_CONCURRENCY", "4"))
+
+# "llm" (mesma análise do pipeline) ou "local" (scoring engine vetorizado, sem custo de tokens)
+RESCORING_ENGINE = os.getenv("RESCORING_ENGINE", "llm")
+
+
+def _startup_dict(startup: models.Startup) -> Dict[str, Any]:
+    """Campos que o prompt de métricas usa, no formato dos dicts do pipeline"""
+    return {
+        "name": startup.name,
+        "sector": startup.sector,
+        "ai_technologies": startup.ai_technologies or [],
+        "last_funding_amount": startup.last_funding_amount,
+        "investor_names": startup.investor_names or [],
+        "country": startup.country,
+        "city": startup.city,
+    }
+
+
+class RescoringService:
+    """Re-pontua startups já salvas cujos dados de entrada ou versão de análise mudaram"""
+
+    def __init__(self, db: Session, engine: str = None, batch_size: int = None,
+                 concurrency: int = None, force: bool = False, orchestrator=None):
+        self.db = db
+        self.engine = (engine or RESCORING_ENGINE).lower()
+        if self.engine not in ("llm", "local"):
+            raise ValueError(f"Engine de re-scoring inválido: {self.engine}")
+        self.batch_size = max(1, batch_size or RESCORING_BATCH_SIZE)
+        self.concurrency = max(1, concurrency or RESCORING_CONCURRENCY)
+        self.force = force
+        self.target_version = (
+            scoring_engine.METRICS_ANALYSIS_VERSION if self.engine == "llm" else scoring_engine.SCORING_ENGINE_VERSION
+        )
+        self.service = AgentService(db)
+        self._orchestrator = orchestrator
+
+    @property
+    def orchestrator(self):
+        if self._orchestrator is None:
+            from agents.orchestrator import get_orchestrator
+            self._orchestrator = get_orchestrator()
+        return self._orchestrator
+
+    def iter_batches(self) -> Iterator[List[models.Startup]]:
+        """Percorre a tabela em lotes ordenados por id, sem carregar tudo em memória"""
+        last_id = 0
+        while True:
+            batch = (
+                self.db.query(models.Startup)
+                .options(selectinload(models.Startup.metrics))
+                .filter(models.Startup.id > last_id)
+                .order_by(models.Startup.id)
+                .limit(self.batch_size)
+                .all()
+            )
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1].id
+            self._release_batch()
+
+    def _release_batch(self):
+        """Libera da identity map as startups/métricas do lote (a sessão é do chamador: a task e o log ficam)"""
+        for instance in list(self.db.identity_map.values()):
+            if isinstance(instance, (models.Startup, models.StartupMetrics)) and instance in self.db:
+                self.db.expunge(instance)
+
+    def needs_rescoring(self, startup: models.Startup) -> bool:
+        """Sem métricas, fingerprint diferente ou versão de análise diferente da atual
+
+        No modo "local" a análise do LLM é mantida enquanto os dados de entrada não mudarem:
+        trocar de versão ali seria rebaixar o score, não atualizá-lo.
+        """
+        if self.force or not startup.metrics:
+            return True
+        metrics = startup.metrics[0]
+        fingerprint_changed = metrics.inputs_fingerprint != scoring_engine.inputs_fingerprint(startup)
+        if self.engine == "local" and metrics.analysis_version != self.target_version:
+            return fingerprint_changed
+        return metrics.analysis_version != self.target_version or fingerprint_changed
+
+    def _score(self, startups: List[models.Startup], deadline: Optional[Deadline]) -> List[Dict[str, Any]]:
+        if self.engine == "local":
+            return scoring_engine.score_startups(startups, note="Re-scoring em lote (scoring local)")
+
+        records = [_startup_dict(s) for s in startups]
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(records))) as executor:
+            return list(executor.map(tracing.propagate(lambda r: self.orchestrator.calculate_metrics(r, deadline)), records))
+
+    def run(self, time_budget: float = None) -> Dict[str, Any]:
+        """Executa o re-scoring e retorna contadores (scanned/rescored/skipped/failed)"""
+        deadline = Deadline.from_budget(time_budget) if time_budget else None
+        stats = {"engine": self.engine, "version": self.target_version,
+                 "scanned": 0, "rescored": 0, "skipped": 0, "failed": 0, "timed_out": False}
+
+        for batch in self.iter_batches():
+            if deadline is not None and deadline.expired:
+                stats["timed_out"] = True
+                logger.warning("Re-scoring interrompido pelo time budget após %d startups", stats["scanned"])
+                break
+
+            stale = [s for s in batch if self.needs_rescoring(s)]
+            stats["scanned"] += len(batch)
+            stats["skipped"] += len(batch) - len(stale)
+            if not stale:
+                continue
+
+            for startup, metrics in zip(stale, self._score(stale, deadline)):
+                if metrics.get("error"):
+                    # Falha do LLM: as métricas atuais ficam como estão e a startup volta no próximo run
+                    stats["failed"] += 1
+                    logger.warning("Re-scoring de %s falhou, métricas mantidas: %s", startup.name, metrics["error"])
+                    continue
+                try:
+                    # Savepoint por linha: uma falha não descarta o resto do lote
+                    with self.db.begin_nested():
+                        self.service.save_startup_metrics(startup.id, metrics, startup=startup, commit=False)
+                    stats["rescored"] += 1
+                except Exception as e:
+                    stats["failed"] += 1
+                    logger.error("Erro ao salvar métricas de %s: %s", startup.name, e)
+
+            # Um commit por lote
+            self.db.commit()
+            logger.info("Re-scoring: %d/%d startups do lote atualizadas (total %d)",
+                        len(stale), len(batch), stats["rescored"])
+
+        return stats
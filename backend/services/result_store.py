@@ -0,0 +1,79 @@
+from sqlalchemy.orm import Session
+from database.models import TaskResult
+from typing import Dict, Any, Optional
+import hashlib
+import json
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+RESULT_ENCODING = "json+zlib"
+COMPRESSION_LEVEL = 6
+MAX_SUMMARY_ERRORS = 10
+
+
+class ResultStore:
+    """Armazena resultados completos de orquestração comprimidos e endereçados por conteúdo"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def put(self, result: Dict[str, Any]) -> str:
+        """Salva o resultado (se ainda não existir) e retorna o digest que o referencia"""
+        raw = json.dumps(result, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+
+        # Conteúdo idêntico já armazenado - apenas reutilizar a referência
+        exists = self.db.query(TaskResult.digest).filter(TaskResult.digest == digest).first()
+        if exists:
+            return digest
+
+        payload = zlib.compress(raw, COMPRESSION_LEVEL)
+        self.db.add(TaskResult(
+            digest=digest,
+            encoding=RESULT_ENCODING,
+            payload=payload,
+            raw_size=len(raw),
+            compressed_size=len(payload)
+        ))
+        self.db.commit()
+
+        logger.info("Resultado %s armazenado: %s -> %s bytes", digest[:12], len(raw), len(payload))
+        return digest
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Carrega e descomprime um resultado pelo digest"""
+        blob = self.db.query(TaskResult).filter(TaskResult.digest == digest).first()
+        if not blob:
+            return None
+
+        return json.loads(zlib.decompress(blob.payload).decode("utf-8"))
+
+
+def build_result_summary(result: Dict[str, Any], digest: Optional[str] = None) -> Dict[str, Any]:
+    """Resumo pequeno do resultado de orquestração para gravar em agent_tasks.output_data"""
+    results = result.get("results", {})
+    errors = result.get("errors", [])
+
+    summary = {
+        "status": result.get("status"),
+        "total_tokens": result.get("tokens_used", 0),
+        "token_usage": result.get("token_usage", {}),
+        "execution_time": result.get("processing_time", 0),
+        "discovered_count": results.get("discovered_count", 0),
+        "validated_count": results.get("validated_count", 0),
+        "startup_count": len(results.get("startup_metrics", [])),
+        "invalid_count": len(results.get("invalid_startups", [])),
+        "excluded_count": results.get("excluded_count", 0),
+        "result_digest": digest
+    }
+
+    if result.get("error"):
+        summary["error"] = result["error"]
+
+    if errors:
+        summary["errors"] = errors[:MAX_SUMMARY_ERRORS]
+        summary["errors_total"] = len(errors)
+
+    return summary
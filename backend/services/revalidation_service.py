@@ -0,0 +1,201 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Callable, List, Optional, Tuple
+import logging
+import os
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy.sql import func
+from database import models
+from agents import tracing
+from services.task_heartbeat import task_heartbeat, claim_task
+
+logger = logging.getLogger(__name__)
+
+# Startups re-validadas há menos que isso são puladas
+REVALIDATION_TTL_HOURS = float(os.getenv("REVALIDATION_TTL_HOURS", "168"))
+
+# Startups lidas por lote (progresso é gravado ao fim de cada lote)
+REVALIDATION_BATCH_SIZE = int(os.getenv("REVALIDATION_BATCH_SIZE", "50"))
+
+# Validações simultâneas (probe do website + LLM); a vazão real é controlada pelo rate limiter global
+REVALIDATION_WORKERS = int(os.getenv("REVALIDATION_WORKERS", "4"))
+
+# Abaixo dessa confiança a startup é marcada como candidata a remoção
+REVALIDATION_MIN_CONFIDENCE = float(os.getenv("REVALIDATION_MIN_CONFIDENCE", "0.3"))
+
+TASK_TYPE = "startup_revalidation"
+# "running" só é retomada quando órfã (sem batimento há TASK_STALE_SECONDS); ver claim_task
+_RESUMABLE_STATUSES = ("running", "interrupted")
+
+
+def startup_validation_data(startup: models.Startup) -> Dict[str, Any]:
+    """Converte o modelo no formato esperado por StartupValidationAgent.validate_startup_info"""
+    return {
+        "name": startup.name,
+        "website": str(startup.website) if startup.website else None,
+        "sector": startup.sector or "",
+        "founded_year": startup.founded_year,
+        "country": startup.country,
+        "city": startup.city,
+        "description": startup.description,
+        "ai_technologies": startup.ai_technologies or [],
+        "last_funding_amount": startup.last_funding_amount or 0,
+        "investor_names": startup.investor_names or [],
+        "has_venture_capital": startup.has_venture_capital,
+        "sources": startup.sources if isinstance(startup.sources, dict) else {}
+    }
+
+
+def is_flagged(validation: Dict[str, Any]) -> bool:
+    """Inválida, empresa inativa ou confiança baixa (erros de validação não contam)"""
+    if validation.get("validation_status") == "error":
+        return False
+    return (
+        validation.get("validation_status") == "invalid" or
+        validation.get("company_active") is False or
+        (validation.get("confidence_score") or 0) < REVALIDATION_MIN_CONFIDENCE
+    )
+
+
+class RevalidationService:
+    """Re-valida startups salvas em lotes paralelos, com progresso persistido e retomada"""
+
+    def __init__(self, db: Session, ttl_hours: float = None, batch_size: int = None,
+                 workers: int = None, validator=None,
+                 on_progress: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.db = db
+        self.ttl_hours = REVALIDATION_TTL_HOURS if ttl_hours is None else float(ttl_hours)
+        self.batch_size = max(1, batch_size or REVALIDATION_BATCH_SIZE)
+        self.workers = max(1, workers or REVALIDATION_WORKERS)
+        self.on_progress = on_progress
+        self._validator = validator
+
+    @property
+    def validator(self):
+        if self._validator is None:
+            from agents.validation_agent import StartupValidationAgent
+            self._validator = StartupValidationAgent()
+        return self._validator
+
+    def open_run(self, input_data: Dict[str, Any] = None, resume: bool = True) -> Tuple[models.AgentTask, bool]:
+        """Retoma a última execução interrompida (ou órfã) ou cria uma nova; retorna (agent_task, retomada)
+
+        Uma execução ainda viva em outro processo nunca é assumida: a retomada passa por um UPDATE
+        condicional, e só quem o vence continua o cursor.
+        """
+        if resume:
+            candidates = self.db.query(models.AgentTask.id).filter(
+                models.AgentTask.task_type == TASK_TYPE,
+                models.AgentTask.status.in_(_RESUMABLE_STATUSES)
+            ).order_by(models.AgentTask.id.desc()).all()
+            for candidate in candidates:
+                if not claim_task(self.db, candidate.id, _RESUMABLE_STATUSES):
+                    continue
+                previous = self.db.query(models.AgentTask).filter(models.AgentTask.id == candidate.id).one()
+                self.db.refresh(previous)
+                logger.info("Retomando re-validação #%d a partir da startup %s",
+                            previous.id, (previous.output_data or {}).get("last_startup_id", 0))
+                return previous, True
+
+        task = models.AgentTask(
+            task_type=TASK_TYPE,
+            status="running",
+            agent_name="revalidation",
+            input_data=input_data or {},
+            output_data=self._empty_progress(),
+            started_at=datetime.now()
+        )
+        self.db.add(task)
+        self.db.commit()
+        self.db.refresh(task)
+        return task, False
+
+    def _empty_progress(self) -> Dict[str, Any]:
+        total = self.db.query(func.count(models.Startup.id)).scalar() or 0
+        return {"total": total, "processed": 0, "skipped": 0, "valid": 0, "suspicious": 0,
+                "invalid": 0, "errors": 0, "flagged": 0, "tokens_used": 0, "last_startup_id": 0}
+
+    def _next_batch(self, after_id: int, cutoff: datetime) -> List[Tuple[models.Startup, bool]]:
+        """Próximo lote por id com a flag "ainda dentro do TTL" calculada no banco"""
+        fresh = (
+            (models.StartupRevalidation.validated_at >= cutoff) &
+            (models.StartupRevalidation.status != "error")
+        ).label("fresh")
+        rows = (
+            self.db.query(models.Startup, fresh)
+            .outerjoin(models.StartupRevalidation, models.StartupRevalidation.startup_id == models.Startup.id)
+            .options(contains_eager(models.Startup.revalidation))
+            .filter(models.Startup.id > after_id)
+            .order_by(models.Startup.id)
+            .limit(self.batch_size)
+            .all()
+        )
+        return [(startup, bool(is_fresh)) for startup, is_fresh in rows]
+
+    def _validate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return self.validator.validate_startup_info(payload)
+        except Exception as e:
+            # Erro em uma startup não interrompe o lote; ela volta a ser tentada na próxima execução
+            logger.error("Erro ao re-validar %s: %s", payload.get("name"), e)
+            return {"validation_status": "error", "confidence_score": 0.0,
+                    "issues_found": [{"field": "validation", "issue": str(e), "severity": "high"}], "tokens_used": 0}
+
+    def _save(self, run_id: int, startup: models.Startup, validation: Dict[str, Any]) -> bool:
+        record = startup.revalidation or models.StartupRevalidation(startup_id=startup.id)
+        flagged = is_flagged(validation)
+
+        record.run_id = run_id
+        record.status = validation.get("validation_status", "error")
+        record.confidence_score = validation.get("confidence_score", 0.0)
+        record.company_active = validation.get("company_active")
+        record.flagged = flagged
+        record.issues = validation.get("issues_found", [])
+        record.tokens_used = validation.get("tokens_used", 0)
+        record.validated_at = func.now()
+        self.db.add(record)
+        return flagged
+
+    def run(self, task: models.AgentTask) -> Dict[str, Any]:
+        """Processa a partir do cursor salvo em task.output_data até o fim da tabela"""
+        progress = {**self._empty_progress(), **(task.output_data or {})}
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=self.ttl_hours)
+
+        # Batimento enquanto roda (também fora do worker, ex: cleanup_db.py): outra execução não assume o cursor
+        with task_heartbeat.keep(task.id), ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                batch = self._next_batch(progress["last_startup_id"], cutoff)
+                if not batch:
+                    break
+
+                stale = [startup for startup, fresh in batch if not fresh]
+                progress["skipped"] += len(batch) - len(stale)
+
+                payloads = [startup_validation_data(s) for s in stale]
+                for startup, validation in zip(stale, executor.map(tracing.propagate(self._validate), payloads)):
+                    status = validation.get("validation_status", "error")
+                    progress[status if status in ("valid", "suspicious", "invalid") else "errors"] += 1
+                    progress["tokens_used"] += validation.get("tokens_used", 0)
+                    if self._save(task.id, startup, validation):
+                        progress["flagged"] += 1
+
+                progress["processed"] += len(batch)
+                progress["last_startup_id"] = batch[-1][0].id
+
+                # Cursor e resultados do lote no mesmo commit: uma interrupção retoma do último lote gravado
+                task.output_data = dict(progress)
+                self.db.commit()
+
+                logger.info("Re-validação #%d: %d/%d startups (%d puladas pelo TTL, %d marcadas)",
+                            task.id, progress["processed"], progress["total"], progress["skipped"], progress["flagged"])
+                if self.on_progress:
+                    self.on_progress(dict(progress))
+
+        return progress
+
+    def flagged_startups(self, run_id: int = None) -> List[models.StartupRevalidation]:
+        """Startups marcadas como candidatas a remoção (opcionalmente só de uma execução)"""
+        query = self.db.query(models.StartupRevalidation).filter(models.StartupRevalidation.flagged == True)
+        if run_id is not None:
+            query = query.filter(models.StartupRevalidation.run_id == run_id)
+        return query.order_by(models.StartupRevalidation.startup_id).all()
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+from typing import Optional
+import os
+import logging
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from database.connection import engine
+from database.models import ScheduledJob
+
+logger = logging.getLogger(__name__)
+
+# Só uma réplica (a que segura o advisory lock do Postgres) dispara os jobs agendados
+SCHEDULER_LEADER_ELECTION = os.getenv("SCHEDULER_LEADER_ELECTION", "true").lower() == "true"
+
+# Chave do advisory lock de liderança (compartilhada por todas as réplicas do mesmo banco)
+SCHEDULER_LEADER_LOCK_KEY = int(os.getenv("SCHEDULER_LEADER_LOCK_KEY", "727274001"))
+
+# Intervalo entre tentativas de assumir a liderança (e verificações de que ela continua válida)
+SCHEDULER_LEADER_CHECK_SECONDS = float(os.getenv("SCHEDULER_LEADER_CHECK_SECONDS", "15"))
+
+
+class LeaderLock:
+    """Liderança do scheduler via pg_try_advisory_lock numa conexão dedicada
+
+    O lock é de sessão: vale enquanto a conexão estiver aberta. Se o líder morrer (ou perder o
+    banco) o Postgres encerra a sessão, libera o lock e outra réplica assume na próxima tentativa.
+    Fora do Postgres (SQLite em desenvolvimento) não há advisory lock e o processo é sempre líder.
+    """
+
+    def __init__(self, key: int = SCHEDULER_LEADER_LOCK_KEY, enabled: bool = SCHEDULER_LEADER_ELECTION):
+        self.key = key
+        self.enabled = enabled and engine.dialect.name == "postgresql"
+        self._engine = None
+        self._connection: Optional[Connection] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return not self.enabled or self._connection is not None
+
+    def acquire(self) -> bool:
+        """Tenta assumir a liderança (não bloqueia); True se este processo é o líder"""
+        if self.is_leader:
+            return True
+
+        # Conexão fora do pool da aplicação: fica aberta enquanto este processo for o líder
+        self._engine = self._engine or create_engine(engine.url, poolclass=NullPool)
+        connection = self._engine.connect()
+        try:
+            acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}).scalar()
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+
+        self._connection = connection
+        logger.info("Liderança do scheduler assumida (advisory lock %d)", self.key)
+        return True
+
+    def check(self) -> bool:
+        """Confirma que a sessão que segura o lock continua viva; se caiu, a liderança foi perdida"""
+        if not self.enabled:
+            return True
+        if self._connection is None:
+            return False
+        try:
+            self._connection.execute(text("SELECT 1")).scalar()
+            self._connection.commit()
+            return True
+        except Exception as e:
+            logger.warning("Conexão do lock de liderança perdida: %s", e)
+            self._drop()
+            return False
+
+    def release(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            self._connection.commit()
+            logger.info("Liderança do scheduler liberada")
+        except Exception as e:
+            logger.warning("Falha ao liberar o lock de liderança (o Postgres libera ao fechar a sessão): %s", e)
+        finally:
+            self._drop()
+
+    def _drop(self):
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+
+def claim_fire(db: Session, job: ScheduledJob, interval_seconds: int, now: datetime = None) -> bool:
+    """Reserva atomicamente este disparo do job: só uma réplica/processo consegue por intervalo
+
+    O UPDATE condicional move next_run para o próximo intervalo; quem chegar depois encontra
+    next_run ainda longe (mais de meio intervalo à frente) e não executa. Protege a janela de
+    troca de líder e os bancos sem advisory lock.
+    """
+    now = now or datetime.now()
+    claimed = db.query(ScheduledJob).filter(
+        ScheduledJob.id == job.id,
+        (ScheduledJob.next_run == None) | (ScheduledJob.next_run <= now + timedelta(seconds=interval_seconds / 2))
+    ).update({ScheduledJob.next_run: now + timedelta(seconds=interval_seconds)}, synchronize_session=False)
+    db.commit()
+    db.refresh(job)
+    return claimed == 1
@@ -1,50 +1,141 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from datetime import datetime, timedelta
+from apscheduler.events import EVENT_JOB_SUBMITTED
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from database.connection import get_db
 from database.models import ScheduledJob, TaskLog, Notification, Startup
+from services.token_budget import budget_status, downgrade_config
+from services.scheduler_leader import LeaderLock, claim_fire, SCHEDULER_LEADER_CHECK_SECONDS
+from instrumentation import SCHEDULER_LAG
 # Imports removidos para evitar dependências circulares - serão importados localmente quando necessário
 import asyncio
 import logging
+import os
+import random
 
 logger = logging.getLogger(__name__)
 
+# Atraso aleatório (s) somado a cada disparo, limitado a 1/4 do intervalo do job
+SCHEDULER_JITTER_SECONDS = int(os.getenv("SCHEDULER_JITTER_SECONDS", "30"))
+
+# Na subida, jobs vencidos (ou sem next_run) disparam escalonados com este espaçamento em vez de todos juntos
+SCHEDULER_START_SPREAD_SECONDS = float(os.getenv("SCHEDULER_START_SPREAD_SECONDS", "60"))
+
+# Disparo atrasado além disso é descartado; disparos perdidos em sequência viram um só (coalesce)
+SCHEDULER_MISFIRE_GRACE_SECONDS = int(os.getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", "300"))
+
+# Execuções simultâneas (na fila ou rodando) por job; task_config.max_instances sobrescreve
+SCHEDULER_MAX_INSTANCES = int(os.getenv("SCHEDULER_MAX_INSTANCES", "1"))
+
 class SchedulerService:
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
+        self.scheduler.add_listener(self._on_job_submitted, EVENT_JOB_SUBMITTED)
+        self._job_types = {}
+        self._job_intervals = {}  # intervalo (s) com que cada job foi agendado, para detectar mudanças
+        self.leader = LeaderLock()
+        self._leadership_task = None
 
     def start(self):
-        """Inicia o scheduler e carrega os jobs existentes"""
+        """Inicia o scheduler; os jobs só são carregados na réplica que assumir a liderança"""
         if not self.scheduler.running:
             self.scheduler.start()
             logger.info("Scheduler iniciado")
 
-        # Carrega jobs existentes do banco
-        asyncio.create_task(self._load_existing_jobs())
+        if self._leadership_task is None:
+            self._leadership_task = asyncio.create_task(self._leadership_loop())
 
     def stop(self):
         """Para o scheduler"""
+        if self._leadership_task is not None:
+            self._leadership_task.cancel()
+            self._leadership_task = None
+        self.leader.release()
         if self.scheduler.running:
             self.scheduler.shutdown()
             logger.info("Scheduler parado")
 
+    @property
+    def is_leader(self) -> bool:
+        return self.leader.is_leader
+
+    async def _leadership_loop(self):
+        """Disputa a liderança periodicamente; o líder sincroniza os jobs com o banco a cada volta"""
+        while True:
+            try:
+                if self.leader.is_leader:
+                    if not await asyncio.to_thread(self.leader.check):
+                        self._step_down()
+                elif await asyncio.to_thread(self.leader.acquire):
+                    logger.info("Esta réplica é a líder do scheduler")
+
+                # Jobs criados/alterados em outras réplicas chegam ao líder por aqui
+                if self.leader.is_leader:
+                    await self._load_existing_jobs()
+
+                    # Orquestrações órfãs (réplica dona morreu ou reiniciou) são retomadas só pelo líder
+                    from services.task_manager import resume_interrupted_tasks
+                    await asyncio.to_thread(resume_interrupted_tasks)
+            except Exception as e:
+                logger.error(f"Erro na eleição de líder do scheduler: {e}")
+            await asyncio.sleep(SCHEDULER_LEADER_CHECK_SECONDS)
+
+    def _step_down(self):
+        """Perdeu a liderança: para de disparar (outra réplica assume os jobs)"""
+        self.scheduler.remove_all_jobs()
+        self._job_intervals.clear()
+        logger.warning("Liderança do scheduler perdida: jobs removidos desta réplica")
+
     async def _load_existing_jobs(self):
-        """Carrega jobs ativos do banco de dados"""
+        """Sincroniza o scheduler com os jobs ativos do banco (agenda novos/alterados, remove os inativos)"""
         db = next(get_db())
         try:
             jobs = db.query(ScheduledJob).filter(ScheduledJob.is_active == True).all()
-            for job in jobs:
-                await self._schedule_job(job)
-            logger.info(f"Carregados {len(jobs)} jobs ativos")
+            active = {str(job.id) for job in jobs}
+            changed = [job for job in jobs
+                       if self._job_intervals.get(str(job.id)) != self._get_interval_seconds(job)
+                       or not self.scheduler.get_job(str(job.id))]
+
+            # Vencidos (ex: após deploy/restart) disparam uma vez cada, escalonados do mais atrasado ao mais recente
+            now = datetime.now()
+            due = sorted((job for job in changed if self._planned_run(job) <= now), key=self._planned_run)
+            slots = {job.id: slot for slot, job in enumerate(due)}
+            for job in changed:
+                await self._schedule_job(job, start_slot=slots.get(job.id))
+            for scheduled in self.scheduler.get_jobs():
+                if scheduled.id not in active:
+                    self.scheduler.remove_job(scheduled.id)
+                    self._job_intervals.pop(scheduled.id, None)
+            if changed:
+                logger.info(f"Carregados {len(changed)} jobs ativos ({len(jobs)} no total)")
         except Exception as e:
             logger.error(f"Erro ao carregar jobs existentes: {e}")
         finally:
             db.close()
 
-    async def _schedule_job(self, job: ScheduledJob):
-        """Agenda um job específico"""
+    @staticmethod
+    def _planned_run(job: ScheduledJob) -> datetime:
+        """next_run do job como datetime local sem timezone (como o resto do scheduler grava)"""
+        if job.next_run is None:
+            return datetime.min
+        if job.next_run.tzinfo is not None:
+            return job.next_run.astimezone().replace(tzinfo=None)
+        return job.next_run
+
+    def _first_run_time(self, job: ScheduledJob, jitter: int, start_slot: int = None) -> datetime:
+        """Primeiro disparo: o next_run salvo ou, se já venceu, um único disparo de recuperação escalonado"""
+        now = datetime.now()
+        planned = self._planned_run(job)
+        if planned > now:
+            return planned
+        return now + timedelta(seconds=(start_slot or 0) * SCHEDULER_START_SPREAD_SECONDS + random.uniform(0, jitter))
+
+    async def _schedule_job(self, job: ScheduledJob, start_slot: int = None):
+        """Agenda um job específico (só no líder; as demais réplicas deixam para a sincronização dele)"""
+        if not self.leader.is_leader:
+            return
         try:
             # Converte unidade para segundos
             unit_to_seconds = {
@@ -62,13 +153,19 @@ class SchedulerService:
                 self.scheduler.remove_job(str(job.id))
 
             # Agenda o novo job
+            self._job_types[str(job.id)] = job.task_type
+            self._job_intervals[str(job.id)] = interval_seconds
+            jitter = min(SCHEDULER_JITTER_SECONDS, interval_seconds // 4)
             self.scheduler.add_job(
                 func=self._execute_job,
                 args=[job.id],
-                trigger=IntervalTrigger(seconds=interval_seconds),
+                trigger=IntervalTrigger(seconds=interval_seconds, jitter=jitter or None),
                 id=str(job.id),
                 name=job.name,
-                next_run_time=datetime.now() if job.next_run is None else job.next_run
+                next_run_time=self._first_run_time(job, jitter, start_slot),
+                misfire_grace_time=SCHEDULER_MISFIRE_GRACE_SECONDS,
+                coalesce=True,
+                max_instances=1
             )
 
             logger.info(f"Job '{job.name}' agendado para executar a cada {job.interval_value} {job.interval_unit}")
@@ -76,6 +173,13 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"Erro ao agendar job {job.id}: {e}")
 
+    def _on_job_submitted(self, event):
+        """Atraso entre o horário planejado e o disparo real de cada execução"""
+        now = datetime.now(timezone.utc)
+        task_type = self._job_types.get(event.job_id, "unknown")
+        for planned in event.scheduled_run_times:
+            SCHEDULER_LAG.labels(task_type).observe(max((now - planned).total_seconds(), 0.0))
+
     async def _execute_job(self, job_id: int):
         """Executa um job agendado"""
         db = next(get_db())
@@ -87,21 +191,49 @@ class SchedulerService:
             if not job or not job.is_active:
                 return
 
+            # Reserva o disparo: em troca de líder (ou sem advisory lock) só um processo executa
+            if not claim_fire(db, job, self._get_interval_seconds(job)):
+                logger.info(f"Job '{job.name}' já disparado por outra réplica neste intervalo")
+                return
+
+            # Execução anterior ainda na fila ou rodando: este disparo é pulado (o próximo tenta de novo)
+            from services.task_manager import task_manager
+            max_instances = (job.task_config or {}).get("max_instances") or SCHEDULER_MAX_INSTANCES
+            if task_manager.active_job_runs(job.id) >= max_instances:
+                self._skip_job(db, job, start_time, f"Execução pulada: {task_manager.active_job_runs(job.id)} "
+                                                    f"execução(ões) anterior(es) ainda na fila ou rodando")
+                return
+
+            # Orçamento diário de tokens (global e do job): perto do limite roda reduzido, esgotado adia
+            config = None
+            budget = budget_status(job)
+            if budget["action"] == "downgrade":
+                config = downgrade_config(job.task_type, dict(job.task_config or {}))
+            if budget["action"] == "defer" or (budget["action"] == "downgrade" and config is None):
+                self._defer_job(db, job, budget, start_time)
+                return
+            if config is not None:
+                logger.warning(f"Job '{job.name}' roda reduzido: {budget['used_fraction']:.0%} do orçamento "
+                               f"{budget['scope']} de tokens usado")
+
             logger.info(f"Iniciando execução do job: {job.name}")
 
             # Executa a tarefa baseada no tipo
             result = None
             if job.task_type == "startup_discovery":
-                result = await self._execute_startup_discovery_task(job_id)
+                result = await self._execute_startup_discovery_task(job_id, config)
             elif job.task_type == "newsletter":
-                result = await self._execute_newsletter_task(job_id)
+                result = await self._execute_newsletter_task(job_id, config)
+            elif job.task_type == "startup_rescoring":
+                result = await self._execute_rescoring_task(job_id, config)
+            elif job.task_type == "startup_revalidation":
+                result = await self._execute_revalidation_task(job_id, config)
 
             end_time = datetime.now()
             execution_time = (end_time - start_time).total_seconds()
 
-            # Atualiza job
+            # Atualiza job (next_run já avançou na reserva do disparo)
             job.last_run = end_time
-            job.next_run = end_time + timedelta(seconds=self._get_interval_seconds(job))
 
             db.commit()
 
@@ -124,7 +256,34 @@ class SchedulerService:
         finally:
             db.close()
 
-    async def _execute_startup_discovery_task(self, job_id: int):
+    def _defer_job(self, db: Session, job: ScheduledJob, budget: dict, now: datetime):
+        """Pula esta execução do job (orçamento de tokens esgotado) e registra o motivo"""
+        message = (f"Execução adiada: {budget['used_fraction']:.0%} do orçamento {budget['scope']} "
+                   f"diário de tokens usado")
+        self._skip_job(db, job, now, message, status="deferred")
+
+    def _skip_job(self, db: Session, job: ScheduledJob, now: datetime, message: str, status: str = "skipped"):
+        """Registra um disparo que não executou (log + notificação de aviso)"""
+        logger.warning(f"Job '{job.name}': {message}")
+
+        db.add(TaskLog(
+            task_name=job.name,
+            task_type=job.task_type,
+            status=status,
+            message=message,
+            scheduled_job_id=job.id,
+            started_at=now,
+            completed_at=now
+        ))
+        db.add(Notification(
+            title=f"{job.name} - " + ("Adiada" if status == "deferred" else "Pulada"),
+            message=message,
+            type="warning",
+            job_id=job.id
+        ))
+        db.commit()
+
+    async def _execute_startup_discovery_task(self, job_id: int, config: dict = None):
         """Executa tarefa de descoberta de startups"""
         try:
             # Busca configuração do job
@@ -133,8 +292,8 @@ class SchedulerService:
             if not job:
                 raise ValueError("Job não encontrado")
 
-            # Extrai parâmetros da configuração
-            config = job.task_config or {}
+            # Extrai parâmetros da configuração (ou da versão reduzida pelo orçamento de tokens)
+            config = config or job.task_config or {}
             country = config.get("country", "")
             sector = config.get("sector", "")
             limit = config.get("limit", 10)
@@ -153,8 +312,8 @@ class SchedulerService:
             from services.task_manager import task_manager, process_orchestration_task
 
             # Enfileira a tarefa no task manager com parâmetros configuráveis
-            task_manager.enqueue_task(
-                0,  # task_id temporário - será criado internamente
+            task_manager.enqueue_job_task(
+                job_id,
                 process_orchestration_task,
                 0,  # task_id temporário
                 country,
@@ -170,7 +329,43 @@ class SchedulerService:
         except Exception as e:
             raise e
 
-    async def _execute_newsletter_task(self, job_id: int):
+    async def _execute_rescoring_task(self, job_id: int, config: dict = None):
+        """Executa re-scoring em lote das startups existentes (só as que mudaram)"""
+        db = next(get_db())
+        try:
+            job = db.query(ScheduledJob).filter(ScheduledJob.id == job_id).first()
+            if not job:
+                raise ValueError("Job não encontrado")
+
+            # task_config: engine ("llm"/"local"), batch_size, concurrency, force, time_budget
+            config = dict(config or job.task_config or {})
+
+            from services.task_manager import task_manager, process_rescoring_task
+
+            task_manager.enqueue_job_task(job_id, process_rescoring_task, job_id, config)
+            return {"status": "success", "message": "Task enqueued"}
+        finally:
+            db.close()
+
+    async def _execute_revalidation_task(self, job_id: int, config: dict = None):
+        """Executa re-validação em lote das startups salvas (retomável, pula as validadas dentro do TTL)"""
+        db = next(get_db())
+        try:
+            job = db.query(ScheduledJob).filter(ScheduledJob.id == job_id).first()
+            if not job:
+                raise ValueError("Job não encontrado")
+
+            # task_config: ttl_hours, batch_size, workers, resume
+            config = dict(config or job.task_config or {})
+
+            from services.task_manager import task_manager, process_revalidation_task
+
+            task_manager.enqueue_job_task(job_id, process_revalidation_task, job_id, config)
+            return {"status": "success", "message": "Task enqueued"}
+        finally:
+            db.close()
+
+    async def _execute_newsletter_task(self, job_id: int, config: dict = None):
         """Executa tarefa de newsletter - chama descoberta E DEPOIS envia email com resultados"""
         try:
             # Busca configuração do job
@@ -179,13 +374,13 @@ class SchedulerService:
             if not job:
                 raise ValueError("Job não encontrado")
 
-            config = job.task_config or {}
+            config = config or job.task_config or {}
 
             # 1. Executa descoberta ASSÍNCRONA e aguarda resultado REAL
             logger.info("Executando descoberta de startups para newsletter...")
 
             # Primeiro enfileira a descoberta (mantém assíncrono)
-            discovery_result = await self._execute_startup_discovery_task(job_id)
+            discovery_result = await self._execute_startup_discovery_task(job_id, config)
             logger.info(f"Discovery task enfileirada: {discovery_result}")
 
             # 2. Aguarda REALMENTE a tarefa completar checando o banco
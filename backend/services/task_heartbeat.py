@@ -0,0 +1,103 @@
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+import os
+import threading
+import time
+import logging
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database.connection import SessionLocal
+from database.models import AgentTask
+
+logger = logging.getLogger(__name__)
+
+# Intervalo do batimento (heartbeat_at) das tasks na fila ou rodando neste processo
+TASK_HEARTBEAT_SECONDS = float(os.getenv("TASK_HEARTBEAT_SECONDS", "30"))
+
+# Task "pending"/"running" sem batimento há mais que isso é órfã (o processo dono morreu) e pode ser retomada
+TASK_STALE_SECONDS = float(os.getenv("TASK_STALE_SECONDS", "120"))
+
+
+class TaskHeartbeat:
+    """Atualiza heartbeat_at das tasks que este processo tem na fila ou em execução
+
+    Outra réplica (ou outra execução do mesmo job) só assume uma task "pending"/"running" depois
+    que o batimento dela parou há mais de TASK_STALE_SECONDS.
+    """
+
+    def __init__(self, interval: float = TASK_HEARTBEAT_SECONDS):
+        self.interval = interval
+        self._owned: Counter = Counter()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, agent_task_id: int):
+        with self._lock:
+            self._owned[agent_task_id] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="task-heartbeat", daemon=True)
+                self._thread.start()
+
+    def discard(self, agent_task_id: int):
+        with self._lock:
+            self._owned[agent_task_id] -= 1
+            if self._owned[agent_task_id] <= 0:
+                del self._owned[agent_task_id]
+
+    @contextmanager
+    def keep(self, agent_task_id: Optional[int]):
+        """Batimento da task enquanto o bloco roda"""
+        if agent_task_id is None:
+            yield
+            return
+        self.add(agent_task_id)
+        try:
+            yield
+        finally:
+            self.discard(agent_task_id)
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                task_ids = list(self._owned)
+            if task_ids:
+                try:
+                    touch(task_ids)
+                except Exception as e:
+                    logger.warning("Falha ao registrar batimento de %d tasks: %s", len(task_ids), e)
+
+
+def touch(task_ids: Iterable[int]):
+    db = SessionLocal()
+    try:
+        db.query(AgentTask).filter(AgentTask.id.in_(list(task_ids))).update(
+            {AgentTask.heartbeat_at: datetime.now()}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def claim_task(db: Session, agent_task_id: int, statuses: Iterable[str] = ("pending", "running", "interrupted")) -> bool:
+    """Assume atomicamente uma task para retomá-la: "interrupted" sempre, "pending"/"running" só se órfã
+
+    UPDATE condicional: entre duas réplicas (ou execuções) disputando a mesma task só uma recebe True.
+    """
+    now = datetime.now()
+    stale = (
+        (AgentTask.status == "interrupted")
+        | (func.coalesce(AgentTask.heartbeat_at, AgentTask.started_at, AgentTask.created_at) < now - timedelta(seconds=TASK_STALE_SECONDS))
+    )
+    claimed = db.query(AgentTask).filter(
+        AgentTask.id == agent_task_id,
+        AgentTask.status.in_(list(statuses)),
+        stale
+    ).update({AgentTask.status: "running", AgentTask.heartbeat_at: now}, synchronize_session=False)
+    db.commit()
+    return claimed == 1
+
+
+task_heartbeat = TaskHeartbeat()
@@ -1,13 +1,37 @@
 import asyncio
 import threading
-from typing import Dict, Callable, Any
+from typing import Dict, Callable, Any, List
 from queue import Queue
+import os
 import time
-from datetime import datetime
+import logging
+from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from database.connection import get_db
+from database.connection import get_db, SessionLocal
 from services.agent_service import AgentService
-from agents.orchestrator import StartupOrchestrator
+from services.result_store import ResultStore, build_result_summary
+from services.cassette_store import CassetteStore
+from services.trace_store import TraceStore
+from agents.orchestrator import get_orchestrator
+from agents.cassette import Cassette, RECORD_CASSETTES, result_digest, use_cassette
+from agents import tracing
+from agents.token_ledger import token_ledger
+from services.token_budget import budget_status
+from services.rescoring_service import RESCORING_ENGINE
+from services.task_heartbeat import task_heartbeat, claim_task
+from instrumentation import TASK_QUEUE_WAIT, TASK_DURATION, TASK_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Tipos de agent_task que rodam o pipeline de orquestração (API, worker e scheduler)
+ORCHESTRATION_TASK_TYPES = ("orchestration", "orchestration_worker", "startup_discovery")
+
+# Retomada automática na subida do worker: só tasks criadas dentro dessa janela
+AUTO_RESUME_ENABLED = os.getenv("ORCHESTRATION_AUTO_RESUME", "true").lower() == "true"
+AUTO_RESUME_MAX_AGE_HOURS = float(os.getenv("ORCHESTRATION_AUTO_RESUME_MAX_AGE_HOURS", "24"))
+
+# Intervalo entre reavaliações do orçamento de tokens enquanto houver tasks adiadas
+BUDGET_RECHECK_SECONDS = float(os.getenv("TOKEN_BUDGET_RECHECK_SECONDS", "60"))
 
 class TaskManager:
     _instance = None
@@ -23,6 +47,10 @@ class TaskManager:
     def __init__(self):
         if not hasattr(self, 'initialized'):
             self.task_queue = Queue()
+            self.deferred: List[Dict[str, Any]] = []  # adiadas por orçamento de tokens esgotado
+            self._budget_checked_at = 0.0
+            self._job_runs: Dict[int, int] = {}  # tasks de cada job agendado na fila, adiadas ou rodando
+            self._job_runs_lock = threading.Lock()
             self.worker_running = False
             self.worker_thread = None
             self.initialized = True
@@ -33,66 +61,186 @@ class TaskManager:
             self.worker_running = True
             self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
             self.worker_thread.start()
-            print("Task worker iniciado")
+            logger.info("Task worker iniciado")
 
     def stop_worker(self):
         """Para o worker"""
         self.worker_running = False
         if self.worker_thread:
             self.worker_thread.join()
-            print("Task worker parado")
+            logger.info("Task worker parado")
 
     def enqueue_task(self, task_id: int, task_func: Callable, *args, **kwargs):
         """Adiciona uma task na fila"""
+        self._put(task_id, task_func, args, kwargs)
+
+    def _put(self, task_id: int, task_func: Callable, args: tuple, kwargs: Dict[str, Any], **extra):
+        # Task na fila deste processo: o batimento impede que outra réplica a assuma
+        if task_id:
+            task_heartbeat.add(task_id)
         self.task_queue.put({
             'task_id': task_id,
             'function': task_func,
             'args': args,
             'kwargs': kwargs,
-            'created_at': datetime.now()
+            'created_at': datetime.now(),
+            'enqueued_at': time.monotonic(),
+            **extra
         })
-        print(f"Task {task_id} adicionada à fila (tamanho: {self.task_queue.qsize()})")
+        logger.info("Task %s adicionada à fila (tamanho: %d)", task_id, self.task_queue.qsize())
+
+    def enqueue_job_task(self, job_id: int, task_func: Callable, *args, **kwargs):
+        """Enfileira a task de um job agendado, contada em active_job_runs até terminar"""
+        with self._job_runs_lock:
+            self._job_runs[job_id] = self._job_runs.get(job_id, 0) + 1
+        self._put(0, task_func, args, kwargs, scheduled_job_id=job_id)
+
+    def active_job_runs(self, job_id: int) -> int:
+        """Execuções do job ainda na fila, adiadas pelo orçamento ou rodando"""
+        with self._job_runs_lock:
+            return self._job_runs.get(job_id, 0)
+
+    def _job_run_finished(self, task: Dict[str, Any]):
+        job_id = task.get('scheduled_job_id')
+        if job_id is None:
+            return
+        with self._job_runs_lock:
+            remaining = self._job_runs.get(job_id, 0) - 1
+            if remaining > 0:
+                self._job_runs[job_id] = remaining
+            else:
+                self._job_runs.pop(job_id, None)
 
     def _worker_loop(self):
         """Loop principal do worker"""
-        print("Worker loop iniciado")
+        logger.debug("Worker loop iniciado")
 
         while self.worker_running:
             try:
+                self._release_deferred()
+
                 # Pega task da fila (bloqueia por 1 segundo)
                 task = self.task_queue.get(timeout=1.0)
 
-                print(f"Processando task {task['task_id']}")
+                # Orçamento diário global esgotado: a task espera (fora da fila) até o orçamento liberar
+                if _spends_tokens(task) and budget_status()["action"] == "defer":
+                    self.deferred.append(task)
+                    self._budget_checked_at = time.monotonic()
+                    logger.warning("Task %s adiada: orçamento diário de tokens esgotado (%d adiadas)",
+                                   task['task_id'], len(self.deferred))
+                    self._log_deferral(task, "deferred", "Task adiada: orçamento diário de tokens esgotado; "
+                                                         "volta à fila quando o orçamento liberar")
+                    self.task_queue.task_done()
+                    continue
+
+                logger.info("Processando task %s", task['task_id'])
+                task_type = _task_type(task['function'])
+                started = time.monotonic()
+                TASK_QUEUE_WAIT.labels(task_type).observe(started - task['enqueued_at'])
 
                 # Executa a task
+                outcome = "success"
                 try:
                     task['function'](*task['args'], **task['kwargs'])
-                    print(f"Task {task['task_id']} concluída")
+                    logger.info("Task %s concluída", task['task_id'])
                 except Exception as e:
-                    print(f"Erro na task {task['task_id']}: {e}")
+                    outcome = "error"
+                    logger.exception("Erro na task %s: %s", task['task_id'], e)
                 finally:
+                    TASK_DURATION.labels(task_type, outcome).observe(time.monotonic() - started)
+                    self._job_run_finished(task)
+                    if task['task_id']:
+                        task_heartbeat.discard(task['task_id'])
                     self.task_queue.task_done()
 
             except:
                 # Timeout - continua o loop
                 continue
 
-        print("Worker loop finalizado")
+        logger.debug("Worker loop finalizado")
+
+    def _release_deferred(self):
+        """Devolve à fila as tasks adiadas quando o orçamento libera (novo dia UTC ou limite maior)"""
+        if not self.deferred or time.monotonic() - self._budget_checked_at < BUDGET_RECHECK_SECONDS:
+            return
+        self._budget_checked_at = time.monotonic()
+        if budget_status()["action"] == "defer":
+            return
+        deferred, self.deferred = self.deferred, []
+        for task in deferred:
+            self.task_queue.put(task)
+        logger.info("Orçamento de tokens liberado: %d tasks adiadas voltaram à fila", len(deferred))
+
+    def drop_deferred(self):
+        """Desligamento: as tasks adiadas só existem em memória; registra em task_logs as que se perdem"""
+        deferred, self.deferred = self.deferred, []
+        for task in deferred:
+            if task['task_id']:
+                # Continua "pending" no banco: sem batimento, o líder a retoma como órfã
+                message = "Task adiada descartada no desligamento; o líder do scheduler a retoma como órfã"
+            else:
+                message = "Execução adiada descartada no desligamento; o job roda de novo no próximo disparo"
+            logger.warning("Task %s (job %s) descartada: %s", task['task_id'], task.get('scheduled_job_id'), message)
+            self._log_deferral(task, "dropped", message)
+
+    def _log_deferral(self, task: Dict[str, Any], status: str, message: str):
+        """Registra em task_logs uma task adiada pelo orçamento de tokens (a fila não é persistida)"""
+        from database.models import TaskLog
+        db = SessionLocal()
+        try:
+            now = datetime.now()
+            db.add(TaskLog(
+                task_name=f"Task #{task['task_id']}" if task['task_id'] else f"Job #{task.get('scheduled_job_id')}",
+                task_type=_task_type(task['function']),
+                status=status,
+                message=message,
+                scheduled_job_id=task.get('scheduled_job_id'),
+                agent_task_id=task['task_id'] or None,
+                started_at=now,
+                completed_at=now
+            ))
+            db.commit()
+        except Exception as e:
+            logger.error("Erro ao registrar task adiada %s: %s", task['task_id'], e)
+        finally:
+            db.close()
 
     def get_queue_size(self) -> int:
         """Retorna o tamanho atual da fila"""
         return self.task_queue.qsize()
 
+    def get_deferred_count(self) -> int:
+        """Tasks aguardando o orçamento de tokens liberar"""
+        return len(self.deferred)
+
     def is_worker_running(self) -> bool:
         """Verifica se o worker está rodando"""
         return self.worker_running
 
+def _task_type(function: Callable) -> str:
+    """Rótulo das métricas: process_orchestration_task -> orchestration"""
+    name = getattr(function, "__name__", "unknown")
+    if name.startswith("process_"):
+        name = name[len("process_"):]
+    return name[:-len("_task")] if name.endswith("_task") else name
+
+def _spends_tokens(task: Dict[str, Any]) -> bool:
+    """Re-scoring com engine local não chama o LLM; as demais tasks da fila chamam"""
+    if _task_type(task['function']) == "rescoring":
+        config = (task['args'][1] if len(task['args']) > 1 else task['kwargs'].get('config')) or {}
+        return (config.get("engine") or RESCORING_ENGINE).lower() != "local"
+    return True
+
 # Singleton instance
 task_manager = TaskManager()
+TASK_QUEUE_SIZE.set_function(task_manager.get_queue_size)
 
 # Função para executar orquestração completa
-def process_orchestration_task(task_id: int, country: str, sector: str, limit: int = 5, from_worker: bool = False, job_id: int = None, search_strategy: str = "specific"):
-    """Processa uma task de orquestração completa (Discovery → Validation → Metrics)"""
+def process_orchestration_task(task_id: int, country: str, sector: str, limit: int = 5, from_worker: bool = False, job_id: int = None, search_strategy: str = "specific", time_budget: float = None, resume: bool = False):
+    """Processa uma task de orquestração completa (Discovery → Validation → Metrics)
+
+    Com resume=True a agent_task `task_id` já existe e o pipeline continua do último checkpoint.
+    """
 
     # Get database session
     db = next(get_db())
@@ -100,7 +248,7 @@ def process_orchestration_task(task_id: int, country: str, sector: str, limit: i
 
     # Se for do worker/scheduler, criar uma agent_task primeiro
     agent_task_id = None
-    if from_worker:
+    if from_worker and not resume:
         from database.models import AgentTask
         agent_task = AgentTask(
             task_type="startup_discovery",
@@ -137,7 +285,7 @@ def process_orchestration_task(task_id: int, country: str, sector: str, limit: i
             valid_job_id = job_id
             job_name = existing_job.name
         else:
-            print(f"WARNING: job_id {job_id} não existe na tabela scheduled_jobs. Usando None.")
+            logger.warning("job_id %s não existe na tabela scheduled_jobs. Usando None.", job_id)
 
     # Usar nome do job ou descrição genérica
     task_name = job_name if job_name else f"Descoberta Manual - {country}"
@@ -147,7 +295,7 @@ def process_orchestration_task(task_id: int, country: str, sector: str, limit: i
         task_name=task_name,
         task_type=task_type,
         status="started",
-        message=f"Iniciando descoberta de startups para {country}" + (f" - Setor: {sector}" if sector else ""),
+        message=("Retomando" if resume else "Iniciando") + f" descoberta de startups para {country}" + (f" - Setor: {sector}" if sector else ""),
         scheduled_job_id=valid_job_id,
         agent_task_id=agent_task_id,
         started_at=start_time
@@ -160,38 +308,62 @@ def process_orchestration_task(task_id: int, country: str, sector: str, limit: i
     task_log.message = f"Task #{agent_task_id}: {task_log.message}"
     db.commit()
 
+    # Spans da execução ficam em memória e vão para task_spans de uma vez no fim
+    trace = tracing.Trace(agent_task_id) if tracing.TRACING_ENABLED and agent_task_id is not None else None
+
     try:
         # Update task to running
         service.update_task(task_id, "running")
-        print(f"Iniciando orquestração para {country} - {sector or 'todos setores'} - Limit: {limit}")
+        logger.info("Iniciando orquestração para %s - %s - Limit: %s", country, sector or 'todos setores', limit)
 
         # Buscar startups existentes APENAS para exclusão (evitar redescobrir as mesmas)
         existing_valid = service.get_valid_startups_for_context(country, sector)
         existing_invalid = service.get_invalid_startups_for_context(country, sector)
-        print(f"Exclusão: {len(existing_valid)} startups válidas já existem no setor {sector}")
+        logger.info("Exclusão: %d válidas e %d inválidas já conhecidas no setor %s", len(existing_valid), len(existing_invalid), sector)
 
-        # Create orchestrator and run full pipeline
-        # Nota: Sempre criar nova instância para evitar problemas de estado compartilhado
+        # Orquestrador compartilhado (grafo compilado uma vez); o estado da execução fica em OrchestrationState
         try:
-            orchestrator = StartupOrchestrator()
-            print(f"Orchestrator criado com sucesso para task {agent_task_id}")
+            orchestrator = get_orchestrator()
         except Exception as e:
-            print(f"ERRO ao criar orchestrator: {e}")
+            logger.error("Erro ao criar orchestrator: %s", e)
             raise e
-        result = orchestrator.run_orchestration(
-            country=country,
-            sector=sector,
-            limit=limit,
-            existing_valid=existing_valid,
-            existing_invalid=existing_invalid,
-            search_strategy=search_strategy
-        )
+        run_params = {
+            "country": country,
+            "sector": sector,
+            "limit": limit,
+            "existing_valid": existing_valid,
+            "existing_invalid": existing_invalid,
+            "search_strategy": search_strategy,
+            "time_budget": time_budget
+        }
+
+        # Gravação opcional das chamadas HTTP (retomadas não são gravadas: o cassette ficaria incompleto)
+        recording = Cassette(agent_task_id=agent_task_id, run=run_params) if RECORD_CASSETTES and not resume else None
+        with use_cassette(recording) as recording, tracing.use_trace(trace), task_heartbeat.keep(agent_task_id), \
+                token_ledger.attribute(agent_task_id=agent_task_id, scheduled_job_id=valid_job_id):
+            with tracing.span("orchestration", kind="task", country=country, sector=sector, limit=limit,
+                              search_strategy=search_strategy, resume=resume) as span:
+                result = orchestrator.run_orchestration(**run_params, task_id=agent_task_id, resume=resume)
+                span.set(status=result.get("status"), tokens_used=result.get("tokens_used", 0),
+                         resumed_from=result.get("resumed_from"))
+        if recording is not None:
+            recording.result = result_digest(result)
+            try:
+                CassetteStore(db).put(recording)
+            except Exception as e:
+                db.rollback()
+                logger.error("Erro ao gravar cassette da task %s: %s", agent_task_id, e)
+
+        # Resultado completo vai para o store comprimido; output_data guarda só o resumo
+        span = tracing.start_span("result_store.put", kind="db", trace=trace)
+        stored_digest = ResultStore(db).put(result)
+        span.end()
+        result_summary = build_result_summary(result, stored_digest)
 
         # Save results (apenas para tasks manuais, não do scheduler)
         if not from_worker:
-            service.update_task(task_id, "completed", result)
-        print(f"Orquestração concluída: {result.get('status')}")
-        print(f"DEBUG - Result status type: {type(result.get('status'))}, value: '{result.get('status')}'")
+            service.update_task(task_id, "completed", result_summary, result_digest=stored_digest)
+        logger.info("Orquestração concluída: %s", result.get('status'))
 
         if result.get("status") == "success":
             # Salvar startups válidas
@@ -199,29 +371,28 @@ def process_orchestration_task(task_id: int, country: str, sector: str, limit: i
             invalid_count = 0
             metrics_count = 0
 
-            print(f"=== PROCESSANDO {len(result.get('results', {}).get('startup_metrics', []))} STARTUPS VALIDADAS ===")
+            logger.info("Salvando %d startups validadas", len(result.get('results', {}).get('startup_metrics', [])))
+            span = tracing.start_span("persist_results", kind="db", trace=trace)
             for i, startup_metrics in enumerate(result.get("results", {}).get("startup_metrics", []), 1):
                 startup_data = startup_metrics["startup"]
                 metrics_data = startup_metrics["metrics"]
                 startup_name = startup_data.get('name', 'N/A')
 
-                print(f"Processando startup {i}: {startup_name}")
+                logger.debug("Processando startup %d: %s", i, startup_name)
 
                 try:
                     # Salvar startup
                     saved_startup = service.save_startup_from_discovery(startup_data)
                     valid_count += 1
-                    print(f"Startup {startup_name} salva com sucesso (valid_count: {valid_count})")
+                    logger.debug("Startup %s salva (valid_count: %d)", startup_name, valid_count)
 
                     # Salvar métricas
-                    service.save_startup_metrics(saved_startup.id, metrics_data)
+                    service.save_startup_metrics(saved_startup.id, metrics_data, startup=saved_startup)
                     metrics_count += 1
-                    print(f"Métricas salvas para {startup_name} (metrics_count: {metrics_count})")
+                    logger.debug("Métricas salvas para %s (metrics_count: %d)", startup_name, metrics_count)
 
                 except Exception as e:
-                    print(f"ERRO ao salvar startup {startup_name}: {e}")
-                    import traceback
-                    print(f"Traceback: {traceback.format_exc()}")
+                    logger.exception("Erro ao salvar startup %s: %s", startup_name, e)
 
             # Salvar startups inválidas com insights detalhados
             for invalid_startup in result.get("results", {}).get("invalid_startups", []):
@@ -229,7 +400,8 @@ def process_orchestration_task(task_id: int, country: str, sector: str, limit: i
                     service.save_invalid_startup(invalid_startup)
                     invalid_count += 1
                 except Exception as e:
-                    print(f"Erro ao salvar startup inválida {invalid_startup.get('name')}: {e}")
+                    logger.error("Erro ao salvar startup inválida %s: %s", invalid_startup.get('name'), e)
+            span.end(valid=valid_count, invalid=invalid_count, metrics=metrics_count)
 
             # Atualizar log de sucesso
             end_time = datetime.now()
@@ -247,10 +419,12 @@ def process_orchestration_task(task_id: int, country: str, sector: str, limit: i
                 if agent_task:
                     agent_task.status = "completed"
                     agent_task.output_data = {
+                        **result_summary,
                         "valid_startups": valid_count,
                         "invalid_startups": invalid_count,
                         "execution_time": execution_time
                     }
+                    agent_task.result_digest = stored_digest
                     agent_task.completed_at = end_time
 
             # Commit das alterações
@@ -269,11 +443,8 @@ def process_orchestration_task(task_id: int, country: str, sector: str, limit: i
             db.add(notification)
             db.commit()
 
-            print(f"=== RESULTADO FINAL ===")
-            print(f"{valid_count} startups válidas salvas")
-            print(f"{metrics_count} métricas calculadas")
-            print(f"{invalid_count} startups inválidas")
-            print(f"=== FIM DO PROCESSAMENTO ===")
+            logger.info("Resultado final: %d startups válidas salvas, %d métricas, %d inválidas",
+                        valid_count, metrics_count, invalid_count)
 
         else:
             # Atualizar log de erro
@@ -292,6 +463,8 @@ def process_orchestration_task(task_id: int, country: str, sector: str, limit: i
                 if agent_task:
                     agent_task.status = "failed"
                     agent_task.error_message = result.get('error', 'Erro desconhecido')
+                    agent_task.output_data = result_summary
+                    agent_task.result_digest = stored_digest
                     agent_task.completed_at = end_time
 
             # Commit das alterações
@@ -312,7 +485,7 @@ def process_orchestration_task(task_id: int, country: str, sector: str, limit: i
 
     except Exception as e:
         error_msg = f"Erro na orquestração: {str(e)}"
-        print(f"Erro na task {agent_task_id}: {error_msg}")
+        logger.error("Erro na task %s: %s", agent_task_id, error_msg)
 
         # Atualizar logs
         end_time = datetime.now()
@@ -349,7 +522,7 @@ def process_orchestration_task(task_id: int, country: str, sector: str, limit: i
 
         # Notificação será enviada quando o job scheduler detectar a conclusão
         # O task manager roda em thread separada e não tem acesso ao loop principal
-        print(f"✅ Notificação criada: {notification.title}")
+        logger.info("Notificação criada: %s", notification.title)
 
         # Atualizar log de erro
         end_time = datetime.now()
@@ -363,6 +536,17 @@ def process_orchestration_task(task_id: int, country: str, sector: str, limit: i
         # Notificação já foi criada acima, não duplicar
 
     finally:
+        token_ledger.flush()
+
+        # Spans gravados também quando a execução falha (é quando o waterfall mais ajuda)
+        if trace is not None:
+            try:
+                TraceStore(db).put(trace)
+            except Exception as e:
+                db.rollback()
+                logger.error("Erro ao gravar spans da task %s: %s", agent_task_id, e)
+            tracing.export_otlp(trace)
+
         # Salvar todas as alterações e enviar notificação via WebSocket
         try:
             db.commit()
@@ -370,10 +554,257 @@ def process_orchestration_task(task_id: int, country: str, sector: str, limit: i
             # WebSocket será enviado pelo scheduler quando o job completar
 
         except Exception as e:
-            print(f"Erro ao salvar logs/notificações: {e}")
+            logger.error("Erro ao salvar logs/notificações: %s", e)
         finally:
             db.close()
 
+def resume_orchestration_task(task_id: int):
+    """Retoma uma orquestração a partir do último checkpoint, com os parâmetros originais da task"""
+    from database.models import AgentTask
+
+    db = next(get_db())
+    try:
+        task = db.query(AgentTask).filter(AgentTask.id == task_id).first()
+        if not task:
+            logger.warning("Task %s não encontrada para retomada", task_id)
+            return
+        params = task.input_data or {}
+        from_worker = task.task_type == "startup_discovery" or bool(params.get("from_worker"))
+    finally:
+        db.close()
+
+    process_orchestration_task(
+        task_id,
+        params.get("country", ""),
+        params.get("sector", ""),
+        params.get("limit", 5),
+        from_worker,
+        params.get("job_id"),
+        params.get("search_strategy", "specific"),
+        params.get("time_budget_seconds"),
+        resume=True
+    )
+
+
+def resume_interrupted_tasks() -> List[int]:
+    """Enfileira a retomada das orquestrações órfãs ("pending"/"running" sem batimento do processo dono)
+
+    Roda periodicamente no líder do scheduler; cada task é assumida com UPDATE condicional, então
+    uma orquestração ainda viva em outra réplica nunca é executada duas vezes.
+    """
+    from database.models import AgentTask
+    from agents.checkpointer import CHECKPOINTS_ENABLED
+
+    if not CHECKPOINTS_ENABLED or not AUTO_RESUME_ENABLED:
+        return []
+
+    db = next(get_db())
+    try:
+        cutoff = datetime.now() - timedelta(hours=AUTO_RESUME_MAX_AGE_HOURS)
+        tasks = db.query(AgentTask.id).filter(
+            AgentTask.task_type.in_(ORCHESTRATION_TASK_TYPES),
+            AgentTask.status.in_(("pending", "running")),
+            AgentTask.created_at >= cutoff
+        ).order_by(AgentTask.id).all()
+        task_ids = [task.id for task in tasks if claim_task(db, task.id, ("pending", "running"))]
+    finally:
+        db.close()
+
+    for task_id in task_ids:
+        task_manager.enqueue_task(task_id, resume_orchestration_task, task_id)
+    if task_ids:
+        logger.info("Retomando %d orquestrações interrompidas: %s", len(task_ids), task_ids)
+    return task_ids
+
+
+def process_rescoring_task(job_id: int = None, config: Dict[str, Any] = None):
+    """Re-pontua em lote as startups salvas cujos dados ou versão de análise mudaram"""
+    from database.models import AgentTask, TaskLog, Notification, ScheduledJob
+    from services.rescoring_service import RescoringService
+
+    config = config or {}
+    db = next(get_db())
+    start_time = datetime.now()
+
+    job = db.query(ScheduledJob).filter(ScheduledJob.id == job_id).first() if job_id else None
+    valid_job_id = job.id if job else None
+    task_name = job.name if job else "Re-scoring de Startups"
+
+    agent_task = AgentTask(
+        task_type="startup_rescoring",
+        status="running",
+        input_data={**config, "from_scheduler": bool(job_id), "job_id": job_id}
+    )
+    db.add(agent_task)
+    db.commit()
+    db.refresh(agent_task)
+
+    task_log = TaskLog(
+        task_name=task_name,
+        task_type="startup_rescoring",
+        status="started",
+        message=f"Task #{agent_task.id}: Iniciando re-scoring de startups",
+        scheduled_job_id=valid_job_id,
+        agent_task_id=agent_task.id,
+        started_at=start_time
+    )
+    db.add(task_log)
+    db.commit()
+
+    try:
+        with token_ledger.attribute(agent_task_id=agent_task.id, scheduled_job_id=valid_job_id, node="rescoring"):
+            stats = RescoringService(
+                db,
+                engine=config.get("engine"),
+                batch_size=config.get("batch_size"),
+                concurrency=config.get("concurrency"),
+                force=bool(config.get("force", False))
+            ).run(time_budget=config.get("time_budget"))
+
+        end_time = datetime.now()
+        execution_time = (end_time - start_time).total_seconds()
+        summary = (f"{stats['rescored']} startups re-pontuadas, {stats['skipped']} sem alteração"
+                   + (f", {stats['failed']} falhas" if stats["failed"] else ""))
+
+        agent_task.status = "completed"
+        agent_task.output_data = {**stats, "execution_time": execution_time}
+        agent_task.completed_at = end_time
+        task_log.status = "completed"
+        task_log.message = f"Task #{agent_task.id}: Re-scoring concluído: {summary}"
+        task_log.completed_at = end_time
+        task_log.execution_time = execution_time
+
+        db.add(Notification(
+            title=f"{task_name} - Concluída",
+            message=summary,
+            type="success",
+            task_id=agent_task.id,
+            job_id=valid_job_id
+        ))
+        db.commit()
+        logger.info("Re-scoring concluído em %.2fs: %s", execution_time, stats)
+
+    except Exception as e:
+        logger.exception("Erro no re-scoring: %s", e)
+        db.rollback()
+        end_time = datetime.now()
+
+        agent_task.status = "failed"
+        agent_task.error_message = str(e)
+        agent_task.completed_at = end_time
+        task_log.status = "failed"
+        task_log.message = f"Task #{agent_task.id}: Erro no re-scoring: {str(e)}"
+        task_log.completed_at = end_time
+        task_log.execution_time = (end_time - start_time).total_seconds()
+
+        db.add(Notification(
+            title=f"{task_name} - Erro",
+            message=f"Erro no re-scoring: {str(e)}",
+            type="error",
+            task_id=agent_task.id,
+            job_id=valid_job_id
+        ))
+        db.commit()
+
+    finally:
+        token_ledger.flush()
+        db.close()
+
+def process_revalidation_task(job_id: int = None, config: Dict[str, Any] = None):
+    """Re-valida as startups salvas (retoma uma execução interrompida quando houver)"""
+    from database.models import TaskLog, Notification, ScheduledJob
+    from services.revalidation_service import RevalidationService
+
+    config = config or {}
+    db = next(get_db())
+    start_time = datetime.now()
+
+    job = db.query(ScheduledJob).filter(ScheduledJob.id == job_id).first() if job_id else None
+    valid_job_id = job.id if job else None
+    task_name = job.name if job else "Re-validação de Startups"
+
+    service = RevalidationService(
+        db,
+        ttl_hours=config.get("ttl_hours"),
+        batch_size=config.get("batch_size"),
+        workers=config.get("workers")
+    )
+    agent_task, resumed = service.open_run(
+        input_data={**config, "from_scheduler": bool(job_id), "job_id": job_id},
+        resume=config.get("resume", True)
+    )
+
+    task_log = TaskLog(
+        task_name=task_name,
+        task_type="startup_revalidation",
+        status="started",
+        message=f"Task #{agent_task.id}: " + ("Retomando" if resumed else "Iniciando") + " re-validação de startups",
+        scheduled_job_id=valid_job_id,
+        agent_task_id=agent_task.id,
+        started_at=start_time
+    )
+    db.add(task_log)
+    db.commit()
+
+    def report(progress: Dict[str, Any]):
+        task_log.message = (f"Task #{agent_task.id}: Re-validação em andamento: "
+                            f"{progress['processed']}/{progress['total']} startups, {progress['flagged']} marcadas")
+        db.commit()
+
+    service.on_progress = report
+
+    try:
+        with token_ledger.attribute(agent_task_id=agent_task.id, scheduled_job_id=valid_job_id, node="revalidation"):
+            progress = service.run(agent_task)
+
+        end_time = datetime.now()
+        execution_time = (end_time - start_time).total_seconds()
+        summary = (f"{progress['processed'] - progress['skipped']} startups re-validadas, "
+                   f"{progress['skipped']} dentro do TTL, {progress['flagged']} marcadas para revisão")
+
+        agent_task.status = "completed"
+        agent_task.completed_at = end_time
+        task_log.status = "completed"
+        task_log.message = f"Task #{agent_task.id}: Re-validação concluída: {summary}"
+        task_log.completed_at = end_time
+        task_log.execution_time = execution_time
+
+        db.add(Notification(
+            title=f"{task_name} - Concluída",
+            message=summary,
+            type="success",
+            task_id=agent_task.id,
+            job_id=valid_job_id
+        ))
+        db.commit()
+        logger.info("Re-validação #%d concluída em %.2fs: %s", agent_task.id, execution_time, progress)
+
+    except Exception as e:
+        logger.exception("Erro na re-validação #%d: %s", agent_task.id, e)
+        db.rollback()
+        end_time = datetime.now()
+
+        # "interrupted" permite que a próxima execução continue do último lote gravado
+        agent_task.status = "interrupted"
+        agent_task.error_message = str(e)
+        task_log.status = "failed"
+        task_log.message = f"Task #{agent_task.id}: Re-validação interrompida: {str(e)}"
+        task_log.completed_at = end_time
+        task_log.execution_time = (end_time - start_time).total_seconds()
+
+        db.add(Notification(
+            title=f"{task_name} - Erro",
+            message=f"Re-validação interrompida (será retomada na próxima execução): {str(e)}",
+            type="error",
+            task_id=agent_task.id,
+            job_id=valid_job_id
+        ))
+        db.commit()
+
+    finally:
+        token_ledger.flush()
+        db.close()
+
 # Auto-start worker when module is imported
 if not task_manager.is_worker_running():
     task_manager.start_worker()
\ No newline at end of file
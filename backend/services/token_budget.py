@@ -0,0 +1,104 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import math
+import os
+import logging
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database.models import ScheduledJob, TokenLedgerEntry
+from agents.token_ledger import token_ledger
+
+logger = logging.getLogger(__name__)
+
+# Orçamento diário global (dia UTC) em tokens e/ou dólares; 0 = sem limite
+TOKEN_BUDGET_DAILY_TOKENS = int(os.getenv("TOKEN_BUDGET_DAILY_TOKENS", "0"))
+TOKEN_BUDGET_DAILY_USD = float(os.getenv("TOKEN_BUDGET_DAILY_USD", "0"))
+
+# A partir dessa fração do orçamento os jobs rodam reduzidos; ao atingir 100% são adiados
+TOKEN_BUDGET_DOWNGRADE_AT = float(os.getenv("TOKEN_BUDGET_DOWNGRADE_AT", "0.8"))
+
+# Fração do limite de startups mantida quando um job de discovery roda reduzido
+TOKEN_BUDGET_DOWNGRADE_LIMIT_FACTOR = float(os.getenv("TOKEN_BUDGET_DOWNGRADE_LIMIT_FACTOR", "0.5"))
+
+
+def _used_fraction(spent: Dict[str, Any], limit_tokens: float, limit_usd: float) -> float:
+    fractions = []
+    if limit_tokens:
+        fractions.append(spent["tokens"] / limit_tokens)
+    if limit_usd:
+        fractions.append(spent["cost_usd"] / limit_usd)
+    return max(fractions)
+
+
+def budget_status(job: Optional[ScheduledJob] = None) -> Dict[str, Any]:
+    """Gasto do dia contra o orçamento global (e o do job, se houver) e a ação resultante
+
+    action: "run", "downgrade" (>= TOKEN_BUDGET_DOWNGRADE_AT) ou "defer" (orçamento esgotado).
+    O orçamento do job vem de task_config: daily_token_budget e/ou daily_cost_budget_usd.
+    """
+    checks = [("global", None, TOKEN_BUDGET_DAILY_TOKENS, TOKEN_BUDGET_DAILY_USD)]
+    if job is not None:
+        config = job.task_config or {}
+        checks.append(("job", job.id, config.get("daily_token_budget") or 0, config.get("daily_cost_budget_usd") or 0))
+
+    budgets = []
+    for scope, job_id, limit_tokens, limit_usd in checks:
+        if not limit_tokens and not limit_usd:
+            continue
+        spent = token_ledger.spent(scheduled_job_id=job_id)
+        budgets.append({
+            "scope": scope,
+            "scheduled_job_id": job_id,
+            "spent_tokens": spent["tokens"],
+            "spent_cost_usd": spent["cost_usd"],
+            "limit_tokens": limit_tokens or None,
+            "limit_usd": limit_usd or None,
+            "used_fraction": round(_used_fraction(spent, limit_tokens, limit_usd), 4)
+        })
+
+    worst = max(budgets, key=lambda budget: budget["used_fraction"], default=None)
+    used = worst["used_fraction"] if worst else 0.0
+    if used >= 1:
+        action = "defer"
+    elif used >= TOKEN_BUDGET_DOWNGRADE_AT:
+        action = "downgrade"
+    else:
+        action = "run"
+    return {"action": action, "scope": worst["scope"] if worst else None, "used_fraction": used, "budgets": budgets}
+
+
+def downgrade_config(task_type: str, config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """task_config mais barata para o tipo de job; None quando não há modo reduzido (o job é adiado)"""
+    if task_type in ("startup_discovery", "newsletter"):
+        # A newsletter dispara uma descoberta com a mesma task_config
+        return {**config, "limit": max(1, math.floor(config.get("limit", 10) * TOKEN_BUDGET_DOWNGRADE_LIMIT_FACTOR))}
+    # Re-scoring não tem modo reduzido: trocar para o engine local rebaixaria as métricas do LLM
+    return None
+
+
+def usage_breakdown(db: Session, group_by: List[str], since: datetime = None,
+                    agent_task_id: int = None) -> List[Dict[str, Any]]:
+    """Totais do ledger agrupados pelas colunas pedidas (ex: ["node", "model", "call_type"])"""
+    columns = [getattr(TokenLedgerEntry, name) for name in group_by]
+    query = db.query(
+        *columns,
+        func.count(TokenLedgerEntry.id),
+        func.sum(TokenLedgerEntry.prompt_tokens),
+        func.sum(TokenLedgerEntry.completion_tokens),
+        func.sum(TokenLedgerEntry.total_tokens),
+        func.sum(TokenLedgerEntry.cost_usd)
+    )
+    if since is not None:
+        query = query.filter(TokenLedgerEntry.created_at >= since)
+    if agent_task_id is not None:
+        query = query.filter(TokenLedgerEntry.agent_task_id == agent_task_id)
+
+    rows = query.group_by(*columns).order_by(func.sum(TokenLedgerEntry.total_tokens).desc()).all()
+    return [{
+        **dict(zip(group_by, row[:len(group_by)])),
+        "calls": row[-5],
+        "prompt_tokens": int(row[-4] or 0),
+        "completion_tokens": int(row[-3] or 0),
+        "total_tokens": int(row[-2] or 0),
+        "cost_usd": round(float(row[-1] or 0), 4)
+    } for row in rows]
@@ -0,0 +1,45 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database.models import TaskSpan
+from agents.tracing import Trace
+from typing import Any, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+_SPAN_FIELDS = ("trace_id", "span_id", "parent_span_id", "name", "kind", "status",
+                "start_time", "offset_ms", "duration_ms", "attributes")
+
+
+class TraceStore:
+    """Spans das orquestrações em task_spans (uma gravação em lote por execução)"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def put(self, trace: Trace) -> int:
+        rows = trace.rows()
+        if not rows:
+            return 0
+        self.db.bulk_insert_mappings(TaskSpan, [{**row, "agent_task_id": trace.agent_task_id} for row in rows])
+        self.db.commit()
+        logger.info("Trace da task %s gravado: %d spans%s", trace.agent_task_id, len(rows),
+                    f" ({trace.dropped} descartados pelo teto)" if trace.dropped else "")
+        return len(rows)
+
+    def traces(self, agent_task_id: int) -> List[Dict[str, Any]]:
+        """Execuções registradas da task (a original e as retomadas), da mais antiga para a mais recente"""
+        rows = self.db.query(
+            TaskSpan.trace_id,
+            func.min(TaskSpan.start_time),
+            func.count(TaskSpan.id)
+        ).filter(TaskSpan.agent_task_id == agent_task_id).group_by(TaskSpan.trace_id).order_by(func.min(TaskSpan.start_time)).all()
+        return [{"trace_id": trace_id, "started_at": started_at, "span_count": count}
+                for trace_id, started_at, count in rows]
+
+    def spans(self, agent_task_id: int, trace_id: str) -> List[Dict[str, Any]]:
+        rows = self.db.query(TaskSpan).filter(
+            TaskSpan.agent_task_id == agent_task_id,
+            TaskSpan.trace_id == trace_id
+        ).order_by(TaskSpan.offset_ms).all()
+        return [{field: getattr(row, field) for field in _SPAN_FIELDS} for row in rows]
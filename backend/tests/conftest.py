@@ -0,0 +1,46 @@
+"""
+Fixtures dos testes do backend
+
+    cd backend && python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_openai import FakeOpenAIConfig, start_fake_openai
+
+
+@pytest.fixture(scope="session")
+def fake_openai():
+    server = start_fake_openai(FakeOpenAIConfig(latency="fixed:0", seed=1))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session")
+def offline_env(fake_openai, tmp_path_factory):
+    """Ambiente apontando para a OpenAI fake e um SQLite temporário (sem rede)
+
+    A configuração é lida na importação dos módulos do backend: importe-os dentro do teste,
+    depois deste fixture.
+    """
+    db_path = tmp_path_factory.mktemp("db") / "test.db"
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{db_path}")
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        monkeypatch.setenv("OPENAI_BASE_URL", f"{fake_openai.base_url}/v1")
+        # Probe dos websites fake respondido pelo próprio servidor fake
+        monkeypatch.setenv("HTTP_PROXY", fake_openai.base_url)
+        monkeypatch.setenv("NO_PROXY", "127.0.0.1,localhost")
+        monkeypatch.setenv("ORCHESTRATION_RECORD_CASSETTES", "true")
+        monkeypatch.setenv("ORCHESTRATION_CHECKPOINTS", "false")
+        monkeypatch.setenv("OPENAI_HEDGING_ENABLED", "false")
+
+        from database.connection import Base, engine
+        import database.models  # noqa: F401 (registra as tabelas no Base)
+        Base.metadata.create_all(bind=engine)
+        yield monkeypatch
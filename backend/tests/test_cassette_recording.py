@@ -0,0 +1,26 @@
+"""
+Orquestração completa com ORCHESTRATION_RECORD_CASSETTES=true contra a OpenAI fake (sem rede)
+"""
+
+
+def test_orchestration_with_cassette_recording(offline_env):
+    from database.connection import SessionLocal
+    from database.models import AgentTask
+    from services.cassette_store import CassetteStore
+    from services.task_manager import process_orchestration_task
+
+    process_orchestration_task(0, "Brazil", "FinTech", 3, True, None, "specific")
+
+    db = SessionLocal()
+    try:
+        task = db.query(AgentTask).order_by(AgentTask.id.desc()).first()
+        assert task.status == "completed", task.error_message
+        assert task.result_digest
+
+        cassette = CassetteStore(db).get(task.id)
+        assert cassette is not None
+        assert cassette.interactions
+        assert cassette.result["status"] == "success"
+        assert cassette.run["sector"] == "FinTech"
+    finally:
+        db.close()
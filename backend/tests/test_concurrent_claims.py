@@ -0,0 +1,71 @@
+"""
+Duas réplicas disputando o mesmo disparo de job / a mesma task órfã: só uma assume
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import threading
+
+
+def _race(claim):
+    """Roda `claim(db)` em duas threads (sessões separadas) liberadas juntas"""
+    from database.connection import SessionLocal
+
+    barrier = threading.Barrier(2)
+
+    def contender(_):
+        db = SessionLocal()
+        try:
+            barrier.wait()
+            return claim(db)
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        return list(executor.map(contender, range(2)))
+
+
+def test_claim_fire_only_one_replica_wins(offline_env):
+    from database.connection import SessionLocal
+    from database.models import ScheduledJob
+    from services.scheduler_leader import claim_fire
+
+    db = SessionLocal()
+    try:
+        job = ScheduledJob(name="claim", task_type="startup_discovery", interval_value=1, interval_unit="hours",
+                           task_config={}, next_run=datetime.now() - timedelta(minutes=1))
+        db.add(job)
+        db.commit()
+        job_id = job.id
+    finally:
+        db.close()
+
+    def claim(db):
+        return claim_fire(db, db.get(ScheduledJob, job_id), 3600)
+
+    assert sorted(_race(claim)) == [False, True]
+
+
+def test_claim_task_only_one_replica_wins(offline_env):
+    from database.connection import SessionLocal
+    from database.models import AgentTask
+    from services.task_heartbeat import claim_task, TASK_STALE_SECONDS
+
+    # Órfã: "running" sem batimento há mais que TASK_STALE_SECONDS
+    db = SessionLocal()
+    try:
+        task = AgentTask(task_type="orchestration", status="running", agent_name="test",
+                         started_at=datetime.now() - timedelta(seconds=TASK_STALE_SECONDS * 2))
+        db.add(task)
+        db.commit()
+        task_id = task.id
+    finally:
+        db.close()
+
+    assert sorted(_race(lambda db: claim_task(db, task_id, ("pending", "running")))) == [False, True]
+
+    # Assumida: o batimento novo impede uma terceira réplica de pegá-la
+    db = SessionLocal()
+    try:
+        assert not claim_task(db, task_id, ("pending", "running"))
+    finally:
+        db.close()
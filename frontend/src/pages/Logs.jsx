@@ -232,6 +232,8 @@ function Logs() {
             >
               <option value="">Todos os Tipos</option>
               <option value="startup_discovery">Descoberta de Startups</option>
+              <option value="startup_rescoring">Re-scoring de Startups</option>
+              <option value="startup_revalidation">Re-validação de Startups</option>
               <option value="orchestration">Orquestração</option>
             </select>
           </div>
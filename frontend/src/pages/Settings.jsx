@@ -31,6 +31,8 @@ function Settings() {
   const taskTypes = [
     { value: 'newsletter', label: 'Newsletter (Descoberta + Envio no Email)' },
     { value: 'startup_discovery', label: 'Descoberta de Startups' },
+    { value: 'startup_rescoring', label: 'Re-scoring de Startups (somente alteradas)' },
+    { value: 'startup_revalidation', label: 'Re-validação de Startups' },
   ];
 
   // Removidos os arrays de opções - agora tudo será dinâmico